@@ -0,0 +1,143 @@
+"""标签页和按月归档页
+
+tags/<标签>.html 和 archive/<yyyy>/<mm>.html 由文章目录中的倒排索引（标签 -> 文章、月份 -> 文章）生成。
+发布、编辑或删除一篇文章时，只重新生成它在修改前后涉及的标签页和月份页，以及两个很小的索引页。
+"""
+import os
+from urllib.parse import quote
+
+from blog_engine import format_tags, tag_filename
+from catalog import month_of
+from feeds import write_if_changed
+from templates import SITE_TITLE, TemplateSet
+
+TAGS_DIR = "tags"
+ARCHIVE_DIR = "archive"
+
+
+class ArchiveWriter:
+    """根据文章目录生成标签页和归档页（使用 archive_page.html 和 archive_card.html 模板）
+
+    scripts(root) 返回页面加载脚本的标签，未给出时加载 main.js。
+    """
+
+    def __init__(self, blog_dir, templates=None, scripts=None):
+        self.blog_dir = blog_dir
+        self.templates = templates or TemplateSet(variables={"site_title": SITE_TITLE})
+        self.scripts = scripts or (lambda root: f'<script src="{root}js/main.js"></script>')
+
+    def _page(self, heading, items, root):
+        return self.templates.render(
+            "archive_page.html", page_title=heading, heading=heading, items=items, root=root,
+            back_url=f"{root}posts.html", scripts=self.scripts(root)
+        )
+
+    def _cards(self, catalog, filenames, root):
+        entries = sorted(
+            (catalog.entries[name] for name in filenames if name in catalog.entries),
+            key=lambda e: (e.get("date", ""), e["seq"]),
+            reverse=True
+        )
+        card = self.templates.get("archive_card.html")
+        variables = self.templates.variables
+        return "\n".join(
+            card.render(
+                **variables,
+                root=root,
+                img_name=entry.get("img") or "default.jpg",
+                title=entry["title"],
+                date=entry.get("date", ""),
+                tags=format_tags(entry.get("tags", []), root),
+                summary=entry.get("summary", ""),
+                filename=quote(entry["filename"])
+            )
+            for entry in entries
+        )
+
+    def tag_path(self, tag):
+        return os.path.join(self.blog_dir, TAGS_DIR, tag_filename(tag))
+
+    def month_path(self, month):
+        year, mm = month
+        return os.path.join(self.blog_dir, ARCHIVE_DIR, year, f"{mm}.html")
+
+    def write_tag(self, catalog, tag):
+        """生成一个标签页，标签下已没有文章时删除该页"""
+        path = self.tag_path(tag)
+        members = catalog.tags.get(tag)
+        if not members:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_if_changed(path, self._page(f"标签：{tag}", self._cards(catalog, members, "../"), "../"))
+
+    def write_month(self, catalog, month):
+        """生成一个月份归档页，该月已没有文章时删除该页"""
+        path = self.month_path(month)
+        members = catalog.months.get(month)
+        if not members:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        heading = f"{month[0]} 年 {int(month[1])} 月"
+        write_if_changed(path, self._page(heading, self._cards(catalog, members, "../../"), "../../"))
+
+    def write_indexes(self, catalog):
+        """生成标签索引页和归档索引页（只列出标签、月份和文章数）"""
+        tags = sorted(catalog.tags.items(), key=lambda item: (-len(item[1]), item[0]))
+        items = "\n".join(
+            f"    <a href=\"{quote(tag_filename(tag))}\" class=\"btn\">{tag}（{len(members)}）</a>"
+            for tag, members in tags
+        )
+        os.makedirs(os.path.join(self.blog_dir, TAGS_DIR), exist_ok=True)
+        write_if_changed(os.path.join(self.blog_dir, TAGS_DIR, "index.html"), self._page("全部标签", items, "../"))
+
+        months = sorted(catalog.months.items(), reverse=True)
+        items = "\n".join(
+            f"    <a href=\"{year}/{mm}.html\" class=\"btn\">{year} 年 {int(mm)} 月（{len(members)}）</a>"
+            for (year, mm), members in months
+        )
+        os.makedirs(os.path.join(self.blog_dir, ARCHIVE_DIR), exist_ok=True)
+        write_if_changed(os.path.join(self.blog_dir, ARCHIVE_DIR, "index.html"), self._page("文章归档", items, "../"))
+
+    def update(self, catalog, *entries):
+        """重新生成这些文章条目（修改前和修改后的版本）涉及的标签页和月份页"""
+        tags, months = set(), set()
+        for entry in entries:
+            if not entry:
+                continue
+            tags.update(entry.get("tags", []))
+            month = month_of(entry)
+            if month:
+                months.add(month)
+
+        for tag in tags:
+            self.write_tag(catalog, tag)
+        for month in months:
+            self.write_month(catalog, month)
+        self.write_indexes(catalog)
+
+    def rebuild(self, catalog):
+        """重新生成全部标签页和归档页，并删除已经没有文章的旧页面"""
+        tags_dir = os.path.join(self.blog_dir, TAGS_DIR)
+        keep = {tag_filename(tag) for tag in catalog.tags} | {"index.html"}
+        if os.path.isdir(tags_dir):
+            for name in os.listdir(tags_dir):
+                if name.endswith(".html") and name not in keep:
+                    os.remove(os.path.join(tags_dir, name))
+
+        archive_dir = os.path.join(self.blog_dir, ARCHIVE_DIR)
+        keep = {self.month_path(month) for month in catalog.months}
+        for dirpath, _, filenames in os.walk(archive_dir):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if dirpath != archive_dir and name.endswith(".html") and path not in keep:
+                    os.remove(path)
+
+        for tag in catalog.tags:
+            self.write_tag(catalog, tag)
+        for month in catalog.months:
+            self.write_month(catalog, month)
+        self.write_indexes(catalog)
@@ -0,0 +1,353 @@
+"""博客目录的增量快照备份
+
+备份目录结构：
+
+    snapshots/<时间>.json    快照清单：相对路径 -> [SHA-256, 大小, 修改时间(ns), 权限]
+    objects/<xx>/<哈希>      大文件，每个内容只保存一份（文本等可压缩的内容用 zlib 流式压缩）
+    packs/<时间>.pack        同一次备份中新增的小文件打包在一起，每个对象单独压缩，可以随机读取
+    index.json               哈希 -> 存放位置
+
+每次备份只读取大小或修改时间与上一个快照不同的文件；内容没有变化的文件直接沿用上一个快照中的哈希，
+清单里只是多一行引用，不会再复制一份（与 rsync --link-dest 的硬链接快照效果相同，但不依赖文件系统支持硬链接）。
+新内容边读边计算哈希、边压缩写入，不需要把大文件整个读进内存；图片等已经压缩过的格式原样保存。
+
+写入顺序为：对象 → 索引 → 清单，清单写好才算备份完成，中途中断不会留下引用缺失对象的快照。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+
+SNAPSHOTS_DIRNAME = "snapshots"
+OBJECTS_DIRNAME = "objects"
+PACKS_DIRNAME = "packs"
+INDEX_FILENAME = "index.json"
+
+# 小于该大小的新文件写入本次备份的 pack 文件，否则单独保存
+PACK_MAX_OBJECT = 256 * 1024
+
+# 不备份的目录（.git 中的内容已经推送到远程仓库，发布 worktree 在 .git 中）
+EXCLUDE_DIRS = {".git", "__pycache__", "node_modules"}
+
+# 已经压缩过的格式，原样保存
+STORED_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".ico", ".zip", ".gz", ".7z", ".rar",
+    ".mp3", ".mp4", ".webm", ".woff", ".woff2", ".pdf", ".pack",
+)
+
+_BLOCK = 1024 * 1024
+
+# 备份和删除快照都会改写索引，同一进程中不能同时进行
+_LOCK = threading.Lock()
+
+
+class BackupError(Exception):
+    pass
+
+
+class Snapshot:
+    """一个快照的概要"""
+
+    def __init__(self, name, created, files, size, added, added_size):
+        self.name = name
+        self.created = created
+        self.files = files  # 文件数
+        self.size = size  # 文件总大小
+        self.added = added  # 本次新保存的对象数
+        self.added_size = added_size  # 本次新写入备份目录的字节数（压缩后）
+
+    def label(self):
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.created))
+        return (f"{when}  {self.files} 个文件 {self.size / 1048576:.1f} MB"
+                f"（新增 {self.added} 个对象 {self.added_size / 1048576:.2f} MB）")
+
+
+def _write_json(path, data):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def _read_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def scan_tree(root, exclude=()):
+    """列出 root 下需要备份的文件：相对路径（使用 /） -> os.stat_result"""
+    exclude = {os.path.normcase(os.path.abspath(path)) for path in exclude}
+    files = {}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in EXCLUDE_DIRS and os.path.normcase(os.path.abspath(entry.path)) not in exclude:
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False) and not entry.name.endswith(".tmp"):
+                    relative = os.path.relpath(entry.path, root).replace(os.sep, "/")
+                    files[relative] = entry.stat(follow_symlinks=False)
+    return files
+
+
+class BackupStore:
+    """备份目录（root）中的对象存储和快照"""
+
+    def __init__(self, root):
+        self.root = root
+        self.snapshots_dir = os.path.join(root, SNAPSHOTS_DIRNAME)
+        self.objects_dir = os.path.join(root, OBJECTS_DIRNAME)
+        self.packs_dir = os.path.join(root, PACKS_DIRNAME)
+        self.index_path = os.path.join(root, INDEX_FILENAME)
+
+    # ----------------------
+    # 快照
+    # ----------------------
+    def snapshot_names(self):
+        if not os.path.isdir(self.snapshots_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.snapshots_dir) if name.endswith(".json"))
+
+    def load_manifest(self, name):
+        manifest = _read_json(os.path.join(self.snapshots_dir, name + ".json"), None)
+        if manifest is None:
+            raise BackupError(f"快照不存在或已损坏：{name}")
+        return manifest
+
+    def snapshots(self):
+        """全部快照的概要（按时间顺序）"""
+        result = []
+        for name in self.snapshot_names():
+            try:
+                manifest = self.load_manifest(name)
+            except BackupError:
+                continue
+            stats = manifest.get("stats", {})
+            result.append(Snapshot(
+                name, manifest.get("created", 0), len(manifest["files"]),
+                sum(item[1] for item in manifest["files"].values()),
+                stats.get("added", 0), stats.get("added_size", 0)
+            ))
+        return result
+
+    # ----------------------
+    # 备份
+    # ----------------------
+    def backup(self, source_dir, progress=None):
+        """为 source_dir 创建一个快照，返回 Snapshot
+
+        progress(已处理文件数, 需要读取的文件数) 报告读取新内容的进度。
+        """
+        with _LOCK:
+            return self._backup(source_dir, progress)
+
+    def _backup(self, source_dir, progress):
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        names = self.snapshot_names()
+        previous = self.load_manifest(names[-1])["files"] if names else {}
+        index = _read_json(self.index_path, {})
+
+        tree = scan_tree(source_dir, exclude=[self.root])
+        files = {}
+        pending = []
+        for relative, st in tree.items():
+            item = previous.get(relative)
+            # 大小和修改时间都没变且对象仍在时沿用上一个快照的哈希，不读取文件
+            if item and item[1] == st.st_size and item[2] == st.st_mtime_ns and item[0] in index:
+                files[relative] = [item[0], st.st_size, st.st_mtime_ns, st.st_mode & 0o777]
+            else:
+                pending.append((relative, st))
+
+        name = time.strftime("%Y%m%d-%H%M%S")
+        while name in names:
+            name += "_"
+        pack_path = os.path.join(self.packs_dir, name + ".pack")
+        added = added_size = 0
+        pack = None
+        try:
+            for done, (relative, st) in enumerate(sorted(pending), 1):
+                path = os.path.join(source_dir, *relative.split("/"))
+                compress = not relative.lower().endswith(STORED_EXTENSIONS)
+                try:
+                    if st.st_size < PACK_MAX_OBJECT:
+                        with open(path, "rb") as f:
+                            data = f.read()
+                        digest = hashlib.sha256(data).hexdigest()
+                        if digest not in index:
+                            if pack is None:
+                                os.makedirs(self.packs_dir, exist_ok=True)
+                                pack = open(pack_path, "ab")
+                            payload = zlib.compress(data, 6) if compress else data
+                            offset = pack.tell()
+                            pack.write(payload)
+                            index[digest] = ["pack", name, offset, len(payload), int(compress)]
+                            added, added_size = added + 1, added_size + len(payload)
+                    else:
+                        digest, written = self._store_loose(path, compress, index)
+                        if written:
+                            added, added_size = added + 1, added_size + written
+                except FileNotFoundError:
+                    continue  # 备份过程中被删除的文件
+                files[relative] = [digest, st.st_size, st.st_mtime_ns, st.st_mode & 0o777]
+                if progress:
+                    progress(done, len(pending))
+        finally:
+            if pack is not None:
+                pack.flush()
+                os.fsync(pack.fileno())
+                pack.close()
+
+        _write_json(self.index_path, index)
+        created = time.time()
+        _write_json(os.path.join(self.snapshots_dir, name + ".json"), {
+            "created": created, "source": os.path.abspath(source_dir), "files": files,
+            "stats": {"added": added, "added_size": added_size, "read": len(pending)}
+        })
+        return Snapshot(name, created, len(files), sum(item[1] for item in files.values()), added, added_size)
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _store_loose(self, path, compress, index):
+        """流式读取大文件：边计算哈希边写入临时文件，内容已存在时丢弃。返回 (哈希, 写入的字节数)"""
+        os.makedirs(self.objects_dir, exist_ok=True)
+        temp_path = os.path.join(self.objects_dir, f".incoming-{os.getpid()}")
+        digest = hashlib.sha256()
+        compressor = zlib.compressobj(6) if compress else None
+        with open(path, "rb") as src, open(temp_path, "wb") as dst:
+            for block in iter(lambda: src.read(_BLOCK), b""):
+                digest.update(block)
+                dst.write(compressor.compress(block) if compressor else block)
+            if compressor:
+                dst.write(compressor.flush())
+            dst.flush()
+            os.fsync(dst.fileno())
+            written = dst.tell()
+        digest = digest.hexdigest()
+        if digest in index:
+            os.remove(temp_path)
+            return digest, 0
+        target = self._object_path(digest)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(temp_path, target)
+        index[digest] = ["loose", int(compress)]
+        return digest, written
+
+    # ----------------------
+    # 读取与恢复
+    # ----------------------
+    def _read_chunks(self, digest, index):
+        """按块读取一个对象的原始内容"""
+        location = index.get(digest)
+        if location is None:
+            raise BackupError(f"备份中缺少对象：{digest}")
+        if location[0] == "pack":
+            _, pack_name, offset, length, compressed = location
+            with open(os.path.join(self.packs_dir, pack_name + ".pack"), "rb") as f:
+                f.seek(offset)
+                data = f.read(length)
+            yield zlib.decompress(data) if compressed else data
+            return
+        decompressor = zlib.decompressobj() if location[1] else None
+        with open(self._object_path(digest), "rb") as f:
+            for block in iter(lambda: f.read(_BLOCK), b""):
+                yield decompressor.decompress(block) if decompressor else block
+        if decompressor:
+            yield decompressor.flush()
+
+    def restore(self, name, target_dir, paths=None, progress=None):
+        """把快照恢复到 target_dir，返回恢复的文件数
+
+        paths 给出时只恢复这些相对路径（或以 / 结尾的目录前缀）下的文件。恢复的文件会校验哈希，
+        并还原修改时间和权限。target_dir 中已有的同名文件被覆盖，其他文件保持不变。
+        """
+        manifest = self.load_manifest(name)
+        index = _read_json(self.index_path, {})
+        items = sorted(manifest["files"].items())
+        if paths:
+            items = [(relative, item) for relative, item in items
+                     if any(relative == p or (p.endswith("/") and relative.startswith(p)) for p in paths)]
+
+        for done, (relative, (digest, size, mtime_ns, mode)) in enumerate(items, 1):
+            target = os.path.join(target_dir, *relative.split("/"))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            temp_path = target + ".restore.tmp"
+            check = hashlib.sha256()
+            try:
+                with open(temp_path, "wb") as f:
+                    for chunk in self._read_chunks(digest, index):
+                        check.update(chunk)
+                        f.write(chunk)
+                if check.hexdigest() != digest:
+                    raise BackupError(f"备份数据损坏：{relative}")
+            except zlib.error:
+                os.remove(temp_path)
+                raise BackupError(f"备份数据损坏：{relative}")
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            os.replace(temp_path, target)
+            os.utime(target, ns=(mtime_ns, mtime_ns))
+            try:
+                os.chmod(target, mode)
+            except OSError:
+                pass
+            if progress:
+                progress(done, len(items))
+        return len(items)
+
+    # ----------------------
+    # 清理
+    # ----------------------
+    def delete(self, name):
+        """删除一个快照，并清理不再被任何快照引用的对象和 pack 文件，返回释放的字节数"""
+        with _LOCK:
+            return self._delete(name)
+
+    def _delete(self, name):
+        path = os.path.join(self.snapshots_dir, name + ".json")
+        if not os.path.exists(path):
+            raise BackupError(f"快照不存在：{name}")
+        os.remove(path)
+
+        referenced = set()
+        for other in self.snapshot_names():
+            referenced.update(item[0] for item in self.load_manifest(other)["files"].values())
+        index = _read_json(self.index_path, {})
+        freed = 0
+        live_packs = set()
+        for digest, location in list(index.items()):
+            if digest in referenced:
+                if location[0] == "pack":
+                    live_packs.add(location[1])
+                continue
+            if location[0] == "loose":
+                object_path = self._object_path(digest)
+                if os.path.exists(object_path):
+                    freed += os.path.getsize(object_path)
+                    os.remove(object_path)
+                    if not os.listdir(os.path.dirname(object_path)):
+                        os.rmdir(os.path.dirname(object_path))
+                del index[digest]
+
+        # pack 中的对象只有整个 pack 都不再被引用时才删除
+        for digest, location in list(index.items()):
+            if location[0] == "pack" and location[1] not in live_packs:
+                del index[digest]
+        if os.path.isdir(self.packs_dir):
+            for filename in os.listdir(self.packs_dir):
+                if filename.endswith(".pack") and filename[:-5] not in live_packs:
+                    freed += os.path.getsize(os.path.join(self.packs_dir, filename))
+                    os.remove(os.path.join(self.packs_dir, filename))
+        _write_json(self.index_path, index)
+        return freed
@@ -0,0 +1,191 @@
+"""博客引擎基准测试（不需要图形界面）
+
+用法：python benchmarks/bench_engine.py [--sizes 1000,10000] [--repeat 20] [--images 100] [--image-kb 300]
+                                         [--gbk-ratio 0.2] [--dir 目录] [--keep] [--json 结果.json]
+
+为每个规模生成一个合成博客（文章页面混合 UTF-8 和 GBK 编码，posts.html 中包含全部文章卡片，
+另有草稿和一个较大的 img 目录），然后分别测量：
+- 首次发布时重建文章目录以及全部订阅源、站点地图和标签/归档页；
+- 发布、读取、编辑、删除文章，列出文章（load_posts_list）；
+- 扫描草稿（load_draft）；
+- 预览时复制资源：只复制一张图片（preview_post）和复制整个 img 目录（preview_edited_post 等）；
+- 站点校验、重建全部页面；
+- 本地备份（首次完整备份和没有变化时的增量备份）。
+100k 篇文章的博客会占用数百 MB 磁盘空间，需要显式指定 --sizes 100000。
+"""
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blog_engine import BlogEngine  # noqa: E402
+
+WORDS = "博客 技术 生活 随笔 编程 Python 前端 设计 阅读 旅行 摄影 音乐 笔记 总结 工具".split()
+TAGS = ["技术", "博客", "生活", "随笔", "Python", "前端", "设计", "阅读"]
+
+
+def summarize(samples):
+    """计算中位数、P95 和最大值（毫秒）"""
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(samples[math.ceil(len(samples) * 0.95) - 1] * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3),
+    }
+
+
+def timed(func, repeat, setup=None):
+    """重复执行 func，返回耗时统计；setup(i) 的返回值作为 func 的参数（不计入耗时）"""
+    samples = []
+    for i in range(repeat):
+        args = setup(i) if setup else ()
+        started = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def make_blog(root, posts, images, image_kb, gbk_ratio, rng):
+    """生成合成博客，返回 BlogEngine"""
+    engine = BlogEngine(root)
+    engine.ensure_dirs()
+
+    with open(engine.css_file, "w", encoding="utf-8") as f:
+        f.write("body { margin: 0; }\n" * 200)
+    with open(os.path.join(engine.js_dir, "main.js"), "w", encoding="utf-8") as f:
+        f.write("console.log('main');\n" * 100)
+
+    # 图片目录
+    for i in range(images):
+        with open(os.path.join(engine.img_dir, f"photo{i}.jpg"), "wb") as f:
+            f.write(os.urandom(image_kb * 1024))
+    with open(os.path.join(engine.img_dir, "default.jpg"), "wb") as f:
+        f.write(os.urandom(image_kb * 1024))
+
+    # 文章页面和文章列表页
+    cards = []
+    for i in range(posts):
+        title = f"合成文章 {i} " + " ".join(rng.sample(WORDS, 3))
+        date = f"20{rng.randint(15, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        tags = ",".join(rng.sample(TAGS, rng.randint(1, 3)))
+        content = "\n".join(
+            ("# " if j % 4 == 0 else "") + "".join(rng.choices(WORDS, k=30)) for j in range(12)
+        )
+        filename = f"post-{i}.html"
+        img_name = f"photo{rng.randrange(images)}.jpg" if images else "default.jpg"
+        html = engine.render_post(title, date, tags, content, img_name)
+        encoding = "gbk" if rng.random() < gbk_ratio else "utf-8"
+        with open(os.path.join(engine.posts_dir, filename), "w", encoding=encoding, errors="replace") as f:
+            f.write(html)
+        cards.append(engine.render_post_card(title, date, tags, "摘要 " + title, filename, img_name))
+
+    with open(engine.posts_page, "w", encoding="utf-8") as f:
+        f.write(engine.render_posts_page("".join(cards)))
+
+    # 草稿（约为文章数的十分之一）
+    for i in range(max(posts // 10, 1)):
+        with open(os.path.join(engine.drafts_dir, f"draft-{i}.txt"), "w", encoding="utf-8") as f:
+            f.write(f"标题：草稿 {i}\n日期：2025-01-01\n标签：技术\n图片：\n摘要：\n---\n正文 {i}\n")
+
+    return engine
+
+
+def bench_size(base_dir, posts, args, rng):
+    root = os.path.join(base_dir, f"blog-{posts}")
+    started = time.perf_counter()
+    engine = make_blog(root, posts, args.images, args.image_kb, args.gbk_ratio, rng)
+    print(f"  生成用时：{time.perf_counter() - started:.1f} 秒")
+
+    repeat = args.repeat
+    results = {}
+
+    # 首次加载：从 posts 目录重建文章目录并生成全部派生文件
+    results["catalog_rebuild"] = timed(lambda: engine.update_generated(engine.load_catalog()), 1)
+
+    published = []
+
+    def publish(i):
+        path = engine.publish_post(f"基准测试文章 {i}", "2025-08-09", "技术,基准", "摘要", "# 标题\n正文")
+        published.append(path)
+
+    results["publish_post"] = timed(publish, repeat, setup=lambda i: (i,))
+    results["list_posts"] = timed(engine.list_posts, repeat)
+
+    existing = [os.path.join(engine.posts_dir, name) for name in engine.list_posts()]
+    results["read_post"] = timed(engine.read_post, repeat, setup=lambda i: (rng.choice(existing),))
+    results["update_post"] = timed(
+        engine.update_post, repeat, setup=lambda i: (published[i], f"改名文章 {i}", "新的正文")
+    )
+    results["delete_post"] = timed(engine.delete_post, repeat, setup=lambda i: (published[i],))
+    results["list_drafts"] = timed(engine.list_drafts, repeat)
+
+    preview_dir = os.path.join(base_dir, f"preview-{posts}")
+    results["preview_one_image"] = timed(
+        lambda: engine.stage_preview(preview_dir, images=["photo0.jpg"]), repeat
+    )
+    results["preview_img_dir"] = timed(lambda: engine.stage_preview(preview_dir), max(repeat // 5, 1))
+
+    results["validate_site"] = timed(engine.validate_site, 1)
+    results["rebuild_site"] = timed(engine.rebuild_site, 1)
+
+    # 本地备份：首次完整备份，之后没有变化时的增量备份
+    results["backup_full"] = timed(engine.backup, 1)
+    results["backup_incremental"] = timed(engine.backup, repeat)
+
+    for name, stats in results.items():
+        print(f"  {name:<20}{stats}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="博客引擎基准测试")
+    parser.add_argument("--sizes", default="1000,10000", help="文章数列表，逗号分隔")
+    parser.add_argument("--repeat", type=int, default=20, help="每项操作的重复次数")
+    parser.add_argument("--images", type=int, default=100, help="img 目录中的图片数")
+    parser.add_argument("--image-kb", type=int, default=300, help="每张图片的大小（KB）")
+    parser.add_argument("--gbk-ratio", type=float, default=0.2, help="以 GBK 编码保存的文章比例")
+    parser.add_argument("--dir", help="在该目录下生成合成博客（默认使用系统临时目录）")
+    parser.add_argument("--keep", action="store_true", help="保留生成的合成博客")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    # 总是在新的子目录中生成，清理时不会影响 --dir 中已有的内容
+    if args.dir:
+        os.makedirs(args.dir, exist_ok=True)
+    base_dir = tempfile.mkdtemp(prefix="blog_bench_", dir=args.dir)
+    rng = random.Random(0)
+
+    results = []
+    try:
+        for posts in [int(s) for s in args.sizes.split(",") if s.strip()]:
+            print(f"{posts} 篇文章")
+            results.append({
+                "posts": posts,
+                "images": args.images,
+                "image_kb": args.image_kb,
+                "gbk_ratio": args.gbk_ratio,
+                "operations": bench_size(base_dir, posts, args, rng),
+            })
+    finally:
+        if not args.keep:
+            shutil.rmtree(base_dir, ignore_errors=True)
+
+    if args.keep:
+        print(f"合成博客保存在：{base_dir}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
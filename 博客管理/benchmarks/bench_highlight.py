@@ -0,0 +1,172 @@
+"""语法高亮按键延迟基准测试
+
+用法：python benchmarks/bench_highlight.py [--sizes 100,300,800] [--keys 200] [--json 结果.json]
+
+对不同大小（KB）的合成 HTML 文件分别测量：
+- 分词器：模拟在可见区域中间输入一个字符 / 回车后，增量重新分词所需的时间；
+- Tk：有图形界面时，测量从 insert 到高亮刷新并完成绘制（update_idletasks）的时间。
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from syntax_highlight import IncrementalTokenizer, SyntaxHighlighter  # noqa: E402
+
+# 可见区域的行数（大致相当于编辑器窗口高度）
+VISIBLE_LINES = 45
+
+SAMPLE_BLOCK = """  <article class="card">
+    <img src="img/post{n}.jpg" alt="示例文章 {n}" class="post-img" />
+    <h2>示例文章 {n}</h2>
+    <p class="post-date">2025-08-{day:02d}</p>
+    <!-- 卡片注释 {n} -->
+    <p>这是一段用于测试的摘要文字，包含 <strong>强调</strong> 和 <a href="posts/{n}.html">链接</a>。</p>
+  </article>
+  <style>
+    .card-{n} {{ color: #667eea; margin: 0 auto; padding: 1.5rem; /* 内联样式 */ }}
+  </style>
+  <script>
+    const card{n} = document.querySelector('.card-{n}');
+    if (card{n}) {{ card{n}.addEventListener('click', () => console.log(`card ${{{n}}}`)); }}
+  </script>
+"""
+
+
+def make_html(size_kb):
+    """生成大约 size_kb KB 的 HTML 文本"""
+    parts = ["<!DOCTYPE html>\n<html lang=\"zh-CN\">\n<body>\n"]
+    total = 0
+    n = 0
+    while total < size_kb * 1024:
+        block = SAMPLE_BLOCK.format(n=n, day=n % 28 + 1)
+        parts.append(block)
+        total += len(block.encode("utf-8"))
+        n += 1
+    parts.append("</body>\n</html>\n")
+    return "".join(parts)
+
+
+def summarize(samples):
+    """计算中位数、P95 和最大值（毫秒）"""
+    samples = sorted(samples)
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1] * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3),
+    }
+
+
+def bench_tokenizer(text, keys, rng):
+    """不依赖界面的增量分词基准"""
+    lines = text.split("\n")
+    tokenizer = IncrementalTokenizer("html")
+    tokenizer.reset(len(lines))
+
+    def get_line(line):
+        return lines[line - 1]
+
+    # 滚动到文件中间，先完成可见区域的分词（包含之前所有行的一次性分词）
+    first = len(lines) // 2
+    last = first + VISIBLE_LINES
+    started = time.perf_counter()
+    tokenizer.update(first, last, get_line)
+    initial = time.perf_counter() - started
+
+    typing, newline = [], []
+    for _ in range(keys):
+        line = rng.randint(first, last)
+
+        # 输入一个字符
+        lines[line - 1] = lines[line - 1] + "x"
+        started = time.perf_counter()
+        tokenizer.lines_changed(line, 0)
+        tokenizer.update(first, last, get_line)
+        typing.append(time.perf_counter() - started)
+
+        # 按下回车（插入一行）
+        lines.insert(line, "")
+        started = time.perf_counter()
+        tokenizer.lines_changed(line, 1)
+        tokenizer.update(first, last, get_line)
+        newline.append(time.perf_counter() - started)
+
+    return {
+        "initial_ms": round(initial * 1000, 3),
+        "typing": summarize(typing),
+        "newline": summarize(newline),
+    }
+
+
+def bench_tk(text, keys, rng):
+    """在 Tk Text 组件上测量按键到绘制完成的延迟，无图形界面时返回 None"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        print(f"  跳过 Tk 测试：{e}")
+        return None
+
+    try:
+        widget = tk.Text(root, width=100, height=VISIBLE_LINES)
+        widget.pack()
+        highlighter = SyntaxHighlighter(widget, "html")
+        widget.insert("1.0", text)
+        line_count = int(widget.index("end-1c").split(".")[0])
+        widget.see(f"{line_count // 2}.0")
+        root.update()
+
+        samples = []
+        for _ in range(keys):
+            first, last = highlighter.visible_lines()
+            line = rng.randint(first, last)
+            started = time.perf_counter()
+            widget.insert(f"{line}.0", "x")
+            highlighter.flush()
+            root.update_idletasks()
+            samples.append(time.perf_counter() - started)
+        return summarize(samples)
+    finally:
+        root.destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="语法高亮按键延迟基准测试")
+    parser.add_argument("--sizes", default="100,300,800", help="文件大小列表（KB），逗号分隔")
+    parser.add_argument("--keys", type=int, default=200, help="每种大小模拟的按键次数")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    results = []
+    for size_kb in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        text = make_html(size_kb)
+        print(f"{size_kb} KB（{text.count(chr(10))} 行）")
+
+        tokenizer_result = bench_tokenizer(text, args.keys, rng)
+        print(f"  首次分词：{tokenizer_result['initial_ms']} ms")
+        print(f"  输入字符：{tokenizer_result['typing']}")
+        print(f"  插入新行：{tokenizer_result['newline']}")
+
+        tk_result = bench_tk(text, args.keys, rng)
+        if tk_result:
+            print(f"  按键到绘制：{tk_result}")
+
+        results.append({
+            "size_kb": size_kb,
+            "tokenizer": tokenizer_result,
+            "keystroke_to_paint": tk_result,
+        })
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1457 @@
+"""博客引擎：与界面无关的发布逻辑
+
+模板、文件名生成、文章渲染、posts.html 的维护以及 Git 部署都在这里，
+图形界面（blog_manager.py）只负责收集输入并调用 BlogEngine。
+本模块只在顶层导入标准库中的轻量模块，subprocess 等在用到时才导入，
+因此脚本和测试可以在没有图形界面的环境中快速导入并直接调用：
+
+    from blog_engine import BlogEngine
+    engine = BlogEngine("/path/to/blog")
+    engine.publish_post("标题", "2025-08-09", "技术,博客", "摘要", "正文")
+"""
+import hashlib
+import os
+import re
+import threading
+from datetime import datetime
+
+from revisions import REVISIONS_DIRNAME
+from templates import SITE_TITLE, TEMPLATES_DIRNAME, TemplateSet
+
+# 默认标签
+DEFAULT_TAGS = "技术,博客"
+
+# 配置文件名
+CONFIG_FILENAME = ".blog_config"
+
+# 文章数不少于该值时“重建全部页面”使用多进程渲染
+REBUILD_POOL_MIN_POSTS = 200
+
+# 多进程渲染时每个任务包含的文章数
+REBUILD_CHUNK_SIZE = 100
+
+# 文章源文件目录：每篇已发布文章的编辑格式原文（头部字段 + 正文），编辑时直接读取
+SOURCES_DIRNAME = "sources"
+
+# 草稿和文章源文件的头部字段（前缀 -> 键），头部与正文之间以单独一行 --- 分隔
+FRONT_MATTER_FIELDS = {"标题：": "title", "日期：": "date", "标签：": "tags", "图片：": "img", "摘要：": "summary"}
+
+# 文章源文件的可选头部字段：手写页面中与标题不同的页眉、图片说明和横幅地址，重新渲染时保留（为空时不写出）
+PAGE_FIELDS = {"页眉：": "heading", "图片说明：": "alt", "横幅：": "banner"}
+
+
+class GitError(Exception):
+    """Git 命令执行失败"""
+
+
+def read_text_file(path, encodings=('utf-8', 'gbk', 'gb2312')):
+    """依次尝试多种编码读取文本文件，全部失败时返回 None"""
+    for encoding in encodings:
+        try:
+            with open(path, "r", encoding=encoding) as f:
+                return f.read()
+        except UnicodeDecodeError:
+            continue  # 尝试下一种编码
+    return None
+
+
+def write_text_file(path, content, encoding="utf-8"):
+    """以指定编码写入文本文件"""
+    with open(path, "w", encoding=encoding) as f:
+        f.write(content)
+
+
+def slugify(title):
+    """根据标题生成文章文件名（处理特殊字符）"""
+    filename = re.sub(r'[^\w\-]', '', title.lower().replace(" ", "-")) + ".html"
+    if not filename or filename == ".html":  # 处理可能的空文件名
+        filename = f"post_{datetime.now().strftime('%Y%m%d%H%M%S')}.html"
+    return filename
+
+
+def split_tags(tags):
+    """把逗号分隔的标签拆成列表"""
+    return [tag.strip() for tag in tags.split(',')] if tags else []
+
+
+def tag_filename(tag):
+    """标签页的文件名（替换文件名中不允许出现的字符）
+
+    替换过字符或含大写字母的标签加上原标签的短哈希，避免只差大小写或空格/连字符的标签
+    （如 "Python" 和 "python"、"Web 开发" 和 "Web-开发"）在不区分大小写的文件系统上写入同一个页面。
+    """
+    name = re.sub(r'[\\/:*?"<>|\s]+', "-", tag).strip("-.")
+    if name != tag or name != name.lower() or re.search(r"-[0-9a-f]{8}$", name):
+        name = f"{name or '_'}-{hashlib.sha1(tag.encode('utf-8')).hexdigest()[:8]}"
+    return name + ".html"
+
+
+def format_tags(tags, root=None):
+    """把标签（逗号分隔的字符串或列表）渲染为 HTML；给出 root 时每个标签链接到 root/tags/ 下的标签页"""
+    tag_list = split_tags(tags) if isinstance(tags, str) else list(tags)
+    if not tag_list:
+        return ""
+    if root is None:
+        spans = [f"<span class='tag'>{tag}</span>" for tag in tag_list]
+    else:
+        from urllib.parse import quote
+        spans = [f"<a href=\"{root}tags/{quote(tag_filename(tag))}\"><span class='tag'>{tag}</span></a>" for tag in tag_list]
+    return "<div class='tags'>" + " ".join(spans) + "</div>"
+
+
+def card_pattern(filename):
+    """匹配文章列表页中某篇文章卡片的正则（不会跨越其他文章的卡片）"""
+    return re.compile(
+        rf'(?s)<!-- 新增文章 -->\s*<article class="card">(?:(?!</article>).)*?href="posts/{re.escape(filename)}".*?</article>',
+        re.IGNORECASE
+    )
+
+
+def format_front_matter(meta, content):
+    """把头部字段和正文写成草稿 / 文章源文件的格式（头部字段只占一行，其中的换行替换为空格）"""
+    header = "".join(
+        f"{prefix}{str(meta.get(key) or '').replace(chr(10), ' ')}\n" for prefix, key in FRONT_MATTER_FIELDS.items()
+    )
+    header += "".join(
+        f"{prefix}{str(meta[key]).replace(chr(10), ' ')}\n" for prefix, key in PAGE_FIELDS.items() if meta.get(key)
+    )
+    return f"{header}---\n{content}"
+
+
+def parse_front_matter(text):
+    """解析草稿 / 文章源文件，返回包含 title/date/tags/img/summary/content 的字典
+
+    第一行 --- 之后的内容原样作为正文（正文中的 --- 不会被当作分隔符）。
+    """
+    fields = dict(FRONT_MATTER_FIELDS, **PAGE_FIELDS)
+    meta = {key: "" for key in fields.values()}
+    meta["content"] = ""
+    lines = text.splitlines(keepends=True)
+    for i, line in enumerate(lines):
+        line = line.rstrip("\r\n")
+        if line == "---":
+            meta["content"] = "".join(lines[i + 1:])
+            break
+        for prefix, key in fields.items():
+            if line.startswith(prefix):
+                meta[key] = line[len(prefix):]
+                break
+    return meta
+
+
+def format_content(content):
+    """把编辑格式的正文转换为 HTML（# 开头为标题，其余每行一段）"""
+    formatted_content = ""
+    for para in content.split("\n"):
+        para = para.strip()
+        if not para:
+            continue
+        if para.startswith("# "):
+            formatted_content += f"    <h2>{para[2:]}</h2>\n\n"
+        else:
+            formatted_content += f"    <p>{para}</p>\n\n"
+    return formatted_content
+
+
+def html_to_edit_format(html_content):
+    """将HTML内容转换为编辑格式"""
+    # 移除图片和日期行
+    content = re.sub(r'<img.*?>', '', html_content, flags=re.DOTALL)
+    content = re.sub(r'<p class="post-date">.*?</p>', '', content, flags=re.DOTALL)
+    content = re.sub(r'<div class="post-tags">(?:\s*<div class=.tags.>.*?</div>)?\s*</div>', '', content, flags=re.DOTALL)
+
+    # 转换h2标签为# 格式
+    content = re.sub(r'<h2>(.*?)</h2>', r'# \1', content, flags=re.DOTALL)
+
+    # 转换p标签为普通文本
+    content = re.sub(r'<p>(.*?)</p>', r'\1', content, flags=re.DOTALL)
+
+    # 去除多余空行和空格
+    lines = [line.strip() for line in content.split('\n') if line.strip()]
+    return '\n'.join(lines)
+
+
+def post_page_markup(html):
+    """已发布文章页面中的 <title>（去掉站点名）、页眉、横幅地址和图片说明（没有的项为空字符串）"""
+    def first(pattern, text=html):
+        match = re.search(pattern, text, re.DOTALL)
+        return match.group(1).strip() if match else ""
+
+    banner = first(r'(<img\b[^>]*class="post-banner"[^>]*>)')
+    return {
+        "page_title": re.sub(rf"\s*-\s*{re.escape(SITE_TITLE)}$", "", first(r"<title>(.*?)</title>")),
+        "heading": first(r'<h1 class="site-title">(.*?)</h1>'),
+        "banner": first(r'\bsrc="([^"]*)"', banner),
+        "alt": first(r'\balt="([^"]*)"', banner),
+    }
+
+
+def preserved_page_fields(markup, title, img_name):
+    """手写页面中与按标题和图片渲染的结果不同的页眉、图片说明和横幅地址（保存为源文件的 PAGE_FIELDS）"""
+    defaults = {"heading": title, "alt": title, "banner": f"../img/{img_name}"}
+    return {key: markup[key] for key in PAGE_FIELDS.values() if markup[key] and markup[key] != defaults[key]}
+
+
+def legacy_post_parts(html):
+    """从没有源文件的旧文章页面中取出 (图片文件名, 正文 HTML)，结构无法识别时返回 None"""
+    match = re.search(r'(?s)<main class="post-content">(.*?)</main>', html)
+    if not match:
+        return None
+    inner = match.group(1)
+    img = re.search(r'<img src="(?:\.\./)?img/([^"]+)"[^>]*class="post-banner"', inner)
+
+    # 正文从标签（旧文章为日期）之后开始
+    end = re.search(r'(?s)<div class="post-tags">(?:\s*<div class=.tags.>.*?</div>)?\s*</div>', inner)
+    if end is None:
+        end = re.search(r'(?s)<p class="post-date">.*?</p>', inner)
+    body = inner[end.end():] if end else inner
+    return (img.group(1) if img else ""), "    " + body.strip() + "\n\n"
+
+
+def render_posts(blog_dir, jobs, engine=None):
+    """用当前模板重新渲染一批文章页面，jobs 为 (文件名, 文章目录条目) 列表，返回重写的页面数
+
+    有源文件的文章从源文件渲染；旧文章保留原有的正文 HTML 以及页面中的标题、页眉、横幅和图片说明，只套用新的模板。
+    可在子进程中执行（rebuild_site 的进程池任务）。
+    """
+    from catalog import scan_post
+    from feeds import write_if_changed
+
+    engine = engine or BlogEngine(blog_dir)
+    changed = 0
+    for filename, entry in jobs:
+        post_path = os.path.join(engine.posts_dir, filename)
+        if os.path.exists(engine.source_path(post_path)):
+            source = engine.read_post_source(post_path, entry)
+            html = engine.render_post(source["title"], source["date"], source["tags"], source["content"],
+                                      source["img"] or "default.jpg", source)
+        else:
+            old_html = read_text_file(post_path) or ""
+            parts = legacy_post_parts(old_html)
+            if parts is None:
+                continue
+            img, body = parts
+            entry = entry or scan_post(post_path, read_text_file) or {}
+            # 目录条目中没有的页面信息（<title>、页眉、图片说明）从页面本身保留
+            markup = post_page_markup(old_html)
+            title = markup["page_title"] or markup["heading"] or entry.get("title", "")
+            img_name = img or entry.get("img") or "default.jpg"
+            html = engine.render_post_html(title, entry.get("date", ""), entry.get("tags", []), body, img_name,
+                                           preserved_page_fields(markup, title, img_name))
+        if write_if_changed(post_path, html):
+            changed += 1
+    return changed
+
+
+class BlogEngine:
+    """博客的发布、编辑、删除和部署操作"""
+
+    def __init__(self, blog_dir):
+        self.set_blog_dir(blog_dir)
+        self._status_cache = {}  # 仓库路径 -> (仓库指纹, 时间, RepoStatus)
+        self._status_generation = 0  # 每次收到工作区变化通知加一
+        self._status_lock = threading.Lock()
+        self.status_watch_root = None  # 文件监视器监视的目录，只有这个仓库的状态会被缓存
+        self._status_configured = set()
+        self.runner = None  # 设置为 GitJobRunner 后 git 命令交给它执行（支持超时和取消）
+        self.warn = None  # 设置后用于报告不影响保存的问题（例如修订历史无法写入）
+
+    # ----------------------
+    # 路径
+    # ----------------------
+    def set_blog_dir(self, blog_dir):
+        """设置博客根目录并初始化各文件路径"""
+        self.blog_dir = blog_dir
+        self.html_files = {
+            "首页": os.path.join(blog_dir, "index.html"),
+            "旧首页": os.path.join(blog_dir, "old-index.html"),
+            "文章列表": os.path.join(blog_dir, "posts.html"),
+            "关于我": os.path.join(blog_dir, "about.html"),
+            "留言板": os.path.join(blog_dir, "guestbook.html")
+        }
+
+        self.css_file = os.path.join(blog_dir, "style.css")
+        self.js_dir = os.path.join(blog_dir, "js")
+        self.posts_dir = os.path.join(blog_dir, "posts")
+        self.img_dir = os.path.join(blog_dir, "img")
+        self.drafts_dir = os.path.join(blog_dir, "drafts")
+        self.sources_dir = os.path.join(blog_dir, SOURCES_DIRNAME)
+        self.templates_dir = os.path.join(blog_dir, TEMPLATES_DIRNAME)
+        self.revisions_dir = os.path.join(blog_dir, REVISIONS_DIRNAME)
+        self.templates = TemplateSet(self.templates_dir, {"site_title": SITE_TITLE})
+        self._bundles = None  # (打包配置的修改时间, 打包结果)
+        self._catalog = None  # 上次加载的文章目录
+        self._catalog_lock = threading.Lock()
+        self.config_path = os.path.join(blog_dir, CONFIG_FILENAME)
+
+    @property
+    def posts_page(self):
+        """文章列表页路径"""
+        return self.html_files["文章列表"]
+
+    def ensure_dirs(self):
+        """确保必要目录存在"""
+        for dir_path in [self.js_dir, self.posts_dir, self.img_dir, self.drafts_dir, self.sources_dir]:
+            os.makedirs(dir_path, exist_ok=True)
+
+    def list_posts(self):
+        """已发布文章的文件名列表"""
+        if not os.path.exists(self.posts_dir):
+            return []
+        return [filename for filename in os.listdir(self.posts_dir) if filename.endswith(".html")]
+
+    def list_js_files(self):
+        """js 目录下的脚本文件名列表"""
+        if not os.path.exists(self.js_dir):
+            return []
+        return [filename for filename in os.listdir(self.js_dir) if filename.endswith(".js")]
+
+    # ----------------------
+    # 文章
+    # ----------------------
+    def render_post(self, title, date, tags, content, img_name="default.jpg", page=None):
+        """渲染文章页面"""
+        return self.render_post_html(title, date, tags, format_content(content), img_name, page)
+
+    def render_post_html(self, title, date, tags, content_html, img_name="default.jpg", page=None):
+        """用 post.html 模板渲染文章页面（正文已经是 HTML）
+
+        page 为包含 PAGE_FIELDS 的字典（例如源文件）时使用其中保留的页眉、图片说明和横幅地址。
+        """
+        page = page or {}
+        return self.templates.render(
+            "post.html",
+            page_title=title,
+            heading=page.get("heading") or title,
+            title=title,
+            alt=page.get("alt") or title,
+            banner=page.get("banner") or f"../img/{img_name}",
+            date=date,
+            tags=format_tags(tags, "../"),
+            content=content_html,
+            img_name=img_name,
+            scripts=self.page_scripts("post", "../")
+        )
+
+    def render_post_card(self, title, date, tags, summary, filename, img_name="default.jpg"):
+        """渲染文章列表页中的文章卡片"""
+        return self.templates.render(
+            "post_card.html",
+            title=title,
+            date=date,
+            tags=format_tags(tags, ""),
+            summary=summary,
+            filename=filename,
+            img_name=img_name
+        )
+
+    def render_posts_page(self, cards):
+        """用 posts_page.html 模板渲染文章列表页"""
+        return self.templates.render("posts_page.html", cards=cards, scripts=self.page_scripts("posts", ""))
+
+    def page_scripts(self, kind, root):
+        """页面加载脚本的标签：打包过脚本时使用该类页面的打包文件，否则加载 main.js"""
+        from js_bundles import BUNDLES_FILENAME, load_config, script_tag
+
+        path = os.path.join(self.blog_dir, BUNDLES_FILENAME)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return f'<script src="{root}js/main.js"></script>'
+        if self._bundles is None or self._bundles[0] != mtime:
+            self._bundles = (mtime, load_config(self.blog_dir)["built"])
+        bundle = self._bundles[1].get(kind)
+        return script_tag(bundle, root) if bundle else ""
+
+    def publish_post(self, title, date, tags, summary, content, img_name="default.jpg"):
+        """发布新文章：写入文章文件并在文章列表页中插入卡片，返回文章路径"""
+        if not title or not date or not content:
+            raise ValueError("标题、日期、内容不能为空！")
+
+        self.ensure_dirs()
+        post_path = os.path.join(self.posts_dir, slugify(title))
+        write_text_file(post_path, self.render_post(title, date, tags, content, img_name))
+        self.write_source(post_path, {
+            "title": title, "date": date, "tags": tags, "img": img_name, "summary": summary, "content": content
+        })
+
+        # 确保文章列表文件存在
+        if not os.path.exists(self.posts_page):
+            self.create_default_posts_page()
+
+        html = read_text_file(self.posts_page, ('utf-8',))
+
+        # 在 </main> 标签前插入新文章卡片
+        filename = os.path.basename(post_path)
+        card = self.render_post_card(title, date, tags, summary, filename, img_name)
+        write_text_file(self.posts_page, html.replace("</main>", card + "\n</main>"))
+
+        # 更新文章目录、订阅源和标签/归档页
+        catalog = self.load_catalog()
+        old_entry = dict(catalog.get(filename) or {})
+        entry = catalog.put(filename, {
+            "title": title,
+            "date": date,
+            "tags": [tag for tag in split_tags(tags) if tag],
+            "summary": summary,
+            "img": img_name
+        })
+        self.update_generated(catalog, old_entry, entry)
+        self.record_revision_safely(post_path, "发布")
+        return post_path
+
+    def create_default_posts_page(self):
+        """创建默认的文章列表页"""
+        write_text_file(self.posts_page, self.render_posts_page(""))
+
+    def source_path(self, post_path):
+        """文章对应的源文件路径（sources/<文件名>.md）"""
+        return os.path.join(self.sources_dir, os.path.splitext(os.path.basename(post_path))[0] + ".md")
+
+    def write_source(self, post_path, source):
+        """保存文章源文件（source 为 read_post_source 返回的字典）"""
+        os.makedirs(self.sources_dir, exist_ok=True)
+        write_text_file(self.source_path(post_path), format_front_matter(source, source["content"]))
+
+    def read_post_source(self, post_path, entry=None):
+        """读取文章源文件，返回包含 title/date/tags/img/summary/content（以及 PAGE_FIELDS）的字典
+
+        没有源文件的旧文章从页面中还原：标题、横幅和图片说明取自页面本身，日期、标签和摘要取自文章目录条目 entry
+        （未给出时读取文章目录）；正文经 html_to_edit_format 转换。
+        """
+        source_path = self.source_path(post_path)
+        if os.path.exists(source_path):
+            return parse_front_matter(read_text_file(source_path, ('utf-8',)))
+
+        # 尝试多种编码读取
+        html = read_text_file(post_path)
+        if html is None:
+            raise Exception("无法解码文章文件，请检查文件编码")
+
+        from catalog import scan_post
+
+        entry = entry or self.load_catalog().get(os.path.basename(post_path)) or scan_post(post_path, read_text_file)
+        content_match = re.search(r'<main class="post-content">(.*?)</main>', html, re.DOTALL)
+        markup = post_page_markup(html)
+        title = markup["page_title"] or markup["heading"] or entry.get("title", "")
+        banner_img = re.fullmatch(r"(?:\.\./)?img/([^\"?#]+)", markup["banner"])
+        img_name = banner_img.group(1) if banner_img else entry.get("img") or "default.jpg"
+        source = {
+            "title": title,
+            "date": entry.get("date", ""),
+            "tags": ",".join(entry.get("tags", [])),
+            "img": img_name,
+            "summary": entry.get("summary", ""),
+            "content": html_to_edit_format(content_match.group(1)) if content_match else "",
+        }
+        source.update(preserved_page_fields(markup, title, img_name))
+        return source
+
+    def read_post(self, post_path):
+        """读取文章，返回 (标题, 编辑格式的正文)"""
+        source = self.read_post_source(post_path)
+        return source["title"], source["content"]
+
+    def update_post(self, post_path, title, content):
+        """用新的标题和正文更新已发布的文章：修改源文件，并从源文件重新渲染页面"""
+        if not title or not content:
+            raise ValueError("标题和内容不能为空")
+
+        source = self.read_post_source(post_path)
+        old_title = source["title"]
+        source.update(title=title, content=content)
+
+        # 从源文件重新渲染文章页面（图片、日期、标签以及手写页面的页眉和横幅保持不变）
+        write_text_file(post_path, self.render_post(
+            title, source["date"], source["tags"], content, source["img"] or "default.jpg", source
+        ))
+        self.write_source(post_path, source)
+
+        # 标题变化时同步更新文章列表页中的卡片
+        filename = os.path.basename(post_path)
+        if title != old_title and os.path.exists(self.posts_page):
+            html = read_text_file(self.posts_page, ('utf-8',))
+            card = self.render_post_card(
+                title, source["date"], source["tags"], source["summary"], filename, source["img"] or "default.jpg"
+            )
+            new_html = card_pattern(filename).sub(lambda m: card.strip(), html, count=1)
+            if new_html != html:
+                write_text_file(self.posts_page, new_html)
+
+        # 更新文章目录、订阅源和标签/归档页
+        from catalog import scan_post
+
+        catalog = self.load_catalog()
+        old_entry = dict(catalog.get(filename) or {})
+        meta = dict(old_entry or scan_post(post_path, read_text_file))
+        meta.update(title=title, updated=None)
+        self.update_generated(catalog, old_entry, catalog.put(filename, meta))
+        self.record_revision_safely(post_path, "编辑")
+
+    def delete_post(self, post_path):
+        """删除文章文件，并从文章列表页中移除对应卡片（删除前的内容保存在修订历史中，可以恢复）"""
+        filename = os.path.basename(post_path)
+        self.record_revision_safely(post_path, "删除前")  # 无法读取的文章也允许删除
+
+        # 从文章列表中移除
+        if os.path.exists(self.posts_page):
+            html = read_text_file(self.posts_page, ('utf-8',))
+
+            # 找到并移除文章卡片
+            write_text_file(self.posts_page, card_pattern(filename).sub('', html))
+
+        # 删除文章文件和源文件
+        os.remove(post_path)
+        if os.path.exists(self.source_path(post_path)):
+            os.remove(self.source_path(post_path))
+
+        # 更新文章目录、订阅源和标签/归档页
+        catalog = self.load_catalog()
+        self.update_generated(catalog, catalog.remove(filename))
+
+    # ----------------------
+    # 修订历史
+    # ----------------------
+    def revision_store(self):
+        from revisions import RevisionStore
+        return RevisionStore(self.revisions_dir)
+
+    def record_revision(self, post_path, message):
+        """把文章源文件的当前内容记为一个修订，返回修订编号（内容没有变化时返回 None）"""
+        source = self.read_post_source(post_path)
+        return self.revision_store().record(
+            os.path.basename(post_path), format_front_matter(source, source["content"]), message
+        )
+
+    def record_revision_safely(self, post_path, message):
+        """记录修订；修订历史损坏或无法写入时只通过 warn 报告，不影响文章的保存"""
+        try:
+            return self.record_revision(post_path, message)
+        except Exception as e:
+            if self.warn:
+                self.warn(f"《{os.path.basename(post_path)}》的修订历史未能记录：{str(e)}")
+            return None
+
+    def list_revisions(self, filename):
+        """文章的修订列表（Revision 对象，按时间顺序）"""
+        return self.revision_store().list(filename)
+
+    def deleted_posts(self):
+        """有修订历史但已经删除的文章文件名"""
+        existing = set(self.list_posts())
+        return [name for name in self.revision_store().names() if name not in existing]
+
+    def revision_text(self, filename, number):
+        return self.revision_store().get(filename, number)
+
+    def revision_diff(self, filename, a, b):
+        """两个修订之间的差异（统一差异格式的行列表）"""
+        return self.revision_store().diff(filename, a, b)
+
+    def restore_revision(self, filename, number):
+        """把文章恢复为某个修订的内容（已删除的文章重新发布），返回文章路径"""
+        from catalog import scan_post
+
+        source = parse_front_matter(self.revision_text(filename, number))
+        if not source["title"] or not source["content"]:
+            raise Exception("该修订缺少标题或正文，无法恢复")
+        img_name = source["img"] or "default.jpg"
+
+        self.ensure_dirs()
+        post_path = os.path.join(self.posts_dir, filename)
+        write_text_file(post_path, self.render_post(
+            source["title"], source["date"], source["tags"], source["content"], img_name, source
+        ))
+        self.write_source(post_path, source)
+
+        # 替换文章列表页中的卡片（已删除的文章重新加入）
+        if not os.path.exists(self.posts_page):
+            self.create_default_posts_page()
+        html = read_text_file(self.posts_page, ('utf-8',))
+        card = self.render_post_card(
+            source["title"], source["date"], source["tags"], source["summary"], filename, img_name
+        )
+        new_html, count = card_pattern(filename).subn(lambda m: card.strip(), html, count=1)
+        if not count:
+            new_html = html.replace("</main>", card + "\n</main>")
+        write_text_file(self.posts_page, new_html)
+
+        catalog = self.load_catalog()
+        old_entry = dict(catalog.get(filename) or {})
+        meta = dict(old_entry or scan_post(post_path, read_text_file))
+        meta.update(
+            title=source["title"], date=source["date"], summary=source["summary"], img=img_name, updated=None,
+            tags=[tag for tag in split_tags(source["tags"]) if tag]
+        )
+        self.update_generated(catalog, old_entry, catalog.put(filename, meta))
+        self.record_revision_safely(post_path, f"恢复到 #{number}")
+        return post_path
+
+    # ----------------------
+    # 文章目录与订阅源
+    # ----------------------
+    def load_catalog(self):
+        """读取文章目录（不存在时从 posts 目录重建）
+
+        目录文件自上次加载或保存以来没有被其他程序改动（例如 git pull）时直接复用内存中的目录，
+        每次发布不必重新读取全部分块。
+        """
+        from catalog import PostCatalog
+        with self._catalog_lock:
+            if self._catalog is None or not self._catalog.is_current():
+                self._catalog = PostCatalog.load(self.blog_dir, self.posts_dir, read_text_file)
+            return self._catalog
+
+    def site_url(self):
+        """站点地址：优先使用配置中的 site_url，否则根据远程仓库推断"""
+        from feeds import guess_site_url
+        settings = self.load_settings()
+        return settings.get("site_url") or guess_site_url(settings.get("remote_repo", ""))
+
+    def feed_writer(self):
+        from feeds import FeedWriter
+        pages = [self.html_files[name] for name in ("首页", "文章列表", "关于我", "留言板")]
+        pages += [os.path.join(self.blog_dir, "tags", "index.html"), os.path.join(self.blog_dir, "archive", "index.html")]
+        return FeedWriter(self.blog_dir, self.site_url(), pages=pages)
+
+    def update_generated(self, catalog, *entries, full=False):
+        """保存文章目录并更新生成的文件：订阅源、受影响的站点地图分块、标签页和月份归档页
+
+        entries 为文章修改前后的目录条目；full 为真（或目录刚从 posts 目录重建）时全部重新生成。
+        增量更新时只写回目录中受影响的分块，订阅源和站点地图分块也只读取最新文章列表和受影响分块的成员。
+        没有站点地址时不生成订阅源和站点地图（其中只能使用绝对地址）。
+        """
+        from archive import ArchiveWriter
+        from feeds import SITEMAP_CHUNK_SIZE, chunk_of
+
+        full = full or catalog.rebuilt
+        catalog.save()
+
+        writer = self.feed_writer()
+        if writer.enabled:
+            writer.write_feeds(catalog)
+            if full:
+                chunks = range((catalog.next_seq + SITEMAP_CHUNK_SIZE - 1) // SITEMAP_CHUNK_SIZE)
+            else:
+                chunks = {chunk_of(entry) for entry in entries if entry}
+            writer.write_sitemap(catalog, chunks)
+
+        archive = ArchiveWriter(self.blog_dir, self.templates, lambda root: self.page_scripts("archive", root))
+        if full:
+            archive.rebuild(catalog)
+            catalog.rebuilt = False
+        else:
+            archive.update(catalog, *entries)
+        # 标签页、归档页和目录分块在文件监视器不监视的子目录中
+        self.invalidate_status()
+
+    def sync_external_changes(self, changed):
+        """按在管理工具之外修改的文件（相对博客目录的路径）更新文章目录中受影响的条目，返回更新的文章数
+
+        有源文件的文章以源文件为准；没有源文件的新文章从页面中识别；页面被删除的文章从目录中移除。
+        目录中已有且没有源文件的文章不重新解析（页面可能就是本工具生成的）。内容相同的条目不改动。
+        """
+        from legacy_import import parse_post
+
+        filenames = set()
+        for relative in changed:
+            directory, _, name = relative.rpartition("/")
+            if directory == "posts" and name.endswith(".html"):
+                filenames.add(name)
+            elif directory == SOURCES_DIRNAME and name.endswith(".md"):
+                filenames.add(name[:-3] + ".html")
+        if not filenames:
+            return 0
+
+        catalog = self.load_catalog()
+        entries = []
+        updated = 0
+        for filename in sorted(filenames):
+            post_path = os.path.join(self.posts_dir, filename)
+            old_entry = dict(catalog.get(filename) or {})
+            if not os.path.exists(post_path):
+                if old_entry:
+                    entries.append(catalog.remove(filename))
+                    updated += 1
+                continue
+            if os.path.exists(self.source_path(post_path)):
+                source = self.read_post_source(post_path)
+                meta = {
+                    "title": source["title"], "date": source["date"], "summary": source["summary"],
+                    "img": source["img"] or "default.jpg", "tags": [tag for tag in split_tags(source["tags"]) if tag],
+                }
+            elif old_entry:
+                continue
+            else:
+                parsed = parse_post(post_path)
+                if parsed["format"] is None:
+                    continue
+                meta = {key: parsed[key] for key in ("title", "date", "summary", "tags")}
+                meta["img"] = parsed["img"] or "default.jpg"
+            if old_entry and all(old_entry.get(key) == value for key, value in meta.items()):
+                continue
+            meta["updated"] = None
+            entries.extend([old_entry, catalog.put(filename, dict(old_entry, **meta))])
+            updated += 1
+
+        if entries:
+            self.update_generated(catalog, *entries)
+        return updated
+
+    def rebuild_generated(self):
+        """重新生成全部订阅源、站点地图、标签页和归档页（例如站点地址变化后）"""
+        self.update_generated(self.load_catalog(), full=True)
+
+    # ----------------------
+    # 脚本打包
+    # ----------------------
+    def bundle_config(self):
+        """各类页面需要的脚本：页面类型 -> 脚本文件名列表"""
+        from js_bundles import load_config
+        return load_config(self.blog_dir)["bundles"]
+
+    def save_bundle_config(self, bundles):
+        from js_bundles import load_config, save_config
+
+        config = load_config(self.blog_dir)
+        config["bundles"] = bundles
+        save_config(self.blog_dir, config)
+
+    def bundles_enabled(self):
+        from js_bundles import BUNDLES_FILENAME
+        return os.path.exists(os.path.join(self.blog_dir, BUNDLES_FILENAME))
+
+    def build_bundles(self, log=None):
+        """生成各类页面的打包脚本，并让页面改为加载打包文件，返回打包结果
+
+        文章页、文章列表、标签/归档页和相册页由模板重新生成；首页等手写页面只替换其中已有的脚本标签。
+        """
+        from feeds import write_if_changed
+        from js_bundles import PAGE_TYPES, build_bundles, inject_bundle, page_type
+
+        built, changed = build_bundles(self.blog_dir, self.js_dir)
+        self.invalidate_status()  # 打包文件在监视器不监视的 js/dist 中
+        if changed & {"post", "posts", "archive"}:
+            self.rebuild_site()
+        elif "other" in changed:
+            self.write_galleries()
+
+        rewritten = 0
+        for name in os.listdir(self.blog_dir):
+            path = os.path.join(self.blog_dir, name)
+            if not name.endswith(".html") or not os.path.isfile(path) or path == self.posts_page:
+                continue
+            html = read_text_file(path)
+            if html is not None and write_if_changed(path, inject_bundle(html, built.get(page_type(name)), "")):
+                rewritten += 1
+
+        if log:
+            summary = "，".join(f"{PAGE_TYPES[kind]} {os.path.basename(item['file'])}" for kind, item in built.items())
+            log(f"脚本打包完成：{summary or '没有需要打包的脚本'}" + (f"，更新了 {rewritten} 个手写页面" if rewritten else ""))
+        return built
+
+    # ----------------------
+    # 导入旧文章
+    # ----------------------
+    def scan_legacy_posts(self, progress=None, max_workers=None):
+        """识别 posts 目录中每篇文章的格式并提取元数据，与文章列表页的卡片对照，返回 LegacyImport
+
+        文章多时分块交给进程池并行解析；progress(已完成, 总数) 报告进度。
+        """
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        from legacy_import import LegacyImport, parse_cards, parse_posts
+
+        paths = [os.path.join(self.posts_dir, name) for name in self.list_posts()]
+        chunks = [paths[i:i + REBUILD_CHUNK_SIZE] for i in range(0, len(paths), REBUILD_CHUNK_SIZE)]
+        posts = []
+        if len(paths) >= REBUILD_POOL_MIN_POSTS:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                for future in as_completed([pool.submit(parse_posts, chunk) for chunk in chunks]):
+                    posts.extend(future.result())
+                    if progress:
+                        progress(len(posts), len(paths))
+        else:
+            for chunk in chunks:
+                posts.extend(parse_posts(chunk))
+                if progress:
+                    progress(len(posts), len(paths))
+
+        html = read_text_file(self.posts_page) if os.path.exists(self.posts_page) else None
+        result = LegacyImport(posts, parse_cards(html or ""))
+        for post in result.posts:
+            if post["img"] and not os.path.exists(os.path.join(self.img_dir, post["img"])):
+                post["problems"].append(f"图片不存在：{post['img']}")
+        return result
+
+    def import_legacy_posts(self, normalize=False, progress=None, max_workers=None):
+        """把 posts 目录中的全部文章纳入管理，返回 LegacyImport（applied 中为各项改动的数量）
+
+        - 重建文章目录（已在目录中的文章保留发布顺序）；
+        - 正文只有段落和标题的文章补写源文件，之后可以直接编辑；
+        - 文章列表页中补上缺少的卡片、删除指向不存在文章的卡片，其余卡片按合并后的信息重新生成；
+        - normalize 为真时把不是当前模板的文章页面改用当前模板生成（保留正文 HTML）。
+        """
+        from catalog import mtime_iso
+        from feeds import write_if_changed
+        from legacy_import import source_of, tags_of
+
+        result = self.scan_legacy_posts(progress, max_workers)
+        applied = {"sources": 0, "normalized": 0, "cards_added": 0, "cards_removed": len(result.orphan_cards)}
+
+        catalog = self.load_catalog()
+        names = {post["filename"] for post in result.posts}
+        for filename in list(catalog.entries):
+            if filename not in names:
+                catalog.remove(filename)
+
+        cards = {}
+        for post in result.posts:
+            filename = post["filename"]
+            post_path = os.path.join(self.posts_dir, filename)
+            img_name = post["img"] or "default.jpg"
+            old_entry = catalog.get(filename) or {}
+            catalog.put(filename, {
+                "title": post["title"], "date": post["date"], "tags": tags_of(post),
+                "summary": post["summary"], "img": img_name,
+                "published": old_entry.get("published") or mtime_iso(post_path),
+                "updated": old_entry.get("updated") or mtime_iso(post_path),
+            })
+
+            if not os.path.exists(self.source_path(post_path)):
+                source = source_of(post)
+                if source:
+                    self.write_source(post_path, source)
+                    applied["sources"] += 1
+            if normalize and post["format"] != "current":
+                html = self.render_post_html(post["title"], post["date"], tags_of(post), post["body"], img_name)
+                if write_if_changed(post_path, html):
+                    applied["normalized"] += 1
+            cards[filename] = self.render_post_card(
+                post["title"], post["date"], tags_of(post), post["summary"], filename, img_name
+            )
+
+        # 对照文章列表页：从后往前替换或删除已有卡片，再在 </main> 前补上缺少的卡片
+        if os.path.exists(self.posts_page):
+            html = read_text_file(self.posts_page) or ""
+            edits = []
+            for filename, card in result.cards.items():
+                edits.append((card["span"], cards.get(filename, "").strip()))
+                edits.extend((span, "") for span in card["duplicates"])
+            for (start, end), replacement in sorted(edits, reverse=True):
+                html = html[:start] + replacement + html[end:]
+            missing = "".join(cards[filename] for filename in result.missing_cards)
+            html = html.replace("</main>", missing + "\n</main>", 1) if missing else html
+        else:
+            html = self.render_posts_page("".join(cards[post["filename"]] for post in result.posts))
+        write_if_changed(self.posts_page, re.sub(r"\n[ \t]*\n(?:[ \t]*\n)+", "\n\n", html))
+        applied["cards_added"] = len(result.missing_cards)
+
+        self.update_generated(catalog, full=True)
+        result.applied = applied
+        return result
+
+    # ----------------------
+    # 图片与相册
+    # ----------------------
+    def import_images(self, paths, progress=None):
+        """批量导入图片或文件夹中的图片到 img 目录（并行去重、复制和优化），返回 ImportResult"""
+        from image_import import import_images
+        try:
+            return import_images(self.img_dir, paths, progress)
+        finally:
+            self.invalidate_status()  # 缩略图在监视器不监视的 img/thumbs 中
+
+    def render_gallery(self, title, images):
+        """用 gallery_page.html 模板渲染相册页（页面位于 galleries/ 下）"""
+        from urllib.parse import quote
+
+        from image_import import thumb_name
+
+        root = "../"
+        item = self.templates.get("gallery_item.html")
+        items = "\n".join(
+            item.render(
+                **self.templates.variables, root=root, image=quote(image),
+                thumb=quote(thumb_name(self.img_dir, image)), alt=os.path.splitext(image)[0]
+            )
+            for image in images
+        )
+        return self.templates.render(
+            "gallery_page.html", page_title=title, heading=title, items=items, count=len(images),
+            scripts=self.page_scripts("other", root)
+        )
+
+    def create_gallery(self, title, images):
+        """为一组图片生成相册页 galleries/<标题>.html（同名相册会被覆盖），返回页面路径"""
+        from feeds import write_if_changed
+        from image_import import GALLERIES_DIRNAME, load_galleries, save_galleries
+
+        if not images:
+            raise Exception("没有可以放入相册的图片")
+        filename = tag_filename(title)
+        galleries = load_galleries(self.blog_dir)
+        galleries[filename] = {"title": title, "images": list(images)}
+        save_galleries(self.blog_dir, galleries)
+
+        path = os.path.join(self.blog_dir, GALLERIES_DIRNAME, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_if_changed(path, self.render_gallery(title, images))
+        self.invalidate_status()  # 相册页在监视器不监视的 galleries 中
+        return path
+
+    def write_galleries(self):
+        """按相册定义重新生成全部相册页（缺失的图片不再列出），返回生成的页数"""
+        from feeds import write_if_changed
+        from image_import import GALLERIES_DIRNAME, load_galleries
+
+        galleries = load_galleries(self.blog_dir)
+        for filename, gallery in galleries.items():
+            images = [name for name in gallery["images"] if os.path.exists(os.path.join(self.img_dir, name))]
+            path = os.path.join(self.blog_dir, GALLERIES_DIRNAME, filename)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_if_changed(path, self.render_gallery(gallery["title"], images))
+        self.invalidate_status()
+        return len(galleries)
+
+    # ----------------------
+    # 模板与重建
+    # ----------------------
+    def export_templates(self):
+        """把内置模板导出到 templates 目录供修改，返回导出的文件名列表"""
+        from templates import export_templates
+        return export_templates(self.templates_dir)
+
+    def rebuild_site(self, progress=None, max_workers=None):
+        """用当前模板重新渲染全部文章页、文章列表页、标签/归档页以及相册页，返回重写的文章页数
+
+        文章多时分块交给进程池并行渲染；progress(已完成, 总数) 报告文章页的渲染进度。
+        内容没有变化的文件不会被重写。
+        """
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        from feeds import write_if_changed
+
+        catalog = self.load_catalog()
+        jobs = [(name, catalog.get(name)) for name in self.list_posts()]
+        chunks = [jobs[i:i + REBUILD_CHUNK_SIZE] for i in range(0, len(jobs), REBUILD_CHUNK_SIZE)]
+        done = changed = 0
+
+        if len(jobs) >= REBUILD_POOL_MIN_POSTS:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = {pool.submit(render_posts, self.blog_dir, chunk): len(chunk) for chunk in chunks}
+                for future in as_completed(futures):
+                    changed += future.result()
+                    done += futures[future]
+                    if progress:
+                        progress(done, len(jobs))
+        else:
+            for chunk in chunks:
+                changed += render_posts(self.blog_dir, chunk, self)
+                done += len(chunk)
+                if progress:
+                    progress(done, len(jobs))
+
+        # 文章列表页：按发布顺序重新生成全部卡片
+        entries = sorted(catalog.entries.values(), key=lambda e: e["seq"])
+        cards = "".join(
+            self.render_post_card(
+                e["title"], e.get("date", ""), e.get("tags", []), e.get("summary", ""), e["filename"],
+                e.get("img") or "default.jpg"
+            )
+            for e in entries
+        )
+        write_if_changed(self.posts_page, self.render_posts_page(cards))
+
+        self.update_generated(catalog, full=True)
+        self.write_galleries()
+        return changed
+
+    # ----------------------
+    # 预览
+    # ----------------------
+    def stage_preview(self, preview_dir, css=True, images=None, posts=False):
+        """把预览需要的样式、脚本、图片（和文章）复制到预览目录
+
+        images 为 None 时复制整个 img 目录，否则只复制列出的图片（图片不存在时改用 default.jpg）。
+        """
+        import shutil
+
+        os.makedirs(preview_dir, exist_ok=True)
+
+        # 复制CSS文件
+        if css and os.path.exists(self.css_file):
+            shutil.copy2(self.css_file, preview_dir)
+
+        # 复制JS文件
+        temp_js_dir = os.path.join(preview_dir, "js")
+        os.makedirs(temp_js_dir, exist_ok=True)
+        for js_file in self.list_js_files():
+            shutil.copy2(os.path.join(self.js_dir, js_file), temp_js_dir)
+
+        # 复制图片
+        temp_img_dir = os.path.join(preview_dir, "img")
+        if images is None:
+            if os.path.exists(self.img_dir):
+                if os.path.exists(temp_img_dir):
+                    shutil.rmtree(temp_img_dir)
+                shutil.copytree(self.img_dir, temp_img_dir)
+        else:
+            os.makedirs(temp_img_dir, exist_ok=True)
+            for img_name in images:
+                src_path = os.path.join(self.img_dir, img_name) if img_name else ""
+                if not src_path or not os.path.exists(src_path):
+                    img_name = "default.jpg"
+                    src_path = os.path.join(self.img_dir, img_name)
+                if os.path.exists(src_path):
+                    shutil.copyfile(src_path, os.path.join(temp_img_dir, img_name))
+
+        # 复制文章
+        if posts:
+            temp_posts_dir = os.path.join(preview_dir, "posts")
+            os.makedirs(temp_posts_dir, exist_ok=True)
+            for post_file in self.list_posts():
+                shutil.copy2(os.path.join(self.posts_dir, post_file), temp_posts_dir)
+
+    # ----------------------
+    # 草稿
+    # ----------------------
+    def save_draft(self, title, date, tags, img_name, summary, content):
+        """保存草稿，返回草稿文件名"""
+        title = title or "未命名草稿"
+
+        # 生成草稿文件名
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{title[:20].lower().replace(' ', '-')}_{timestamp}.txt"
+
+        self.ensure_dirs()
+        meta = {"title": title, "date": date, "tags": tags, "img": img_name, "summary": summary}
+        with open(os.path.join(self.drafts_dir, filename), "w", encoding="utf-8") as f:
+            f.write(format_front_matter(meta, content))
+        return filename
+
+    def list_drafts(self):
+        """草稿列表，元素为 (文件名, 路径)"""
+        drafts = []
+        if os.path.exists(self.drafts_dir):
+            for filename in os.listdir(self.drafts_dir):
+                if filename.endswith(".txt"):
+                    drafts.append((filename, os.path.join(self.drafts_dir, filename)))
+        return drafts
+
+    def read_draft(self, draft_path):
+        """解析草稿文件，返回包含 title/date/tags/img/summary/content 的字典"""
+        with open(draft_path, "r", encoding="utf-8") as f:
+            return parse_front_matter(f.read())
+
+    # ----------------------
+    # 配置
+    # ----------------------
+    def load_settings(self):
+        """读取 .blog_config 中的配置，返回字典"""
+        settings = {}
+        if os.path.exists(self.config_path):
+            with open(self.config_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if "=" in line:
+                        key, value = line.split("=", 1)
+                        settings[key] = value
+        return settings
+
+    def save_settings(self, settings):
+        """把配置写入 .blog_config（保留未修改的其他配置项）"""
+        merged = self.load_settings()
+        merged.update(settings)
+        with open(self.config_path, "w", encoding="utf-8") as f:
+            for key, value in merged.items():
+                f.write(f"{key}={value}\n")
+
+    # ----------------------
+    # 本地备份
+    # ----------------------
+    def backup_dir(self):
+        """备份目录：配置中的 backup_dir，默认为博客目录旁边的“<博客目录名>-backups”"""
+        configured = self.load_settings().get("backup_dir", "").strip()
+        if configured:
+            return configured
+        return os.path.abspath(self.blog_dir) + "-backups"
+
+    def backup_store(self):
+        from backups import BackupStore
+        return BackupStore(self.backup_dir())
+
+    def backup(self, progress=None):
+        """为博客目录（包括草稿、配置和尚未推送的修改，不含 .git）创建一个增量快照，返回 Snapshot"""
+        return self.backup_store().backup(self.blog_dir, progress)
+
+    def list_backups(self):
+        return self.backup_store().snapshots()
+
+    def backup_due(self, interval=24 * 3600):
+        """距离上一次备份是否已超过 interval 秒（没有备份时为真）"""
+        store = self.backup_store()
+        names = store.snapshot_names()
+        if not names:
+            return True
+        return datetime.now().timestamp() - store.load_manifest(names[-1]).get("created", 0) >= interval
+
+    def restore_backup(self, name, target_dir, paths=None, progress=None):
+        """把快照恢复到 target_dir（可以只恢复部分文件），返回恢复的文件数"""
+        return self.backup_store().restore(name, target_dir, paths, progress)
+
+    def delete_backup(self, name):
+        """删除快照并清理不再使用的备份数据，返回释放的字节数"""
+        return self.backup_store().delete(name)
+
+    # ----------------------
+    # Git 与部署
+    # ----------------------
+    def git(self, args, repo_path=None, log=None, message=None, allow_failure=False):
+        """运行 git 命令（参数列表，不经过 shell），逐行输出日志，返回 (返回码, 输出)"""
+        if message and log:
+            log(message)
+
+        if self.runner is not None:
+            returncode, output = self.runner.run(["git", *args], repo_path or self.blog_dir, log)
+        else:
+            returncode, output = self._run_git(args, repo_path or self.blog_dir, log)
+
+        if returncode != 0 and not allow_failure:
+            raise GitError(f"命令执行失败：git {' '.join(args)}，返回代码：{returncode}")
+        return returncode, output
+
+    @staticmethod
+    def _run_git(args, cwd, log=None):
+        """直接运行 git 命令（没有设置任务队列时使用）"""
+        import subprocess
+
+        process = subprocess.Popen(
+            ["git", *args],
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            encoding="utf-8",
+            errors="replace"
+        )
+
+        # 实时输出日志
+        output = []
+        for line in process.stdout:
+            line = line.rstrip()
+            output.append(line)
+            if log:
+                log(line)
+
+        process.wait()
+        return process.returncode, "\n".join(output)
+
+    @staticmethod
+    def is_git_repo(repo_path):
+        return os.path.exists(os.path.join(repo_path, ".git"))
+
+    def remote_url(self, repo_path=None):
+        """返回 origin 的地址，未设置时返回空字符串"""
+        code, output = self.git(["remote", "get-url", "origin"], repo_path, allow_failure=True)
+        return output.strip() if code == 0 else ""
+
+    def status(self, repo_path=None, log=None):
+        """输出 git status"""
+        return self.git(["status"], repo_path, log=log)
+
+    def git_version(self):
+        """git 版本号元组，例如 (2, 43, 0)"""
+        _, output = self.git(["--version"], allow_failure=True)
+        match = re.search(r"(\d+)\.(\d+)(?:\.(\d+))?", output)
+        return tuple(int(part or 0) for part in match.groups()) if match else (0, 0, 0)
+
+    def configure_status(self, repo_path=None):
+        """为仓库开启 untracked cache 和 fsmonitor（可用时），已有的配置不会被覆盖
+
+        fsmonitor 内置守护进程只在 Windows 和 macOS 上可用（git 2.37 起）。返回开启的配置项列表。
+        """
+        import sys
+
+        repo_path = repo_path or self.blog_dir
+        version = self.git_version()
+        wanted = {}
+        if version >= (2, 8):
+            wanted["core.untrackedCache"] = "true"
+        if version >= (2, 37) and sys.platform in ("win32", "darwin"):
+            wanted["core.fsmonitor"] = "true"
+
+        enabled = []
+        for key, value in wanted.items():
+            code, current = self.git(["config", "--get", key], repo_path, allow_failure=True)
+            if code != 0 or not current.strip():
+                self.git(["config", key, value], repo_path)
+                enabled.append(key)
+        return enabled
+
+    def repo_status(self, repo_path=None, force=False):
+        """结构化的仓库状态（RepoStatus）
+
+        只有文件监视器覆盖的仓库（status_watch_root）会缓存结果：仓库指纹不变、期间没有 invalidate_status
+        且结果不超过 STATUS_MAX_AGE 秒时直接返回缓存的结果。
+        """
+        import time
+
+        from git_status import STATUS_ARGS, STATUS_MAX_AGE, parse_porcelain_v2, worktree_fingerprint
+
+        repo_path = os.path.abspath(repo_path or self.blog_dir)
+        if repo_path not in self._status_configured:
+            self.configure_status(repo_path)
+            self._status_configured.add(repo_path)
+
+        watched = self.status_watch_root is not None and os.path.abspath(self.status_watch_root) == repo_path
+        fingerprint = worktree_fingerprint(repo_path)
+        with self._status_lock:
+            cached = self._status_cache.get(repo_path)
+            generation = self._status_generation
+        if (not force and watched and cached and cached[0] == fingerprint
+                and time.monotonic() - cached[1] < STATUS_MAX_AGE):
+            return cached[2]
+
+        _, output = self.git(STATUS_ARGS, repo_path)
+        status = parse_porcelain_v2(output)
+        # 缓存键使用执行前的指纹：执行期间的修改会让下一次检查重新执行 git status，而不是被当作已经反映在结果中
+        with self._status_lock:
+            if watched and generation == self._status_generation:
+                self._status_cache[repo_path] = (fingerprint, time.monotonic(), status)
+        return status
+
+    def invalidate_status(self):
+        """工作区文件有变化（文件监视器报告）时调用，丢弃缓存的仓库状态"""
+        with self._status_lock:
+            self._status_generation += 1
+            self._status_cache.clear()
+
+    def diff(self, path, staged=False, repo_path=None):
+        """单个文件的差异"""
+        args = ["diff", "--cached", "--", path] if staged else ["diff", "--", path]
+        _, output = self.git(args, repo_path, allow_failure=True)
+        return output
+
+    def pull(self, branch="main", repo_path=None, log=None):
+        """从远程仓库拉取更新"""
+        return self.git(["pull", "origin", branch], repo_path, log=log)
+
+    def validate_site(self, repo_path=None):
+        """校验站点中的链接和资源，返回 ValidationReport"""
+        from site_validator import validate_site
+        return validate_site(repo_path or self.blog_dir)
+
+    def audit_site(self, repo_path=None):
+        """按配置中的预算审计页面大小和请求数，返回 AuditReport"""
+        from page_audit import audit_site, load_budgets
+        return audit_site(repo_path or self.blog_dir, load_budgets(self.load_settings()))
+
+    def analyze_css(self, repo_path=None):
+        """检查站点中未使用的样式规则（页面模板中用到的类名也算作已使用），返回 UsageReport"""
+        from css_usage import analyze_site
+        from site_publish import collect_site_files
+
+        repo_path = repo_path or self.blog_dir
+        return analyze_site(repo_path, collect_site_files(repo_path), self.css_safelist(), self.templates.sources())
+
+    def css_safelist(self):
+        """.blog_config 中 css_safelist 列出的始终保留的类名和 id"""
+        names = self.load_settings().get("css_safelist", "").split(",")
+        return [name.strip().lstrip(".#") for name in names if name.strip()]
+
+    def publish_transform(self, repo_path, files, optimize=False, prune=False):
+        """发布时对站点文件的改写：精简样式表和页面内联样式、优化页面加载，都不需要时返回 None"""
+        if not optimize and not prune:
+            return None
+
+        from site_validator import read_html
+
+        if prune:
+            from css_usage import collect_usage, prune_css, prune_inline_styles
+            usage = collect_usage(repo_path, files, self.css_safelist(), self.templates.sources())
+        if optimize:
+            from page_optimizer import PageOptimizer
+            optimizer = PageOptimizer(repo_path)
+
+        def transform(relative, path):
+            if relative.endswith(".css"):
+                return prune_css(read_html(path), usage)[0] if prune else None
+            if not relative.endswith(".html"):
+                return None
+            html = read_html(path)
+            if prune:
+                html = prune_inline_styles(html, usage)[0]
+            if optimize:
+                html = optimizer.optimize(path, html)
+            return html
+
+        return transform
+
+    def check_before_deploy(self, repo_path, log=None, validate=False, audit_mode="off"):
+        """部署前的站点校验和页面性能审计，未通过时抛出异常
+
+        audit_mode 为 "warn" 时在日志中列出超出预算的页面，为 "block" 时超出预算则取消部署。
+        """
+        # 部署前校验站点，有失效链接或缺失资源时中止
+        if validate:
+            report = self.validate_site(repo_path)
+            if log:
+                log(report.summary())
+                for line in report.format_problems():
+                    log(line)
+            if not report.ok:
+                raise Exception("站点校验未通过，已取消部署")
+
+        # 页面性能审计
+        if audit_mode in ("warn", "block"):
+            report = self.audit_site(repo_path)
+            if log:
+                log(report.summary())
+                for line in report.format_problems():
+                    log(line)
+            if audit_mode == "block" and not report.ok:
+                raise Exception("页面性能审计未通过，已取消部署")
+
+    def ensure_repo(self, remote_repo, repo_path, log=None):
+        """确保目录是 Git 仓库并配置了 origin"""
+        # 检查是否是Git仓库
+        if not self.is_git_repo(repo_path):
+            if log:
+                log("错误：所选目录不是Git仓库，正在初始化...")
+            self.git(["init"], repo_path, log, "初始化Git仓库...")
+
+        # 检查是否有远程仓库配置
+        _, remotes = self.git(["remote"], repo_path, allow_failure=True)
+        if "origin" not in remotes.split():
+            self.git(["remote", "add", "origin", remote_repo], repo_path, log, "添加远程仓库...")
+
+    def prepare_bundles(self, log=None, bundler=None):
+        """部署前重新生成打包脚本（开启了脚本打包时）
+
+        打包可能重建文章页、文章列表和订阅源；bundler(log) 给出时交给它执行（界面用它把打包放到写线程中并等待），
+        否则在当前线程中直接调用 build_bundles。
+        """
+        if self.bundles_enabled():
+            (bundler or self.build_bundles)(log)
+
+    def deploy(self, message, remote_repo, branch="main", repo_path=None, log=None, validate=False, audit_mode="off",
+               optimize=False, bundler=None):
+        """提交整个仓库并推送到远程仓库
+
+        这种方式推送的就是博客目录本身，页面加载优化会改写手写的源页面，因此 optimize 为真时只在日志中提示并跳过，
+        需要优化时请使用发布分支（publish_site）。bundler 见 prepare_bundles。
+        """
+        repo_path = repo_path or self.blog_dir
+        self.prepare_bundles(log, bundler)
+        if optimize and log:
+            log("页面加载优化只在「只发布站点文件」方式下进行，提交整个仓库时不改写源页面，已跳过")
+        self.check_before_deploy(repo_path, log, validate, audit_mode)
+        self.ensure_repo(remote_repo, repo_path, log)
+
+        # 检查分支是否存在，不存在则创建
+        self.git(["checkout", branch], repo_path, log, f"切换到{branch}分支...", allow_failure=True)
+
+        # 添加所有文件
+        self.git(["add", "."], repo_path, log, "添加文件...")
+
+        # 提交更改
+        self.git(["commit", "-m", message], repo_path, log, "提交更改...", allow_failure=True)
+
+        # 推送到远程仓库
+        self.git(["push", "origin", branch], repo_path, log, "推送更改...")
+
+    def publish_worktree(self, branch="gh-pages", repo_path=None, log=None):
+        """准备发布分支的 worktree（位于 .git/publish-worktree），返回其路径
+
+        远程已有该分支时以远程版本为准；本地和远程都没有时创建一个不含历史的孤立分支。
+        """
+        from site_publish import WORKTREE_DIRNAME
+
+        repo_path = repo_path or self.blog_dir
+        _, git_dir = self.git(["rev-parse", "--git-common-dir"], repo_path)
+        worktree = os.path.join(repo_path, git_dir.strip(), WORKTREE_DIRNAME)
+
+        # 清理已被手动删除的 worktree 记录
+        self.git(["worktree", "prune"], repo_path, allow_failure=True)
+
+        code, _ = self.git(
+            ["fetch", "origin", f"+refs/heads/{branch}:refs/remotes/origin/{branch}"],
+            repo_path, log, f"获取远程{branch}分支...", allow_failure=True
+        )
+        remote_exists = code == 0
+
+        if os.path.exists(os.path.join(worktree, ".git")):
+            if remote_exists:
+                self.git(["checkout", "-f", "-B", branch, f"origin/{branch}"], worktree, log)
+            return worktree
+
+        if remote_exists:
+            self.git(["worktree", "add", "-f", "-B", branch, worktree, f"origin/{branch}"], repo_path, log, "创建发布目录...")
+            return worktree
+
+        code, _ = self.git(["rev-parse", "--verify", "--quiet", f"refs/heads/{branch}"], repo_path, allow_failure=True)
+        if code == 0:
+            self.git(["worktree", "add", "-f", worktree, branch], repo_path, log, "创建发布目录...")
+        elif self.git_version() >= (2, 42):
+            self.git(["worktree", "add", "-f", "--orphan", "-b", branch, worktree], repo_path, log, "创建发布分支...")
+        else:
+            # 旧版本 git 不支持 worktree add --orphan：先分离检出，再切换到孤立分支并清空索引
+            self.git(["worktree", "add", "-f", "--detach", worktree], repo_path, log, "创建发布分支...")
+            self.git(["checkout", "--orphan", branch], worktree, log)
+            self.git(["rm", "-r", "--cached", "--quiet", "."], worktree, allow_failure=True)
+        return worktree
+
+    def publish_site(self, message, remote_repo, branch="gh-pages", repo_path=None, log=None, validate=False,
+                     audit_mode="off", optimize=False, prune=False, bundler=None):
+        """只把构建好的站点文件提交到发布分支并推送，源文件不进入该分支
+
+        optimize 为真时页面在同步到发布分支时优化，prune 为真时去掉未使用的样式规则，博客目录中的文件保持不变。
+        bundler 见 prepare_bundles。
+        """
+        from site_publish import collect_site_files, sync_tree
+
+        repo_path = repo_path or self.blog_dir
+        self.prepare_bundles(log, bundler)
+        self.check_before_deploy(repo_path, log, validate, audit_mode)
+        self.ensure_repo(remote_repo, repo_path, log)
+
+        files = collect_site_files(repo_path)
+        transform = self.publish_transform(repo_path, files, optimize, prune)
+        worktree = self.publish_worktree(branch, repo_path, log)
+        copied, removed = sync_tree(files, worktree, transform)
+        nojekyll = os.path.join(worktree, ".nojekyll")
+        if not os.path.exists(nojekyll):
+            open(nojekyll, "w").close()
+        if log:
+            log(f"同步站点文件：更新 {copied} 个，删除 {removed} 个")
+
+        self.git(["add", "-A", "."], worktree, log, "添加文件...")
+        code, _ = self.git(["diff", "--cached", "--quiet"], worktree, allow_failure=True)
+        if code == 0:
+            if log:
+                log("站点文件没有变化，无需提交")
+        else:
+            self.git(["commit", "-m", message], worktree, log, "提交更改...")
+
+        # 即使没有新提交也推送一次，补上之前失败的推送
+        self.git(["push", "origin", branch], worktree, log, "推送更改...")
+
+    def deploy_with_settings(self, message, log=None, bundler=None):
+        """按 .blog_config 中保存的部署设置部署（自动部署队列使用），bundler 见 prepare_bundles"""
+        settings = self.load_settings()
+        remote_repo = settings.get("remote_repo", "")
+        if not remote_repo:
+            raise Exception("未设置远程仓库地址")
+
+        options = {
+            "repo_path": settings.get("repo_path") or self.blog_dir,
+            "log": log,
+            "validate": settings.get("validate_before_deploy") == "1",
+            "audit_mode": settings.get("audit_mode", "off"),
+            "optimize": settings.get("optimize_pages") == "1",
+            "bundler": bundler,
+        }
+        if settings.get("publish_mode") == "worktree":
+            options["prune"] = settings.get("prune_css") == "1"
+            self.publish_site(message, remote_repo, settings.get("publish_branch") or "gh-pages", **options)
+        else:
+            self.deploy(message, remote_repo, settings.get("branch") or "main", **options)
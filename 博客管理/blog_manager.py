@@ -1,17 +1,204 @@
-﻿import tkinter as tk
+﻿import time
+
+# 模块开始加载的时间点（用于启动耗时分析）
+_MODULE_STARTED_AT = time.perf_counter()
+
+import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog, messagebox, simpledialog
 import os
-import re
-import webbrowser
 from datetime import datetime
-import subprocess
+import logging
+import shutil
 import tempfile
 import threading
-import time
+import queue
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import font
 
+from blog_engine import BlogEngine, DEFAULT_TAGS, read_text_file, write_text_file
+from syntax_highlight import SyntaxHighlighter
+from large_file import MappedFile, LargeFileView, is_large_file
+from git_status import STATUS_NAMES
+from deploy_queue import DeployQueue, QUEUE_FILENAME, DEFAULT_DELAY
+from git_jobs import GitJobRunner, DEFAULT_TIMEOUT, QUICK_TIMEOUT
+from js_bundles import PAGE_TYPES
+
+# 模块加载完成的时间点（用于启动耗时分析）
+_MODULE_LOADED_AT = time.perf_counter()
+
+# 发布方式：source 提交整个仓库到部署分支，worktree 只把站点文件提交到单独的发布分支
+PUBLISH_MODE_LABELS = {"source": "提交整个仓库", "worktree": "只发布站点文件"}
+
+# 部署前页面性能审计的模式（与 page_audit.AUDIT_MODES 对应）
+AUDIT_MODE_LABELS = {"off": "关闭", "warn": "仅警告", "block": "阻止部署"}
+
+
+def open_in_browser(path):
+    """在浏览器中打开本地文件（webbrowser 在用到时才导入）"""
+    import webbrowser
+    webbrowser.open(f"file:///{path}")
+
+
+class AnimationScheduler:
+    """基于 after() 的非阻塞动画调度器
+
+    每个动画由一个键标识，同一个键上的新动画会取消尚未执行的旧帧（合并），
+    保证界面只显示最新的消息；其他线程的调用通过队列转交给 Tk 主线程执行。
+    回调中的异常与其他 Tk 回调一样交给 root.report_callback_exception 处理。
+    """
+
+    def __init__(self, root, poll_interval=30):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._jobs = {}  # 键 -> 尚未执行的 after id 列表
+        self._calls = queue.Queue()  # 其他线程提交的回调
+        self._main_thread = threading.current_thread()
+        self._poll()
+
+    def _poll(self):
+        """在主线程中执行其他线程提交的回调"""
+        while True:
+            try:
+                func, args = self._calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func(*args)
+            except Exception as e:
+                self.root.report_callback_exception(type(e), e, e.__traceback__)
+        self.root.after(self.poll_interval, self._poll)
+
+    def call_soon(self, func, *args):
+        """尽快在主线程中执行回调（可在任意线程调用）"""
+        if threading.current_thread() is self._main_thread:
+            self.root.after_idle(func, *args)
+        else:
+            self._calls.put((func, args))
+
+    def run(self, key, frames, interval=200):
+        """按固定间隔依次执行各帧，取消同一键上正在进行的动画"""
+        if threading.current_thread() is not self._main_thread:
+            self._calls.put((self.run, (key, frames, interval)))
+            return
+
+        self.cancel(key)
+        if not frames:
+            return
+
+        # 第一帧立即执行，其余帧交给 after() 排队
+        frames[0]()
+        self._jobs[key] = [
+            self.root.after(interval * i, self._run_frame, key, frame)
+            for i, frame in enumerate(frames[1:], start=1)
+        ]
+
+    def _run_frame(self, key, frame):
+        """执行单帧，并从待执行列表中移除"""
+        jobs = self._jobs.get(key)
+        if jobs:
+            jobs.pop(0)
+            if not jobs:
+                del self._jobs[key]
+        frame()
+
+    def cancel(self, key):
+        """取消某个键上尚未执行的动画帧"""
+        for job in self._jobs.pop(key, []):
+            self.root.after_cancel(job)
+
+    def is_running(self, key):
+        """判断某个键上的动画是否仍在进行"""
+        return bool(self._jobs.get(key))
+
+
+class IOWorker:
+    """文件读写工作层
+
+    读操作在线程池中并行执行，写操作在单独的线程中按提交顺序串行执行，
+    完成结果经由调度器的队列回到 Tk 主线程。每个任务可以带一个文档键，
+    同一文档键上的新任务会取消旧任务，旧任务即使已经完成，其结果也会被丢弃。
+    没有给出 on_error 的任务出错时交给 default_error（在主线程中调用）。
+    """
+
+    def __init__(self, scheduler, max_workers=4, default_error=None):
+        self.scheduler = scheduler
+        self.default_error = default_error
+        self._readers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="blog-io-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="blog-io-write")
+        self._lock = threading.Lock()
+        self._tokens = {}  # 文档键 -> 最新任务编号
+        self._futures = {}  # 文档键 -> 最新任务
+
+    def read(self, key, func, *args, on_done=None, on_error=None):
+        """提交读任务（并行执行）"""
+        return self._submit(self._readers, key, func, args, on_done, on_error)
+
+    def write(self, key, func, *args, on_done=None, on_error=None):
+        """提交写任务（串行执行，避免同一文件被并发写入）"""
+        return self._submit(self._writer, key, func, args, on_done, on_error)
+
+    def _submit(self, executor, key, func, args, on_done, on_error):
+        with self._lock:
+            token = self._tokens.get(key, 0) + 1
+            if key is not None:
+                self._tokens[key] = token
+                old = self._futures.get(key)
+                if old is not None:
+                    old.cancel()  # 尚未开始的旧任务直接取消
+            
+            future = executor.submit(func, *args)
+            if key is not None:
+                self._futures[key] = future
+        
+        future.add_done_callback(
+            lambda f: self.scheduler.call_soon(self._deliver, key, token, f, on_done, on_error)
+        )
+        return future
+
+    def _deliver(self, key, token, future, on_done, on_error):
+        """在主线程中分发任务结果，过期的结果直接丢弃"""
+        if future.cancelled():
+            return
+        
+        with self._lock:
+            if key is not None:
+                if self._tokens.get(key) != token:
+                    return
+                self._futures.pop(key, None)
+        
+        error = future.exception()
+        if error is not None:
+            if on_error:
+                on_error(error)
+            elif self.default_error:
+                self.default_error(error)
+            else:
+                logging.getLogger(__name__).error("文件操作失败", exc_info=error)
+        elif on_done:
+            on_done(future.result())
+
+    def cancel(self, key):
+        """取消某个文档键上的任务，已在执行的任务结果也会被丢弃"""
+        with self._lock:
+            self._tokens[key] = self._tokens.get(key, 0) + 1
+            future = self._futures.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def shutdown(self):
+        """关闭线程池（等待写任务完成，避免丢失数据）"""
+        self._readers.shutdown(wait=False, cancel_futures=True)
+        self._writer.shutdown(wait=True)
+
+
 class BlogManager(tk.Tk):
-    def __init__(self):
+    def __init__(self, profile_startup=False):
+        # 启动耗时记录
+        self.profile_startup = profile_startup
+        self._startup_marks = []
+        self._startup_last = time.perf_counter()
+        
         super().__init__()
         self.title("博客管理系统")
         self.geometry("1100x750")
@@ -36,29 +223,120 @@ class BlogManager(tk.Tk):
         
         # 设置中文字体支持
         self.font_config()
+
+        # 动画调度器（所有提示闪烁和过渡效果都通过 after() 驱动）
+        self.animator = AnimationScheduler(self)
         
+        # 文件读写工作层（所有磁盘读写都在后台线程中执行）
+        self.io = IOWorker(
+            self.animator, default_error=lambda e: self.animate_result(f"文件操作失败：{str(e)}", "danger")
+        )
+
         # 博客根目录（默认为当前程序所在目录）
         self.blog_dir = os.path.dirname(os.path.abspath(__file__))
         self.temp_preview_dir = os.path.join(tempfile.gettempdir(), "blog_preview")
-        os.makedirs(self.temp_preview_dir, exist_ok=True)
+        self.mark_startup("窗口与样式")
         
         # 初始化文件路径
         self.initialize_paths()
+        self.mark_startup("路径初始化")
         
-        # 创建界面
-        self.create_widgets()
+        # Git 任务队列（拉取、部署、检查状态等串行执行，可取消，有超时）
+        self.git_jobs = GitJobRunner(
+            self.animator, on_change=self.update_deploy_button_state,
+            default_error=lambda name, e: self.update_deploy_log(f"Git 任务「{name}」失败：{str(e)}")
+        )
+        self.engine.runner = self.git_jobs
+        self.engine.warn = self.update_deploy_log
         
-        # 加载文件列表
-        self.load_file_lists()
+        # 自动部署队列（在后台预热时创建）
+        self.deploy_queue = None
+        self.auto_deploy = False
+        
+        # 部署标签页构建之前产生的部署日志（构建时写入日志框），以及后台备份是否正在进行
+        self.pending_deploy_log = []
+        self.backup_running = False
+        
+        # 草稿保存定时器
+        self.draft_timer = None
+        
+        # 后台预读的数据（首次打开标签页时直接使用）
+        self.warmup_cache = {}
+        
+        # 大文件模式下各编辑器对应的分页视图
+        self.large_views = {}
+        
+        # 博客目录的文件监视器（在后台预热时启动），以及各编辑器载入的内容（用于发现外部修改）
+        self.file_watcher = None
+        self.editor_states = {}
+        
+        # 创建界面（只构建首个标签页，其余标签页首次切换时再构建）
+        self.create_widgets()
+        self.mark_startup("发布标签页")
         
         # 绑定动画事件
         self.bind_animations()
         
-        # 部署状态
-        self.deploying = False
+        # 首帧绘制完成后再开始后台预热
+        self.after_idle(lambda: self.after(0, self.on_first_paint))
         
-        # 草稿保存定时器
-        self.draft_timer = None
+        # 关闭窗口前等待未完成的写入
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+    
+    def on_close(self):
+        """关闭窗口：等待后台写入完成后退出"""
+        self.io.shutdown()
+        self.git_jobs.shutdown()
+        if self.file_watcher:
+            self.file_watcher.stop()
+        if self.deploy_queue:
+            # 未完成的自动部署保存在磁盘上，下次启动时继续
+            self.deploy_queue.stop()
+        self.destroy()
+    
+    def report_callback_exception(self, exc, value, tb):
+        """界面回调中未处理的异常：记录到日志，并在状态栏中提示（窗口程序没有控制台）"""
+        logging.getLogger(__name__).error("界面回调出错", exc_info=(exc, value, tb))
+        if hasattr(self, "result_label"):
+            self.animate_result(f"操作出错：{value}", "danger")
+    
+    def mark_startup(self, name):
+        """记录启动阶段耗时"""
+        now = time.perf_counter()
+        self._startup_marks.append((name, (now - self._startup_last) * 1000))
+        self._startup_last = now
+    
+    def on_first_paint(self):
+        """首帧绘制完成：打印启动耗时并开始后台预热"""
+        self.mark_startup("首帧绘制")
+        
+        if self.profile_startup:
+            print("启动耗时分析：")
+            print(f"  {'模块导入':<10}{(_MODULE_LOADED_AT - _MODULE_STARTED_AT) * 1000:8.1f} ms")
+            for name, elapsed in self._startup_marks:
+                print(f"  {name:<10}{elapsed:8.1f} ms")
+            total = (time.perf_counter() - _MODULE_STARTED_AT) * 1000
+            print(f"  {'合计':<10}{total:8.1f} ms")
+        
+        threading.Thread(target=self._warmup_thread, daemon=True).start()
+    
+    def _warmup_thread(self):
+        """后台预热：创建必要目录、预读样式文件并启动自动部署队列（不触碰任何界面组件）"""
+        started = time.perf_counter()
+        try:
+            self.ensure_dirs()
+            self.start_deploy_queue()
+            self.start_auto_backup()
+            self.start_file_watcher()
+            
+            if os.path.exists(self.css_file) and not is_large_file(self.css_file):
+                content = read_text_file(self.css_file, ['utf-8', 'gbk', 'gb2312', 'iso-8859-1'])
+                self.warmup_cache.setdefault(self.css_file, content)
+        except Exception as e:
+            self.update_deploy_log(f"后台预热失败：{str(e)}")
+        
+        if self.profile_startup:
+            print(f"  后台预热完成：{(time.perf_counter() - started) * 1000:.1f} ms")
     
     def setup_styles(self):
         """设置自定义样式"""
@@ -94,72 +372,25 @@ class BlogManager(tk.Tk):
         self.option_add("*Font", default_font)
     
     def initialize_paths(self):
-        """初始化各文件路径"""
-        self.html_files = {
-            "首页": os.path.join(self.blog_dir, "index.html"),
-            "旧首页": os.path.join(self.blog_dir, "old-index.html"),
-            "文章列表": os.path.join(self.blog_dir, "posts.html"),
-            "关于我": os.path.join(self.blog_dir, "about.html"),
-            "留言板": os.path.join(self.blog_dir, "guestbook.html")
-        }
-        
-        self.css_file = os.path.join(self.blog_dir, "style.css")
-        self.js_dir = os.path.join(self.blog_dir, "js")
-        self.posts_dir = os.path.join(self.blog_dir, "posts")
-        self.img_dir = os.path.join(self.blog_dir, "img")
-        self.drafts_dir = os.path.join(self.blog_dir, "drafts")
+        """初始化各文件路径（发布逻辑都在 BlogEngine 中）"""
+        if getattr(self, "engine", None) is None:
+            self.engine = BlogEngine(self.blog_dir)
+        else:
+            self.engine.set_blog_dir(self.blog_dir)
         
-        # 确保必要目录存在
-        for dir_path in [self.js_dir, self.posts_dir, self.img_dir, self.drafts_dir]:
-            if not os.path.exists(dir_path):
-                os.makedirs(dir_path)
+        self.html_files = self.engine.html_files
+        self.css_file = self.engine.css_file
+        self.js_dir = self.engine.js_dir
+        self.posts_dir = self.engine.posts_dir
+        self.img_dir = self.engine.img_dir
+        self.drafts_dir = self.engine.drafts_dir
         
-        # 文章模板
-        self.post_template = """<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-  <meta charset="UTF-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-  <title>{title} - TangShiMei</title>
-  <link rel="stylesheet" href="../style.css" />
-</head>
-<body>
-  <header style="position: relative;">
-    <h1 class="site-title">{title}</h1>
-    <button id="theme-toggle" class="theme-btn" title="切换夜间模式">🌙</button>
-  </header>
-
-  <main class="post-content">
-    <img src="img/{img_name}" alt="{title}" class="post-banner" />
-    <p class="post-date">发布于 {date}</p>
-    <div class="post-tags">{tags}</div>
+        # 必要目录在后台预热或首次写入时再创建（见 ensure_dirs）
     
-{content}
-  </main>
-
-  <footer style="margin-top: 60px;">
-    <a href="posts.html" class="btn">← 返回文章列表</a>
-    <br><br>
-    <small>© 2025 TangShiMei</small>
-  </footer>
-
-    <script src="../js/main.js"></script>
-</body>
-</html>
-"""
-        
-        # 文章列表项模板
-        self.post_list_item = """
-    <!-- 新增文章 -->
-    <article class="card">
-      <img src="img/{img_name}" alt="{title}" class="post-img" />
-      <h2>{title}</h2>
-      <p class="post-date">{date}</p>
-      <div class="post-tags">{tags}</div>
-      <p>{summary}</p>
-      <a href="posts/{filename}" class="btn">阅读全文</a>
-    </article>
-"""
+    def ensure_dirs(self):
+        """确保必要目录存在"""
+        self.engine.ensure_dirs()
+        os.makedirs(self.temp_preview_dir, exist_ok=True)
     
     def create_widgets(self):
         """创建界面组件"""
@@ -190,18 +421,40 @@ class BlogManager(tk.Tk):
         
         self.tab_control.pack(expand=1, fill="both", padx=10, pady=10)
         
-        # 初始化各个标签页
-        self.init_post_tab()  # 重点优化
-        self.init_manage_tab()
-        self.init_deploy_tab()  # 重点优化
-        self.init_pages_tab()
-        self.init_css_tab()
-        self.init_js_tab()
+        # 各标签页的初始化函数，首次切换到该标签页时才调用
+        self.tab_builders = {
+            str(self.tab_post): self.init_post_tab,  # 重点优化
+            str(self.tab_manage): self.init_manage_tab,
+            str(self.tab_deploy): self.init_deploy_tab,  # 重点优化
+            str(self.tab_pages): self.init_pages_tab,
+            str(self.tab_css): self.init_css_tab,
+            str(self.tab_js): self.init_js_tab
+        }
+        
+        # 首个标签页立即构建，其余延迟构建
+        self.build_tab(self.tab_post)
         
         # 状态栏
         self.status_bar = ttk.Label(self, text="就绪", relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
     
+    def build_tab(self, tab):
+        """构建尚未初始化的标签页（每个标签页只构建一次）"""
+        builder = self.tab_builders.pop(str(tab), None)
+        if builder is None:
+            return False
+        
+        started = time.perf_counter()
+        builder()
+        if self.profile_startup:
+            tab_name = self.tab_control.tab(tab, "text")
+            print(f"  首次构建「{tab_name}」：{(time.perf_counter() - started) * 1000:.1f} ms")
+        return True
+    
+    def is_tab_built(self, tab):
+        """判断标签页是否已构建"""
+        return str(tab) not in self.tab_builders
+    
     def init_post_tab(self):
         """初始化发布文章标签页（重点优化）"""
         # 使用卡片式布局
@@ -229,7 +482,7 @@ class BlogManager(tk.Tk):
         
         ttk.Label(info_card, text="文章标签：").grid(row=0, column=2, sticky=tk.W, pady=5, padx=(20, 20))
         self.tags_entry = ttk.Entry(info_card, width=30)
-        self.tags_entry.insert(0, "技术,博客")  # 默认标签
+        self.tags_entry.insert(0, DEFAULT_TAGS)  # 默认标签
         self.tags_entry.grid(row=0, column=3, sticky=tk.W, pady=5)
         
         # 封面图片
@@ -246,6 +499,17 @@ class BlogManager(tk.Tk):
         self.preview_img_button = ttk.Button(img_frame, text="预览图片", command=self.preview_selected_image)
         self.preview_img_button.pack(side=tk.LEFT)
         
+        self.import_images_btn = ttk.Button(img_frame, text="批量导入", command=self.import_images)
+        self.import_images_btn.pack(side=tk.LEFT, padx=(10, 0))
+        
+        self.import_folder_btn = ttk.Button(
+            img_frame, text="导入文件夹", command=lambda: self.import_images(folder=True)
+        )
+        self.import_folder_btn.pack(side=tk.LEFT, padx=(10, 0))
+        
+        self.import_progress = ttk.Progressbar(img_frame, mode="determinate", length=160)
+        self.import_progress.pack(side=tk.LEFT, padx=(10, 0))
+        
         # 摘要卡片
         summary_card = ttk.Frame(main_frame, style="Card.TFrame", padding=10)
         summary_card.pack(fill=tk.X, pady=(0, 10))
@@ -337,7 +601,7 @@ class BlogManager(tk.Tk):
         img_path = os.path.join(self.img_dir, img_name)
         if os.path.exists(img_path):
             try:
-                webbrowser.open(f"file:///{img_path}")
+                open_in_browser(img_path)
             except Exception as e:
                 self.result_label.config(text=f"预览失败：{str(e)}", foreground=self.colors["danger"])
         else:
@@ -353,21 +617,15 @@ class BlogManager(tk.Tk):
                 self.result_label.config(text="内容为空，不保存草稿", foreground=self.colors["warning"])
             return
         
-        # 生成草稿文件名
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{title[:20].lower().replace(' ', '-')}_{timestamp}.txt"
-        draft_path = os.path.join(self.drafts_dir, filename)
-        
         try:
-            # 保存草稿内容
-            with open(draft_path, "w", encoding="utf-8") as f:
-                f.write(f"标题：{title}\n")
-                f.write(f"日期：{self.date_entry.get()}\n")
-                f.write(f"标签：{self.tags_entry.get()}\n")
-                f.write(f"图片：{self.img_entry.get()}\n")
-                f.write(f"摘要：{self.summary_entry.get('1.0', tk.END)}\n")
-                f.write("---\n")  # 分隔符
-                f.write(content)
+            filename = self.engine.save_draft(
+                title,
+                self.date_entry.get(),
+                self.tags_entry.get(),
+                self.img_entry.get(),
+                self.summary_entry.get('1.0', tk.END),
+                content
+            )
             
             if not silent:
                 self.animate_result(f"草稿已保存：{filename}", "success")
@@ -380,11 +638,7 @@ class BlogManager(tk.Tk):
     def load_draft(self):
         """加载草稿"""
         # 获取草稿列表
-        drafts = []
-        if os.path.exists(self.drafts_dir):
-            for filename in os.listdir(self.drafts_dir):
-                if filename.endswith(".txt"):
-                    drafts.append((filename, os.path.join(self.drafts_dir, filename)))
+        drafts = self.engine.list_drafts()
         
         if not drafts:
             messagebox.showinfo("提示", "没有找到草稿")
@@ -418,56 +672,26 @@ class BlogManager(tk.Tk):
             draft_path = drafts[index][1]
             
             try:
-                with open(draft_path, "r", encoding="utf-8") as f:
-                    lines = f.readlines()
-                
-                # 解析草稿内容
-                title = ""
-                date = ""
-                tags = ""
-                img = ""
-                summary = ""
-                content = []
-                section = "header"
-                
-                for line in lines:
-                    line = line.rstrip("\n")
-                    if line == "---":
-                        section = "content"
-                        continue
-                        
-                    if section == "header":
-                        if line.startswith("标题："):
-                            title = line[3:]
-                        elif line.startswith("日期："):
-                            date = line[3:]
-                        elif line.startswith("标签："):
-                            tags = line[3:]
-                        elif line.startswith("图片："):
-                            img = line[3:]
-                        elif line.startswith("摘要："):
-                            summary = line[3:]
-                    else:
-                        content.append(line)
+                draft = self.engine.read_draft(draft_path)
                 
                 # 填充到表单
                 self.title_entry.delete(0, tk.END)
-                self.title_entry.insert(0, title)
+                self.title_entry.insert(0, draft["title"])
                 
                 self.date_entry.delete(0, tk.END)
-                self.date_entry.insert(0, date or datetime.today().strftime("%Y-%m-%d"))
+                self.date_entry.insert(0, draft["date"] or datetime.today().strftime("%Y-%m-%d"))
                 
                 self.tags_entry.delete(0, tk.END)
-                self.tags_entry.insert(0, tags)
+                self.tags_entry.insert(0, draft["tags"])
                 
                 self.img_entry.delete(0, tk.END)
-                self.img_entry.insert(0, img)
+                self.img_entry.insert(0, draft["img"])
                 
                 self.summary_entry.delete(1.0, tk.END)
-                self.summary_entry.insert(tk.END, summary)
+                self.summary_entry.insert(tk.END, draft["summary"])
                 
                 self.content_text.delete(1.0, tk.END)
-                self.content_text.insert(tk.END, "\n".join(content))
+                self.content_text.insert(tk.END, draft["content"])
                 
                 self.animate_result(f"已加载草稿：{drafts[index][0]}", "success")
                 draft_window.destroy()
@@ -515,6 +739,53 @@ class BlogManager(tk.Tk):
         self.branch_var = tk.StringVar(value="main")
         ttk.Entry(branch_frame, textvariable=self.branch_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         
+        # 发布方式（只发布站点文件时使用单独的发布分支和 git worktree）
+        publish_frame = ttk.Frame(settings_card)
+        publish_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(publish_frame, text="发布方式：", width=12).pack(side=tk.LEFT)
+        self.publish_mode_var = tk.StringVar(value=PUBLISH_MODE_LABELS["source"])
+        ttk.Combobox(
+            publish_frame, textvariable=self.publish_mode_var, values=list(PUBLISH_MODE_LABELS.values()),
+            state="readonly", width=14
+        ).pack(side=tk.LEFT, padx=5)
+        ttk.Label(publish_frame, text="发布分支：").pack(side=tk.LEFT, padx=(10, 0))
+        self.publish_branch_var = tk.StringVar(value="gh-pages")
+        ttk.Entry(publish_frame, textvariable=self.publish_branch_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        
+        # 自动部署（发布、编辑、删除文章后合并成一次提交在后台推送）
+        auto_frame = ttk.Frame(settings_card)
+        auto_frame.pack(fill=tk.X, pady=5)
+        
+        self.auto_deploy_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            auto_frame, text="发布或编辑文章后自动部署", variable=self.auto_deploy_var
+        ).pack(side=tk.LEFT)
+        ttk.Label(auto_frame, text="等待秒数：").pack(side=tk.LEFT, padx=(10, 0))
+        self.auto_deploy_delay_var = tk.StringVar(value=str(DEFAULT_DELAY))
+        ttk.Spinbox(
+            auto_frame, from_=5, to=3600, increment=5, textvariable=self.auto_deploy_delay_var, width=6
+        ).pack(side=tk.LEFT, padx=5)
+        
+        # 站点地址（用于订阅源和站点地图中的绝对链接，留空时根据远程仓库推断）
+        site_frame = ttk.Frame(settings_card)
+        site_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(site_frame, text="站点地址：", width=12).pack(side=tk.LEFT)
+        self.site_url_var = tk.StringVar()
+        ttk.Entry(site_frame, textvariable=self.site_url_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        
+        # 本地备份目录（留空时使用博客目录旁边的“<博客目录名>-backups”）
+        backup_dir_frame = ttk.Frame(settings_card)
+        backup_dir_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(backup_dir_frame, text="备份目录：", width=12).pack(side=tk.LEFT)
+        self.backup_dir_var = tk.StringVar()
+        ttk.Entry(backup_dir_frame, textvariable=self.backup_dir_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        ttk.Button(backup_dir_frame, text="浏览", command=self.browse_backup_dir).pack(side=tk.LEFT, padx=5)
+        self.auto_backup_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(backup_dir_frame, text="每天自动备份", variable=self.auto_backup_var).pack(side=tk.LEFT, padx=5)
+        
         # 保存设置按钮
         ttk.Button(settings_card, text="保存设置", command=self.save_deploy_settings).pack(anchor=tk.E, pady=10)
         
@@ -543,6 +814,54 @@ class BlogManager(tk.Tk):
         self.deploy_btn = ttk.Button(btn_frame, text="开始部署", command=self.start_deploy, style="Accent.TButton")
         self.deploy_btn.pack(side=tk.LEFT, padx=10)
         
+        self.validate_btn = ttk.Button(btn_frame, text="校验站点", command=self.check_site)
+        self.validate_btn.pack(side=tk.LEFT, padx=10)
+        
+        self.cancel_git_btn = ttk.Button(btn_frame, text="取消", command=self.cancel_git_jobs, state="disabled")
+        self.cancel_git_btn.pack(side=tk.LEFT, padx=10)
+        
+        # 部署前校验站点（可选）
+        self.validate_before_deploy_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            btn_frame, text="部署前校验链接和资源", variable=self.validate_before_deploy_var
+        ).pack(side=tk.LEFT, padx=10)
+        
+        # 页面加载优化（关键 CSS、预连接、defer）
+        self.optimize_pages_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            btn_frame, text="优化页面加载", variable=self.optimize_pages_var
+        ).pack(side=tk.LEFT, padx=10)
+        
+        # 发布分支模式下去掉未使用的样式规则（博客目录中的样式表不变）
+        self.prune_css_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            btn_frame, text="发布时精简样式", variable=self.prune_css_var
+        ).pack(side=tk.LEFT, padx=10)
+        
+        # 页面性能审计
+        audit_frame = ttk.Frame(deploy_ops_card)
+        audit_frame.pack(fill=tk.X, pady=5)
+        
+        self.audit_btn = ttk.Button(audit_frame, text="性能审计", command=self.check_page_weight)
+        self.audit_btn.pack(side=tk.LEFT, padx=10)
+        
+        ttk.Label(audit_frame, text="部署前审计：").pack(side=tk.LEFT)
+        self.audit_mode_var = tk.StringVar(value=AUDIT_MODE_LABELS["off"])
+        ttk.Combobox(
+            audit_frame, textvariable=self.audit_mode_var, values=list(AUDIT_MODE_LABELS.values()),
+            state="readonly", width=10
+        ).pack(side=tk.LEFT, padx=5)
+        
+        # 本地备份（包括草稿、配置和尚未推送的修改）
+        self.backup_btn = ttk.Button(
+            audit_frame, text="立即备份", command=self.start_backup,
+            state=tk.DISABLED if self.backup_running else tk.NORMAL
+        )
+        self.backup_btn.pack(side=tk.LEFT, padx=(20, 10))
+        ttk.Button(audit_frame, text="备份与恢复", command=self.show_backups).pack(side=tk.LEFT, padx=10)
+        self.backup_progress = ttk.Progressbar(audit_frame, mode="determinate", length=160)
+        self.backup_progress.pack(side=tk.LEFT, padx=10)
+        
         # 部署状态指示器
         self.deploy_status_frame = ttk.Frame(deploy_ops_card, height=20)
         self.deploy_status_frame.pack(fill=tk.X, pady=5)
@@ -554,6 +873,37 @@ class BlogManager(tk.Tk):
         )
         self.deploy_status_label.pack(anchor=tk.W)
         
+        # Git 任务队列提示（正在执行的任务和排队数）
+        self.git_queue_var = tk.StringVar()
+        ttk.Label(
+            self.deploy_status_frame, textvariable=self.git_queue_var, foreground=self.colors["secondary"]
+        ).pack(anchor=tk.W)
+        self.update_deploy_button_state(self.git_jobs.current)
+        
+        # 仓库状态（按已暂存、已修改、未跟踪、冲突分组，双击文件查看差异）
+        status_card = ttk.Frame(frame, style="Card.TFrame", padding=15)
+        status_card.pack(fill=tk.X, pady=(0, 20))
+        
+        ttk.Label(status_card, text="仓库状态", style="Header.TLabel").pack(anchor=tk.W, pady=(0, 10))
+        
+        self.repo_status_var = tk.StringVar(value="尚未检查，点击“检查状态”获取")
+        ttk.Label(status_card, textvariable=self.repo_status_var, wraplength=900).pack(anchor=tk.W, pady=(0, 5))
+        
+        tree_frame = ttk.Frame(status_card)
+        tree_frame.pack(fill=tk.X)
+        
+        self.status_tree = ttk.Treeview(tree_frame, columns=("status",), height=6)
+        self.status_tree.heading("#0", text="文件")
+        self.status_tree.heading("status", text="状态")
+        self.status_tree.column("status", width=120, stretch=False)
+        self.status_tree.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        status_scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.status_tree.yview)
+        status_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.status_tree.config(yscrollcommand=status_scrollbar.set)
+        self.status_tree.bind("<Double-1>", self.show_status_diff)
+        self.status_items = {}
+        
         # 部署日志
         log_card = ttk.Frame(frame, style="Card.TFrame", padding=15)
         log_card.pack(fill=tk.BOTH, expand=True)
@@ -564,6 +914,13 @@ class BlogManager(tk.Tk):
         self.deploy_log.pack(fill=tk.BOTH, expand=True)
         self.deploy_log.config(state=tk.DISABLED)
         
+        # 写入标签页构建之前产生的日志（例如启动时的自动备份）
+        if self.pending_deploy_log:
+            self.deploy_log.config(state=tk.NORMAL)
+            self.deploy_log.insert(tk.END, "".join(self.pending_deploy_log))
+            self.deploy_log.config(state=tk.DISABLED)
+            self.pending_deploy_log.clear()
+        
         # 加载保存的部署设置
         self.load_deploy_settings()
     
@@ -574,262 +931,524 @@ class BlogManager(tk.Tk):
             self.repo_path_var.set(path)
             self.blog_dir = path
             self.initialize_paths()  # 重新初始化路径
+            self.start_deploy_queue()
+            self.start_file_watcher()
+    
+    def browse_backup_dir(self):
+        """浏览选择备份目录"""
+        path = filedialog.askdirectory(title="选择备份目录")
+        if path:
+            self.backup_dir_var.set(path)
+    
+    def start_auto_backup(self):
+        """开启了每天自动备份且距上次备份超过一天时在后台备份（可在任意线程调用）"""
+        try:
+            if self.engine.load_settings().get("auto_backup") == "1" and self.engine.backup_due():
+                self.update_deploy_log("距上次备份已超过一天，开始自动备份...")
+                self.start_backup()
+        except Exception as e:
+            self.update_deploy_log(f"检查备份失败：{str(e)}")
+    
+    def start_backup(self):
+        """在后台为博客目录创建增量快照（不阻塞文章的保存）"""
+        if threading.current_thread() is not threading.main_thread():
+            self.animator.call_soon(self.start_backup)
+            return
+        
+        if self.backup_running:
+            return
+        
+        def progress(done, total):
+            self.animator.call_soon(self.update_backup_progress, done, total)
+        
+        def on_done(snapshot):
+            self.set_backup_running(False)
+            self.update_backup_progress(1, 1)
+            self.update_deploy_log(f"备份完成：{snapshot.label()}")
+        
+        def on_error(e):
+            self.set_backup_running(False)
+            self.update_deploy_log(f"备份失败：{str(e)}")
+        
+        self.set_backup_running(True)
+        self.update_backup_progress(0, 1)
+        self.update_deploy_log(f"开始备份到 {self.engine.backup_dir()}")
+        self.io.read("backup", self.engine.backup, progress, on_done=on_done, on_error=on_error)
+    
+    def set_backup_running(self, running):
+        """记录后台备份状态，部署标签页已构建时同步“立即备份”按钮"""
+        self.backup_running = running
+        if hasattr(self, "backup_btn"):
+            self.backup_btn.config(state=tk.DISABLED if running else tk.NORMAL)
+    
+    def update_backup_progress(self, done, total):
+        # 部署标签页尚未构建时没有进度条（启动时的自动备份）
+        if hasattr(self, "backup_progress"):
+            self.backup_progress.config(maximum=max(total, 1), value=done)
+    
+    def show_backups(self):
+        """列出备份快照，可以恢复到指定文件夹或删除快照"""
+        window = tk.Toplevel(self)
+        window.title("备份与恢复")
+        window.geometry("700x420")
+        window.transient(self)
+        
+        ttk.Label(window, text=f"备份目录：{self.engine.backup_dir()}").pack(anchor=tk.W, padx=10, pady=10)
+        snapshot_list = tk.Listbox(window, exportselection=False)
+        snapshot_list.pack(fill=tk.BOTH, expand=True, padx=10)
+        status = ttk.Label(window, text="正在读取快照...")
+        status.pack(fill=tk.X, padx=10, pady=5)
+        snapshots = []
+        
+        def on_error(e):
+            status.config(text=f"操作失败：{str(e)}", foreground=self.colors["danger"])
+        
+        def refresh():
+            self.io.read("backup_list", self.engine.list_backups, on_done=on_list, on_error=on_error)
+        
+        def on_list(items):
+            if not window.winfo_exists():
+                return
+            # 最新的快照排在最前面
+            snapshots[:] = list(reversed(items))
+            snapshot_list.delete(0, tk.END)
+            for snapshot in snapshots:
+                snapshot_list.insert(tk.END, snapshot.label())
+            status.config(text=f"共 {len(items)} 个快照" if items else "还没有备份", foreground=self.colors["dark"])
+        
+        def selected():
+            selection = snapshot_list.curselection()
+            if not selection:
+                status.config(text="请先选择一个快照", foreground=self.colors["warning"])
+                return None
+            return snapshots[selection[0]]
+        
+        def restore():
+            snapshot = selected()
+            if snapshot is None:
+                return
+            target = filedialog.askdirectory(title="选择恢复到的文件夹（建议使用空文件夹）", parent=window)
+            if not target:
+                return
+            if os.path.abspath(target) == os.path.abspath(self.blog_dir) and not messagebox.askyesno(
+                "覆盖博客目录", "将用快照中的文件覆盖博客目录中的同名文件，是否继续？", parent=window
+            ):
+                return
+            status.config(text="正在恢复...", foreground=self.colors["warning"])
+            self.io.write(
+                None, self.engine.restore_backup, snapshot.name, target,
+                on_done=lambda count: status.config(
+                    text=f"已恢复 {count} 个文件到 {target}", foreground=self.colors["success"]
+                ),
+                on_error=on_error
+            )
+        
+        def delete():
+            snapshot = selected()
+            if snapshot is None or not messagebox.askyesno(
+                "删除快照", f"确定要删除快照 {snapshot.name} 吗？", parent=window
+            ):
+                return
+            
+            def on_done(freed):
+                status.config(text=f"已删除快照，释放 {freed / 1048576:.1f} MB", foreground=self.colors["success"])
+                refresh()
+            
+            self.io.read("backup_delete", self.engine.delete_backup, snapshot.name, on_done=on_done, on_error=on_error)
+        
+        btn_frame = ttk.Frame(window)
+        btn_frame.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Button(btn_frame, text="恢复到文件夹...", command=restore).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="删除快照", command=delete).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="关闭", command=window.destroy).pack(side=tk.RIGHT, padx=5)
+        refresh()
     
     def detect_remote_repo(self):
         """检测当前远程仓库"""
         repo_path = self.repo_path_var.get()
-        if not os.path.exists(os.path.join(repo_path, ".git")):
+        if not self.engine.is_git_repo(repo_path):
             self.update_deploy_log("错误：所选目录不是Git仓库")
             return
-            
-        try:
-            # 执行git remote命令
-            process = subprocess.Popen(
-                "git remote get-url origin",
-                cwd=repo_path,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                encoding="utf-8"
-            )
-            
-            output, _ = process.communicate()
-            if process.returncode == 0 and output.strip():
-                self.remote_repo_var.set(output.strip())
-                self.update_deploy_log(f"已检测到远程仓库：{output.strip()}")
+        
+        def on_done(remote):
+            if remote:
+                self.remote_repo_var.set(remote)
+                self.update_deploy_log(f"已检测到远程仓库：{remote}")
             else:
                 self.update_deploy_log("未设置远程仓库，请手动输入")
-                
-        except Exception as e:
-            self.update_deploy_log(f"检测失败：{str(e)}")
+        
+        self.git_jobs.submit(
+            "检测远程仓库", self.engine.remote_url, repo_path,
+            timeout=QUICK_TIMEOUT,
+            on_done=on_done,
+            on_error=lambda e: self.update_deploy_log(f"检测失败：{str(e)}")
+        )
     
     def check_repo_status(self):
         """检查仓库状态"""
-        self.update_deploy_log("检查仓库状态...")
-        threading.Thread(target=self._check_repo_status_thread, daemon=True).start()
-    
-    def _check_repo_status_thread(self):
-        """检查仓库状态的线程"""
         repo_path = self.repo_path_var.get()
-        if not os.path.exists(os.path.join(repo_path, ".git")):
+        if not self.engine.is_git_repo(repo_path):
             self.update_deploy_log("错误：所选目录不是Git仓库")
             return
-            
-        try:
-            # 执行git status命令
-            process = subprocess.Popen(
-                "git status",
-                cwd=repo_path,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                encoding="utf-8"
-            )
-            
-            for line in process.stdout:
-                self.update_deploy_log(line.strip())
-            
-            process.wait()
-            
-            if process.returncode != 0:
-                self.update_deploy_log(f"命令执行失败，返回代码：{process.returncode}")
-                
-        except Exception as e:
-            self.update_deploy_log(f"检查失败：{str(e)}")
+        
+        self.update_deploy_log("检查仓库状态...")
+        self.git_jobs.submit(
+            "检查状态", self.engine.repo_status, repo_path,
+            timeout=QUICK_TIMEOUT,
+            on_done=self.show_repo_status,
+            on_error=lambda e: self.update_deploy_log(f"检查失败：{str(e)}")
+        )
     
-    def pull_from_remote(self):
-        """从远程仓库拉取更新"""
-        if self.deploying:
-            messagebox.showinfo("提示", "正在执行部署操作，请稍后再试")
+    def show_repo_status(self, status):
+        """在状态列表中显示结构化的仓库状态"""
+        self.update_deploy_log(status.summary())
+        self.repo_status_var.set(status.summary())
+        self.status_tree.delete(*self.status_tree.get_children())
+        self.status_items = {}
+        
+        groups = [
+            ("已暂存", [(code, path, orig, "staged") for code, path, orig in status.staged]),
+            ("已修改", [(code, path, orig, "modified") for code, path, orig in status.modified]),
+            ("未跟踪", [("?", path, None, "untracked") for path in status.untracked]),
+            ("冲突", [("U", path, None, "unmerged") for _, path in status.unmerged]),
+        ]
+        for name, files in groups:
+            if not files:
+                continue
+            parent = self.status_tree.insert("", tk.END, text=f"{name}（{len(files)}）", open=True)
+            for code, path, orig, kind in files:
+                label = "未跟踪" if kind == "untracked" else STATUS_NAMES.get(code, code)
+                text = f"{orig} → {path}" if orig else path
+                item = self.status_tree.insert(parent, tk.END, text=text, values=(label,))
+                self.status_items[item] = (path, kind)
+    
+    def show_status_diff(self, event):
+        """双击状态列表中的文件：在部署日志中显示该文件的差异"""
+        item = self.status_tree.focus()
+        if item not in self.status_items:
             return
-            
-        self.update_deploy_log("开始从远程拉取更新...")
-        self.deploying = True
-        self.update_deploy_button_state()
-        threading.Thread(target=self._pull_thread, daemon=True).start()
+        
+        path, kind = self.status_items[item]
+        if kind == "untracked":
+            self.update_deploy_log(f"未跟踪的新文件：{path}")
+            return
+        
+        def on_done(output):
+            self.update_deploy_log(f"{path} 的差异：")
+            for line in output.splitlines() or ["（没有文本差异）"]:
+                self.update_deploy_log(line)
+        
+        self.git_jobs.submit(
+            "查看差异", self.engine.diff, path, staged=kind == "staged", repo_path=self.repo_path_var.get(),
+            timeout=QUICK_TIMEOUT,
+            on_done=on_done,
+            on_error=lambda e: self.update_deploy_log(f"获取差异失败：{str(e)}")
+        )
     
-    def _pull_thread(self):
-        """拉取更新的线程"""
+    def pull_from_remote(self):
+        """从远程仓库拉取更新（加入 Git 任务队列）"""
         repo_path = self.repo_path_var.get()
         branch = self.branch_var.get() or "main"
         
-        try:
-            # 执行git pull命令
-            process = subprocess.Popen(
-                f"git pull origin {branch}",
-                cwd=repo_path,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                encoding="utf-8"
-            )
-            
-            for line in process.stdout:
-                self.update_deploy_log(line.strip())
-            
-            process.wait()
-            
-            if process.returncode == 0:
-                self.update_deploy_log("拉取更新成功")
-                self.animate_deploy_status("拉取更新成功", "success")
-            else:
-                self.update_deploy_log(f"拉取更新失败，返回代码：{process.returncode}")
-                self.animate_deploy_status("拉取更新失败", "danger")
-                
-        except Exception as e:
+        def on_done(_):
+            self.update_deploy_log("拉取更新成功")
+            self.animate_deploy_status("拉取更新成功", "success")
+            self.check_repo_status()
+        
+        def on_error(e):
             self.update_deploy_log(f"拉取失败：{str(e)}")
             self.animate_deploy_status("拉取更新失败", "danger")
-        finally:
-            self.deploying = False
-            self.update_deploy_button_state()
+        
+        self.update_deploy_log("开始从远程拉取更新...")
+        self.git_jobs.submit(
+            "拉取更新", self.engine.pull, branch, repo_path, log=self.update_deploy_log,
+            timeout=self.git_timeout(), on_done=on_done, on_error=on_error
+        )
     
     def start_deploy(self):
-        """开始部署（在新线程中执行）"""
-        if self.deploying:
-            messagebox.showinfo("提示", "正在执行部署操作，请稍后再试")
-            return
-            
+        """开始部署（加入 Git 任务队列，在后台执行）"""
         # 保存部署设置
         self.save_deploy_settings()
         
         # 检查必要信息
-        if not self.remote_repo_var.get().strip():
+        remote_repo = self.remote_repo_var.get().strip()
+        if not remote_repo:
             messagebox.showwarning("警告", "请设置远程仓库地址")
             return
             
         # 获取更新说明
         msg = self.deploy_msg.get().strip() or f"更新于 {datetime.today().strftime('%Y-%m-%d')}"
         
+        repo_path = self.repo_path_var.get()
+        options = {}
+        if self.get_publish_mode() == "worktree":
+            publish = self.engine.publish_site
+            branch = self.publish_branch_var.get().strip() or "gh-pages"
+            options["prune"] = self.prune_css_var.get()
+        else:
+            publish = self.engine.deploy
+            branch = self.branch_var.get() or "main"
+        
+        def on_done(_):
+            # 手动部署已经提交了全部更改，清空自动部署队列
+            if self.deploy_queue:
+                self.deploy_queue.clear()
+            self.update_deploy_log("部署完成！几分钟后刷新网页即可看到更新。")
+            self.animate_deploy_status("部署成功", "success")
+            self.check_repo_status()
+        
+        def on_error(e):
+            self.update_deploy_log(f"部署失败：{str(e)}")
+            self.animate_deploy_status("部署失败", "danger")
+        
         self.update_deploy_log("开始部署...")
-        self.deploying = True
-        self.update_deploy_button_state()
         self.animate_deploy_status("正在部署...", "warning")
-        
-        # 在新线程中执行部署，避免界面冻结
-        threading.Thread(target=self._deploy_thread, args=(msg,), daemon=True).start()
+        self.git_jobs.submit(
+            "部署", publish, msg, remote_repo, branch, repo_path,
+            log=self.update_deploy_log,
+            validate=self.validate_before_deploy_var.get(),
+            audit_mode=self.get_audit_mode(),
+            optimize=self.optimize_pages_var.get(), bundler=self.build_bundles_for_deploy,
+            timeout=self.git_timeout(), on_done=on_done, on_error=on_error, **options
+        )
+    
+    def build_bundles_for_deploy(self, log):
+        """部署任务中的脚本打包（在 Git 任务线程中调用）
+
+        打包会重写文章页和文章列表，交给写线程执行并等待完成，避免与其他写操作同时修改同一批文件；
+        出错时由部署任务报告。
+        """
+        return self.io.write(None, self.engine.build_bundles, log, on_error=lambda e: None).result()
+    
+    def cancel_git_jobs(self):
+        """取消正在执行和排队中的 Git 任务"""
+        if self.git_jobs.busy:
+            self.update_deploy_log("正在取消 Git 任务...")
+            self.git_jobs.cancel_all()
     
-    def _deploy_thread(self, msg):
-        """部署的线程函数"""
+    def git_timeout(self):
+        """拉取和部署任务的超时时间（秒），可在 .blog_config 中用 git_timeout 设置"""
+        try:
+            return max(int(self.engine.load_settings().get("git_timeout") or DEFAULT_TIMEOUT), 10)
+        except ValueError:
+            return DEFAULT_TIMEOUT
+    
+    def check_site(self):
+        """手动校验站点"""
         repo_path = self.repo_path_var.get()
-        branch = self.branch_var.get() or "main"
+        self.update_deploy_log("开始校验站点...")
+        threading.Thread(target=self.run_site_validation, args=(repo_path,), daemon=True).start()
+    
+    def run_site_validation(self, repo_path):
+        """校验站点并把结果写入部署日志，返回是否通过（在工作线程中执行）"""
+        try:
+            report = self.engine.validate_site(repo_path)
+        except Exception as e:
+            self.update_deploy_log(f"站点校验失败：{str(e)}")
+            return False
         
+        self.update_deploy_log(report.summary())
+        for line in report.format_problems():
+            self.update_deploy_log(line)
+        return report.ok
+    
+    def get_repo_path(self):
+        """部署使用的仓库目录；部署标签页还没有打开时读取保存的设置"""
+        if hasattr(self, "repo_path_var"):
+            return self.repo_path_var.get()
         try:
-            # 检查是否是Git仓库
-            if not os.path.exists(os.path.join(repo_path, ".git")):
-                self.update_deploy_log("错误：所选目录不是Git仓库，正在初始化...")
-                self.run_git_command(f"git init", "初始化Git仓库...")
-            
-            # 检查是否有远程仓库配置
-            process = subprocess.Popen(
-                "git remote",
-                cwd=repo_path,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                encoding="utf-8"
-            )
-            output, _ = process.communicate()
-            
-            if "origin" not in output:
-                self.update_deploy_log("添加远程仓库...")
-                self.run_git_command(
-                    f"git remote add origin {self.remote_repo_var.get()}", 
-                    "添加远程仓库..."
-                )
-            
-            # 检查分支是否存在，不存在则创建
-            self.run_git_command(f"git checkout {branch}", f"切换到{branch}分支...", allow_failure=True)
-            
-            # 添加所有文件
-            self.run_git_command(f"git add .", "添加文件...")
-            
-            # 提交更改
-            self.run_git_command(f'git commit -m "{msg}"', "提交更改...", allow_failure=True)
-            
-            # 推送到远程仓库
-            self.run_git_command(f"git push origin {branch}", "推送更改...")
-            
-            self.update_deploy_log("部署完成！几分钟后刷新网页即可看到更新。")
-            self.animate_deploy_status("部署成功", "success")
-            
+            return self.engine.load_settings().get("repo_path") or self.blog_dir
+        except OSError:
+            return self.blog_dir
+    
+    def get_publish_mode(self):
+        """当前选择的发布方式（source / worktree）"""
+        label = self.publish_mode_var.get()
+        for mode, mode_label in PUBLISH_MODE_LABELS.items():
+            if mode_label == label:
+                return mode
+        return "source"
+    
+    def get_audit_mode(self):
+        """当前选择的审计模式（off / warn / block）"""
+        label = self.audit_mode_var.get()
+        for mode, mode_label in AUDIT_MODE_LABELS.items():
+            if mode_label == label:
+                return mode
+        return "off"
+    
+    def check_page_weight(self):
+        """手动审计页面大小和请求数"""
+        repo_path = self.repo_path_var.get()
+        self.update_deploy_log("开始页面性能审计...")
+        threading.Thread(target=self.run_page_audit, args=(repo_path,), daemon=True).start()
+    
+    def run_page_audit(self, repo_path):
+        """审计页面并把各页面的字节数和超出预算的项写入部署日志（在工作线程中执行）"""
+        try:
+            report = self.engine.audit_site(repo_path)
         except Exception as e:
-            self.update_deploy_log(f"部署失败：{str(e)}")
-            self.animate_deploy_status("部署失败", "danger")
-        finally:
-            self.deploying = False
-            self.update_deploy_button_state()
+            self.update_deploy_log(f"页面性能审计失败：{str(e)}")
+            return
+        
+        self.update_deploy_log(report.summary())
+        for line in report.format_pages(limit=20):
+            self.update_deploy_log(line)
+        for line in report.format_problems():
+            self.update_deploy_log(line)
+    
+    def update_deploy_button_state(self, current=None, queued=0):
+        """Git 任务队列变化时更新取消按钮和队列提示（任务串行执行，其他按钮可以继续排队）"""
+        if not hasattr(self, "cancel_git_btn"):
+            return
+        self.cancel_git_btn.config(state="normal" if current or queued else "disabled")
+        if current:
+            text = f"正在执行：{current.name}"
+            if queued:
+                text += f"（另有 {queued} 个任务排队）"
+        else:
+            text = ""
+        self.git_queue_var.set(text)
     
-    def update_deploy_button_state(self):
-        """更新部署按钮状态"""
-        state = "disabled" if self.deploying else "normal"
-        self.deploy_btn.config(state=state)
-        self.check_status_btn.config(state=state)
-        self.pull_btn.config(state=state)
+    # ----------------------
+    # 自动部署
+    # ----------------------
+    def start_deploy_queue(self):
+        """按当前设置创建自动部署队列，开启了自动部署时继续处理上次未完成的部署"""
+        settings = self.engine.load_settings()
+        self.auto_deploy = settings.get("auto_deploy") == "1"
+        try:
+            delay = max(int(settings.get("auto_deploy_delay") or DEFAULT_DELAY), 1)
+        except ValueError:
+            delay = DEFAULT_DELAY
+        
+        if self.deploy_queue:
+            self.deploy_queue.stop()
+        self.deploy_queue = DeployQueue(
+            os.path.join(self.blog_dir, QUEUE_FILENAME),
+            self._auto_deploy,
+            log=self.log_auto_deploy,
+            delay=delay
+        )
+        if self.auto_deploy:
+            self.deploy_queue.resume()
+    
+    def _auto_deploy(self, message):
+        """自动部署队列的部署函数（在计时器线程中执行，使用已保存的部署设置）
+
+        部署作为一个 Git 任务排队，与手动部署、拉取等串行执行。
+        """
+        self.git_jobs.submit(
+            "自动部署", self.engine.deploy_with_settings, message, log=self.log_auto_deploy,
+            bundler=self.build_bundles_for_deploy, timeout=self.git_timeout()
+        ).result()
+    
+    def log_auto_deploy(self, message, status=None):
+        """自动部署的消息（可在任意线程调用）：写入部署日志，部署结果同时显示在发布页"""
+        self.animator.call_soon(self._show_auto_deploy_message, message, status)
+    
+    def _show_auto_deploy_message(self, message, status):
+        if hasattr(self, "deploy_log"):
+            self.update_deploy_log(message)
+        if status:
+            self.animate_result(message, status)
+    
+    def queue_auto_deploy(self, reason):
+        """开启了自动部署时把一次变更加入队列（排在已提交的写入之后）"""
+        if self.auto_deploy and self.deploy_queue:
+            self.io.write(None, self.deploy_queue.enqueue, reason)
     
     def save_deploy_settings(self):
         """保存部署设置"""
         settings = {
             "repo_path": self.repo_path_var.get(),
             "remote_repo": self.remote_repo_var.get(),
-            "branch": self.branch_var.get()
+            "branch": self.branch_var.get(),
+            "site_url": self.site_url_var.get().strip(),
+            "publish_mode": self.get_publish_mode(),
+            "publish_branch": self.publish_branch_var.get().strip(),
+            "auto_deploy": "1" if self.auto_deploy_var.get() else "0",
+            "auto_deploy_delay": self.auto_deploy_delay_var.get().strip(),
+            "validate_before_deploy": "1" if self.validate_before_deploy_var.get() else "0",
+            "audit_mode": self.get_audit_mode(),
+            "optimize_pages": "1" if self.optimize_pages_var.get() else "0",
+            "prune_css": "1" if self.prune_css_var.get() else "0",
+            "backup_dir": self.backup_dir_var.get().strip(),
+            "auto_backup": "1" if self.auto_backup_var.get() else "0"
         }
         
         try:
-            with open(os.path.join(self.blog_dir, ".blog_config"), "w", encoding="utf-8") as f:
-                for key, value in settings.items():
-                    f.write(f"{key}={value}\n")
-            
+            old_site_url = self.engine.site_url()
+            self.engine.save_settings(settings)
+            
+            # 站点地址变化后重新生成订阅源、站点地图和标签/归档页
+            if self.engine.site_url() != old_site_url:
+                self.io.write(
+                    None, self.engine.rebuild_generated,
+                    on_done=lambda _: self.update_deploy_log("订阅源、站点地图和标签页已按新的站点地址重新生成"),
+                    on_error=lambda e: self.update_deploy_log(f"重新生成订阅源失败：{str(e)}")
+                )
+            self.start_deploy_queue()
             self.update_deploy_log("部署设置已保存")
+            if not self.engine.site_url():
+                self.update_deploy_log("未设置站点地址，也无法从远程仓库地址推断，不会生成订阅源和站点地图")
         except Exception as e:
             self.update_deploy_log(f"保存设置失败：{str(e)}")
     
     def load_deploy_settings(self):
         """加载部署设置"""
-        config_path = os.path.join(self.blog_dir, ".blog_config")
-        if os.path.exists(config_path):
-            try:
-                with open(config_path, "r", encoding="utf-8") as f:
-                    for line in f:
-                        line = line.strip()
-                        if "=" in line:
-                            key, value = line.split("=", 1)
-                            if key == "repo_path" and value:
-                                self.repo_path_var.set(value)
-                            elif key == "remote_repo" and value:
-                                self.remote_repo_var.set(value)
-                            elif key == "branch" and value:
-                                self.branch_var.set(value)
-                
-                self.update_deploy_log("已加载部署设置")
-            except Exception as e:
-                self.update_deploy_log(f"加载设置失败：{str(e)}")
-    
-    def run_git_command(self, command, message, allow_failure=False):
-        """运行Git命令"""
-        self.update_deploy_log(message)
-        
-        process = subprocess.Popen(
-            command,
-            cwd=self.repo_path_var.get(),
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            encoding="utf-8"
-        )
-        
-        # 实时输出日志
-        for line in process.stdout:
-            self.update_deploy_log(line.strip())
+        try:
+            settings = self.engine.load_settings()
+        except Exception as e:
+            self.update_deploy_log(f"加载设置失败：{str(e)}")
+            return
         
-        process.wait()
+        if not settings:
+            return
         
-        if process.returncode != 0 and not allow_failure:
-            raise Exception(f"命令执行失败：{command}，返回代码：{process.returncode}")
+        if settings.get("repo_path"):
+            self.repo_path_var.set(settings["repo_path"])
+        if settings.get("remote_repo"):
+            self.remote_repo_var.set(settings["remote_repo"])
+        if settings.get("branch"):
+            self.branch_var.set(settings["branch"])
+        if settings.get("site_url"):
+            self.site_url_var.set(settings["site_url"])
+        if settings.get("publish_mode") in PUBLISH_MODE_LABELS:
+            self.publish_mode_var.set(PUBLISH_MODE_LABELS[settings["publish_mode"]])
+        if settings.get("publish_branch"):
+            self.publish_branch_var.set(settings["publish_branch"])
+        if "auto_deploy" in settings:
+            self.auto_deploy_var.set(settings["auto_deploy"] == "1")
+        if settings.get("auto_deploy_delay"):
+            self.auto_deploy_delay_var.set(settings["auto_deploy_delay"])
+        if "validate_before_deploy" in settings:
+            self.validate_before_deploy_var.set(settings["validate_before_deploy"] == "1")
+        if "optimize_pages" in settings:
+            self.optimize_pages_var.set(settings["optimize_pages"] == "1")
+        if "prune_css" in settings:
+            self.prune_css_var.set(settings["prune_css"] == "1")
+        if settings.get("audit_mode") in AUDIT_MODE_LABELS:
+            self.audit_mode_var.set(AUDIT_MODE_LABELS[settings["audit_mode"]])
+        if settings.get("backup_dir"):
+            self.backup_dir_var.set(settings["backup_dir"])
+        if "auto_backup" in settings:
+            self.auto_backup_var.set(settings["auto_backup"] == "1")
+        
+        self.update_deploy_log("已加载部署设置")
     
     def update_deploy_log(self, message):
-        """更新部署日志"""
+        """更新部署日志（可在任意线程调用，其他线程的调用转交给主线程）"""
+        if threading.current_thread() is not threading.main_thread():
+            self.animator.call_soon(self.update_deploy_log, message)
+            return
+        line = f"{datetime.now().strftime('%H:%M:%S')} - {message}\n"
+        if not hasattr(self, "deploy_log"):
+            # 部署标签页尚未构建，构建时再写入日志框
+            self.pending_deploy_log.append(line)
+            return
         self.deploy_log.config(state=tk.NORMAL)
-        self.deploy_log.insert(tk.END, f"{datetime.now().strftime('%H:%M:%S')} - {message}\n")
+        self.deploy_log.insert(tk.END, line)
         self.deploy_log.see(tk.END)
         self.deploy_log.config(state=tk.DISABLED)
         self.update_idletasks()
@@ -888,8 +1507,17 @@ class BlogManager(tk.Tk):
         self.preview_edit_btn = ttk.Button(btn_frame, text="预览文章", command=self.preview_edited_post)
         self.preview_edit_btn.pack(side=tk.LEFT, padx=10)
         
+        self.history_btn = ttk.Button(btn_frame, text="历史版本", command=self.show_revision_history)
+        self.history_btn.pack(side=tk.LEFT, padx=10)
+        
+        self.legacy_import_btn = ttk.Button(btn_frame, text="导入旧文章", command=self.show_legacy_import)
+        self.legacy_import_btn.pack(side=tk.LEFT, padx=10)
+        
         self.edit_result_label = ttk.Label(right_frame, text="", foreground=self.colors["success"])
         self.edit_result_label.pack(fill=tk.X, pady=5)
+        
+        # 加载文章列表
+        self.load_posts_list()
     
     def format_edit_text(self, prefix, suffix=""):
         """格式化编辑中的文章文本"""
@@ -931,6 +1559,7 @@ class BlogManager(tk.Tk):
         
         self.page_editor = scrolledtext.ScrolledText(right_frame, wrap=tk.WORD)
         self.page_editor.pack(fill=tk.BOTH, expand=True, pady=5)
+        self.page_highlighter = SyntaxHighlighter(self.page_editor, "html")
         
         # 按钮区域
         btn_frame = ttk.Frame(right_frame)
@@ -942,8 +1571,19 @@ class BlogManager(tk.Tk):
         self.preview_page_btn = ttk.Button(btn_frame, text="预览页面", command=self.preview_page)
         self.preview_page_btn.pack(side=tk.LEFT, padx=10)
         
+        # 查找（大文件模式下在整个文件中查找）
+        self.page_find_entry = ttk.Entry(btn_frame, width=20)
+        self.page_find_entry.pack(side=tk.LEFT, padx=(20, 5))
+        ttk.Button(
+            btn_frame, text="查找",
+            command=lambda: self.find_in_editor(self.page_editor, self.page_find_entry.get(), self.animate_page_result)
+        ).pack(side=tk.LEFT)
+        
         self.page_result_label = ttk.Label(right_frame, text="", foreground=self.colors["success"])
         self.page_result_label.pack(fill=tk.X, pady=5)
+        
+        # 加载页面列表
+        self.load_page_list()
     
     def init_css_tab(self):
         """初始化样式管理标签页"""
@@ -954,6 +1594,7 @@ class BlogManager(tk.Tk):
         
         self.css_editor = scrolledtext.ScrolledText(frame, wrap=tk.WORD)
         self.css_editor.pack(fill=tk.BOTH, expand=True, pady=5)
+        self.css_highlighter = SyntaxHighlighter(self.css_editor, "css")
         
         # 按钮区域
         btn_frame = ttk.Frame(frame)
@@ -965,11 +1606,34 @@ class BlogManager(tk.Tk):
         self.preview_css_btn = ttk.Button(btn_frame, text="预览效果", command=self.preview_css)
         self.preview_css_btn.pack(side=tk.LEFT, padx=10)
         
-        self.css_result_label = ttk.Label(frame, text="", foreground=self.colors["success"])
-        self.css_result_label.pack(fill=tk.X, pady=5)
+        # 查找（大文件模式下在整个文件中查找）
+        self.css_find_entry = ttk.Entry(btn_frame, width=20)
+        self.css_find_entry.pack(side=tk.LEFT, padx=(20, 5))
+        ttk.Button(
+            btn_frame, text="查找",
+            command=lambda: self.find_in_editor(self.css_editor, self.css_find_entry.get(), self.animate_css_result)
+        ).pack(side=tk.LEFT)
         
-        # 加载CSS内容
-        self.load_css_content()
+        # 页面模板：导出内置模板供修改，修改后重建全部页面
+        template_frame = ttk.Frame(frame)
+        template_frame.pack(fill=tk.X, pady=(0, 5))
+        
+        ttk.Button(template_frame, text="导出模板", command=self.export_templates).pack(side=tk.LEFT, padx=10)
+        
+        self.rebuild_site_btn = ttk.Button(template_frame, text="重建全部页面", command=self.rebuild_site)
+        self.rebuild_site_btn.pack(side=tk.LEFT, padx=10)
+        
+        self.rebuild_progress = ttk.Progressbar(template_frame, mode="determinate", length=240)
+        self.rebuild_progress.pack(side=tk.LEFT, padx=10)
+        
+        self.css_usage_btn = ttk.Button(template_frame, text="检查未使用的样式", command=self.check_css_usage)
+        self.css_usage_btn.pack(side=tk.LEFT, padx=10)
+        
+        self.css_result_label = ttk.Label(frame, text="", foreground=self.colors["success"])
+        self.css_result_label.pack(fill=tk.X, pady=5)
+        
+        # 加载CSS内容
+        self.load_css_content()
     
     def init_js_tab(self):
         """初始化脚本管理标签页"""
@@ -992,12 +1656,40 @@ class BlogManager(tk.Tk):
         self.add_js_btn = ttk.Button(left_frame, text="添加JS文件", command=self.add_js_file)
         self.add_js_btn.pack(fill=tk.X, pady=5)
         
+        # 各类页面加载的脚本（按顺序打包成一个文件）
+        ttk.Label(left_frame, text="页面脚本：", style="Header.TLabel").pack(anchor=tk.W, pady=(10, 5))
+        
+        self.bundle_type_var = tk.StringVar(value=PAGE_TYPES["post"])
+        bundle_type_combo = ttk.Combobox(
+            left_frame, textvariable=self.bundle_type_var, values=list(PAGE_TYPES.values()), state="readonly"
+        )
+        bundle_type_combo.pack(fill=tk.X)
+        bundle_type_combo.bind("<<ComboboxSelected>>", lambda e: self.show_bundle_scripts())
+        
+        self.bundle_listbox = tk.Listbox(left_frame, width=25, height=6)
+        self.bundle_listbox.pack(fill=tk.X, pady=5)
+        
+        bundle_btns = ttk.Frame(left_frame)
+        bundle_btns.pack(fill=tk.X)
+        for text, command in (
+            ("加入", self.add_bundle_script), ("移除", self.remove_bundle_script),
+            ("上移", lambda: self.move_bundle_script(-1)), ("下移", lambda: self.move_bundle_script(1))
+        ):
+            ttk.Button(bundle_btns, text=text, width=4, command=command).pack(side=tk.LEFT, expand=True, fill=tk.X)
+        
+        self.build_bundles_btn = ttk.Button(left_frame, text="保存并打包", command=self.build_bundles)
+        self.build_bundles_btn.pack(fill=tk.X, pady=5)
+        
+        self.bundles = self.engine.bundle_config()
+        self.show_bundle_scripts()
+        
         # 右侧编辑区域
         right_frame = ttk.Frame(frame)
         right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
         
         self.js_editor = scrolledtext.ScrolledText(right_frame, wrap=tk.WORD)
         self.js_editor.pack(fill=tk.BOTH, expand=True, pady=5)
+        self.js_highlighter = SyntaxHighlighter(self.js_editor, "js")
         
         # 按钮区域
         btn_frame = ttk.Frame(right_frame)
@@ -1011,59 +1703,317 @@ class BlogManager(tk.Tk):
         
         self.js_result_label = ttk.Label(right_frame, text="", foreground=self.colors["success"])
         self.js_result_label.pack(fill=tk.X, pady=5)
+        
+        # 加载JS文件列表
+        self.load_js_files()
     
-    def load_file_lists(self):
-        """加载各种文件列表"""
-        # 加载页面列表
+    def bundle_type(self):
+        """当前选择的页面类型"""
+        label = self.bundle_type_var.get()
+        return next((kind for kind, name in PAGE_TYPES.items() if name == label), "post")
+    
+    def show_bundle_scripts(self):
+        """显示当前页面类型的脚本列表"""
+        self.bundle_listbox.delete(0, tk.END)
+        for name in self.bundles.get(self.bundle_type(), []):
+            self.bundle_listbox.insert(tk.END, name)
+    
+    def add_bundle_script(self):
+        """把左侧选中的脚本加入当前页面类型"""
+        selection = self.js_listbox.curselection()
+        if not selection:
+            self.animate_js_result("请先在上方列表中选择脚本", "warning")
+            return
+        name = self.js_listbox.get(selection[0])
+        scripts = self.bundles.setdefault(self.bundle_type(), [])
+        if name not in scripts:
+            scripts.append(name)
+            self.show_bundle_scripts()
+    
+    def remove_bundle_script(self):
+        selection = self.bundle_listbox.curselection()
+        if selection:
+            del self.bundles[self.bundle_type()][selection[0]]
+            self.show_bundle_scripts()
+    
+    def move_bundle_script(self, offset):
+        """调整脚本的加载顺序"""
+        selection = self.bundle_listbox.curselection()
+        if not selection:
+            return
+        scripts = self.bundles[self.bundle_type()]
+        index = selection[0]
+        target = index + offset
+        if 0 <= target < len(scripts):
+            scripts[index], scripts[target] = scripts[target], scripts[index]
+            self.show_bundle_scripts()
+            self.bundle_listbox.selection_set(target)
+    
+    def build_bundles(self):
+        """保存各类页面的脚本配置并打包"""
+        def build():
+            self.engine.save_bundle_config(self.bundles)
+            return self.engine.build_bundles()
+        
+        def on_done(built):
+            self.build_bundles_btn.config(state=tk.NORMAL)
+            self.animate_js_result(f"打包完成：生成 {len(set(item['file'] for item in built.values()))} 个脚本文件", "success")
+            if built:
+                self.queue_auto_deploy("更新脚本打包")
+        
+        def on_error(e):
+            self.build_bundles_btn.config(state=tk.NORMAL)
+            self.animate_js_result(f"打包失败：{str(e)}", "danger")
+        
+        self.build_bundles_btn.config(state=tk.DISABLED)
+        self.animate_js_result("正在打包脚本...", "warning")
+        self.io.write("build_bundles", build, on_done=on_done, on_error=on_error)
+    
+    def load_page_list(self):
+        """加载页面列表"""
         self.page_listbox.delete(0, tk.END)
         for page_name in self.html_files.keys():
             self.page_listbox.insert(tk.END, page_name)
-        
-        # 加载文章列表
-        self.load_posts_list()
-        
-        # 加载JS文件列表
-        self.load_js_files()
     
     def load_posts_list(self):
         """加载文章列表"""
+        # 文章管理标签页尚未构建时无需刷新，构建时会自行加载
+        if not self.is_tab_built(self.tab_manage):
+            return
+        
         self.posts_listbox.delete(0, tk.END)
         self.posts_files = []
         
-        if os.path.exists(self.posts_dir):
-            for filename in os.listdir(self.posts_dir):
-                if filename.endswith(".html"):
-                    self.posts_listbox.insert(tk.END, filename)
-                    self.posts_files.append(os.path.join(self.posts_dir, filename))
+        for filename in self.engine.list_posts():
+            self.posts_listbox.insert(tk.END, filename)
+            self.posts_files.append(os.path.join(self.posts_dir, filename))
     
     def load_js_files(self):
         """加载JS文件列表"""
+        # 脚本管理标签页尚未构建时无需刷新，构建时会自行加载
+        if not self.is_tab_built(self.tab_js):
+            return
+        
         self.js_listbox.delete(0, tk.END)
         self.js_files = []
         
-        if os.path.exists(self.js_dir):
-            for filename in os.listdir(self.js_dir):
-                if filename.endswith(".js"):
-                    self.js_listbox.insert(tk.END, filename)
-                    self.js_files.append(os.path.join(self.js_dir, filename))
+        for filename in self.engine.list_js_files():
+            self.js_listbox.insert(tk.END, filename)
+            self.js_files.append(os.path.join(self.js_dir, filename))
     
     def load_css_content(self):
         """加载CSS内容，尝试多种编码格式"""
         if os.path.exists(self.css_file):
-            # 尝试多种编码格式
-            encodings = ['utf-8', 'gbk', 'gb2312', 'iso-8859-1']
-            for encoding in encodings:
-                try:
-                    with open(self.css_file, "r", encoding=encoding) as f:
-                        content = f.read()
-                        self.css_editor.delete(1.0, tk.END)
-                        self.css_editor.insert(tk.END, content)
-                    return  # 成功读取则退出
-                except UnicodeDecodeError:
-                    continue  # 尝试下一种编码
+            # 大文件只映射文件并分页加载
+            if is_large_file(self.css_file):
+                self.io.read(
+                    "css_editor", MappedFile, self.css_file,
+                    on_done=lambda mapped: self.attach_large_file(self.css_editor, mapped, self.animate_css_result, "css"),
+                    on_error=lambda e: self.animate_css_result(f"加载失败：{str(e)}", "danger")
+                )
+                return
+            
+            # 优先使用后台预热读取的内容，否则尝试多种编码格式读取
+            content = self.warmup_cache.pop(self.css_file, None)
+            if content is None:
+                content = read_text_file(self.css_file, ['utf-8', 'gbk', 'gb2312', 'iso-8859-1'])
+            
+            if content is not None:
+                self.css_editor.delete(1.0, tk.END)
+                self.css_editor.insert(tk.END, content)
+                self.track_text_editor("css", self.css_editor, self.css_file, self.animate_css_result, content)
+                return  # 成功读取则退出
             # 如果所有编码都失败
             self.css_result_label.config(text=f"无法解码CSS文件，请检查文件编码", foreground=self.colors["danger"])
     
+    # ----------------------
+    # 外部修改
+    # ----------------------
+    def start_file_watcher(self):
+        """监视博客目录，在管理工具之外修改的文件只刷新受影响的列表条目、编辑器和文章目录（可在工作线程中调用）"""
+        from fs_watch import create_watcher
+        
+        if self.file_watcher:
+            self.file_watcher.stop()
+        # 监视器运行期间仓库状态才能缓存（工作区变化由 on_files_changed 通知引擎）
+        self.engine.status_watch_root = None
+        self.engine.invalidate_status()
+        try:
+            self.file_watcher = create_watcher(
+                self.blog_dir, lambda changes: self.animator.call_soon(self.on_files_changed, changes),
+                on_error=lambda e: self.update_deploy_log(f"处理文件变化失败：{str(e)}")
+            )
+            self.engine.status_watch_root = self.blog_dir
+        except OSError as e:
+            self.file_watcher = None
+            self.update_deploy_log(f"无法监视博客目录，外部修改的文件需要手动刷新：{str(e)}")
+    
+    def on_files_changed(self, changes):
+        """处理一批外部修改（相对博客目录的路径集合，{"*"} 表示需要全部刷新）"""
+        from fs_watch import RESCAN
+        
+        self.engine.invalidate_status()
+        if RESCAN in changes:
+            self.load_posts_list()
+            self.load_js_files()
+            self.warmup_cache.clear()
+            for key in list(self.editor_states):
+                self.check_editor(key)
+            self.io.write("sync_external", self.engine.sync_external_changes,
+                          {f"posts/{name}" for name in self.engine.list_posts()},
+                          on_error=lambda e: self.update_deploy_log(f"更新文章目录失败：{str(e)}"))
+            return
+        
+        names = {}
+        for relative in changes:
+            directory, _, name = relative.rpartition("/")
+            names.setdefault(directory, set()).add(name)
+        
+        self.update_file_list(self.tab_manage, "posts_listbox", "posts_files", self.posts_dir,
+                              {name for name in names.get("posts", ()) if name.endswith(".html")})
+        self.update_file_list(self.tab_js, "js_listbox", "js_files", self.js_dir,
+                              {name for name in names.get("js", ()) if name.endswith(".js")})
+        for relative in changes:
+            self.warmup_cache.pop(os.path.join(self.blog_dir, relative), None)
+        
+        for key, state in list(self.editor_states.items()):
+            if state["relative"] & changes:
+                self.check_editor(key)
+        
+        if names.get("posts") or names.get("sources"):
+            def on_done(updated):
+                if updated:
+                    self.update_deploy_log(f"外部修改了 {updated} 篇文章，已更新文章目录")
+            
+            self.io.write(None, self.engine.sync_external_changes, changes, on_done=on_done,
+                          on_error=lambda e: self.update_deploy_log(f"更新文章目录失败：{str(e)}"))
+    
+    def update_file_list(self, tab, listbox_attr, files_attr, directory, names):
+        """在文件列表中只增删变化的文件，不重新扫描目录（标签页尚未构建时构建时会自行加载）"""
+        if not names or not self.is_tab_built(tab):
+            return
+        listbox = getattr(self, listbox_attr)
+        files = getattr(self, files_attr)
+        for name in sorted(names):
+            path = os.path.join(directory, name)
+            exists = os.path.isfile(path)
+            if exists and path not in files:
+                listbox.insert(tk.END, name)
+                files.append(path)
+            elif not exists and path in files:
+                index = files.index(path)
+                listbox.delete(index)
+                files.pop(index)
+    
+    def _relative_path(self, path):
+        return os.path.relpath(path, self.blog_dir).replace(os.sep, "/")
+    
+    def track_text_editor(self, key, editor, path, show_result, content, encodings=None):
+        """记录文本编辑器载入的文件和内容，文件在外部被修改时据此判断编辑器中是否有未保存的修改"""
+        def set_text(text):
+            editor.delete(1.0, tk.END)
+            editor.insert(tk.END, text)
+        
+        def read():
+            if not os.path.exists(path):
+                return None
+            return read_text_file(path, encodings) if encodings else read_text_file(path)
+        
+        self.editor_states[key] = {
+            "relative": {self._relative_path(path)},
+            "name": os.path.basename(path),
+            "read": read,
+            "get": lambda: editor.get("1.0", tk.END),
+            "set": set_text,
+            "show": show_result,
+            "loaded": content,
+            "stale": False,
+        }
+    
+    def track_post_editor(self, post_file, loaded):
+        """记录文章编辑器载入的文章（页面和源文件任一被外部修改都重新检查），loaded 为 (标题, 正文)"""
+        def get():
+            return self.post_edit_title.get(), self.post_edit_content.get("1.0", tk.END)
+        
+        def set_post(post):
+            title, content = post
+            self.post_edit_title.delete(0, tk.END)
+            self.post_edit_title.insert(0, title or "")
+            self.post_edit_content.delete(1.0, tk.END)
+            self.post_edit_content.insert(tk.END, content or "")
+        
+        def read():
+            if not os.path.exists(post_file):
+                return None
+            return self.engine.read_post(post_file)
+        
+        self.editor_states["post"] = {
+            "relative": {self._relative_path(post_file), self._relative_path(self.engine.source_path(post_file))},
+            "name": os.path.basename(post_file),
+            "read": read,
+            "get": get,
+            "set": set_post,
+            "show": self.animate_result,
+            "loaded": loaded,
+            "stale": False,
+        }
+    
+    @staticmethod
+    def _same_content(a, b):
+        """比较编辑器内容（忽略换行符差异和首尾空白，文章比较标题和正文）"""
+        if isinstance(a, tuple) and isinstance(b, tuple):
+            return len(a) == len(b) and all(BlogManager._same_content(x, y) for x, y in zip(a, b))
+        
+        def normalize(text):
+            return (text or "").replace("\r\n", "\n").strip()
+        return normalize(a) == normalize(b)
+    
+    def check_editor(self, key):
+        """编辑器对应的文件在外部被修改：编辑器没有未保存的修改时重新载入，否则标记为已过期"""
+        state = self.editor_states.get(key)
+        if state is None:
+            return
+        
+        def on_done(disk):
+            # 期间编辑器已切换到其他文件
+            if self.editor_states.get(key) is not state:
+                return
+            current = state["get"]()
+            if disk is None:
+                state["stale"] = True
+                state["show"](f"{state['name']} 已在外部被删除或无法读取，保存时会确认是否重新写入", "warning")
+            elif self._same_content(disk, current):
+                state["loaded"], state["stale"] = disk, False
+            elif self._same_content(state["loaded"], current):
+                state["set"](disk)
+                state["loaded"], state["stale"] = disk, False
+                state["show"](f"{state['name']} 已在外部修改，已重新载入", "info")
+            else:
+                state["stale"] = True
+                state["show"](f"{state['name']} 已在外部修改，编辑器中有未保存的修改，保存时会确认是否覆盖", "warning")
+        
+        self.io.read(
+            f"check:{key}", state["read"],
+            on_done=on_done,
+            on_error=lambda e: state["show"](f"检查外部修改失败：{str(e)}", "danger")
+        )
+    
+    def confirm_overwrite(self, key):
+        """保存前确认：文件在外部被修改过且编辑器中有未保存的修改时询问是否覆盖"""
+        state = self.editor_states.get(key)
+        if state is None or not state["stale"]:
+            return True
+        return messagebox.askyesno(
+            "文件已在外部修改",
+            f"{state['name']} 在编辑器之外被修改过，保存将覆盖这些修改。是否继续？"
+        )
+    
+    def editor_saved(self, key, content):
+        """保存成功后以保存的内容作为编辑器的基准"""
+        state = self.editor_states.get(key)
+        if state is not None:
+            state["loaded"], state["stale"] = content, False
+    
     def on_post_select(self, event):
         """处理文章选择事件"""
         selection = self.posts_listbox.curselection()
@@ -1077,59 +2027,87 @@ class BlogManager(tk.Tk):
         post_file = self.posts_files[index]
         self.current_post_file = post_file
         
-        # 解析HTML文件获取标题和内容
-        try:
-            # 尝试多种编码读取
-            encodings = ['utf-8', 'gbk', 'gb2312']
-            content = None
-            
-            for encoding in encodings:
-                try:
-                    with open(post_file, "r", encoding=encoding) as f:
-                        content = f.read()
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if content is None:
-                raise Exception("无法解码文章文件，请检查文件编码")
-                
-            # 提取标题
-            title_match = re.search(r'<h1 class="site-title">(.*?)</h1>', content)
-            if title_match:
-                title = title_match.group(1)
+        def on_done(result):
+            title, edit_content = result
+            if title is not None:
                 self.post_edit_title.delete(0, tk.END)
                 self.post_edit_title.insert(0, title)
-            
-            # 提取正文内容
-            content_match = re.search(r'<main class="post-content">(.*?)</main>', content, re.DOTALL)
-            if content_match:
-                main_content = content_match.group(1)
-                # 转换HTML内容为编辑格式
-                edit_content = self.html_to_edit_format(main_content)
+            if edit_content is not None:
                 self.post_edit_content.delete(1.0, tk.END)
                 self.post_edit_content.insert(tk.END, edit_content)
-            
+            self.track_post_editor(post_file, result)
             self.animate_result(f"已加载：{os.path.basename(post_file)}", "success")
-        except Exception as e:
-            self.animate_result(f"加载失败：{str(e)}", "danger")
-    
-    def html_to_edit_format(self, html_content):
-        """将HTML内容转换为编辑格式"""
-        # 移除图片和日期行
-        content = re.sub(r'<img.*?>', '', html_content, flags=re.DOTALL)
-        content = re.sub(r'<p class="post-date">.*?</p>', '', content, flags=re.DOTALL)
-        content = re.sub(r'<div class="post-tags">.*?</div>', '', content, flags=re.DOTALL)
-        
-        # 转换h2标签为# 格式
-        content = re.sub(r'<h2>(.*?)</h2>', r'# \1', content, flags=re.DOTALL)
         
-        # 转换p标签为普通文本
-        content = re.sub(r'<p>(.*?)</p>', r'\1', content, flags=re.DOTALL)
+        # 在后台读取并解析，连续点击时只保留最后一次的结果
+        self.io.read(
+            "post_editor", self.engine.read_post, post_file,
+            on_done=on_done,
+            on_error=lambda e: self.animate_result(f"加载失败：{str(e)}", "danger")
+        )
+    
+    def attach_large_file(self, editor, mapped, show_result, key=None):
+        """以大文件模式在编辑器中分页显示文件（key 为编辑器名称，大文件模式下不检查外部修改）"""
+        self.detach_large_file(editor)
+        if key:
+            self.editor_states.pop(key, None)
+        
+        def confirm_leave():
+            return messagebox.askyesno("未保存的修改", "当前片段有未保存的修改，继续翻页将丢弃这些修改。是否继续？")
+        
+        self.large_views[str(editor)] = LargeFileView(
+            editor, mapped,
+            on_status=lambda text: show_result(text, "info"),
+            confirm_leave=confirm_leave
+        )
+    
+    def detach_large_file(self, editor):
+        """退出编辑器的大文件模式"""
+        view = self.large_views.pop(str(editor), None)
+        if view is not None:
+            view.detach()
+    
+    def save_large_file(self, editor, show_result, success_text):
+        """大文件模式下只写回当前窗口中变化的部分，编辑器不在大文件模式时返回 False"""
+        view = self.large_views.get(str(editor))
+        if view is None:
+            return False
+        if view.busy:
+            show_result("正在保存，请稍候", "warning")
+            return True
+        
+        def on_done(_):
+            view.after_save()
+            show_result(success_text, "success")
+        
+        def on_error(e):
+            view.busy = False
+            show_result(f"保存失败：{str(e)}", "danger")
+        
+        start, end, text = view.prepare_save()
+        self.io.write(None, view.mapped.replace_lines, start, end, text, on_done=on_done, on_error=on_error)
+        return True
+    
+    def find_in_editor(self, editor, query, show_result):
+        """在编辑器中查找文本，大文件模式下在整个映射文件中查找"""
+        if not query:
+            return
         
-        # 去除多余空行和空格
-        lines = [line.strip() for line in content.split('\n') if line.strip()]
-        return '\n'.join(lines)
+        view = self.large_views.get(str(editor))
+        if view is not None:
+            found = view.find(query)
+        else:
+            index = editor.search(query, "insert+1c")
+            found = bool(index)
+            if found:
+                end = f"{index}+{len(query)}c"
+                editor.tag_remove(tk.SEL, "1.0", tk.END)
+                editor.tag_add(tk.SEL, index, end)
+                editor.mark_set(tk.INSERT, end)
+                editor.see(index)
+        
+        if not found:
+            show_result(f"未找到：{query}", "warning")
+        editor.focus_set()
     
     def on_page_select(self, event):
         """处理页面选择事件"""
@@ -1146,31 +2124,38 @@ class BlogManager(tk.Tk):
         page_path = self.html_files[page_name]
         self.current_page_path = page_path
         
-        # 加载页面内容
-        try:
-            if os.path.exists(page_path):
-                # 尝试多种编码
-                encodings = ['utf-8', 'gbk', 'gb2312']
-                content = None
-                
-                for encoding in encodings:
-                    try:
-                        with open(page_path, "r", encoding=encoding) as f:
-                            content = f.read()
-                        break
-                    except UnicodeDecodeError:
-                        continue
-                
-                if content is None:
-                    raise Exception("无法解码页面文件，请检查文件编码")
-                    
-                self.page_editor.delete(1.0, tk.END)
-                self.page_editor.insert(tk.END, content)
-                self.animate_page_result(f"已加载：{page_name}", "success")
-            else:
+        def on_done(content):
+            if content is None:
                 self.animate_page_result(f"文件不存在：{page_name}", "warning")
-        except Exception as e:
-            self.animate_page_result(f"加载失败：{str(e)}", "danger")
+                return
+            if isinstance(content, MappedFile):
+                self.attach_large_file(self.page_editor, content, self.animate_page_result, "page")
+                return
+            self.detach_large_file(self.page_editor)
+            self.page_editor.delete(1.0, tk.END)
+            self.page_editor.insert(tk.END, content)
+            self.track_text_editor("page", self.page_editor, page_path, self.animate_page_result, content)
+            self.animate_page_result(f"已加载：{page_name}", "success")
+        
+        # 加载页面内容
+        self.io.read(
+            "page_editor", self._read_page_file, page_path,
+            on_done=on_done,
+            on_error=lambda e: self.animate_page_result(f"加载失败：{str(e)}", "danger")
+        )
+    
+    def _read_page_file(self, page_path):
+        """读取页面文件，文件不存在时返回 None，大文件返回 MappedFile（在工作线程中执行）"""
+        if not os.path.exists(page_path):
+            return None
+        if is_large_file(page_path):
+            return MappedFile(page_path)
+        
+        # 尝试多种编码
+        content = read_text_file(page_path)
+        if content is None:
+            raise Exception("无法解码页面文件，请检查文件编码")
+        return content
     
     def on_js_select(self, event):
         """处理JS文件选择事件"""
@@ -1185,42 +2170,112 @@ class BlogManager(tk.Tk):
         js_file = self.js_files[index]
         self.current_js_file = js_file
         
-        # 加载JS内容
-        try:
-            with open(js_file, "r", encoding="utf-8") as f:
-                self.js_editor.delete(1.0, tk.END)
-                self.js_editor.insert(tk.END, f.read())
+        def on_done(content):
+            if content is None:
+                self.animate_js_result("加载失败：无法解码脚本文件，请检查文件编码", "danger")
+                return
+            self.js_editor.delete(1.0, tk.END)
+            self.js_editor.insert(tk.END, content)
+            self.track_text_editor("js", self.js_editor, js_file, self.animate_js_result, content, ('utf-8',))
             self.animate_js_result(f"已加载：{os.path.basename(js_file)}", "success")
-        except Exception as e:
-            self.animate_js_result(f"加载失败：{str(e)}", "danger")
+        
+        # 加载JS内容
+        self.io.read(
+            "js_editor", read_text_file, js_file, ('utf-8',),
+            on_done=on_done,
+            on_error=lambda e: self.animate_js_result(f"加载失败：{str(e)}", "danger")
+        )
     
     def choose_image(self):
-        """选择图片并复制到img目录"""
+        """选择图片并复制到img目录（在后台复制，与已有图片内容相同时直接使用已有的文件）"""
         file_path = filedialog.askopenfilename(
             title="选择图片",
             filetypes=[("图片文件", "*.jpg;*.jpeg;*.png;*.gif;*.ico")]
         )
         
         if file_path:
-            # 确保img目录存在
-            if not os.path.exists(self.img_dir):
-                os.makedirs(self.img_dir)
-            
-            # 复制文件到img目录（使用二进制模式）
-            try:
-                import shutil
-                file_name = os.path.basename(file_path)
-                dest_path = os.path.join(self.img_dir, file_name)
-                
-                # 二进制模式复制图片
-                with open(file_path, 'rb') as fsrc, open(dest_path, 'wb') as fdst:
-                    shutil.copyfileobj(fsrc, fdst)
-                
+            def on_done(result):
+                if not result.images:
+                    self.animate_result(f"图片处理失败：{result.failed[0][1] if result.failed else file_path}", "danger")
+                    return
+                file_name = result.images[0]
                 self.img_entry.delete(0, tk.END)
                 self.img_entry.insert(0, file_name)
-                self.animate_result(f"图片已复制：{file_name}", "success")
-            except Exception as e:
-                self.animate_result(f"图片处理失败：{str(e)}", "danger")
+                self.animate_result(
+                    f"图片已复制：{file_name}" if result.copied else f"已有相同的图片：{file_name}", "success"
+                )
+            
+            self.io.write(
+                None, self.engine.import_images, [file_path],
+                on_done=on_done,
+                on_error=lambda e: self.animate_result(f"图片处理失败：{str(e)}", "danger")
+            )
+    
+    def import_images(self, folder=False):
+        """批量导入图片（或整个文件夹），在后台并行去重、复制和优化，可选生成相册页"""
+        if folder:
+            directory = filedialog.askdirectory(title="选择图片文件夹")
+            paths = [directory] if directory else []
+        else:
+            paths = list(filedialog.askopenfilenames(
+                title="选择图片",
+                filetypes=[("图片文件", "*.jpg;*.jpeg;*.png;*.gif;*.webp;*.bmp;*.ico")]
+            ))
+        if not paths:
+            return
+        
+        def progress(done, total):
+            self.animator.call_soon(self.update_import_progress, done, total)
+        
+        def finish():
+            self.import_images_btn.config(state=tk.NORMAL)
+            self.import_folder_btn.config(state=tk.NORMAL)
+        
+        def on_done(result):
+            finish()
+            if not result.images:
+                self.animate_result(result.summary() if result.failed else "没有找到图片", "warning")
+                return
+            self.animate_result(result.summary(), "warning" if result.failed else "success")
+            if not self.img_entry.get().strip():
+                self.img_entry.insert(0, result.images[0])
+            if len(result.images) > 1:
+                self.ask_create_gallery(result.images)
+            elif result.copied:
+                self.queue_auto_deploy(f"导入图片 {result.images[0]}")
+        
+        def on_error(e):
+            finish()
+            self.animate_result(f"导入图片失败：{str(e)}", "danger")
+        
+        self.import_images_btn.config(state=tk.DISABLED)
+        self.import_folder_btn.config(state=tk.DISABLED)
+        self.import_progress.config(value=0)
+        self.animate_result("正在导入图片...", "warning")
+        self.io.write("import_images", self.engine.import_images, paths, progress, on_done=on_done, on_error=on_error)
+    
+    def update_import_progress(self, done, total):
+        self.import_progress.config(maximum=max(total, 1), value=done)
+    
+    def ask_create_gallery(self, images):
+        """导入多张图片后询问是否生成相册页"""
+        title = simpledialog.askstring(
+            "生成相册", f"已导入 {len(images)} 张图片。\n输入相册标题即可生成相册页（取消则不生成）："
+        )
+        if not title or not title.strip():
+            self.queue_auto_deploy(f"导入 {len(images)} 张图片")
+            return
+        title = title.strip()
+        
+        def on_done(path):
+            self.animate_result(f"相册已生成：galleries/{os.path.basename(path)}", "success")
+            self.queue_auto_deploy(f"导入图片并生成相册《{title}》")
+        
+        self.io.write(
+            None, self.engine.create_gallery, title, images,
+            on_done=on_done,
+            on_error=lambda e: self.animate_result(f"生成相册失败：{str(e)}", "danger")
+        )
     
     def create_post(self):
         """创建新文章"""
@@ -1236,132 +2291,49 @@ class BlogManager(tk.Tk):
             self.animate_result("标题、日期、内容不能为空！", "warning")
             return
         
-        # 生成文件名（处理特殊字符）
-        filename = re.sub(r'[^\w\-]', '', title.lower().replace(" ", "-")) + ".html"
-        if not filename or filename == ".html":  # 处理可能的空文件名
-            filename = f"post_{datetime.now().strftime('%Y%m%d%H%M%S')}.html"
-        
-        filename = os.path.join(self.posts_dir, filename)
-        
-        # 处理标签
-        formatted_tags = ""
-        if tags:
-            tag_list = [tag.strip() for tag in tags.split(',')]
-            formatted_tags = "<div class='tags'>" + " ".join([f"<span class='tag'>{tag}</span>" for tag in tag_list]) + "</div>"
-        
-        # 替换文章模板内容（处理换行）
-        formatted_content = ""
-        for para in content.split("\n"):
-            para = para.strip()
-            if not para:
-                continue
-            if para.startswith("# "):
-                formatted_content += f"    <h2>{para[2:]}</h2>\n\n"
-            else:
-                formatted_content += f"    <p>{para}</p>\n\n"
-        
-        # 写入文章文件
-        try:
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(self.post_template.format(
-                    title=title,
-                    date=date,
-                    tags=formatted_tags,
-                    content=formatted_content,
-                    img_name=img_name
-                ))
-            
-            # 更新文章列表页 posts.html
-            posts_path = self.html_files["文章列表"]
-            # 确保文章列表文件存在
-            if not os.path.exists(posts_path):
-                self.create_default_posts_page()
-            
-            with open(posts_path, "r", encoding="utf-8") as f:
-                html = f.read()
-            
-            # 在 </main> 标签前插入新文章卡片
-            new_html = html.replace(
-                "</main>",
-                self.post_list_item.format(
-                    title=title,
-                    date=date,
-                    tags=formatted_tags,
-                    summary=summary,
-                    filename=os.path.basename(filename),
-                    img_name=img_name
-                ) + "\n</main>"
-            )
-            
-            with open(posts_path, "w", encoding="utf-8") as f:
-                f.write(new_html)
-            
+        def on_done(post_path):
             # 刷新文章列表
             self.load_posts_list()
             
-            self.animate_result(f"文章发布成功！文件：{os.path.basename(filename)}", "success")
-            
-            # 提供选项：继续编辑或新建
-            def on_continue():
-                dialog.destroy()
-            
-            def on_new():
-                # 清空输入框
-                self.title_entry.delete(0, tk.END)
-                self.summary_entry.delete(1.0, tk.END)
-                self.content_text.delete(1.0, tk.END)
-                self.tags_entry.delete(0, tk.END)
-                self.tags_entry.insert(0, "技术,博客")
-                dialog.destroy()
-            
-            dialog = tk.Toplevel(self)
-            dialog.title("发布成功")
-            dialog.geometry("300x120")
-            dialog.transient(self)
-            dialog.grab_set()
-            
-            ttk.Label(dialog, text=f"文章《{title}》已成功发布！").pack(pady=15)
-            
-            btn_frame = ttk.Frame(dialog)
-            btn_frame.pack(fill=tk.X, padx=20, pady=10)
-            
-            ttk.Button(btn_frame, text="继续编辑", command=on_continue).pack(side=tk.LEFT, padx=10)
-            ttk.Button(btn_frame, text="新建文章", command=on_new).pack(side=tk.LEFT, padx=10)
-            
-        except Exception as e:
-            self.animate_result(f"发布失败：{str(e)}", "danger")
-    
-    def create_default_posts_page(self):
-        """创建默认的文章列表页"""
-        posts_page_content = """<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-  <meta charset="UTF-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-  <title>文章列表 - TangShiMei</title>
-  <link rel="stylesheet" href="style.css" />
-</head>
-<body>
-  <header>
-    <h1 class="site-title">文章列表</h1>
-    <button id="theme-toggle" class="theme-btn" title="切换夜间模式">🌙</button>
-  </header>
-
-  <main class="posts-container">
-  </main>
-
-  <footer>
-    <a href="index.html" class="btn">← 返回首页</a>
-    <br><br>
-    <small>© 2025 TangShiMei</small>
-  </footer>
-
-  <script src="js/main.js"></script>
-</body>
-</html>"""
+            self.animate_result(f"文章发布成功！文件：{os.path.basename(post_path)}", "success")
+            self.queue_auto_deploy(f"发布文章《{title}》")
+            self.show_publish_dialog(title)
         
-        with open(self.html_files["文章列表"], "w", encoding="utf-8") as f:
-            f.write(posts_page_content)
+        # 写入文章文件并更新文章列表页（在后台串行执行）
+        self.io.write(
+            None, self.engine.publish_post,
+            title, date, tags, summary, content, img_name,
+            on_done=on_done,
+            on_error=lambda e: self.animate_result(f"发布失败：{str(e)}", "danger")
+        )
+    
+    def show_publish_dialog(self, title):
+        """发布成功后提供选项：继续编辑或新建"""
+        def on_continue():
+            dialog.destroy()
+        
+        def on_new():
+            # 清空输入框
+            self.title_entry.delete(0, tk.END)
+            self.summary_entry.delete(1.0, tk.END)
+            self.content_text.delete(1.0, tk.END)
+            self.tags_entry.delete(0, tk.END)
+            self.tags_entry.insert(0, DEFAULT_TAGS)
+            dialog.destroy()
+        
+        dialog = tk.Toplevel(self)
+        dialog.title("发布成功")
+        dialog.geometry("300x120")
+        dialog.transient(self)
+        dialog.grab_set()
+        
+        ttk.Label(dialog, text=f"文章《{title}》已成功发布！").pack(pady=15)
+        
+        btn_frame = ttk.Frame(dialog)
+        btn_frame.pack(fill=tk.X, padx=20, pady=10)
+        
+        ttk.Button(btn_frame, text="继续编辑", command=on_continue).pack(side=tk.LEFT, padx=10)
+        ttk.Button(btn_frame, text="新建文章", command=on_new).pack(side=tk.LEFT, padx=10)
     
     def save_post_edit(self):
         """保存文章编辑"""
@@ -1369,74 +2341,27 @@ class BlogManager(tk.Tk):
             self.animate_result("请先选择一篇文章", "warning")
             return
             
-        try:
-            title = self.post_edit_title.get().strip()
-            content = self.post_edit_content.get("1.0", tk.END).strip()
-            
-            if not title or not content:
-                self.animate_result("标题和内容不能为空", "warning")
-                return
-            
-            # 读取原文件内容
-            with open(self.current_post_file, "r", encoding="utf-8") as f:
-                html_content = f.read()
-            
-            # 更新标题
-            new_html = re.sub(
-                r'<h1 class="site-title">.*?</h1>',
-                f'<h1 class="site-title">{title}</h1>',
-                html_content
-            )
-            
-            new_html = re.sub(
-                r'<title>.*? - TangShiMei</title>',
-                f'<title>{title} - TangShiMei</title>',
-                new_html
-            )
-            
-            # 处理内容
-            formatted_content = ""
-            for para in content.split("\n"):
-                para = para.strip()
-                if not para:
-                    continue
-                if para.startswith("# "):
-                    formatted_content += f"    <h2>{para[2:]}</h2>\n\n"
-                else:
-                    formatted_content += f"    <p>{para}</p>\n\n"
-            
-            # 更新正文内容（保留图片和日期）
-            # 首先提取图片和日期部分
-            match = re.search(r'(?s)<main class="post-content">(.*?)<p class="post-date">.*?</p>(.*?)</main>', html_content)
-            if match:
-                img_part = match.group(1)
-                # 构建新的main内容
-                new_main_content = f"{img_part}<p class='post-date'>{match.group(2).split('</p>')[0]}</p>\n{formatted_content}"
-                
-                # 更新正文内容
-                new_html = re.sub(
-                    r'(?s)<main class="post-content">.*?</main>',
-                    f'<main class="post-content">{new_main_content}</main>',
-                    new_html,
-                    count=1
-                )
-            else:
-                # 如果没有找到匹配的结构，直接替换
-                new_html = re.sub(
-                    r'(?s)<main class="post-content">.*?</main>',
-                    f'<main class="post-content">\n{formatted_content}\n</main>',
-                    new_html,
-                    count=1
-                )
-            
-            # 写入更新后的内容
-            with open(self.current_post_file, "w", encoding="utf-8") as f:
-                f.write(new_html)
-            
+        title = self.post_edit_title.get().strip()
+        content = self.post_edit_content.get("1.0", tk.END).strip()
+        
+        if not title or not content:
+            self.animate_result("标题和内容不能为空", "warning")
+            return
+        
+        if not self.confirm_overwrite("post"):
+            return
+        post_file = self.current_post_file
+        
+        def on_done(_):
+            self.editor_saved("post", (title, content))
             self.animate_result("文章更新成功", "success")
-            
-        except Exception as e:
-            self.animate_result(f"保存失败：{str(e)}", "danger")
+            self.queue_auto_deploy(f"编辑文章《{title}》")
+        
+        self.io.write(
+            f"save:{post_file}", self.engine.update_post, post_file, title, content,
+            on_done=on_done,
+            on_error=lambda e: self.animate_result(f"保存失败：{str(e)}", "danger")
+        )
     
     def delete_post(self):
         """删除文章"""
@@ -1444,40 +2369,243 @@ class BlogManager(tk.Tk):
             self.animate_result("请先选择一篇文章", "warning")
             return
             
-        filename = os.path.basename(self.current_post_file)
+        post_file = self.current_post_file
+        filename = os.path.basename(post_file)
         
-        if messagebox.askyesno("确认删除", f"确定要删除文章 '{filename}' 吗？此操作不可恢复。"):
-            try:
-                # 从文章列表中移除
-                posts_path = self.html_files["文章列表"]
-                if os.path.exists(posts_path):
-                    with open(posts_path, "r", encoding="utf-8") as f:
-                        html = f.read()
-                
-                    # 找到并移除文章卡片
-                    pattern = re.compile(
-                        rf'(?s)<!-- 新增文章 -->\s*<article class="card">.*?href="posts/{re.escape(filename)}".*?</article>',
-                        re.IGNORECASE
-                    )
-                    new_html = pattern.sub('', html)
-                    
-                    with open(posts_path, "w", encoding="utf-8") as f:
-                        f.write(new_html)
-                
-                # 删除文章文件
-                os.remove(self.current_post_file)
-                
+        if messagebox.askyesno("确认删除", f"确定要删除文章 '{filename}' 吗？删除后可以在“历史版本”中恢复。"):
+            def on_done(_):
                 # 刷新文章列表
                 self.load_posts_list()
                 
                 # 清空编辑区域
-                self.post_edit_title.delete(0, tk.END)
-                self.post_edit_content.delete(1.0, tk.END)
+                if self.current_post_file == post_file:
+                    self.current_post_file = None
+                    self.editor_states.pop("post", None)
+                    self.post_edit_title.delete(0, tk.END)
+                    self.post_edit_content.delete(1.0, tk.END)
                 
                 self.animate_result(f"文章 '{filename}' 已删除", "success")
-                
-            except Exception as e:
-                self.animate_result(f"删除失败：{str(e)}", "danger")
+                self.queue_auto_deploy(f"删除文章 {filename}")
+            
+            # 丢弃该文章尚未完成的读取和保存
+            self.io.cancel("post_editor")
+            self.io.cancel(f"save:{post_file}")
+            self.io.write(
+                None, self.engine.delete_post, post_file,
+                on_done=on_done,
+                on_error=lambda e: self.animate_result(f"删除失败：{str(e)}", "danger")
+            )
+    
+    def show_revision_history(self):
+        """文章历史版本：查看差异、恢复任意版本（包括已删除的文章）"""
+        window = tk.Toplevel(self)
+        window.title("历史版本")
+        window.geometry("760x560")
+        window.transient(self)
+        
+        top = ttk.Frame(window)
+        top.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Label(top, text="文章：").pack(side=tk.LEFT)
+        post_var = tk.StringVar()
+        post_combo = ttk.Combobox(top, textvariable=post_var, state="readonly", width=50)
+        post_combo.pack(side=tk.LEFT, padx=5)
+        
+        panes = ttk.PanedWindow(window, orient=tk.VERTICAL)
+        panes.pack(fill=tk.BOTH, expand=True, padx=10)
+        revision_list = tk.Listbox(panes, height=8, exportselection=False)
+        panes.add(revision_list, weight=1)
+        text = scrolledtext.ScrolledText(panes, wrap=tk.NONE, font=("Consolas", 10))
+        text.tag_config("add", foreground=self.colors["success"])
+        text.tag_config("remove", foreground=self.colors["danger"])
+        panes.add(text, weight=3)
+        
+        status = ttk.Label(window, text="")
+        status.pack(fill=tk.X, padx=10, pady=5)
+        state = {"names": [], "revisions": []}
+        
+        def selected_name():
+            index = post_combo.current()
+            return state["names"][index] if index >= 0 else None
+        
+        def selected_revision():
+            selection = revision_list.curselection()
+            return state["revisions"][selection[0]] if selection else None
+        
+        def show_lines(lines):
+            text.config(state=tk.NORMAL)
+            text.delete(1.0, tk.END)
+            for line in lines:
+                tag = ()
+                if line.startswith("+") and not line.startswith("+++"):
+                    tag = ("add",)
+                elif line.startswith("-") and not line.startswith("---"):
+                    tag = ("remove",)
+                text.insert(tk.END, line + "\n", tag)
+            text.config(state=tk.DISABLED)
+        
+        def on_error(e):
+            status.config(text=f"操作失败：{str(e)}", foreground=self.colors["danger"])
+        
+        def load_names():
+            posts = self.engine.list_posts()
+            return [(name, name) for name in posts] + [
+                (name, f"{name}（已删除）") for name in self.engine.deleted_posts()
+            ]
+        
+        def on_names(items):
+            state["names"] = [name for name, _ in items]
+            post_combo["values"] = [label for _, label in items]
+            current = os.path.basename(getattr(self, "current_post_file", None) or "")
+            if current in state["names"]:
+                post_combo.current(state["names"].index(current))
+            elif items:
+                post_combo.current(0)
+            load_revisions()
+        
+        def load_revisions(_=None):
+            name = selected_name()
+            if name:
+                self.io.read("revisions", self.engine.list_revisions, name, on_done=on_revisions, on_error=on_error)
+        
+        def on_revisions(revisions):
+            # 最新的修订排在最前面
+            state["revisions"] = list(reversed(revisions))
+            revision_list.delete(0, tk.END)
+            for revision in state["revisions"]:
+                revision_list.insert(tk.END, revision.label())
+            show_lines([])
+            status.config(text=f"共 {len(revisions)} 个版本" if revisions else "这篇文章还没有历史版本",
+                          foreground=self.colors["dark"])
+        
+        def show_diff(against_latest):
+            revision = selected_revision()
+            if revision is None:
+                status.config(text="请先选择一个版本", foreground=self.colors["warning"])
+                return
+            latest = len(state["revisions"])
+            other = latest if against_latest else revision.number - 1
+            if other < 1 or other == revision.number:
+                self.io.read("revision_view", self.engine.revision_text, selected_name(), revision.number,
+                             on_done=lambda content: show_lines(content.splitlines()), on_error=on_error)
+                return
+            a, b = sorted((other, revision.number))
+            self.io.read("revision_view", self.engine.revision_diff, selected_name(), a, b,
+                         on_done=lambda lines: show_lines(lines or ["两个版本内容相同"]), on_error=on_error)
+        
+        def show_in_editor(title, edit_content):
+            self.post_edit_title.delete(0, tk.END)
+            self.post_edit_title.insert(0, title or "")
+            self.post_edit_content.delete(1.0, tk.END)
+            self.post_edit_content.insert(tk.END, edit_content or "")
+        
+        def restore():
+            name, revision = selected_name(), selected_revision()
+            if revision is None:
+                status.config(text="请先选择一个版本", foreground=self.colors["warning"])
+                return
+            if not messagebox.askyesno("恢复版本", f"确定要把 '{name}' 恢复到版本 #{revision.number} 吗？\n"
+                                                   "当前内容会保留在历史版本中。", parent=window):
+                return
+            
+            def on_done(post_path):
+                self.load_posts_list()
+                if getattr(self, "current_post_file", None) == post_path:
+                    # 编辑器中打开的正是这篇文章，重新载入恢复后的内容
+                    self.io.read("post_editor", self.engine.read_post, post_path,
+                                 on_done=lambda result: show_in_editor(*result), on_error=on_error)
+                self.animate_result(f"文章 '{name}' 已恢复到版本 #{revision.number}", "success")
+                self.queue_auto_deploy(f"恢复文章 {name} 到版本 #{revision.number}")
+                if window.winfo_exists():
+                    self.io.read("revision_names", load_names, on_done=on_names, on_error=on_error)
+            
+            self.io.cancel(f"save:{os.path.join(self.posts_dir, name)}")
+            self.io.write(None, self.engine.restore_revision, name, revision.number,
+                          on_done=on_done, on_error=on_error)
+        
+        post_combo.bind("<<ComboboxSelected>>", load_revisions)
+        revision_list.bind("<Double-Button-1>", lambda e: show_diff(False))
+        
+        btn_frame = ttk.Frame(window)
+        btn_frame.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Button(btn_frame, text="与上一版本比较", command=lambda: show_diff(False)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="与最新版本比较", command=lambda: show_diff(True)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="恢复此版本", command=restore).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="关闭", command=window.destroy).pack(side=tk.RIGHT, padx=5)
+        
+        self.io.read("revision_names", load_names, on_done=on_names, on_error=on_error)
+    
+    def show_legacy_import(self):
+        """检查 posts 目录中各种旧格式的文章，确认后一次性纳入文章目录和文章列表页"""
+        window = tk.Toplevel(self)
+        window.title("导入旧文章")
+        window.geometry("760x520")
+        window.transient(self)
+        
+        summary_var = tk.StringVar(value="正在识别文章格式...")
+        ttk.Label(window, textvariable=summary_var, wraplength=720).pack(anchor=tk.W, padx=10, pady=10)
+        progress_bar = ttk.Progressbar(window, mode="determinate")
+        progress_bar.pack(fill=tk.X, padx=10)
+        
+        text = scrolledtext.ScrolledText(window, wrap=tk.NONE)
+        text.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        ttk.Label(
+            window, text="导入后文章列表页中的卡片按合并后的信息重新生成；正文只有段落和标题的文章会补写源文件，之后可以直接编辑。",
+            wraplength=720
+        ).pack(anchor=tk.W, padx=10)
+        normalize_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            window, text="把旧格式的文章页面改用当前模板（保留正文）", variable=normalize_var
+        ).pack(anchor=tk.W, padx=10, pady=5)
+        
+        def progress(done, total):
+            self.animator.call_soon(
+                lambda: window.winfo_exists() and progress_bar.config(maximum=max(total, 1), value=done)
+            )
+        
+        def show(result):
+            if not window.winfo_exists():
+                return
+            summary_var.set(result.summary())
+            text.config(state=tk.NORMAL)
+            text.delete(1.0, tk.END)
+            text.insert(tk.END, "\n".join(result.format_details()) or "posts 目录中没有文章")
+            text.config(state=tk.DISABLED)
+            import_btn.config(state=tk.NORMAL if result.posts or result.orphan_cards else tk.DISABLED)
+        
+        def on_error(e):
+            if window.winfo_exists():
+                summary_var.set(f"操作失败：{str(e)}")
+                import_btn.config(state=tk.NORMAL)
+        
+        def on_imported(result):
+            applied = result.applied
+            message = (f"已导入 {len(result.posts)} 篇文章：补写源文件 {applied['sources']} 篇，"
+                       f"改用当前模板 {applied['normalized']} 篇，新增卡片 {applied['cards_added']} 张，"
+                       f"删除卡片 {applied['cards_removed']} 张")
+            self.load_posts_list()
+            self.animate_result(message, "success")
+            self.queue_auto_deploy("导入旧文章")
+            show(result)
+            if window.winfo_exists():
+                summary_var.set(message)
+        
+        def start_import():
+            import_btn.config(state=tk.DISABLED)
+            summary_var.set("正在导入...")
+            progress_bar.config(value=0)
+            self.io.write(
+                None, self.engine.import_legacy_posts, normalize_var.get(), progress,
+                on_done=on_imported, on_error=on_error
+            )
+        
+        btn_frame = ttk.Frame(window)
+        btn_frame.pack(fill=tk.X, padx=10, pady=10)
+        import_btn = ttk.Button(btn_frame, text="导入", command=start_import, state=tk.DISABLED)
+        import_btn.pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="关闭", command=window.destroy).pack(side=tk.RIGHT, padx=5)
+        
+        self.io.read("legacy_scan", self.engine.scan_legacy_posts, progress, on_done=show, on_error=on_error)
     
     def save_page(self):
         """保存页面编辑"""
@@ -1485,29 +2613,118 @@ class BlogManager(tk.Tk):
             self.animate_page_result("请先选择一个页面", "warning")
             return
             
-        try:
-            content = self.page_editor.get("1.0", tk.END)
-            
-            with open(self.current_page_path, "w", encoding="utf-8") as f:
-                f.write(content)
-            
+        page_path = self.current_page_path
+        if self.save_large_file(self.page_editor, self.animate_page_result, "页面保存成功"):
+            return
+        
+        if not self.confirm_overwrite("page"):
+            return
+        content = self.page_editor.get("1.0", tk.END)
+        
+        def on_done(_):
+            self.editor_saved("page", content)
             self.animate_page_result("页面保存成功", "success")
-            
-        except Exception as e:
-            self.animate_page_result(f"保存失败：{str(e)}", "danger")
+        
+        self.io.write(
+            f"save:{page_path}", write_text_file, page_path, content,
+            on_done=on_done,
+            on_error=lambda e: self.animate_page_result(f"保存失败：{str(e)}", "danger")
+        )
     
     def save_css(self):
         """保存CSS样式"""
-        try:
-            content = self.css_editor.get("1.0", tk.END)
-            
-            with open(self.css_file, "w", encoding="utf-8") as f:
-                f.write(content)
-            
+        if self.save_large_file(self.css_editor, self.animate_css_result, "样式保存成功"):
+            return
+        
+        if not self.confirm_overwrite("css"):
+            return
+        content = self.css_editor.get("1.0", tk.END)
+        
+        def on_done(_):
+            self.editor_saved("css", content)
             self.animate_css_result("样式保存成功", "success")
-            
-        except Exception as e:
-            self.animate_css_result(f"保存失败：{str(e)}", "danger")
+        
+        self.io.write(
+            f"save:{self.css_file}", write_text_file, self.css_file, content,
+            on_done=on_done,
+            on_error=lambda e: self.animate_css_result(f"保存失败：{str(e)}", "danger")
+        )
+    
+    def export_templates(self):
+        """把内置页面模板导出到博客目录的 templates 文件夹"""
+        def on_done(exported):
+            if exported:
+                self.animate_css_result(f"已导出 {len(exported)} 个模板到 {self.engine.templates_dir}", "success")
+            else:
+                self.animate_css_result(f"模板已存在：{self.engine.templates_dir}", "warning")
+        
+        self.io.write(
+            "templates", self.engine.export_templates,
+            on_done=on_done,
+            on_error=lambda e: self.animate_css_result(f"导出失败：{str(e)}", "danger")
+        )
+    
+    def rebuild_site(self):
+        """用当前模板重新生成全部文章页、文章列表页以及标签/归档页"""
+        if not messagebox.askyesno("确认重建", "确定要用当前模板重新生成全部页面吗？"):
+            return
+        
+        def progress(done, total):
+            self.animator.call_soon(self.update_rebuild_progress, done, total)
+        
+        def on_done(changed):
+            self.rebuild_site_btn.config(state=tk.NORMAL)
+            self.animate_css_result(f"重建完成，更新了 {changed} 篇文章", "success")
+            if changed:
+                self.queue_auto_deploy("重建全部页面")
+        
+        def on_error(e):
+            self.rebuild_site_btn.config(state=tk.NORMAL)
+            self.animate_css_result(f"重建失败：{str(e)}", "danger")
+        
+        self.rebuild_site_btn.config(state=tk.DISABLED)
+        self.rebuild_progress.config(value=0)
+        self.animate_css_result("正在重建全部页面...", "warning")
+        self.io.write("rebuild_site", self.engine.rebuild_site, progress, on_done=on_done, on_error=on_error)
+    
+    def check_css_usage(self):
+        """检查站点中未使用的样式规则，在窗口中列出"""
+        def on_done(report):
+            self.css_usage_btn.config(state=tk.NORMAL)
+            self.animate_css_result(report.summary(), "success" if not report.dead_count else "warning")
+            self.show_css_usage_report(report)
+        
+        def on_error(e):
+            self.css_usage_btn.config(state=tk.NORMAL)
+            self.animate_css_result(f"检查失败：{str(e)}", "danger")
+        
+        self.css_usage_btn.config(state=tk.DISABLED)
+        self.animate_css_result("正在检查未使用的样式...", "warning")
+        self.io.read("css_usage", self.engine.analyze_css, self.get_repo_path() or None,
+                     on_done=on_done, on_error=on_error)
+    
+    def show_css_usage_report(self, report):
+        """显示未使用样式报告"""
+        window = tk.Toplevel(self)
+        window.title("未使用的样式")
+        window.geometry("640x480")
+        window.transient(self)
+        
+        ttk.Label(window, text=report.summary(), wraplength=600).pack(anchor=tk.W, padx=10, pady=10)
+        
+        text = scrolledtext.ScrolledText(window, wrap=tk.NONE)
+        text.pack(fill=tk.BOTH, expand=True, padx=10)
+        text.insert(tk.END, "\n".join(report.format_dead()) or "没有发现未使用的样式规则")
+        text.config(state=tk.DISABLED)
+        
+        ttk.Label(
+            window, text="发布分支模式下勾选“发布时精简样式”即可在发布时去掉这些规则（博客目录中的文件不变）。"
+        ).pack(anchor=tk.W, padx=10, pady=5)
+        ttk.Button(window, text="关闭", command=window.destroy).pack(pady=10)
+    
+    def update_rebuild_progress(self, done, total):
+        self.rebuild_progress.config(maximum=max(total, 1), value=done)
+        self.animate_css_result(f"正在重建全部页面：{done}/{total}", "warning")
     
     def add_js_file(self):
         """添加新的JS文件"""
@@ -1527,6 +2744,7 @@ class BlogManager(tk.Tk):
             
         try:
             # 创建空文件
+            self.ensure_dirs()
             with open(file_path, "w", encoding="utf-8") as f:
                 f.write("// 新增JS文件\n")
             
@@ -1544,16 +2762,20 @@ class BlogManager(tk.Tk):
             self.animate_js_result("请先选择一个JS文件", "warning")
             return
             
-        try:
-            content = self.js_editor.get("1.0", tk.END)
-            
-            with open(self.current_js_file, "w", encoding="utf-8") as f:
-                f.write(content)
-            
+        if not self.confirm_overwrite("js"):
+            return
+        content = self.js_editor.get("1.0", tk.END)
+        js_file = self.current_js_file
+        
+        def on_done(_):
+            self.editor_saved("js", content)
             self.animate_js_result("脚本保存成功", "success")
-            
-        except Exception as e:
-            self.animate_js_result(f"保存失败：{str(e)}", "danger")
+        
+        self.io.write(
+            f"save:{js_file}", write_text_file, js_file, content,
+            on_done=on_done,
+            on_error=lambda e: self.animate_js_result(f"保存失败：{str(e)}", "danger")
+        )
     
     def delete_js_file(self):
         """删除JS文件"""
@@ -1572,6 +2794,7 @@ class BlogManager(tk.Tk):
                 
                 # 清空编辑区域
                 self.js_editor.delete(1.0, tk.END)
+                self.editor_states.pop("js", None)
                 
                 self.animate_js_result(f"JS文件 '{filename}' 已删除", "success")
                 
@@ -1586,68 +2809,22 @@ class BlogManager(tk.Tk):
         content = self.content_text.get("1.0", tk.END).strip()
         img_name = self.img_entry.get().strip() or "default.jpg"
         
-        # 处理标签
-        formatted_tags = ""
-        if tags:
-            tag_list = [tag.strip() for tag in tags.split(',')]
-            formatted_tags = "<div class='tags'>" + " ".join([f"<span class='tag'>{tag}</span>" for tag in tag_list]) + "</div>"
-        
-        # 处理内容
-        formatted_content = ""
-        for para in content.split("\n"):
-            para = para.strip()
-            if not para:
-                continue
-            if para.startswith("# "):
-                formatted_content += f"    <h2>{para[2:]}</h2>\n\n"
-            else:
-                formatted_content += f"    <p>{para}</p>\n\n"
-        
         # 创建临时预览文件
         try:
-            temp_file = os.path.join(self.temp_preview_dir, "preview_post.html")
-            
-            # 复制CSS文件到临时目录
-            if os.path.exists(self.css_file):
-                import shutil
-                shutil.copy2(self.css_file, self.temp_preview_dir)
-            
-            # 创建临时js目录并复制文件
-            temp_js_dir = os.path.join(self.temp_preview_dir, "js")
-            os.makedirs(temp_js_dir, exist_ok=True)
-            if os.path.exists(self.js_dir):
-                for js_file in os.listdir(self.js_dir):
-                    if js_file.endswith(".js"):
-                        shutil.copy2(os.path.join(self.js_dir, js_file), temp_js_dir)
+            self.ensure_dirs()
+            # 预览文件放在 posts 子目录中，与正式文章的相对路径一致
+            temp_file = os.path.join(self.temp_preview_dir, "posts", "preview_post.html")
+            os.makedirs(os.path.dirname(temp_file), exist_ok=True)
             
-            # 创建临时img目录并复制需要的图片（使用二进制模式）
-            temp_img_dir = os.path.join(self.temp_preview_dir, "img")
-            os.makedirs(temp_img_dir, exist_ok=True)
-            if img_name and os.path.exists(os.path.join(self.img_dir, img_name)):
-                src_path = os.path.join(self.img_dir, img_name)
-                dest_path = os.path.join(temp_img_dir, img_name)
-                with open(src_path, 'rb') as fsrc, open(dest_path, 'wb') as fdst:
-                    shutil.copyfileobj(fsrc, fdst)
-            # 复制默认图片
-            if not img_name or not os.path.exists(os.path.join(self.img_dir, img_name)):
-                default_img = os.path.join(self.img_dir, "default.jpg")
-                if os.path.exists(default_img):
-                    dest_path = os.path.join(temp_img_dir, "default.jpg")
-                    with open(default_img, 'rb') as fsrc, open(dest_path, 'wb') as fdst:
-                        shutil.copyfileobj(fsrc, fdst)
+            # 复制样式、脚本和需要的图片
+            self.engine.stage_preview(self.temp_preview_dir, images=[img_name])
             
             # 写入预览内容
             with open(temp_file, "w", encoding="utf-8") as f:
-                f.write(self.post_template.format(
-                    title=title,
-                    date=date,
-                    tags=formatted_tags,
-                    content=formatted_content,
-                    img_name=img_name
-                ))
+                f.write(self.engine.render_post(title, date, tags, content, img_name))
             
             # 在浏览器中打开预览
-            webbrowser.open(f"file:///{temp_file}")
+            open_in_browser(temp_file)
             self.animate_result("预览已在浏览器中打开", "success")
             
         except Exception as e:
@@ -1661,33 +2838,18 @@ class BlogManager(tk.Tk):
             
         try:
             # 创建临时预览文件
-            temp_file = os.path.join(self.temp_preview_dir, "preview_edited_post.html")
+            self.ensure_dirs()
+            temp_file = os.path.join(self.temp_preview_dir, "posts", "preview_edited_post.html")
+            os.makedirs(os.path.dirname(temp_file), exist_ok=True)
             
             # 复制文件到临时目录
-            import shutil
             shutil.copy2(self.current_post_file, temp_file)
             
-            # 复制CSS文件
-            if os.path.exists(self.css_file):
-                shutil.copy2(self.css_file, self.temp_preview_dir)
-            
-            # 复制JS文件
-            temp_js_dir = os.path.join(self.temp_preview_dir, "js")
-            os.makedirs(temp_js_dir, exist_ok=True)
-            if os.path.exists(self.js_dir):
-                for js_file in os.listdir(self.js_dir):
-                    if js_file.endswith(".js"):
-                        shutil.copy2(os.path.join(self.js_dir, js_file), temp_js_dir)
-            
-            # 复制图片目录
-            temp_img_dir = os.path.join(self.temp_preview_dir, "img")
-            if os.path.exists(self.img_dir):
-                if os.path.exists(temp_img_dir):
-                    shutil.rmtree(temp_img_dir)
-                shutil.copytree(self.img_dir, temp_img_dir)
+            # 复制样式、脚本和图片目录
+            self.engine.stage_preview(self.temp_preview_dir)
             
             # 在浏览器中打开预览
-            webbrowser.open(f"file:///{temp_file}")
+            open_in_browser(temp_file)
             self.animate_result("预览已在浏览器中打开", "success")
             
         except Exception as e:
@@ -1708,40 +2870,19 @@ class BlogManager(tk.Tk):
             page_filename = os.path.basename(self.current_page_path)
             temp_page_path = os.path.join(temp_page_dir, page_filename)
             
-            # 保存当前编辑的内容到临时文件
-            content = self.page_editor.get("1.0", tk.END)
-            with open(temp_page_path, "w", encoding="utf-8") as f:
-                f.write(content)
-            
-            # 复制CSS文件
-            if os.path.exists(self.css_file):
-                shutil.copy2(self.css_file, temp_page_dir)
-            
-            # 复制JS目录
-            temp_js_dir = os.path.join(temp_page_dir, "js")
-            os.makedirs(temp_js_dir, exist_ok=True)
-            if os.path.exists(self.js_dir):
-                for js_file in os.listdir(self.js_dir):
-                    if js_file.endswith(".js"):
-                        shutil.copy2(os.path.join(self.js_dir, js_file), temp_js_dir)
-            
-            # 复制图片目录
-            temp_img_dir = os.path.join(temp_page_dir, "img")
-            if os.path.exists(self.img_dir):
-                if os.path.exists(temp_img_dir):
-                    shutil.rmtree(temp_img_dir)
-                shutil.copytree(self.img_dir, temp_img_dir)
+            # 保存当前编辑的内容到临时文件（大文件模式下编辑器中只有一部分，直接复制原文件）
+            if self.large_views.get(str(self.page_editor)):
+                shutil.copy2(self.current_page_path, temp_page_path)
+            else:
+                content = self.page_editor.get("1.0", tk.END)
+                with open(temp_page_path, "w", encoding="utf-8") as f:
+                    f.write(content)
             
-            # 复制posts目录（如果是文章列表页）
-            if page_filename == "posts.html" and os.path.exists(self.posts_dir):
-                temp_posts_dir = os.path.join(temp_page_dir, "posts")
-                os.makedirs(temp_posts_dir, exist_ok=True)
-                for post_file in os.listdir(self.posts_dir):
-                    if post_file.endswith(".html"):
-                        shutil.copy2(os.path.join(self.posts_dir, post_file), temp_posts_dir)
+            # 复制样式、脚本、图片目录（文章列表页还需要文章）
+            self.engine.stage_preview(temp_page_dir, posts=page_filename == "posts.html")
             
             # 在浏览器中打开预览
-            webbrowser.open(f"file:///{temp_page_path}")
+            open_in_browser(temp_page_path)
             self.animate_page_result("预览已在浏览器中打开", "success")
             
         except Exception as e:
@@ -1780,29 +2921,20 @@ class BlogManager(tk.Tk):
 </body>
 </html>""")
             
-            # 保存当前编辑的CSS内容
-            css_content = self.css_editor.get("1.0", tk.END)
+            # 保存当前编辑的CSS内容（大文件模式下直接复制原文件）
             temp_css_path = os.path.join(temp_css_dir, "style.css")
-            with open(temp_css_path, "w", encoding="utf-8") as f:
-                f.write(css_content)
-            
-            # 复制JS目录
-            temp_js_dir = os.path.join(temp_css_dir, "js")
-            os.makedirs(temp_js_dir, exist_ok=True)
-            if os.path.exists(self.js_dir):
-                for js_file in os.listdir(self.js_dir):
-                    if js_file.endswith(".js"):
-                        shutil.copy2(os.path.join(self.js_dir, js_file), temp_js_dir)
+            if self.large_views.get(str(self.css_editor)):
+                shutil.copy2(self.css_file, temp_css_path)
+            else:
+                css_content = self.css_editor.get("1.0", tk.END)
+                with open(temp_css_path, "w", encoding="utf-8") as f:
+                    f.write(css_content)
             
-            # 复制图片目录
-            temp_img_dir = os.path.join(temp_css_dir, "img")
-            if os.path.exists(self.img_dir):
-                if os.path.exists(temp_img_dir):
-                    shutil.rmtree(temp_img_dir)
-                shutil.copytree(self.img_dir, temp_img_dir)
+            # 复制脚本和图片目录（样式使用编辑器中的内容）
+            self.engine.stage_preview(temp_css_dir, css=False)
             
             # 在浏览器中打开预览
-            webbrowser.open(f"file:///{temp_index_path}")
+            open_in_browser(temp_index_path)
             self.animate_css_result("CSS效果预览已在浏览器中打开", "success")
             
         except Exception as e:
@@ -1816,18 +2948,24 @@ class BlogManager(tk.Tk):
                             foreground="white")
         
         # 为标签页添加切换动画（通过绑定事件实现）
-        self.tab_control.bind("<<NotebookTabChanged>>", self.animate_tab_change)
+        self.tab_control.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+    
+    def on_tab_changed(self, event):
+        """标签页切换：首次进入时构建界面，然后播放切换动画"""
+        self.build_tab(self.tab_control.select())
+        self.animate_tab_change(event)
     
     def animate_tab_change(self, event):
-        """标签页切换动画"""
-        current_tab = self.tab_control.select()
-        frame = self.nametowidget(current_tab)
-        
-        # 淡入效果
-        for i in range(0, 11):
-            frame.configure(alpha=i/10)
-            self.update_idletasks()
-            time.sleep(0.02)
+        """标签页切换动画（状态栏文字由浅到深渐显）"""
+        tab_name = self.tab_control.tab(self.tab_control.select(), "text")
+        
+        # 渐变色序列，每帧 20ms，由调度器驱动，不阻塞界面
+        fade = ["#cbd5e1", "#94a3b8", self.colors["secondary"], "#475569", self.colors["dark"]]
+        frames = [
+            lambda color=color: self.status_bar.config(text=f"当前：{tab_name}", foreground=color)
+            for color in fade
+        ]
+        self.animator.run("tab", frames, interval=20)
     
     def animate_result(self, text, status):
         """结果提示动画"""
@@ -1836,19 +2974,16 @@ class BlogManager(tk.Tk):
             "danger": self.colors["danger"],
             "warning": self.colors["warning"]
         }
+        color = colors.get(status, self.colors["secondary"])
         
-        self.result_label.config(text=text, foreground=colors.get(status, self.colors["secondary"]))
+        # 闪烁动画：显示 -> 隐藏 -> 显示 -> 隐藏 -> 显示，新消息到来时直接替换
+        def show():
+            self.result_label.config(text=text, foreground=color)
         
-        # 闪烁动画
-        for i in range(2):
-            self.result_label.config(foreground=colors.get(status, self.colors["secondary"]))
-            self.update_idletasks()
-            time.sleep(0.2)
+        def hide():
             self.result_label.config(foreground=self.colors["background"])
-            self.update_idletasks()
-            time.sleep(0.2)
         
-        self.result_label.config(foreground=colors.get(status, self.colors["secondary"]))
+        self.animator.run("result", [show, hide, show, hide, show], interval=200)
     
     def animate_page_result(self, text, status):
         """页面编辑结果提示动画"""
@@ -1881,7 +3016,7 @@ class BlogManager(tk.Tk):
         self.js_result_label.config(text=text, foreground=colors.get(status, self.colors["secondary"]))
     
     def animate_deploy_status(self, text, status):
-        """部署状态动画"""
+        """部署状态动画（可在工作线程中调用）"""
         colors = {
             "success": self.colors["success"],
             "danger": self.colors["danger"],
@@ -1889,20 +3024,25 @@ class BlogManager(tk.Tk):
             "info": self.colors["primary"]
         }
         
-        self.deploy_status_var.set(text)
-        self.deploy_status_label.config(foreground=colors.get(status, self.colors["secondary"]))
+        def show():
+            self.deploy_status_var.set(text)
+            self.deploy_status_label.config(
+                foreground=colors.get(status, self.colors["secondary"]),
+                font=("SimHei", 10)
+            )
+        
+        def bold():
+            self.deploy_status_label.config(font=("SimHei", 10, "bold"))
         
-        # 状态变化动画
-        for i in range(3):
-            self.deploy_status_label.config(font=("SimHei", 10, "bold" if i%2 else "normal"))
-            self.update_idletasks()
-            time.sleep(0.2)
+        def normal():
+            self.deploy_status_label.config(font=("SimHei", 10))
         
-        self.deploy_status_label.config(font=("SimHei", 10))
+        # 状态变化动画：正常 -> 加粗 -> 正常
+        self.animator.run("deploy", [show, bold, normal], interval=200)
 
 if __name__ == "__main__":
     try:
-        app = BlogManager()
+        app = BlogManager(profile_startup="--profile-startup" in sys.argv)
         app.mainloop()
     except Exception as e:
         # 创建一个简单的错误提示窗口
@@ -0,0 +1,285 @@
+"""文章目录：已发布文章的元数据（标题、日期、标签、摘要、修改时间）
+
+订阅源、站点地图等生成的文件都从目录读取元数据，不再重新解析文章页面。
+条目按发布顺序每 CHUNK_SIZE 篇分成一块，保存在博客根目录的 .blog_catalog/chunk-N.json 中（与站点地图分块一致），
+.blog_catalog.json 只记录下一个发布序号和最新文章列表；文件不存在时从 posts 目录重建一次。
+发布、编辑或删除一篇文章时只写回它所在的分块和这个小文件；最新文章列表（LATEST_SIZE 篇）随每次修改增量维护，
+分块成员有单独的索引，因此更新订阅源和站点地图不需要遍历全部条目。
+"""
+import heapq
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+CATALOG_FILENAME = ".blog_catalog.json"
+CHUNKS_DIRNAME = ".blog_catalog"
+
+# 每个分块中的文章数（站点地图分块使用同一个值）
+CHUNK_SIZE = 1000
+
+# 增量维护的最新文章数：比订阅源的文章数多一些，删除几篇文章后仍不需要重新扫描
+LATEST_SIZE = 50
+
+_CHUNK_FILE = re.compile(r"chunk-(\d+)\.json")
+
+
+def now_iso():
+    """当前时间（带时区的 ISO 8601 字符串）"""
+    return datetime.now(timezone.utc).astimezone().isoformat(timespec="seconds")
+
+
+def mtime_iso(path):
+    """文件修改时间（带时区的 ISO 8601 字符串）"""
+    return datetime.fromtimestamp(os.path.getmtime(path), timezone.utc).astimezone().isoformat(timespec="seconds")
+
+
+def month_of(entry):
+    """文章所属的月份 (年, 月)，日期无法识别时为 None"""
+    match = re.match(r"(\d{4})-(\d{1,2})", entry.get("date", ""))
+    return (match.group(1), f"{int(match.group(2)):02d}") if match else None
+
+
+def scan_post(path, read_text):
+    """从已发布的文章页面中提取元数据（只在重建目录时使用）"""
+    html = read_text(path) or ""
+
+    def first(pattern):
+        match = re.search(pattern, html, re.DOTALL)
+        return match.group(1).strip() if match else ""
+
+    date = first(r'发布于\s*(\d{4}-\d{1,2}-\d{1,2})') or first(r'<p class="post-date">(.*?)</p>')
+    return {
+        "title": first(r'<h1 class="site-title">(.*?)</h1>') or os.path.splitext(os.path.basename(path))[0],
+        "date": date,
+        "tags": re.findall(r"<span class='tag'>(.*?)</span>", html),
+        "summary": first(r'<main class="post-content">.*?<p>(.*?)</p>')[:200],
+        "img": first(r'<img src="(?:\.\./)?img/(.*?)"'),
+    }
+
+
+def _write_json(path, data):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        # json.dumps 使用 C 实现的编码器，比逐块写入的 json.dump 快得多
+        f.write(json.dumps(data, ensure_ascii=False))
+    os.replace(temp_path, path)
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+def _latest_key(entry):
+    return entry.get("date", ""), entry["seq"]
+
+
+class PostCatalog:
+    """以文件名为键的文章元数据表，seq 记录发布顺序"""
+
+    def __init__(self, path):
+        self.path = path
+        self.chunks_dir = os.path.join(os.path.dirname(path), CHUNKS_DIRNAME)
+        self.entries = {}
+        self.next_seq = 0
+        self.rebuilt = False  # 本次加载时是否从 posts 目录重建
+        self._chunks = {}  # 分块编号 -> 文件名集合
+        self._dirty = set()  # 需要写回的分块
+        self._latest = None  # 最新文章的文件名（按 _latest_key 倒序），是全部条目中最新的 len(_latest) 篇
+        self._stamp = None  # 加载或保存后目录文件的 (修改时间, 大小)
+        self._tags = None  # 倒排索引：标签 -> 文件名集合（首次使用时建立）
+        self._months = None  # 倒排索引：(年, 月) -> 文件名集合
+
+    @classmethod
+    def load(cls, blog_dir, posts_dir, read_text):
+        """读取目录；不存在或已损坏时从 posts 目录重建（旧版本的单文件目录读取后按分块格式保存）"""
+        catalog = cls(os.path.join(blog_dir, CATALOG_FILENAME))
+        try:
+            with open(catalog.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if "entries" in data:
+                entries = data["entries"]
+            else:
+                entries = {}
+                for name in os.listdir(catalog.chunks_dir):
+                    if _CHUNK_FILE.fullmatch(name):
+                        with open(os.path.join(catalog.chunks_dir, name), "r", encoding="utf-8") as f:
+                            entries.update(json.load(f))
+            catalog.next_seq = data["next_seq"]
+            for filename, entry in entries.items():
+                catalog.entries[filename] = entry
+                catalog._chunks.setdefault(entry["seq"] // CHUNK_SIZE, set()).add(filename)
+                catalog.next_seq = max(catalog.next_seq, entry["seq"] + 1)
+            if "entries" in data:
+                catalog._dirty = set(catalog._chunks)
+            latest = data.get("latest")
+            if isinstance(latest, list) and all(name in catalog.entries for name in latest):
+                catalog._latest = latest
+        except (OSError, ValueError, KeyError, TypeError):
+            catalog.rebuild(posts_dir, read_text)
+        catalog._stamp = _stamp(catalog.path)
+        return catalog
+
+    def rebuild(self, posts_dir, read_text):
+        """扫描 posts 目录重建目录（按文件修改时间排列发布顺序）"""
+        # 保存时删除或覆盖磁盘上原有的全部分块
+        if os.path.isdir(self.chunks_dir):
+            self._dirty.update(int(m.group(1)) for m in map(_CHUNK_FILE.fullmatch, os.listdir(self.chunks_dir)) if m)
+        self.entries = {}
+        self.next_seq = 0
+        self.rebuilt = True
+        self._chunks = {}
+        self._latest = None
+        self._tags = self._months = None
+        if not os.path.exists(posts_dir):
+            return
+        paths = [os.path.join(posts_dir, name) for name in os.listdir(posts_dir) if name.endswith(".html")]
+        for path in sorted(paths, key=os.path.getmtime):
+            meta = scan_post(path, read_text)
+            meta["published"] = meta["updated"] = mtime_iso(path)
+            self.put(os.path.basename(path), meta)
+
+    def is_current(self):
+        """目录文件自加载或上次保存以来没有被其他程序改动"""
+        return _stamp(self.path) == self._stamp
+
+    def save(self):
+        """写回有变化的分块，再原子地写回目录文件"""
+        if self._dirty:
+            os.makedirs(self.chunks_dir, exist_ok=True)
+        for chunk in sorted(self._dirty):
+            path = os.path.join(self.chunks_dir, f"chunk-{chunk}.json")
+            members = self._chunks.get(chunk)
+            if members:
+                _write_json(path, {name: self.entries[name] for name in sorted(members)})
+            elif os.path.exists(path):
+                os.remove(path)
+        self._dirty.clear()
+        self.latest(LATEST_SIZE)
+        _write_json(self.path, {"next_seq": self.next_seq, "latest": self._latest})
+        self._stamp = _stamp(self.path)
+
+    def put(self, filename, meta):
+        """新增或更新一篇文章，返回其条目"""
+        entry = self.entries.get(filename)
+        if entry is None:
+            entry = {"seq": self.next_seq, "published": meta.get("published") or now_iso()}
+            self.next_seq += 1
+            self.entries[filename] = entry
+            self._chunks.setdefault(entry["seq"] // CHUNK_SIZE, set()).add(filename)
+        else:
+            self._unindex(entry)
+            self._unlatest(filename)
+        entry.update(meta)
+        entry["filename"] = filename
+        entry["updated"] = meta.get("updated") or now_iso()
+        self._dirty.add(entry["seq"] // CHUNK_SIZE)
+        self._index(entry)
+        self._add_latest(entry)
+        return entry
+
+    def remove(self, filename):
+        """删除一篇文章，返回被删除的条目（不存在时为 None）"""
+        entry = self.entries.pop(filename, None)
+        if entry is not None:
+            chunk = entry["seq"] // CHUNK_SIZE
+            self._chunks[chunk].discard(filename)
+            if not self._chunks[chunk]:
+                del self._chunks[chunk]
+            self._dirty.add(chunk)
+            self._unindex(entry)
+            self._unlatest(filename)
+        return entry
+
+    # ----------------------
+    # 最新文章和分块
+    # ----------------------
+    def _unlatest(self, filename):
+        # 去掉一篇后剩下的仍是其余条目中最新的若干篇
+        if self._latest is not None and filename in self._latest:
+            self._latest.remove(filename)
+
+    def _add_latest(self, entry):
+        # 新条目比列表中最旧的一篇新，或者列表已包含其余全部条目时，它属于最新的 len(_latest) + 1 篇
+        latest = self._latest
+        if latest is None:
+            return
+        key = _latest_key(entry)
+        if len(latest) < len(self.entries) - 1 and (not latest or key < _latest_key(self.entries[latest[-1]])):
+            return
+        index = 0
+        while index < len(latest) and _latest_key(self.entries[latest[index]]) > key:
+            index += 1
+        latest.insert(index, entry["filename"])
+        del latest[LATEST_SIZE:]
+
+    def latest(self, limit):
+        """按日期（其次按发布顺序）倒序的前 limit 篇文章
+
+        通常直接取增量维护的列表；列表因删除变得比 limit 短时才扫描全部条目重新选出。
+        """
+        if self._latest is None or len(self._latest) < min(limit, len(self.entries)):
+            entries = heapq.nlargest(max(limit, LATEST_SIZE), self.entries.values(), key=_latest_key)
+            self._latest = [entry["filename"] for entry in entries]
+        return [self.entries[name] for name in self._latest[:limit]]
+
+    def chunk_numbers(self):
+        """有文章的分块编号（升序）"""
+        return sorted(self._chunks)
+
+    def chunk_entries(self, chunk):
+        """一个分块中的文章（按发布顺序）"""
+        return sorted((self.entries[name] for name in self._chunks.get(chunk, ())), key=lambda e: e["seq"])
+
+    # ----------------------
+    # 倒排索引
+    # ----------------------
+    def _build_index(self):
+        self._tags, self._months = {}, {}
+        for entry in self.entries.values():
+            self._index(entry)
+
+    def _index(self, entry):
+        if self._tags is None:
+            return
+        for tag in entry.get("tags", []):
+            self._tags.setdefault(tag, set()).add(entry["filename"])
+        month = month_of(entry)
+        if month:
+            self._months.setdefault(month, set()).add(entry["filename"])
+
+    def _unindex(self, entry):
+        if self._tags is None:
+            return
+        for tag in entry.get("tags", []):
+            members = self._tags.get(tag)
+            if members is not None:
+                members.discard(entry["filename"])
+                if not members:
+                    del self._tags[tag]
+        month = month_of(entry)
+        if month and month in self._months:
+            self._months[month].discard(entry["filename"])
+            if not self._months[month]:
+                del self._months[month]
+
+    @property
+    def tags(self):
+        """标签 -> 文件名集合"""
+        if self._tags is None:
+            self._build_index()
+        return self._tags
+
+    @property
+    def months(self):
+        """(年, 月) -> 文件名集合"""
+        if self._months is None:
+            self._build_index()
+        return self._months
+
+    def get(self, filename):
+        return self.entries.get(filename)
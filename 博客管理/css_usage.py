@@ -0,0 +1,240 @@
+"""未使用样式分析
+
+收集全站页面中出现的标签名、类名和 id，以及 js/*.js 和页面内联脚本中操作 DOM 时用到的类名、id 和标签
+（classList、className、getElementById、querySelector、createElement 以及字符串中的 class="..."），
+据此找出 style.css 和页面 <style> 中永远不会匹配的规则。
+
+判断是保守的：只要选择器中的每个标签、类名和 id 都在站点中出现过就认为可能匹配，不检查它们是否在同一个元素上。
+精简后的样式表只用于发布输出，博客目录中的源文件保持不变。
+"""
+import re
+
+from page_optimizer import STATE_CLASSES, parse_css
+
+_ELEMENT = re.compile(r"<([a-zA-Z][\w-]*)\b([^>]*)>")
+_CLASS_ATTR = re.compile(r"""\bclass\s*=\s*\\?["']([^"'\\]*)""", re.IGNORECASE)
+_ID_ATTR = re.compile(r"""\bid\s*=\s*\\?["']([^"'\\]*)""", re.IGNORECASE)
+_STYLE_BLOCK = re.compile(r"(?is)(<style\b([^>]*)>)(.*?)</style>")
+_SCRIPT_BLOCK = re.compile(r"(?is)<script\b([^>]*)>(.*?)</script>")
+_STRING = re.compile(r"""(['"`])((?:\\.|(?!\1).)*)\1""")
+
+# 脚本中操作 DOM 的调用：(正则, 参数的含义)
+_JS_CALLS = (
+    (re.compile(r"classList\.(?:add|remove|toggle|replace|contains)\(([^)]*)\)"), "class"),
+    (re.compile(r"\.className\s*[+]?=\s*([^;\n]+)"), "class"),
+    (re.compile(r"setAttribute\(\s*['\"]class['\"]\s*,([^)]*)\)"), "class"),
+    (re.compile(r"getElementById\(([^)]*)\)"), "id"),
+    (re.compile(r"\.id\s*=\s*([^;\n]+)"), "id"),
+    (re.compile(r"(?:querySelector(?:All)?|closest|matches)\(([^)]*)\)"), "selector"),
+    (re.compile(r"createElement\(([^)]*)\)"), "tag"),
+)
+
+_SELECTOR_TOKENS = re.compile(r"([.#]?)(-?[a-zA-Z_][\w-]*)")
+_PSEUDO = re.compile(r"::?[\w-]+(?:\([^)]*\))?")
+_COMPOUND = re.compile(r"[^\s>+~]+")
+
+
+class CssUsage:
+    """站点中出现过的标签名、类名和 id
+
+    safelist 中的名称始终视为已使用（类名和 id 均可），例如由外部脚本添加的类名。
+    """
+
+    def __init__(self, safelist=()):
+        self.tags = {"html", "body"}
+        self.classes = set(STATE_CLASSES) | set(safelist)
+        self.ids = set(safelist)
+
+    def add_html(self, html):
+        for match in _ELEMENT.finditer(html):
+            self.tags.add(match.group(1).lower())
+            attrs = match.group(2)
+            for value in _CLASS_ATTR.findall(attrs):
+                self.classes.update(value.split())
+            for value in _ID_ATTR.findall(attrs):
+                self.ids.add(value.strip())
+        for attrs, code in _SCRIPT_BLOCK.findall(html):
+            if "src" not in attrs.lower():
+                self.add_script(code)
+
+    def add_script(self, code):
+        # 字符串里拼出来的 HTML（innerHTML 模板）
+        for value in _CLASS_ATTR.findall(code):
+            self.classes.update(value.split())
+        for value in _ID_ATTR.findall(code):
+            self.ids.update(value.split())
+
+        for pattern, meaning in _JS_CALLS:
+            for match in pattern.finditer(code):
+                for _, literal in _STRING.findall(match.group(1)):
+                    literal = re.sub(r"\$\{[^}]*\}", " ", literal)
+                    if meaning == "class":
+                        self.classes.update(literal.split())
+                    elif meaning == "id":
+                        self.ids.add(literal.strip())
+                    elif meaning == "tag":
+                        self.tags.add(literal.strip().lower())
+                    else:
+                        self.add_selector(literal)
+
+    def add_selector(self, selector):
+        for prefix, name in _SELECTOR_TOKENS.findall(_PSEUDO.sub("", re.sub(r"\[[^\]]*\]", "", selector))):
+            if prefix == ".":
+                self.classes.add(name)
+            elif prefix == "#":
+                self.ids.add(name)
+            else:
+                self.tags.add(name.lower())
+
+    def matches(self, selector):
+        """选择器是否可能匹配站点中的元素"""
+        selector = _PSEUDO.sub("", re.sub(r"\[[^\]]*\]", "", selector))
+        for compound in _COMPOUND.findall(selector):
+            for prefix, name in _SELECTOR_TOKENS.findall(compound):
+                if prefix == ".":
+                    if name not in self.classes:
+                        return False
+                elif prefix == "#":
+                    if name not in self.ids:
+                        return False
+                elif name.lower() not in self.tags:
+                    return False
+        return True
+
+
+def collect_usage(root, files, safelist=(), extra_html=()):
+    """从站点文件（相对路径 -> 绝对路径）和 extra_html（例如页面模板）中收集 CssUsage"""
+    from site_validator import read_html
+
+    usage = CssUsage(safelist)
+    for html in extra_html:
+        usage.add_html(html)
+    for relative, path in files.items():
+        if relative.endswith((".html", ".htm")):
+            usage.add_html(read_html(path))
+        elif relative.endswith(".js"):
+            usage.add_script(read_html(path))
+    return usage
+
+
+# ----------------------
+# 精简
+# ----------------------
+def _line_of(text, position):
+    return text.count("\n", 0, position) + 1
+
+
+def find_dead_rules(rules, usage, text, dead=None, edits=None):
+    """找出不会匹配的规则，返回 (死规则列表, 编辑列表)
+
+    死规则为 (行号, 选择器)；编辑为 (起点, 终点, 替换文本)，整条规则无用时删除，部分选择器无用时只删这些选择器。
+    """
+    dead = [] if dead is None else dead
+    edits = [] if edits is None else edits
+    for kind, prelude, body, (start, end) in rules:
+        if kind == "rule":
+            selectors = [s.strip() for s in prelude.split(",")]
+            used = [s for s in selectors if usage.matches(s)]
+            if len(used) == len(selectors):
+                continue
+            line = _line_of(text, start)
+            dead.extend((line, s) for s in selectors if s not in used)
+            if used:
+                brace = text.index("{", start)
+                edits.append((start, brace, ", ".join(used) + " "))
+            else:
+                edits.append((start, end, ""))
+        elif isinstance(body, list):
+            inner_dead, inner_edits = find_dead_rules(body, usage, text)
+            dead.extend(inner_dead)
+            live = [rule for rule in body if rule[0] != "rule" or any(
+                usage.matches(s.strip()) for s in rule[1].split(","))]
+            if body and not live:
+                edits.append((start, end, ""))
+            else:
+                edits.extend(inner_edits)
+    return dead, edits
+
+
+def apply_edits(text, edits):
+    """按位置从后往前替换；删除整条规则时一并去掉其后的空行"""
+    for start, end, replacement in sorted(edits, reverse=True):
+        if not replacement:
+            while end < len(text) and text[end] in " \t":
+                end += 1
+            if text.startswith("\n", end):
+                end += 1
+        text = text[:start] + replacement + text[end:]
+    return re.sub(r"\n{3,}", "\n\n", text)
+
+
+def prune_css(text, usage):
+    """返回 (精简后的样式表, 死规则列表)"""
+    dead, edits = find_dead_rules(parse_css(text), usage, text)
+    return apply_edits(text, edits), dead
+
+
+def prune_inline_styles(html, usage):
+    """精简页面中的 <style> 块（跳过关键 CSS），返回 (新页面, 死规则列表)"""
+    dead = []
+
+    def replace(match):
+        if "data-critical" in match.group(2):
+            return match.group(0)
+        css, block_dead = prune_css(match.group(3), usage)
+        # 行号换算为页面中的行号
+        base = _line_of(html, match.start(3)) - 1
+        dead.extend((base + line, selector) for line, selector in block_dead)
+        return match.group(1) + css + "</style>"
+
+    return _STYLE_BLOCK.sub(replace, html), dead
+
+
+class UsageReport:
+    """未使用样式报告"""
+
+    def __init__(self, root):
+        self.root = root
+        self.files = []  # (相对路径, 原字节数, 精简后字节数, [(行号, 选择器)])
+
+    @property
+    def dead_count(self):
+        return sum(len(dead) for _, _, _, dead in self.files)
+
+    def summary(self):
+        before = sum(size for _, size, _, _ in self.files)
+        after = sum(size for _, _, size, _ in self.files)
+        return (f"检查了 {len(self.files)} 处样式，发现 {self.dead_count} 个未使用的选择器，"
+                f"精简后 {before / 1024:.1f} KB → {after / 1024:.1f} KB")
+
+    def format_dead(self, limit=200):
+        lines = []
+        for relative, before, after, dead in self.files:
+            if not dead:
+                continue
+            lines.append(f"{relative}（{before} → {after} 字节）")
+            lines.extend(f"  第 {line} 行：{selector}" for line, selector in dead)
+        if len(lines) > limit:
+            lines = lines[:limit] + [f"……另有 {len(lines) - limit} 行未列出"]
+        return lines
+
+
+def analyze_site(root, files, safelist=(), extra_html=()):
+    """分析站点中的样式表和页面内联样式，返回 UsageReport"""
+    from site_validator import read_html
+
+    usage = collect_usage(root, files, safelist, extra_html)
+    report = UsageReport(root)
+    for relative, path in sorted(files.items()):
+        if relative.endswith(".css"):
+            text = read_html(path)
+            pruned, dead = prune_css(text, usage)
+        elif relative.endswith((".html", ".htm")):
+            text = read_html(path)
+            if "<style" not in text.lower():
+                continue
+            pruned, dead = prune_inline_styles(text, usage)
+        else:
+            continue
+        report.files.append((relative, len(text.encode("utf-8")), len(pruned.encode("utf-8")), dead))
+    return report
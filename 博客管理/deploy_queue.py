@@ -0,0 +1,161 @@
+"""自动部署队列
+
+发布、编辑或删除文章后把一条变更记录加入队列；在防抖窗口内没有新的变更时，
+把队列中的所有变更合并成一次提交并在后台推送。推送失败时按指数退避重试。
+队列保存在博客目录的 .deploy_queue.json 中，程序重启后继续处理未完成的部署。
+"""
+import json
+import os
+import threading
+import time
+
+QUEUE_FILENAME = ".deploy_queue.json"
+
+# 防抖窗口（秒）：最后一次变更后等待这么久才部署
+DEFAULT_DELAY = 60
+
+# 持续有变更时，最早的变更最多等待防抖窗口的这么多倍
+MAX_WAIT_FACTOR = 10
+
+# 失败重试的等待时间（秒）：从 RETRY_BASE 开始每次翻倍，最多 RETRY_MAX
+RETRY_BASE = 30
+RETRY_MAX = 1800
+
+
+def commit_message(changes):
+    """把一批变更合并成一条提交说明"""
+    reasons = list(dict.fromkeys(change["reason"] for change in changes))
+    if len(reasons) == 1:
+        return f"自动部署：{reasons[0]}"
+    return f"自动部署：{len(reasons)} 项更新\n\n" + "\n".join(f"- {reason}" for reason in reasons)
+
+
+class DeployQueue:
+    """带防抖和重试的自动部署队列
+
+    deploy(message) 在后台线程中执行实际的提交和推送，失败时抛出异常；
+    log(message, status=None) 接收进度消息，status 为 "success" 或 "danger" 时表示一次部署的结果。
+    lock 与手动部署共用，保证同一时间只有一个 git 操作。
+    """
+
+    def __init__(self, path, deploy, log=None, delay=DEFAULT_DELAY, lock=None):
+        self.path = path
+        self.deploy = deploy
+        self.log = log or (lambda message, status=None: None)
+        self.delay = delay
+        self.lock = lock or threading.Lock()
+        self.changes = []  # {"at": 时间戳, "reason": 说明}
+        self.attempts = 0  # 连续失败次数
+        self._state_lock = threading.Lock()
+        self._timer = None
+        self._load()
+
+    # ----------------------
+    # 持久化
+    # ----------------------
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.changes = data.get("changes", [])
+        self.attempts = data.get("attempts", 0)
+
+    def _save(self):
+        if not self.changes:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"changes": self.changes, "attempts": self.attempts}, ensure_ascii=False, indent=2))
+        os.replace(temp_path, self.path)
+
+    # ----------------------
+    # 调度
+    # ----------------------
+    @property
+    def pending(self):
+        return len(self.changes)
+
+    def _schedule(self, seconds):
+        if self._timer:
+            self._timer.cancel()
+        self._timer = threading.Timer(max(seconds, 0), self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def enqueue(self, reason):
+        """加入一条变更并重新开始防抖计时（正在退避重试时保持原来的重试时间）"""
+        with self._state_lock:
+            now = time.time()
+            self.changes.append({"at": now, "reason": reason})
+            self._save()
+            if self.attempts == 0:
+                deadline = self.changes[0]["at"] + self.delay * MAX_WAIT_FACTOR
+                self._schedule(min(self.delay, deadline - now))
+        self.log(f"已加入自动部署队列：{reason}（共 {self.pending} 项）")
+
+    def resume(self):
+        """程序启动时继续处理上次未完成的部署"""
+        with self._state_lock:
+            if not self.changes:
+                return
+            self._schedule(self.delay)
+        self.log(f"自动部署队列中有 {self.pending} 项未完成的更新，{self.delay} 秒后部署")
+
+    def clear(self):
+        """手动部署已包含全部变更时清空队列"""
+        with self._state_lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            self.changes = []
+            self.attempts = 0
+            self._save()
+
+    def stop(self):
+        """停止计时（队列仍保存在磁盘上，下次启动时继续）"""
+        with self._state_lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+    def flush(self):
+        """把当前队列中的变更合并成一次部署（在计时器线程中执行）"""
+        # 正在手动部署时稍后再试
+        if not self.lock.acquire(blocking=False):
+            with self._state_lock:
+                self._schedule(self.delay)
+            return
+
+        try:
+            with self._state_lock:
+                self._timer = None
+                batch = list(self.changes)
+            if not batch:
+                return
+
+            self.log(f"开始自动部署（{len(batch)} 项更新）...")
+            try:
+                self.deploy(commit_message(batch))
+            except Exception as e:
+                with self._state_lock:
+                    self.attempts += 1
+                    retry = min(RETRY_BASE * 2 ** (self.attempts - 1), RETRY_MAX)
+                    self._save()
+                    self._schedule(retry)
+                self.log(f"自动部署失败：{str(e)}，{retry} 秒后第 {self.attempts + 1} 次尝试", "danger")
+                return
+
+            with self._state_lock:
+                # 部署期间新加入的变更留在队列中，等待下一次防抖
+                del self.changes[:len(batch)]
+                self.attempts = 0
+                self._save()
+                if self.changes:
+                    self._schedule(self.delay)
+            self.log(f"自动部署完成（{len(batch)} 项更新）", "success")
+        finally:
+            self.lock.release()
@@ -0,0 +1,220 @@
+"""订阅源和站点地图
+
+feed.xml（RSS 2.0）、atom.xml、feed.json（JSON Feed 1.1）只包含最新的 FEED_LIMIT 篇文章；
+sitemap.xml 是索引文件，文章按发布顺序每 SITEMAP_CHUNK_SIZE 篇分成一个 sitemap-posts-N.xml。
+发布、编辑或删除一篇文章时只重写三个订阅源、它所在的分块和索引：最新文章取自目录增量维护的列表，
+分块成员取自目录的分块索引，耗时只与 FEED_LIMIT 和分块大小有关，不随文章总数增长。
+订阅源和站点地图中的地址必须是绝对地址，没有站点地址时不生成（见 FeedWriter.enabled）。
+"""
+import json
+import os
+import re
+from datetime import datetime
+from email.utils import format_datetime
+from urllib.parse import quote
+from xml.sax.saxutils import escape, quoteattr
+
+from catalog import CHUNK_SIZE, mtime_iso
+from templates import SITE_TITLE
+
+# 订阅源中的文章数
+FEED_LIMIT = 20
+
+# 每个站点地图分块中的文章数（与文章目录的分块一致）
+SITEMAP_CHUNK_SIZE = CHUNK_SIZE
+
+SITEMAP_INDEX = "sitemap.xml"
+SITEMAP_PAGES = "sitemap-pages.xml"
+
+
+def guess_site_url(remote_repo):
+    """根据 GitHub 仓库地址推断 GitHub Pages 站点地址，无法推断时返回空字符串"""
+    match = re.search(r"github\.com[:/]([^/]+)/([^/]+?)(?:\.git)?/?$", remote_repo or "")
+    if not match:
+        return ""
+    user, repo = match.groups()
+    if repo.lower() == f"{user.lower()}.github.io":
+        return f"https://{repo.lower()}/"
+    return f"https://{user.lower()}.github.io/{repo}/"
+
+
+def write_if_changed(path, content):
+    """内容变化时才（原子地）写入文件，返回是否写入"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == content:
+                return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(temp_path, path)
+    return True
+
+
+def chunk_of(entry):
+    """文章所在的站点地图分块编号"""
+    return entry["seq"] // SITEMAP_CHUNK_SIZE
+
+
+def _parse_date(entry):
+    """文章日期（YYYY-MM-DD）转为带时区的 datetime，无法解析时使用发布时间"""
+    published = datetime.fromisoformat(entry["published"])
+    try:
+        return datetime.strptime(entry.get("date", ""), "%Y-%m-%d").replace(tzinfo=published.tzinfo)
+    except ValueError:
+        return published
+
+
+class FeedWriter:
+    """把文章目录写成订阅源和站点地图"""
+
+    def __init__(self, blog_dir, site_url="", title=SITE_TITLE, pages=()):
+        self.blog_dir = blog_dir
+        self.site_url = site_url.rstrip("/") + "/" if site_url else ""
+        self.title = title
+        self.pages = pages  # 写入站点地图的其他页面路径
+
+    @property
+    def enabled(self):
+        """有站点地址时才能生成订阅源和站点地图（其中不允许相对地址）"""
+        return bool(self.site_url)
+
+    def url(self, relative_path):
+        return self.site_url + quote(relative_path.replace(os.sep, "/"))
+
+    def post_url(self, entry):
+        return self.url(f"posts/{entry['filename']}")
+
+    def _write(self, filename, content):
+        return write_if_changed(os.path.join(self.blog_dir, filename), content)
+
+    # ----------------------
+    # 订阅源
+    # ----------------------
+    def render_rss(self, entries):
+        items = []
+        for entry in entries:
+            categories = "".join(f"\n      <category>{escape(tag)}</category>" for tag in entry.get("tags", []))
+            items.append(f"""    <item>
+      <title>{escape(entry['title'])}</title>
+      <link>{escape(self.post_url(entry))}</link>
+      <guid>{escape(self.post_url(entry))}</guid>
+      <pubDate>{format_datetime(_parse_date(entry))}</pubDate>
+      <description>{escape(entry.get('summary', ''))}</description>{categories}
+    </item>""")
+        build_date = max((datetime.fromisoformat(e["updated"]) for e in entries), default=None)
+        last_build = f"\n    <lastBuildDate>{format_datetime(build_date)}</lastBuildDate>" if build_date else ""
+        return f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0">
+  <channel>
+    <title>{escape(self.title)}</title>
+    <link>{escape(self.url('posts.html'))}</link>
+    <description>{escape(self.title)} 的最新文章</description>
+    <language>zh-CN</language>{last_build}
+{chr(10).join(items)}
+  </channel>
+</rss>
+"""
+
+    def render_atom(self, entries):
+        items = []
+        for entry in entries:
+            categories = "".join(f"\n    <category term={quoteattr(tag)}/>" for tag in entry.get("tags", []))
+            items.append(f"""  <entry>
+    <title>{escape(entry['title'])}</title>
+    <link href="{escape(self.post_url(entry))}"/>
+    <id>{escape(self.post_url(entry))}</id>
+    <published>{_parse_date(entry).isoformat()}</published>
+    <updated>{entry['updated']}</updated>
+    <summary>{escape(entry.get('summary', ''))}</summary>{categories}
+  </entry>""")
+        updated = max((e["updated"] for e in entries), default=datetime.now().astimezone().isoformat(timespec="seconds"))
+        return f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xml:lang="zh-CN">
+  <title>{escape(self.title)}</title>
+  <link href="{escape(self.url('atom.xml'))}" rel="self"/>
+  <link href="{escape(self.url('posts.html'))}"/>
+  <id>{escape(self.url('posts.html'))}</id>
+  <updated>{updated}</updated>
+{chr(10).join(items)}
+</feed>
+"""
+
+    def render_json_feed(self, entries):
+        feed = {
+            "version": "https://jsonfeed.org/version/1.1",
+            "title": self.title,
+            "home_page_url": self.url("index.html"),
+            "feed_url": self.url("feed.json"),
+            "language": "zh-CN",
+            "items": [
+                {
+                    "id": self.post_url(entry),
+                    "url": self.post_url(entry),
+                    "title": entry["title"],
+                    "summary": entry.get("summary", ""),
+                    "date_published": _parse_date(entry).isoformat(),
+                    "date_modified": entry["updated"],
+                    "tags": entry.get("tags", []),
+                }
+                for entry in entries
+            ],
+        }
+        return json.dumps(feed, ensure_ascii=False, indent=2) + "\n"
+
+    def write_feeds(self, catalog):
+        """重写三个订阅源（只包含最新的 FEED_LIMIT 篇文章）"""
+        entries = catalog.latest(FEED_LIMIT)
+        self._write("feed.xml", self.render_rss(entries))
+        self._write("atom.xml", self.render_atom(entries))
+        self._write("feed.json", self.render_json_feed(entries))
+
+    # ----------------------
+    # 站点地图
+    # ----------------------
+    @staticmethod
+    def _urlset(urls):
+        body = "\n".join(
+            f"  <url>\n    <loc>{escape(loc)}</loc>\n    <lastmod>{lastmod}</lastmod>\n  </url>" for loc, lastmod in urls
+        )
+        return f"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+{body}
+</urlset>
+"""
+
+    def write_sitemap(self, catalog, chunks):
+        """重写指定的文章分块、其他页面的站点地图和索引"""
+        # 1. 受影响的文章分块
+        for chunk in set(chunks):
+            members = catalog.chunk_entries(chunk)
+            filename = f"sitemap-posts-{chunk}.xml"
+            if members:
+                self._write(filename, self._urlset([(self.post_url(e), e["updated"]) for e in members]))
+            elif os.path.exists(os.path.join(self.blog_dir, filename)):
+                os.remove(os.path.join(self.blog_dir, filename))
+
+        # 2. 其他页面（首页、文章列表页等）
+        pages = [path for path in self.pages if os.path.exists(path)]
+        self._write(SITEMAP_PAGES, self._urlset(
+            [(self.url(os.path.relpath(path, self.blog_dir)), mtime_iso(path)) for path in pages]
+        ))
+
+        # 3. 索引：列出现有的分块文件，lastmod 取分块文件的修改时间
+        parts = [SITEMAP_PAGES]
+        for chunk in catalog.chunk_numbers():
+            filename = f"sitemap-posts-{chunk}.xml"
+            if os.path.exists(os.path.join(self.blog_dir, filename)):
+                parts.append(filename)
+        body = "\n".join(
+            f"  <sitemap>\n    <loc>{escape(self.url(name))}</loc>\n"
+            f"    <lastmod>{mtime_iso(os.path.join(self.blog_dir, name))}</lastmod>\n  </sitemap>"
+            for name in parts
+        )
+        self._write(SITEMAP_INDEX, f"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+{body}
+</sitemapindex>
+""")
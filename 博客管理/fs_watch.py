@@ -0,0 +1,223 @@
+"""监视博客目录中的文件变化
+
+批处理脚本、外部编辑器和 git pull 都会在管理工具之外修改 posts/、js/、style.css 和 img/。
+监视器只监视博客根目录和几个子目录（都不递归），把短时间内的一串变化合并成一批相对路径
+（例如 posts/a.html、style.css）交给回调，界面据此只刷新受影响的条目，不需要重新扫描全部文件。
+
+Linux 上通过 ctypes 调用 inotify，其他系统（或 inotify 不可用时）每秒比较一次目录中文件的修改时间和大小。
+以点开头的文件和 .tmp 临时文件的变化被忽略。事件队列溢出时回调收到 {"*"}，表示需要全部刷新。
+回调出错时交给 on_error（没有给出时记录到日志），监视线程继续运行。
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+# 监视的子目录（根目录本身也监视，用于 style.css、各个页面等）
+WATCH_DIRS = ("posts", "sources", "js", "img", "templates")
+
+# 一批变化在最后一个事件之后再等待多久才交给回调（秒），持续有事件时最多等待 MAX_DELAY
+DEBOUNCE = 0.3
+MAX_DELAY = 2.0
+POLL_INTERVAL = 1.0
+
+RESCAN = "*"
+
+# inotify 常量（linux/inotify.h）
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+               | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT = struct.Struct("iIII")
+
+
+def ignored(name):
+    return name.startswith(".") or name.endswith((".tmp", "~")) or name == "__pycache__"
+
+
+class _Watcher:
+    """监视器的公共部分：后台线程、去抖和回调"""
+
+    def __init__(self, root, on_changes, dirs=WATCH_DIRS, debounce=DEBOUNCE, on_error=None):
+        self.root = root
+        self.on_changes = on_changes
+        self.on_error = on_error
+        self.dirs = dirs
+        self.debounce = debounce
+        self._pending = set()
+        self._first = self._last = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"{type(self).__name__}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+    def _add(self, relative):
+        now = time.monotonic()
+        if not self._pending:
+            self._first = now
+        self._last = now
+        self._pending.add(relative)
+
+    def _timeout(self, default):
+        """距离下一次需要交出变化的时间"""
+        if not self._pending:
+            return default
+        due = min(self._last + self.debounce, self._first + MAX_DELAY)
+        return max(due - time.monotonic(), 0)
+
+    def _flush(self):
+        if self._pending and self._timeout(0) == 0:
+            changes, self._pending = self._pending, set()
+            try:
+                self.on_changes(changes)
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(e)
+                else:
+                    logging.getLogger(__name__).exception("处理文件变化失败")
+
+    def _relative(self, directory, name):
+        return f"{directory}/{name}" if directory else name
+
+
+class PollingWatcher(_Watcher):
+    """定期比较目录中文件的修改时间和大小"""
+
+    backend = "polling"
+
+    def __init__(self, root, on_changes, dirs=WATCH_DIRS, debounce=DEBOUNCE, on_error=None, interval=POLL_INTERVAL):
+        super().__init__(root, on_changes, dirs, debounce, on_error)
+        self.interval = interval
+
+    def _scan(self):
+        state = {}
+        for directory in ("",) + tuple(self.dirs):
+            try:
+                entries = os.scandir(os.path.join(self.root, directory))
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if ignored(entry.name):
+                        continue
+                    try:
+                        if entry.is_file():
+                            st = entry.stat()
+                            state[self._relative(directory, entry.name)] = (st.st_mtime_ns, st.st_size)
+                    except OSError:
+                        continue
+        return state
+
+    def _run(self):
+        previous = self._scan()
+        next_scan = time.monotonic() + self.interval
+        while not self._stop.wait(min(self._timeout(self.interval), max(next_scan - time.monotonic(), 0))):
+            if time.monotonic() >= next_scan:
+                current = self._scan()
+                for relative in previous.keys() | current.keys():
+                    if previous.get(relative) != current.get(relative):
+                        self._add(relative)
+                previous = current
+                next_scan = time.monotonic() + self.interval
+            self._flush()
+
+
+class InotifyWatcher(_Watcher):
+    """Linux inotify（通过 ctypes 调用 libc）"""
+
+    backend = "inotify"
+
+    def __init__(self, root, on_changes, dirs=WATCH_DIRS, debounce=DEBOUNCE, on_error=None):
+        super().__init__(root, on_changes, dirs, debounce, on_error)
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self._wds = {}  # 监视描述符 -> 相对目录（根目录为 ""）
+        self._add_watch("")
+        for directory in self.dirs:
+            self._add_watch(directory)
+
+    def _add_watch(self, directory):
+        path = os.path.join(self.root, directory) if directory else self.root
+        if not os.path.isdir(path):
+            return
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if wd >= 0:
+            self._wds[wd] = directory
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                readable, _, _ = select.select([self._fd], [], [], min(self._timeout(0.5), 0.5))
+                if readable:
+                    self._read_events()
+                self._flush()
+        finally:
+            os.close(self._fd)
+
+    def _read_events(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].split(b"\0", 1)[0]
+            offset += _EVENT.size + length
+            name = os.fsdecode(name)
+
+            if mask & IN_Q_OVERFLOW:
+                self._add(RESCAN)
+                continue
+            directory = self._wds.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._wds[wd]
+                continue
+            if mask & IN_ISDIR:
+                # 监视的子目录在启动之后才创建（或被删除后重新创建）
+                if directory == "" and name in self.dirs and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_watch(name)
+                    self._add(RESCAN)
+                continue
+            if name and not ignored(name):
+                self._add(self._relative(directory, name))
+
+
+def create_watcher(root, on_changes, dirs=WATCH_DIRS, debounce=DEBOUNCE, polling=False, on_error=None):
+    """创建并启动监视器：Linux 上优先使用 inotify，不可用时改为轮询"""
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root, on_changes, dirs, debounce, on_error).start()
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, on_changes, dirs, debounce, on_error).start()
@@ -0,0 +1,287 @@
+"""Git 任务队列
+
+所有 git 命令都由一个后台线程中的 asyncio 事件循环通过 create_subprocess_exec 执行（参数列表，不经过 shell），
+输出逐行回传。拉取、部署、检查状态等任务（一个任务可能包含多条 git 命令）按提交顺序串行执行，
+每个任务有自己的超时时间；任务超时或被取消时，正在运行的 git 进程会被终止。
+"""
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+
+from blog_engine import GitError
+
+# 任务的默认超时时间（秒）：拉取和部署等需要联网的任务
+DEFAULT_TIMEOUT = 300
+
+# 只在本地执行的任务（检查状态、查看差异等）的超时时间（秒）
+QUICK_TIMEOUT = 60
+
+
+class GitTimeout(GitError):
+    """任务超时"""
+
+
+class GitCancelled(GitError):
+    """任务被取消"""
+
+
+class GitJob:
+    """一个排队执行的任务"""
+
+    def __init__(self, name, func, args, kwargs, timeout):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.timeout = timeout
+        self.future = Future()
+        self.deadline = None
+        self.cancelled = False
+        self._command = None  # 正在运行的 git 命令（concurrent Future）
+
+    def result(self, timeout=None):
+        """等待任务完成并返回结果（不能在 Tk 主线程中调用）"""
+        return self.future.result(timeout)
+
+
+class GitJobRunner:
+    """在单独的线程中运行 asyncio 事件循环，串行执行 git 任务
+
+    任务函数在一个专用的任务线程中执行，其中调用的 run() 会把 git 命令交给事件循环，
+    因此任务函数可以是普通的同步代码（例如 BlogEngine.deploy）。
+    传入调度器时，完成回调和 on_change 都在 Tk 主线程中执行。
+    没有给出 on_error 的任务失败时调用 default_error(任务名, 异常)，未设置时记录到日志。
+    """
+
+    def __init__(self, scheduler=None, on_change=None, default_timeout=DEFAULT_TIMEOUT, default_error=None):
+        self.scheduler = scheduler
+        self.on_change = on_change  # 队列变化时调用 on_change(正在执行的任务, 排队的任务数)
+        self.default_error = default_error
+        self.default_timeout = default_timeout
+        self.current = None
+        self._jobs = deque()  # 排队中的任务
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="git-job")
+
+        self.loop = asyncio.new_event_loop()
+        self._wakeup = None
+        self._thread = threading.Thread(target=self._run_loop, name="git-loop", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+
+    # ----------------------
+    # 事件循环
+    # ----------------------
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _start(self):
+        self._wakeup = asyncio.Event()
+        self._worker = self.loop.create_task(self._work())
+
+    async def _work(self):
+        """依次取出任务，在任务线程中执行"""
+        while True:
+            with self._lock:
+                job = self._jobs.popleft() if self._jobs else None
+                if job is None:
+                    self._wakeup.clear()
+            if job is None:
+                await self._wakeup.wait()
+                continue
+            if job.cancelled:
+                job.future.set_exception(GitCancelled(f"已取消：{job.name}"))
+                continue
+
+            job.deadline = time.monotonic() + job.timeout
+            self.current = job
+            self._notify()
+            try:
+                result = await self.loop.run_in_executor(self._executor, self._run_job, job)
+            except BaseException as e:
+                job.future.set_exception(e)
+            else:
+                job.future.set_result(result)
+            finally:
+                self.current = None
+                self._notify()
+
+    def _run_job(self, job):
+        self._local.job = job
+        try:
+            return job.func(*job.args, **job.kwargs)
+        finally:
+            self._local.job = None
+
+    async def _exec(self, argv, cwd, log, timeout):
+        """运行一条命令，逐行输出日志，返回 (返回码, 输出)"""
+        # 禁止 git 在终端中询问用户名和密码，缺少凭据时直接失败而不是一直等待
+        env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+        # git 会启动子进程（远程传输、钩子等），放到单独的进程组中，终止时一并结束
+        if sys.platform == "win32":
+            group = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            group = {"start_new_session": True}
+        process = await asyncio.create_subprocess_exec(
+            *argv, cwd=cwd, env=env,
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, **group
+        )
+
+        output = []
+
+        async def read():
+            while True:
+                line = await process.stdout.readline()
+                if not line:
+                    break
+                line = line.decode("utf-8", errors="replace").rstrip()
+                output.append(line)
+                if log:
+                    log(line)
+            return await process.wait()
+
+        try:
+            returncode = await asyncio.wait_for(read(), timeout)
+        except asyncio.TimeoutError:
+            await self._kill(process)
+            raise GitTimeout(f"命令超时：{' '.join(argv)}")
+        except asyncio.CancelledError:
+            await self._kill(process)
+            raise
+        return returncode, "\n".join(output)
+
+    @staticmethod
+    async def _kill(process):
+        """终止进程及其子进程"""
+        if process.returncode is not None:
+            return
+        try:
+            if sys.platform == "win32":
+                killer = await asyncio.create_subprocess_exec(
+                    "taskkill", "/F", "/T", "/PID", str(process.pid),
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                )
+                await killer.wait()
+            else:
+                os.killpg(process.pid, signal.SIGKILL)
+        except (OSError, ProcessLookupError):
+            process.kill()
+        await process.wait()
+
+    # ----------------------
+    # 对外接口
+    # ----------------------
+    def run(self, argv, cwd=None, log=None):
+        """运行一条命令并等待结果（在任务线程或其他非事件循环线程中调用）
+
+        在任务中调用时使用任务剩余的时间作为超时，任务被取消时抛出 GitCancelled。
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("不能在事件循环线程中同步等待 git 命令")
+
+        job = getattr(self._local, "job", None)
+        if job is None:
+            timeout = self.default_timeout
+        else:
+            if job.cancelled:
+                raise GitCancelled(f"已取消：{job.name}")
+            timeout = job.deadline - time.monotonic()
+            if timeout <= 0:
+                raise GitTimeout(f"任务超时（{job.timeout:.0f} 秒）：{job.name}")
+
+        command = asyncio.run_coroutine_threadsafe(self._exec(argv, cwd, log, timeout), self.loop)
+        if job is not None:
+            job._command = command
+            if job.cancelled:
+                command.cancel()
+        try:
+            return command.result()
+        except CancelledError:
+            raise GitCancelled(f"已取消：{job.name if job else ' '.join(argv)}")
+        finally:
+            if job is not None:
+                job._command = None
+
+    def submit(self, name, func, *args, timeout=None, on_done=None, on_error=None, **kwargs):
+        """把任务加入队列，返回 GitJob"""
+        job = GitJob(name, func, args, kwargs, timeout or self.default_timeout)
+        job.future.add_done_callback(lambda f: self._deliver(name, f, on_done, on_error))
+        with self._lock:
+            self._jobs.append(job)
+        self.loop.call_soon_threadsafe(self._wakeup.set)
+        self._notify()
+        return job
+
+    def _deliver(self, name, future, on_done, on_error):
+        if self.scheduler:
+            self.scheduler.call_soon(self._dispatch, name, future, on_done, on_error)
+        else:
+            self._dispatch(name, future, on_done, on_error)
+
+    def _dispatch(self, name, future, on_done, on_error):
+        error = future.exception()
+        if error is not None:
+            if on_error:
+                on_error(error)
+            elif isinstance(error, GitCancelled):
+                pass  # 用户主动取消的任务不需要提示
+            elif self.default_error:
+                self.default_error(name, error)
+            else:
+                logging.getLogger(__name__).error("Git 任务失败：%s", name, exc_info=error)
+        elif on_done:
+            on_done(future.result())
+
+    def _notify(self):
+        if not self.on_change:
+            return
+        with self._lock:
+            queued = len(self._jobs)
+        if self.scheduler:
+            self.scheduler.call_soon(self.on_change, self.current, queued)
+        else:
+            self.on_change(self.current, queued)
+
+    @property
+    def busy(self):
+        with self._lock:
+            return self.current is not None or bool(self._jobs)
+
+    def cancel(self, job):
+        """取消任务：排队中的任务不再执行，正在执行的任务终止当前的 git 命令"""
+        job.cancelled = True
+        command = job._command
+        if command is not None:
+            command.cancel()
+
+    def cancel_all(self):
+        """取消正在执行和排队中的全部任务"""
+        with self._lock:
+            jobs = list(self._jobs)
+        if self.current is not None:
+            jobs.append(self.current)
+        for job in jobs:
+            self.cancel(job)
+
+    def shutdown(self):
+        """取消全部任务并停止事件循环"""
+        self.cancel_all()
+        self._executor.shutdown(wait=False)
+        asyncio.run_coroutine_threadsafe(self._stop(), self.loop)
+
+    async def _stop(self):
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self.loop.stop()
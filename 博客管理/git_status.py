@@ -0,0 +1,125 @@
+"""结构化的仓库状态
+
+解析 git status --porcelain=v2 -z --branch 的输出，得到分支、领先/落后提交数，
+以及已暂存、已修改、未跟踪和冲突的文件列表。
+仓库指纹只包含 .git 中索引、HEAD 和引用的修改时间，几次 stat 就能算出；工作区文件的变化由文件监视器通知
+（见 BlogEngine.invalidate_status）。指纹不变、没有收到变化通知且结果不超过 STATUS_MAX_AGE 秒时直接复用上一次的结果。
+"""
+import os
+
+# git status 的状态字母
+STATUS_NAMES = {
+    "M": "修改",
+    "T": "类型变化",
+    "A": "新增",
+    "D": "删除",
+    "R": "重命名",
+    "C": "复制",
+    "U": "冲突",
+}
+
+# 缓存的状态最多复用多久（秒）：监视器不递归子目录、也忽略点文件，这些位置的变化最迟在这之后被发现
+STATUS_MAX_AGE = 60
+
+STATUS_ARGS = ["status", "--porcelain=v2", "-z", "--branch", "--untracked-files=all"]
+
+
+class RepoStatus:
+    """一次 git status 的结果"""
+
+    def __init__(self):
+        self.oid = None
+        self.branch = None  # 分离 HEAD 时为 None
+        self.upstream = None
+        self.ahead = 0
+        self.behind = 0
+        self.staged = []  # (状态字母, 路径, 原路径或 None)
+        self.modified = []  # (状态字母, 路径, 原路径或 None)
+        self.untracked = []  # 路径
+        self.unmerged = []  # (状态字母对, 路径)
+
+    @property
+    def clean(self):
+        return not (self.staged or self.modified or self.untracked or self.unmerged)
+
+    def summary(self):
+        """一行摘要"""
+        branch = self.branch or f"分离的 HEAD（{(self.oid or '')[:7]}）"
+        parts = [f"分支 {branch}"]
+        if self.upstream:
+            parts.append(f"跟踪 {self.upstream}，领先 {self.ahead}、落后 {self.behind} 个提交")
+        else:
+            parts.append("未设置上游分支")
+        if self.clean:
+            parts.append("工作区干净")
+        else:
+            parts.append(
+                f"已暂存 {len(self.staged)}，已修改 {len(self.modified)}，"
+                f"未跟踪 {len(self.untracked)}，冲突 {len(self.unmerged)}"
+            )
+        return "；".join(parts)
+
+
+def parse_porcelain_v2(output):
+    """解析 git status --porcelain=v2 -z --branch 的输出"""
+    status = RepoStatus()
+    records = output.split("\0")
+    i = 0
+    while i < len(records):
+        record = records[i]
+        i += 1
+        if not record:
+            continue
+
+        kind = record[0]
+        if kind == "#":
+            _, key, value = record.split(" ", 2)
+            if key == "branch.oid":
+                status.oid = None if value == "(initial)" else value
+            elif key == "branch.head":
+                status.branch = None if value == "(detached)" else value
+            elif key == "branch.upstream":
+                status.upstream = value
+            elif key == "branch.ab":
+                ahead, behind = value.split()
+                status.ahead, status.behind = int(ahead), -int(behind)
+        elif kind in "12":
+            # 1 XY sub mH mI mW hH hI 路径
+            # 2 XY sub mH mI mW hH hI Xscore 路径 \0 原路径
+            fields = record.split(" ", 9 if kind == "2" else 8)
+            xy, path = fields[1], fields[-1]
+            orig = None
+            if kind == "2":
+                orig = records[i]
+                i += 1
+            if xy[0] != ".":
+                status.staged.append((xy[0], path, orig))
+            if xy[1] != ".":
+                status.modified.append((xy[1], path, orig if xy[0] == "." else None))
+        elif kind == "u":
+            # u XY sub m1 m2 m3 mW h1 h2 h3 路径
+            fields = record.split(" ", 10)
+            status.unmerged.append((fields[1], fields[-1]))
+        elif kind == "?":
+            status.untracked.append(record[2:])
+    return status
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+def worktree_fingerprint(repo_path):
+    """仓库指纹：索引、HEAD 和引用的修改时间与大小
+
+    暂存、提交、切换分支、拉取等 git 操作都会改变指纹；不遍历工作区，开销与仓库中的文件数无关。
+    """
+    git_dir = os.path.join(repo_path, ".git")
+    parts = [_stat_key(os.path.join(git_dir, name)) for name in ("index", "HEAD", "packed-refs", "FETCH_HEAD")]
+    for dirpath, dirnames, filenames in os.walk(os.path.join(git_dir, "refs")):
+        parts.extend((name, _stat_key(os.path.join(dirpath, name))) for name in filenames)
+    return hash(tuple(parts))
@@ -0,0 +1,293 @@
+"""批量导入图片
+
+选择多张图片或整个文件夹导入到 img/：先在线程池中并行计算内容哈希，与 img/ 中已有的图片和本批其他图片去重
+（内容相同的图片只保留一份，直接使用已有的文件名），再并行复制新图片。
+装有 Pillow 时顺便按 EXIF 方向摆正、缩小过大的照片（去掉 EXIF 等元数据），并在 img/thumbs/ 生成缩略图；
+没有 Pillow 时原样复制，相册页直接使用原图。
+
+img/ 中已有图片的哈希缓存在 img/.index.json 中（按大小和修改时间判断是否需要重新计算），
+以点开头的文件不会被发布。
+"""
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".ico")
+THUMBS_DIRNAME = "thumbs"
+INDEX_FILENAME = ".index.json"
+
+# 照片的最大宽度或高度（像素），更大的照片导入时缩小
+MAX_IMAGE_SIZE = 1920
+THUMB_SIZE = 400
+JPEG_QUALITY = 85
+
+# Pillow 可以安全地重新编码的格式（gif 可能是动图，ico 含多个尺寸，原样复制）
+_OPTIMIZABLE = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+
+
+class ImageImportError(Exception):
+    pass
+
+
+def has_pillow():
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def find_images(paths):
+    """展开文件和文件夹，返回图片文件路径列表（文件夹按名称顺序递归查找）"""
+    images = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+                images.extend(
+                    os.path.join(dirpath, name) for name in sorted(filenames)
+                    if name.lower().endswith(IMAGE_EXTENSIONS) and not name.startswith(".")
+                )
+        elif path.lower().endswith(IMAGE_EXTENSIONS):
+            images.append(path)
+    return images
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ----------------------
+# 已有图片的哈希索引
+# ----------------------
+def load_index(img_dir):
+    """img/ 中已有图片的哈希：{文件名: {"size", "mtime", "sha"}}，过期的条目重新计算"""
+    path = os.path.join(img_dir, INDEX_FILENAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        cached = {}
+
+    index = {}
+    if not os.path.isdir(img_dir):
+        return index
+    for name in os.listdir(img_dir):
+        file_path = os.path.join(img_dir, name)
+        if name.startswith(".") or not name.lower().endswith(IMAGE_EXTENSIONS) or not os.path.isfile(file_path):
+            continue
+        st = os.stat(file_path)
+        entry = cached.get(name)
+        if not entry or entry.get("size") != st.st_size or entry.get("mtime") != st.st_mtime:
+            entry = {"size": st.st_size, "mtime": st.st_mtime, "sha": file_hash(file_path)}
+        index[name] = entry
+    return index
+
+
+def save_index(img_dir, index):
+    path = os.path.join(img_dir, INDEX_FILENAME)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def unique_name(name, digest, taken):
+    """文件名已被内容不同的图片占用时加上哈希前缀区分（taken 为已占用的小写文件名，Windows 不区分大小写）"""
+    if name.lower() not in taken:
+        return name
+    stem, ext = os.path.splitext(name)
+    for length in (8, 16, 64):
+        candidate = f"{stem}-{digest[:length]}{ext}"
+        if candidate.lower() not in taken:
+            return candidate
+    raise ImageImportError(f"无法为图片分配文件名：{name}")
+
+
+# ----------------------
+# 复制与优化
+# ----------------------
+def copy_image(source, dest, thumb_dest=None, optimize=True):
+    """复制一张图片；可以优化时缩小过大的照片并生成缩略图，返回是否生成了缩略图"""
+    ext = os.path.splitext(dest)[1].lower()
+    if not optimize or ext not in _OPTIMIZABLE or not has_pillow():
+        shutil.copyfile(source, dest)
+        return False
+
+    from PIL import Image, ImageOps
+
+    temp_path = dest + ".tmp"
+    # 临时文件的扩展名无法推断格式，保存时总是明确给出格式
+    fmt = Image.registered_extensions()[ext]
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if fmt == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        if max(image.size) > MAX_IMAGE_SIZE:
+            resized = image.copy()
+            resized.thumbnail((MAX_IMAGE_SIZE, MAX_IMAGE_SIZE), Image.LANCZOS)
+            resized.save(temp_path, fmt, **_save_options(ext))
+            if os.path.getsize(temp_path) < os.path.getsize(source):
+                os.replace(temp_path, dest)
+            else:
+                os.remove(temp_path)
+                shutil.copyfile(source, dest)
+        else:
+            shutil.copyfile(source, dest)
+
+        if thumb_dest:
+            thumb = image.copy()
+            thumb.thumbnail((THUMB_SIZE, THUMB_SIZE), Image.LANCZOS)
+            thumb.save(thumb_dest, fmt, **_save_options(ext))
+            return True
+    return False
+
+
+def _save_options(ext):
+    if ext in (".jpg", ".jpeg"):
+        return {"quality": JPEG_QUALITY, "optimize": True, "progressive": True}
+    if ext == ".png":
+        return {"optimize": True}
+    if ext == ".webp":
+        return {"quality": JPEG_QUALITY}
+    return {}
+
+
+class ImportResult:
+    """批量导入的结果"""
+
+    def __init__(self):
+        self.images = []  # 本批图片在 img/ 中的文件名（按选择顺序，重复的只出现一次）
+        self.copied = 0
+        self.duplicates = 0
+        self.thumbs = set()  # 生成了缩略图的文件名
+        self.failed = []  # (源路径, 错误信息)
+
+    def summary(self):
+        text = f"导入 {self.copied} 张图片"
+        if self.duplicates:
+            text += f"，跳过 {self.duplicates} 张重复的图片"
+        if self.failed:
+            text += f"，{len(self.failed)} 张失败"
+        return text
+
+
+def import_images(img_dir, paths, progress=None, optimize=True, max_workers=None):
+    """把图片（或文件夹中的图片）导入 img_dir，返回 ImportResult
+
+    progress(已完成, 总数) 报告进度（哈希和复制各算一半），在工作线程中调用。
+    """
+    sources = find_images(paths)
+    result = ImportResult()
+    if not sources:
+        return result
+    os.makedirs(img_dir, exist_ok=True)
+    total = len(sources) * 2
+    done = 0
+
+    def step():
+        nonlocal done
+        done += 1
+        if progress:
+            progress(done, total)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # 第一步：并行计算哈希（同时刷新已有图片的索引）
+        index_future = pool.submit(load_index, img_dir)
+        futures = {pool.submit(file_hash, source): source for source in sources}
+        digests = {}
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                digests[source] = future.result()
+            except OSError as e:
+                result.failed.append((source, str(e)))
+                step()  # 不再复制，两步一起算完成
+            step()
+        index = index_future.result()
+
+        # 第二步：按选择顺序去重并分配文件名
+        by_hash = {entry["sha"]: name for name, entry in sorted(index.items())}
+        taken = {name.lower() for name in index}
+        jobs = []
+        for source in sources:
+            digest = digests.get(source)
+            if digest is None:
+                continue
+            if digest in by_hash:
+                result.duplicates += 1
+                if by_hash[digest] not in result.images:
+                    result.images.append(by_hash[digest])
+                step()
+                continue
+            name = unique_name(os.path.basename(source).replace(" ", "-"), digest, taken)
+            taken.add(name.lower())
+            by_hash[digest] = name
+            result.images.append(name)
+            jobs.append((source, name, digest))
+
+        # 第三步：并行复制和优化
+        thumbs_dir = os.path.join(img_dir, THUMBS_DIRNAME)
+        if jobs and optimize and has_pillow():
+            os.makedirs(thumbs_dir, exist_ok=True)
+        futures = {
+            pool.submit(
+                copy_image, source, os.path.join(img_dir, name), os.path.join(thumbs_dir, name), optimize
+            ): (source, name, digest)
+            for source, name, digest in jobs
+        }
+        for future in as_completed(futures):
+            source, name, digest = futures[future]
+            try:
+                if future.result():
+                    result.thumbs.add(name)
+                dest = os.path.join(img_dir, name)
+                st = os.stat(dest)
+                # 优化后的文件内容变了，仍以原图的哈希记录，再次导入同一张照片时能识别为重复
+                index[name] = {"size": st.st_size, "mtime": st.st_mtime, "sha": digest}
+                result.copied += 1
+            except Exception as e:
+                result.failed.append((source, str(e)))
+                result.images.remove(name)
+            step()
+
+    save_index(img_dir, index)
+    return result
+
+
+def thumb_name(img_dir, name):
+    """相册中使用的缩略图（相对 img/ 的路径），没有缩略图时使用原图"""
+    if os.path.exists(os.path.join(img_dir, THUMBS_DIRNAME, name)):
+        return f"{THUMBS_DIRNAME}/{name}"
+    return name
+
+
+# ----------------------
+# 相册
+# ----------------------
+GALLERIES_DIRNAME = "galleries"
+GALLERIES_FILENAME = ".galleries.json"
+
+
+def load_galleries(blog_dir):
+    """相册定义：{页面文件名: {"title": 标题, "images": [img/ 中的文件名]}}，重建页面时据此重新生成"""
+    try:
+        with open(os.path.join(blog_dir, GALLERIES_FILENAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_galleries(blog_dir, galleries):
+    path = os.path.join(blog_dir, GALLERIES_FILENAME)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(galleries, ensure_ascii=False, indent=2))
+    os.replace(temp_path, path)
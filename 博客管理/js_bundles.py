@@ -0,0 +1,294 @@
+"""脚本打包
+
+每种页面（文章页、文章列表、标签/归档页、首页、其他页面）在 .js_bundles.json 中声明需要的 js/ 下的脚本及其顺序。
+打包时把它们按顺序拼接、精简，写成 js/dist/bundle-<内容哈希>.js，页面只需加载一个带 defer 的脚本。
+脚本开头可以用注释声明依赖（// @requires other.js），依赖的脚本会自动加入并排在前面。
+内容不变时哈希不变，浏览器可以长期缓存，内容相同的几类页面共用同一个文件；旧的打包文件在重新打包后删除。
+"""
+import hashlib
+import json
+import os
+import re
+
+BUNDLES_FILENAME = ".js_bundles.json"
+DIST_DIRNAME = "dist"
+
+PAGE_TYPES = {
+    "post": "文章页",
+    "posts": "文章列表",
+    "archive": "标签/归档页",
+    "index": "首页",
+    "other": "其他页面（包括相册）",
+}
+
+# 未配置时每种页面使用的脚本（首页自带内联脚本，默认不加载 main.js）
+DEFAULT_BUNDLES = {"post": ["main.js"], "posts": ["main.js"], "archive": ["main.js"], "index": [], "other": ["main.js"]}
+
+_REQUIRES = re.compile(r"^\s*//\s*@requires\s+(.+)$", re.MULTILINE)
+
+# 出现在这些字符或关键字之后的 / 是正则表达式的开头而不是除号
+_REGEX_PREFIX = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORDS = ("return", "typeof", "case", "do", "else", "in", "of", "void", "delete", "throw", "yield", "await")
+
+
+class BundleError(Exception):
+    pass
+
+
+def page_type(relative):
+    """按页面的相对路径（使用 /）判断页面类型"""
+    if relative == "index.html":
+        return "index"
+    if relative == "posts.html":
+        return "posts"
+    if relative.startswith("posts/"):
+        return "post"
+    if relative.startswith(("tags/", "archive/")):
+        return "archive"
+    return "other"
+
+
+# ----------------------
+# 配置
+# ----------------------
+def load_config(blog_dir):
+    """读取打包配置：{"bundles": {页面类型: [脚本]}, "built": {页面类型: 打包文件}}"""
+    try:
+        with open(os.path.join(blog_dir, BUNDLES_FILENAME), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+    bundles = dict(DEFAULT_BUNDLES, **data.get("bundles", {}))
+    return {"bundles": bundles, "built": data.get("built", {})}
+
+
+def save_config(blog_dir, config):
+    path = os.path.join(blog_dir, BUNDLES_FILENAME)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(config, ensure_ascii=False, indent=2))
+    os.replace(temp_path, path)
+
+
+# ----------------------
+# 依赖排序
+# ----------------------
+def read_script(path):
+    with open(path, "r", encoding="utf-8-sig") as f:
+        return f.read()
+
+
+def resolve_order(js_dir, names):
+    """按声明的顺序展开 @requires 依赖，返回脚本文件名列表（依赖在前，每个脚本只出现一次）"""
+    ordered, visiting = [], []
+
+    def visit(name):
+        if name in ordered:
+            return
+        if name in visiting:
+            raise BundleError(f"脚本循环依赖：{' -> '.join(visiting + [name])}")
+        path = os.path.join(js_dir, name)
+        if not os.path.isfile(path):
+            raise BundleError(f"找不到脚本：{name}" + (f"（{visiting[-1]} 依赖）" if visiting else ""))
+        visiting.append(name)
+        for line in _REQUIRES.findall(read_script(path)):
+            for required in re.split(r"[,\s]+", line.strip()):
+                if required:
+                    visit(required)
+        visiting.pop()
+        ordered.append(name)
+
+    for name in names:
+        visit(name)
+    return ordered
+
+
+# ----------------------
+# 精简
+# ----------------------
+def minify_js(code):
+    """保守地精简脚本：去掉注释（保留 /*! 开头的版权注释）、行首尾空白和空行，保留换行以免改变语句的自动分号
+
+    只压缩代码中的空白，字符串、模板字符串、正则表达式和保留的注释原样复制。
+    """
+    out = []
+    space = ""  # 代码中待输出的空白："\n"、" " 或空
+    last = ""  # 上一个有意义的字符，用于区分除号和正则表达式
+    word = ""  # 上一个标识符
+
+    def emit(text):
+        # 待输出的空白只在两段内容之间写出，因此行首、行尾的空白和空行都被去掉
+        if space and out and not out[-1].endswith("\n"):
+            out.append(space)
+        out.append(text)
+
+    i, n = 0, len(code)
+    while i < n:
+        ch = code[i]
+        if ch in "\"'`":
+            j = i + 1
+            while j < n and code[j] != ch:
+                j += 2 if code[j] == "\\" else 1
+            emit(code[i:j + 1])
+            i = j + 1
+            space, last, word = "", ch, ""
+            continue
+        if code.startswith("//", i):
+            j = code.find("\n", i)
+            i = n if j < 0 else j
+            continue
+        if code.startswith("/*", i):
+            j = code.find("*/", i + 2)
+            j = n if j < 0 else j + 2
+            if code.startswith("/*!", i):
+                emit(code[i:j])
+                space = ""
+            elif "\n" in code[i:j]:
+                space = "\n"
+            else:
+                space = space or " "
+            i = j
+            continue
+        if ch == "/" and (not last or last in _REGEX_PREFIX or word in _REGEX_KEYWORDS):
+            j, in_class = i + 1, False
+            while j < n and code[j] != "\n":
+                if code[j] == "\\":
+                    j += 2
+                    continue
+                if code[j] == "[":
+                    in_class = True
+                elif code[j] == "]":
+                    in_class = False
+                elif code[j] == "/" and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and (code[j].isalnum() or code[j] == "_"):
+                j += 1  # 标志位
+            emit(code[i:j])
+            i = j
+            space, last, word = "", "/", ""
+            continue
+
+        if ch == "\n":
+            space = "\n"
+        elif ch.isspace():
+            space = space or " "
+        else:
+            emit(ch)
+            space = ""
+            if ch.isalnum() or ch in "_$":
+                word = word + ch if last and (last.isalnum() or last in "_$") else ch
+            else:
+                word = ""
+            last = ch
+        i += 1
+
+    return "".join(out) + "\n" if out else "\n"
+
+
+# ----------------------
+# 打包
+# ----------------------
+def build_bundle(js_dir, names):
+    """拼接并精简脚本，返回 (内容, 实际包含的脚本列表)"""
+    ordered = resolve_order(js_dir, names)
+    parts = []
+    for name in ordered:
+        # 每个脚本单独成段，并以分号结尾，避免与下一个脚本连成一条语句
+        parts.append(f"/* {name} */\n" + minify_js(read_script(os.path.join(js_dir, name))).rstrip() + "\n;")
+    return "\n".join(parts) + "\n", ordered
+
+
+def build_bundles(blog_dir, js_dir):
+    """按配置生成全部打包文件，返回 (built, 有变化的页面类型集合)
+
+    built 为 页面类型 -> {"file": 相对 js 目录的打包文件路径, "scripts": 包含的脚本}，没有脚本的页面类型不在其中。
+    """
+    config = load_config(blog_dir)
+    dist_dir = os.path.join(js_dir, DIST_DIRNAME)
+    os.makedirs(dist_dir, exist_ok=True)
+
+    built = {}
+    for kind, names in config["bundles"].items():
+        if kind not in PAGE_TYPES or not names:
+            continue
+        content, ordered = build_bundle(js_dir, names)
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:10]
+        filename = f"bundle-{digest}.js"
+        path = os.path.join(dist_dir, filename)
+        if not os.path.exists(path):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+        built[kind] = {"file": f"{DIST_DIRNAME}/{filename}", "scripts": ordered}
+
+    # 删除不再使用的旧打包文件
+    keep = {os.path.basename(item["file"]) for item in built.values()}
+    for filename in os.listdir(dist_dir):
+        if filename.endswith(".js") and filename not in keep:
+            os.remove(os.path.join(dist_dir, filename))
+
+    changed = {kind for kind in PAGE_TYPES if built.get(kind) != config["built"].get(kind)}
+    config["built"] = built
+    save_config(blog_dir, config)
+    return built, changed
+
+
+def script_tag(bundle, root):
+    """加载打包脚本的标签，bundle 为 build_bundles 返回的条目"""
+    return f'<script src="{root}js/{bundle["file"]}" defer data-bundle="{",".join(bundle["scripts"])}"></script>'
+
+
+_SCRIPT = re.compile(r"(?is)<script\b([^>]*)>\s*</script>")
+_SRC = re.compile(r"""\bsrc\s*=\s*["']([^"']+)["']""")
+_BUNDLE_ATTR = re.compile(r"""\bdata-bundle\s*=\s*["']([^"']*)["']""")
+
+
+def _js_name(src):
+    """脚本地址对应的 js 目录下的文件名（不是 js/ 下的本地脚本时返回 None）"""
+    if "://" in src or src.startswith("//"):
+        return None
+    match = re.search(r"(?:^|/)js/([^/]+\.js)$", src.split("?")[0].split("#")[0])
+    return match.group(1) if match else None
+
+
+def restore_scripts(html, root):
+    """把页面中的打包脚本标签还原成原来的各个脚本标签"""
+    def restore(match):
+        names = _BUNDLE_ATTR.search(match.group(1))
+        if not names:
+            return match.group(0)
+        return "\n  ".join(f'<script src="{root}js/{name}"></script>' for name in names.group(1).split(",") if name)
+
+    return _SCRIPT.sub(restore, html)
+
+
+def inject_bundle(html, bundle, root):
+    """在手写页面中用打包脚本替换其中包含的脚本，bundle 为 None 时还原成原来的脚本标签
+
+    打包脚本放在原来第一个被替换的脚本处；其后还有内联脚本时不加 defer，保证执行顺序不变。
+    页面中没有被替换的脚本时（页面原本不加载这些脚本）不做修改。
+    """
+    html = restore_scripts(html, root)
+    if not bundle:
+        return html
+
+    sources = set(bundle["scripts"])
+    out, last, position = [], 0, None
+    for match in _SCRIPT.finditer(html):
+        src = _SRC.search(match.group(1))
+        if not src or _js_name(src.group(1)) not in sources:
+            continue
+        out.append(html[last:match.start()].rstrip(" \t\n") if position is not None else html[last:match.start()])
+        if position is None:
+            position = sum(len(part) for part in out)
+        last = match.end()
+    if position is None:
+        return html
+    out.append(html[last:])
+    html = "".join(out)
+
+    tag = script_tag(bundle, root)
+    if re.search(r"(?is)<script\b(?![^>]*\bsrc\b)[^>]*>", html[position:]):
+        tag = tag.replace(" defer", "")
+    return html[:position] + tag + html[position:]
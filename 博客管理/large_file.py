@@ -0,0 +1,294 @@
+"""大文件分页查看/编辑
+
+MappedFile 用 mmap 映射文件并建立行偏移索引，按行范围读取、在映射区中查找，
+保存时只改写发生变化的字节区间（长度变化时需要平移其后的内容）。没有写权限的文件以只读方式打开，只能查看。
+LargeFileView 把文件的一个行窗口放进 Tk Text 组件，滚动到窗口边缘时再换页。
+"""
+import bisect
+import codecs
+import mmap
+import os
+from array import array
+
+# 超过该大小（字节）的文件使用大文件模式
+LARGE_FILE_THRESHOLD = 1024 * 1024
+
+# 平移文件内容时每次读写的块大小
+_CHUNK_SIZE = 1024 * 1024
+
+
+def is_large_file(path):
+    """判断文件是否需要使用大文件模式"""
+    try:
+        return os.path.getsize(path) > LARGE_FILE_THRESHOLD
+    except OSError:
+        return False
+
+
+class MappedFile:
+    """内存映射的文本文件，按行建立字节偏移索引"""
+
+    def __init__(self, path, encodings=('utf-8', 'gbk')):
+        self.path = path
+        try:
+            self._file = open(path, "r+b")
+            self.read_only = False
+        except PermissionError:
+            self._file = open(path, "rb")
+            self.read_only = True
+        self._map = None
+        self._remap()
+        self.encoding = self._detect_encoding(encodings)
+        self.offsets = self._build_offsets()
+
+    def _remap(self):
+        """重新建立映射（文件大小变化后调用）"""
+        if self._map is not None:
+            self._map.close()
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+    def _data(self, start, end):
+        return self._map[start:end] if self._map is not None else b""
+
+    def _detect_encoding(self, encodings):
+        """根据文件开头的 1MB 判断编码"""
+        sample = self._data(0, 1024 * 1024)
+        for encoding in encodings:
+            try:
+                # 样本末尾可能截断了一个多字节字符，用增量解码器容忍这种情况
+                codecs.getincrementaldecoder(encoding)().decode(sample, final=len(sample) == self.size)
+                return encoding
+            except UnicodeDecodeError:
+                continue
+        raise UnicodeDecodeError(encodings[-1], sample[:1], 0, 1, "无法识别文件编码")
+
+    def _build_offsets(self):
+        """扫描映射区，记录每一行开头的字节偏移"""
+        offsets = array("q", [0])
+        if self._map is None:
+            return offsets
+        find = self._map.find
+        pos = find(b"\n")
+        while pos >= 0:
+            offsets.append(pos + 1)
+            pos = find(b"\n", pos + 1)
+        return offsets
+
+    @property
+    def line_count(self):
+        return len(self.offsets)
+
+    def byte_range(self, start, end):
+        """行范围 [start, end)（从 0 开始）对应的字节范围"""
+        end = min(end, self.line_count)
+        return self.offsets[start], (self.offsets[end] if end < self.line_count else self.size)
+
+    def read_lines(self, start, end):
+        """读取行范围 [start, end) 的文本（包含行尾换行符）"""
+        begin, finish = self.byte_range(start, end)
+        return self._data(begin, finish).decode(self.encoding)
+
+    def line_of_offset(self, offset):
+        """字节偏移所在的行号（从 0 开始）"""
+        return bisect.bisect_right(self.offsets, offset) - 1
+
+    def find(self, text, start_line=0, start_column=0):
+        """在整个映射区中查找文本，返回 (行号, 列号) 或 None，到文件末尾后从头继续"""
+        needle = text.encode(self.encoding)
+        if self._map is None or not needle:
+            return None
+
+        line_start = self.offsets[start_line]
+        prefix = self.read_lines(start_line, start_line + 1)[:start_column]
+        begin = line_start + len(prefix.encode(self.encoding))
+
+        pos = self._map.find(needle, begin)
+        if pos < 0:
+            pos = self._map.find(needle, 0, begin)
+        if pos < 0:
+            return None
+
+        line = self.line_of_offset(pos)
+        column = len(self._data(self.offsets[line], pos).decode(self.encoding, errors="replace"))
+        return line, column
+
+    def replace_lines(self, start, end, new_text):
+        """把行范围 [start, end) 替换为 new_text，只改写实际变化的字节区间"""
+        if self.read_only:
+            raise PermissionError(f"文件是只读的：{self.path}")
+        begin, finish = self.byte_range(start, end)
+        old = self._data(begin, finish)
+        new = new_text.encode(self.encoding)
+        if old == new:
+            return
+
+        # 去掉相同的前缀和后缀，缩小需要改写的区间
+        prefix = 0
+        limit = min(len(old), len(new))
+        while prefix < limit and old[prefix] == new[prefix]:
+            prefix += 1
+        suffix = 0
+        limit -= prefix
+        while suffix < limit and old[-1 - suffix] == new[-1 - suffix]:
+            suffix += 1
+
+        write_at = begin + prefix
+        old_end = finish - suffix
+        middle = new[prefix:len(new) - suffix]
+        delta = len(middle) - (old_end - write_at)
+
+        # Windows 下不能改变已映射文件的大小，先关闭映射（空文件没有映射）
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        f = self._file
+        if delta > 0:
+            # 文件变长：先扩展文件，再从后往前平移尾部
+            f.truncate(self.size + delta)
+            pos = self.size
+            while pos > old_end:
+                chunk_start = max(pos - _CHUNK_SIZE, old_end)
+                f.seek(chunk_start)
+                chunk = f.read(pos - chunk_start)
+                f.seek(chunk_start + delta)
+                f.write(chunk)
+                pos = chunk_start
+        elif delta < 0:
+            # 文件变短：从前往后平移尾部，再截断
+            pos = old_end
+            while pos < self.size:
+                f.seek(pos)
+                chunk = f.read(min(_CHUNK_SIZE, self.size - pos))
+                f.seek(pos + delta)
+                f.write(chunk)
+                pos += len(chunk)
+            f.truncate(self.size + delta)
+        f.seek(write_at)
+        f.write(middle)
+        f.flush()
+        self._remap()
+
+        # 更新行偏移：替换区间之前不变，区间内重新计算，区间之后整体平移
+        new_starts = array("q")
+        pos = new.find(b"\n")
+        while pos >= 0:
+            new_starts.append(begin + pos + 1)
+            pos = new.find(b"\n", pos + 1)
+        total_delta = len(new) - len(old)
+        tail = array("q", (offset + total_delta for offset in self.offsets[end + 1:]))
+        self.offsets = self.offsets[:start + 1] + new_starts + tail
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+class LargeFileView:
+    """在 Text 组件中分页显示 MappedFile 的一个行窗口"""
+
+    def __init__(self, text, mapped, window_lines=2000, on_status=None, confirm_leave=None):
+        self.text = text
+        self.mapped = mapped
+        self.window_lines = window_lines
+        self.on_status = on_status  # 窗口变化时回调，参数为状态文字
+        self.confirm_leave = confirm_leave  # 窗口有未保存修改时换页前的确认回调
+        self.start = 0
+        self.end = 0
+        self.busy = False
+        self._paging = None
+
+        # 滚动到窗口边缘时换页
+        self._scroll_command = text.cget("yscrollcommand")
+        text.configure(yscrollcommand=self._on_scroll)
+        self.load_window(0)
+
+    def _on_scroll(self, first, last):
+        if self._scroll_command:
+            self.text.tk.call(self._scroll_command, first, last)
+        if self.busy or self._paging is not None:
+            return
+        if float(last) >= 1.0 and self.end < self.mapped.line_count:
+            self._paging = self.text.after_idle(self.page, 1)
+        elif float(first) <= 0.0 and self.start > 0:
+            self._paging = self.text.after_idle(self.page, -1)
+
+    def load_window(self, start, top_line=None):
+        """加载从 start 行开始的窗口，并让绝对行号 top_line 显示在顶部"""
+        start = max(0, min(start, self.mapped.line_count - 1))
+        self.start = start
+        self.end = min(start + self.window_lines, self.mapped.line_count)
+
+        content = self.mapped.read_lines(self.start, self.end)
+        self.text.delete("1.0", "end")
+        self.text.insert("1.0", content)
+        self.text.edit_modified(False)
+
+        if top_line is not None:
+            self.text.yview(f"{top_line - self.start + 1}.0")
+        self._report()
+
+    def _report(self):
+        if self.on_status:
+            read_only = "（只读）" if self.mapped.read_only else ""
+            self.on_status(f"大文件模式{read_only}：第 {self.start + 1}-{self.end} 行 / 共 {self.mapped.line_count} 行")
+
+    def current_top_line(self):
+        """当前显示在顶部的绝对行号（从 0 开始）"""
+        return self.start + int(self.text.index("@0,0").split(".")[0]) - 1
+
+    def page(self, direction):
+        """向后（1）或向前（-1）翻半个窗口"""
+        self._paging = None
+        if self.text.edit_modified() and not (self.confirm_leave and self.confirm_leave()):
+            return
+
+        top = self.current_top_line()
+        step = self.window_lines // 2
+        new_start = self.start + step if direction > 0 else max(self.start - step, 0)
+        self.load_window(new_start, top)
+
+    def goto(self, line, column=0):
+        """跳转到绝对行号（从 0 开始），必要时切换窗口，返回组件中的位置"""
+        if not (self.start <= line < self.end):
+            if self.text.edit_modified() and not (self.confirm_leave and self.confirm_leave()):
+                return None
+            self.load_window(max(line - self.window_lines // 4, 0))
+        index = f"{line - self.start + 1}.{column}"
+        self.text.see(index)
+        return index
+
+    def find(self, query):
+        """从光标处开始在整个文件中查找，找到后选中结果"""
+        row, column = map(int, self.text.index("insert").split("."))
+        found = self.mapped.find(query, self.start + row - 1, column + 1)
+        if found is None:
+            return False
+
+        index = self.goto(*found)
+        if index is None:
+            return False
+        end = f"{index}+{len(query)}c"
+        self.text.tag_remove("sel", "1.0", "end")
+        self.text.tag_add("sel", index, end)
+        self.text.mark_set("insert", end)
+        return True
+
+    def prepare_save(self):
+        """返回保存当前窗口所需的参数 (起始行, 结束行, 新文本)"""
+        self.busy = True
+        return self.start, self.end, self.text.get("1.0", "end-1c")
+
+    def after_save(self):
+        """保存完成后重新加载当前窗口（行数可能发生了变化）"""
+        self.busy = False
+        self.load_window(self.start, self.current_top_line())
+
+    def detach(self):
+        """恢复组件原来的滚动回调并关闭文件"""
+        if self._paging is not None:
+            self.text.after_cancel(self._paging)
+        self.text.configure(yscrollcommand=self._scroll_command)
+        self.mapped.close()
@@ -0,0 +1,244 @@
+"""导入旧格式的文章
+
+posts/ 中可能混有几代不同格式的文章页面：
+
+    current      当前模板：<main class="post-content">，带 <div class="post-tags">
+    old          早期模板（old-只有发布文章.py）：<main class="post-content">，没有标签
+    content-div  blog-manager(可用).py 的模板：<h1> 标题、<p>发布于 日期</p> 和 <div class="content"> 正文
+    handwritten  手写页面：取 <main>、<article> 或 <body> 中的内容
+
+parse_post 识别格式并取出标题、日期、标签、图片、摘要和正文（可以在子进程中执行）；
+LegacyImport 再与文章列表页 posts.html 中的卡片对照：卡片上的标题、摘要、图片和标签优先，
+没有卡片的文章补上卡片，指向不存在文章的卡片和重复的卡片删除。
+"""
+import os
+import re
+from datetime import datetime
+from urllib.parse import unquote
+
+from blog_engine import format_content, html_to_edit_format, legacy_post_parts, read_text_file, split_tags
+from templates import SITE_TITLE
+
+FORMAT_LABELS = {
+    "current": "当前模板",
+    "old": "早期模板（无标签）",
+    "content-div": "旧版管理工具模板",
+    "handwritten": "手写页面",
+}
+
+_DATE = re.compile(r"(\d{4})[-/.年](\d{1,2})[-/.月](\d{1,2})")
+_FILENAME_DATE = re.compile(r"(?<!\d)(\d{4})(\d{2})(\d{2})(?!\d)")
+_TAG_SPAN = re.compile(r"<span class=['\"]tag['\"]>(.*?)</span>", re.DOTALL)
+_IMG = re.compile(r"""<img\b[^>]*\bsrc=["'](?:\.\./|/)?img/([^"'?#]+)["']""", re.IGNORECASE)
+_CARD = re.compile(r'(?is)(?:<!-- 新增文章 -->\s*)?<article class="card">(?:(?!</article>).)*?</article>')
+_CARD_LINK = re.compile(r"""href=["'](?:\./)?posts/([^"'#?]+)["']""", re.IGNORECASE)
+
+
+def _first(pattern, text, flags=re.DOTALL | re.IGNORECASE):
+    match = re.search(pattern, text, flags)
+    return match.group(1).strip() if match else ""
+
+
+def strip_tags(html):
+    text = re.sub(r"(?is)<(script|style)\b.*?</\1>", " ", html)
+    text = re.sub(r"<[^>]+>", " ", text)
+    for entity, char in (("&lt;", "<"), ("&gt;", ">"), ("&quot;", '"'), ("&nbsp;", " "), ("&amp;", "&")):
+        text = text.replace(entity, char)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def normalize_date(text):
+    match = _DATE.search(text or "")
+    if not match:
+        return ""
+    year, month, day = match.groups()
+    return f"{year}-{int(month):02d}-{int(day):02d}"
+
+
+def detect_format(html):
+    if re.search(r'<main class="post-content">', html):
+        return "current" if '<div class="post-tags">' in html else "old"
+    if re.search(r'<div class="content">', html):
+        return "content-div"
+    return "handwritten"
+
+
+def _body_of(html, fmt):
+    """正文 HTML（不含页眉、标题、日期、封面图和页脚）"""
+    if fmt in ("current", "old"):
+        parts = legacy_post_parts(html)
+        return parts[1] if parts else ""
+    if fmt == "content-div":
+        match = re.search(r'(?s)<div class="content">(.*)</div>', html)
+        inner = match.group(1) if match else ""
+        return "    " + inner.strip() + "\n\n"
+
+    for pattern in (r"(?is)<main\b[^>]*>(.*?)</main>", r"(?is)<article\b[^>]*>(.*?)</article>",
+                    r"(?is)<body\b[^>]*>(.*?)</body>"):
+        inner = _first(pattern, html, 0)
+        if inner:
+            break
+    else:
+        inner = html
+    inner = re.sub(r"(?is)<(header|footer|nav|script|style)\b.*?</\1>", "", inner)
+    inner = re.sub(r"(?is)<h1\b.*?</h1>", "", inner, count=1)
+    inner = re.sub(r'(?is)<p\b[^>]*>\s*发布于.*?</p>', "", inner, count=1)
+    inner = re.sub(r'(?is)<img\b[^>]*class="post-banner"[^>]*>', "", inner, count=1)
+    return "    " + inner.strip() + "\n\n"
+
+
+def is_simple_body(body):
+    """正文是否只有纯文本的段落和二级标题（转换为编辑格式再渲染不会丢失内容）"""
+    def normalize(html):
+        return re.sub(r"\s+", " ", html).strip()
+    return normalize(format_content(html_to_edit_format(body))) == normalize(body)
+
+
+def parse_post(path):
+    """解析一篇文章页面，返回元数据字典（包括格式、正文和发现的问题）"""
+    filename = os.path.basename(path)
+    html = read_text_file(path)
+    if html is None:
+        return {"filename": filename, "format": None, "problems": ["无法解码文件"]}
+    html = html.lstrip("﻿")
+    fmt = detect_format(html)
+    problems = []
+
+    page_title = _first(r"<title>(.*?)</title>", html)
+    page_title = re.sub(rf"\s*-\s*{re.escape(SITE_TITLE)}\s*$", "", page_title)
+    heading = strip_tags(_first(r"<h1\b[^>]*>(.*?)</h1>", html))
+    title = page_title or heading or os.path.splitext(filename)[0]
+
+    date = normalize_date(_first(r"发布于\s*([^<]*)", html)) or normalize_date(_first(r'class="post-date">(.*?)<', html))
+    if not date:
+        match = _FILENAME_DATE.search(filename)
+        if match:
+            date = "-".join(match.groups())
+
+    body = _body_of(html, fmt)
+    if not date:
+        # 手写页面的日期常写在正文开头
+        date = normalize_date(strip_tags(body)[:200])
+    if not date:
+        date = datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y-%m-%d")
+        problems.append("页面中没有日期，使用文件修改时间")
+
+    if not strip_tags(body):
+        problems.append("没有找到正文")
+    img = _first(_IMG.pattern, html)
+    paragraphs = (strip_tags(p) for p in re.findall(r"(?is)<p\b[^>]*>(.*?)</p>", body))
+    summary = next((text for text in paragraphs if text and not _DATE.fullmatch(text.rstrip("日"))), "")[:200]
+
+    return {
+        "filename": filename,
+        "format": fmt,
+        "title": title,
+        "date": date,
+        "tags": [strip_tags(tag) for tag in _TAG_SPAN.findall(html)],
+        "img": img,
+        "summary": summary,
+        "body": body,
+        "simple": is_simple_body(body),
+        "mtime": os.path.getmtime(path),
+        "problems": problems,
+    }
+
+
+def parse_posts(paths):
+    """解析一批文章（进程池任务）"""
+    return [parse_post(path) for path in paths]
+
+
+# ----------------------
+# 与文章列表页对照
+# ----------------------
+def parse_cards(html):
+    """文章列表页中的卡片：文件名 -> {"title", "date", "tags", "summary", "img", "span", "duplicates"}
+
+    同一篇文章有多张卡片时以第一张为准，其余卡片的位置记在 duplicates 中。
+    """
+    cards = {}
+    for match in _CARD.finditer(html):
+        block = match.group(0)
+        link = _CARD_LINK.search(block)
+        if not link:
+            continue
+        filename = unquote(link.group(1))
+        if filename in cards:
+            cards[filename]["duplicates"].append(match.span())
+            continue
+        paragraphs = [strip_tags(p) for p in re.findall(r'(?is)<p>(.*?)</p>', block)]
+        cards[filename] = {
+            "title": strip_tags(_first(r"<h2\b[^>]*>(.*?)</h2>", block)),
+            "date": normalize_date(_first(r'class="post-date">(.*?)<', block)),
+            "tags": [strip_tags(tag) for tag in _TAG_SPAN.findall(block)],
+            "summary": paragraphs[-1] if paragraphs else "",
+            "img": _first(_IMG.pattern, block),
+            "span": match.span(),
+            "duplicates": [],
+        }
+    return cards
+
+
+class LegacyImport:
+    """导入结果：每篇文章合并后的元数据，以及需要在文章列表页中增删的卡片"""
+
+    def __init__(self, posts, cards):
+        self.posts = sorted(posts, key=lambda p: (p.get("date") or "", p.get("mtime", 0)))
+        self.cards = cards
+        self.unreadable = [p for p in self.posts if p["format"] is None]
+        self.posts = [p for p in self.posts if p["format"] is not None]
+
+        names = {p["filename"] for p in self.posts}
+        self.missing_cards = [p["filename"] for p in self.posts if p["filename"] not in cards]
+        self.orphan_cards = sorted(name for name in cards if name not in names)
+        for post in self.posts:
+            card = cards.get(post["filename"])
+            if card:
+                # 卡片是作者实际展示的内容，优先于从页面中猜出的信息
+                for key in ("title", "date", "summary", "img"):
+                    if card[key]:
+                        post[key] = card[key]
+                post["tags"] = post["tags"] or card["tags"]
+        self.applied = None  # 应用后为 {"sources", "normalized", "cards_added", "cards_removed"}
+
+    def counts(self):
+        counts = {}
+        for post in self.posts:
+            counts[post["format"]] = counts.get(post["format"], 0) + 1
+        return counts
+
+    def summary(self):
+        formats = "，".join(f"{FORMAT_LABELS[fmt]} {count} 篇" for fmt, count in sorted(self.counts().items()))
+        text = f"共 {len(self.posts)} 篇文章（{formats or '无'}）"
+        if self.missing_cards:
+            text += f"，{len(self.missing_cards)} 篇缺少文章列表卡片"
+        if self.orphan_cards:
+            text += f"，{len(self.orphan_cards)} 张卡片指向不存在的文章"
+        if self.unreadable:
+            text += f"，{len(self.unreadable)} 篇无法读取"
+        return text
+
+    def format_details(self):
+        lines = []
+        for post in self.posts:
+            tags = ",".join(post["tags"]) or "无标签"
+            lines.append(f"{post['filename']}  [{FORMAT_LABELS[post['format']]}]  {post['date']}  {post['title']}  ({tags})")
+            lines.extend(f"    ! {problem}" for problem in post["problems"])
+        lines.extend(f"{name}  卡片指向的文章不存在，导入时删除该卡片" for name in self.orphan_cards)
+        lines.extend(f"{post['filename']}  无法读取：{'；'.join(post['problems'])}" for post in self.unreadable)
+        return lines
+
+
+def source_of(post):
+    """可以无损转换为编辑格式的文章的源文件字典，否则为 None"""
+    if not post["simple"]:
+        return None
+    return {
+        "title": post["title"], "date": post["date"], "tags": ",".join(post["tags"]),
+        "img": post["img"] or "default.jpg", "summary": post["summary"], "content": html_to_edit_format(post["body"]),
+    }
+
+
+def tags_of(post):
+    return [tag for tag in split_tags(",".join(post["tags"])) if tag]
@@ -0,0 +1,283 @@
+"""离线页面性能审计
+
+对站点中的每个页面统计访客需要下载的字节数（HTML、CSS、JS、图片、字体），
+其中包括样式表中 url() / @import 引用的资源；同时统计外部请求数，标出阻塞渲染的资源和过大的图片，
+并与可配置的预算比较。外部资源的大小无法离线获知，只计入请求数。
+只审计会发布的页面（site_publish.collect_site_files），引用了不会发布的本地文件时记为缺失。
+"""
+import os
+import re
+from collections import deque
+from html.parser import HTMLParser
+
+from site_publish import collect_site_files
+from site_validator import DEFAULT_EXCLUDE_DIRS, collect_html_files, read_html, resolve_reference
+
+# 默认预算（可在 .blog_config 中覆盖）
+DEFAULT_BUDGETS = {
+    "budget_page_kb": 1024,  # 每个页面的总字节数
+    "budget_image_kb": 200,  # 单张图片
+    "budget_external": 4,  # 外部请求数
+    "budget_blocking": 3,  # 阻塞渲染的资源数
+}
+
+# 审计模式：off 不审计，warn 只在日志中提示，block 超出预算时阻止部署
+AUDIT_MODES = ("off", "warn", "block")
+
+CATEGORY_NAMES = {"html": "HTML", "css": "CSS", "js": "JS", "image": "图片", "font": "字体", "other": "其他"}
+
+_EXTENSIONS = {
+    "css": {".css"},
+    "js": {".js", ".mjs"},
+    "image": {".jpg", ".jpeg", ".png", ".gif", ".webp", ".avif", ".svg", ".ico", ".bmp"},
+    "font": {".woff", ".woff2", ".ttf", ".otf", ".eot"},
+}
+
+_CSS_URL = re.compile(r"""@import\s+(?:url\()?\s*['"]?([^'")\s;]+)|url\(\s*['"]?([^'")]+?)['"]?\s*\)""", re.IGNORECASE)
+
+
+def category_of(path):
+    ext = os.path.splitext(path)[1].lower()
+    for category, extensions in _EXTENSIONS.items():
+        if ext in extensions:
+            return category
+    return "other"
+
+
+def is_external(url):
+    return url.startswith(("http://", "https://", "//"))
+
+
+class _AuditParser(HTMLParser):
+    """收集页面加载的资源，并记录哪些资源会阻塞渲染"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.resources = []  # (类别, 地址, 是否阻塞渲染)
+        self.declares_icon = False
+        self._in_head = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {key: (value or "") for key, value in attrs}
+        if tag == "head":
+            self._in_head = True
+        elif tag == "body":
+            self._in_head = False
+        elif tag == "link":
+            rel = attrs.get("rel", "").lower().split()
+            href = attrs.get("href", "").strip()
+            if not href:
+                return
+            if "stylesheet" in rel:
+                media = attrs.get("media", "all").lower()
+                self.resources.append(("css", href, media in ("", "all", "screen")))
+            elif "icon" in rel:
+                self.declares_icon = True
+                self.resources.append(("image", href, False))
+            elif "preload" in rel and attrs.get("as") in ("font", "style", "script", "image"):
+                kind = {"style": "css", "script": "js"}.get(attrs["as"], attrs["as"])
+                self.resources.append((kind, href, False))
+        elif tag == "script":
+            src = attrs.get("src", "").strip()
+            if src:
+                deferred = "async" in attrs or "defer" in attrs or attrs.get("type") == "module"
+                self.resources.append(("js", src, self._in_head and not deferred))
+        elif tag in ("img", "source"):
+            for attr in ("src", "srcset"):
+                value = attrs.get(attr, "").strip()
+                if value:
+                    # srcset 中只有一张会被下载，按第一张计算
+                    self.resources.append(("image", value.split(",")[0].split()[0], False))
+                    break
+        elif tag in ("video", "audio"):
+            poster = attrs.get("poster", "").strip()
+            if poster:
+                self.resources.append(("image", poster, False))
+
+    handle_startendtag = handle_starttag
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self._in_head = False
+
+
+class PageAudit:
+    """单个页面的审计结果"""
+
+    def __init__(self, page):
+        self.page = page
+        self.bytes = {}  # 类别 -> 字节数
+        self.external = []  # 外部资源地址
+        self.blocking = []  # 阻塞渲染的资源地址
+        self.large_images = []  # (路径, 字节数)
+        self.missing = []  # 找不到的本地资源
+        self.violations = []  # 超出预算的说明
+
+    @property
+    def total(self):
+        return sum(self.bytes.values())
+
+    def add(self, category, size):
+        self.bytes[category] = self.bytes.get(category, 0) + size
+
+
+class AuditReport:
+    """站点审计结果"""
+
+    def __init__(self, root, budgets):
+        self.root = root
+        self.budgets = budgets
+        self.pages = []
+
+    @property
+    def violations(self):
+        return [(page, violation) for page in self.pages for violation in page.violations]
+
+    @property
+    def missing(self):
+        """找不到的本地资源：(页面, 资源地址)；不计入页面大小，也不影响 ok"""
+        return [(page, url) for page in self.pages for url in page.missing]
+
+    @property
+    def ok(self):
+        return not any(page.violations for page in self.pages)
+
+    def summary(self):
+        heaviest = max(self.pages, key=lambda p: p.total, default=None)
+        text = f"审计了 {len(self.pages)} 个页面，{len(self.violations)} 项超出预算"
+        if self.missing:
+            text += f"，{len(self.missing)} 个本地资源找不到（未计入大小）"
+        if heaviest:
+            text += f"，最重的页面是 {os.path.relpath(heaviest.page, self.root)}（{heaviest.total / 1024:.0f} KB）"
+        return text
+
+    def format_pages(self, limit=50):
+        """每个页面一行：总字节数、各类别字节数、外部请求和阻塞资源数，按总字节数倒序"""
+        lines = []
+        for page in sorted(self.pages, key=lambda p: p.total, reverse=True)[:limit]:
+            parts = " / ".join(
+                f"{CATEGORY_NAMES[category]} {size / 1024:.0f}"
+                for category, size in sorted(page.bytes.items(), key=lambda item: -item[1]) if size
+            )
+            lines.append(
+                f"{os.path.relpath(page.page, self.root)}：{page.total / 1024:.0f} KB（{parts}），"
+                f"外部请求 {len(page.external)}，阻塞渲染 {len(page.blocking)}"
+            )
+        return lines
+
+    def format_problems(self, limit=50):
+        lines = [f"{os.path.relpath(page.page, self.root)}：{violation}" for page, violation in self.violations]
+        lines += [f"{os.path.relpath(page.page, self.root)}：找不到资源 {url}" for page, url in self.missing]
+        if len(lines) > limit:
+            lines = lines[:limit] + [f"……另有 {len(lines) - limit} 项未列出"]
+        return lines
+
+
+def load_budgets(settings):
+    """从配置中读取预算，未配置的项使用默认值"""
+    budgets = dict(DEFAULT_BUDGETS)
+    for key in budgets:
+        try:
+            budgets[key] = int(settings.get(key, budgets[key]))
+        except ValueError:
+            pass
+    return budgets
+
+
+def audit_site(root, budgets=None, exclude_dirs=DEFAULT_EXCLUDE_DIRS):
+    """审计 root 下会发布的所有页面，返回 AuditReport"""
+    budgets = dict(DEFAULT_BUDGETS, **(budgets or {}))
+    report = AuditReport(root, budgets)
+    published = {os.path.normpath(path) for path in collect_site_files(root).values()}
+    sizes = {}  # 路径 -> 字节数（None 表示不存在或不会发布）
+    css_refs = {}  # 样式表路径 -> [(类别, 路径)]
+
+    def size_of(path):
+        if path not in sizes:
+            sizes[path] = os.path.getsize(path) if os.path.normpath(path) in published else None
+        return sizes[path]
+
+    def stylesheet_assets(path):
+        """样式表中 url() 和 @import 引用的本地资源（带缓存，递归处理 @import）"""
+        if path not in css_refs:
+            css_refs[path] = []
+            try:
+                text = read_html(path)
+            except OSError:
+                return []
+            for match in _CSS_URL.finditer(text):
+                url = (match.group(1) or match.group(2)).strip()
+                if not url or url.startswith("data:") or is_external(url):
+                    continue
+                target, _ = resolve_reference(root, path, url)
+                if target:
+                    css_refs[path].append((category_of(target), target))
+        return css_refs[path]
+
+    favicon = os.path.join(root, "favicon.ico")
+    for page in collect_html_files(root, exclude_dirs):
+        audit = PageAudit(page)
+        audit.add("html", size_of(page) or 0)
+
+        parser = _AuditParser()
+        try:
+            parser.feed(read_html(page))
+            parser.close()
+        except Exception:
+            pass  # 残缺的页面尽量保留已经解析出的资源
+
+        resources = list(parser.resources)
+        if not parser.declares_icon and size_of(favicon):
+            # 没有声明图标时浏览器会请求站点根目录的 favicon.ico
+            resources.append(("image", "/favicon.ico", False))
+
+        # 队列元素：(类别, 地址, 是否阻塞渲染, 本地路径)；样式表引用的资源入队时已解析为本地路径
+        seen = set()
+        queue = deque()
+        for category, url, blocking in resources:
+            if is_external(url):
+                if url not in seen:
+                    seen.add(url)
+                    audit.external.append(url)
+                    if blocking:
+                        audit.blocking.append(url)
+                continue
+            queue.append((category, url, blocking, resolve_reference(root, page, url)[0]))
+
+        while queue:
+            category, url, blocking, target = queue.popleft()
+            if target is None or target in seen:
+                continue
+            seen.add(target)
+
+            size = size_of(target)
+            if size is None:
+                audit.missing.append(url)
+                continue
+            if category == "css" and category_of(target) != "css":
+                category = category_of(target)
+            audit.add(category, size)
+            if blocking:
+                audit.blocking.append(url)
+            if category == "image" and size > budgets["budget_image_kb"] * 1024:
+                audit.large_images.append((os.path.relpath(target, root), size))
+            if category == "css":
+                queue.extend(
+                    (kind, os.path.relpath(path, root), blocking and kind == "css", path)
+                    for kind, path in stylesheet_assets(target)
+                )
+
+        # 与预算比较
+        if audit.total > budgets["budget_page_kb"] * 1024:
+            audit.violations.append(f"页面总大小 {audit.total / 1024:.0f} KB，超出预算 {budgets['budget_page_kb']} KB")
+        for path, size in audit.large_images:
+            audit.violations.append(f"图片 {path} 为 {size / 1024:.0f} KB，超出单张图片预算 {budgets['budget_image_kb']} KB")
+        if len(audit.external) > budgets["budget_external"]:
+            audit.violations.append(f"外部请求 {len(audit.external)} 个，超出预算 {budgets['budget_external']} 个")
+        if len(audit.blocking) > budgets["budget_blocking"]:
+            audit.violations.append(
+                f"阻塞渲染的资源 {len(audit.blocking)} 个（{', '.join(audit.blocking)}），超出预算 {budgets['budget_blocking']} 个"
+            )
+        report.pages.append(audit)
+
+    return report
@@ -0,0 +1,359 @@
+"""页面加载优化
+
+发布前对页面做三件事，让首屏在慢速网络上更早绘制：
+
+1. 关键 CSS：找出首屏元素（页面 <body> 中前 FOLD_ELEMENTS 个元素）用到的样式规则，内联到 <style data-critical> 中，
+   完整的本地样式表改为异步加载（preload + onload，另附 <noscript> 回退）；外部样式表（字体、图标库）同样异步加载。
+2. 资源提示：为外部样式表的域名添加 preconnect，为首屏中的第一张本地图片添加 preload。
+3. 脚本：<head> 之外或后面没有内联脚本的本地脚本加上 defer。
+
+注入的标签和加上的 defer 都带有 data-optimized 属性，改为异步加载的样式表保留原有属性（integrity、crossorigin 等），
+再次优化前会先还原成原样，因此可以反复执行（样式表修改后重新优化即可）。
+首屏元素相同的页面（例如同一模板生成的文章页）共用一次计算结果。
+"""
+import os
+import re
+from urllib.parse import urlsplit
+
+from site_validator import resolve_reference
+
+# 视为首屏的元素个数（按文档顺序，从 <body> 开始计算）
+FOLD_ELEMENTS = 60
+
+# 由脚本在首次绘制前后添加的类名（例如夜间模式），相关规则一并内联
+STATE_CLASSES = {"dark"}
+
+# 只在交互时生效的伪类，首屏不需要
+INTERACTIVE_PSEUDO = re.compile(r":(?:hover|focus|focus-within|focus-visible|active|visited)\b")
+
+# 已知会再请求另一个域名的样式表（谷歌字体的字体文件在 fonts.gstatic.com）
+EXTRA_ORIGINS = {"https://fonts.googleapis.com": "https://fonts.gstatic.com"}
+
+# 异步加载样式表时添加或改写的属性，还原时去掉
+ASYNC_ATTRS = ("rel", "as", "data-optimized", "onload")
+
+_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_TAG = re.compile(r"<(link|script|style|noscript|img)\b([^>]*)>", re.IGNORECASE)
+_ATTR = re.compile(r"""([\w:-]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?""")
+_ELEMENT = re.compile(r"<([a-zA-Z][\w-]*)((?:\s+[^>]*?)?)\s*/?>")
+_CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+_COMPOUND = re.compile(r"[^\s>+~]+")
+_PSEUDO_ARGS = re.compile(r"::?[\w-]+(?:\([^)]*\))?")
+
+
+def parse_attrs(text):
+    """解析标签属性，返回小写属性名 -> 值（无值属性为空字符串）"""
+    attrs = {}
+    for match in _ATTR.finditer(text):
+        value = match.group(2)
+        if value is None:
+            value = match.group(3) if match.group(3) is not None else (match.group(4) or "")
+        attrs[match.group(1).lower()] = value
+    return attrs
+
+
+def format_attrs(attrs):
+    """把 parse_attrs 的结果还原成属性文本（带前导空格），空值写成无值属性"""
+    parts = []
+    for name, value in attrs.items():
+        if value:
+            value = value.replace('"', "&quot;")
+            parts.append(f' {name}="{value}"')
+        else:
+            parts.append(f" {name}")
+    return "".join(parts)
+
+
+# ----------------------
+# 样式表解析
+# ----------------------
+def parse_css(text, offset=0):
+    """把样式表拆成规则列表：("rule", 选择器, 声明, 位置) 或 ("at", 前导, 子规则列表或原始内容或 None, 位置)
+
+    位置为规则在原文中的 (起点, 终点)，offset 为 text 在原文中的起点；注释按原长度替换为空白，位置和行号不变。
+    """
+    text = _COMMENT.sub(lambda m: re.sub(r"[^\n]", " ", m.group(0)), text)
+    rules = []
+    i, n = 0, len(text)
+    while i < n:
+        # 找到下一个 { 或 ;（跳过字符串）
+        j = i
+        quote = None
+        while j < n:
+            ch = text[j]
+            if quote:
+                if ch == "\\":
+                    j += 1
+                elif ch == quote:
+                    quote = None
+            elif ch in "\"'":
+                quote = ch
+            elif ch in "{;}":
+                break
+            j += 1
+        prelude = text[i:j].strip()
+        if j >= n:
+            break
+        if text[j] in ";}":
+            # @import/@charset 等语句，或多余的右括号
+            if prelude.startswith("@"):
+                rules.append(("at", prelude, None, (offset + i + len(text[i:j]) - len(text[i:j].lstrip()), offset + j + 1)))
+            i = j + 1
+            continue
+
+        # 找到与 { 匹配的 }
+        depth, k = 1, j + 1
+        quote = None
+        while k < n and depth:
+            ch = text[k]
+            if quote:
+                if ch == "\\":
+                    k += 1
+                elif ch == quote:
+                    quote = None
+            elif ch in "\"'":
+                quote = ch
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+            k += 1
+        body = text[j + 1:k - 1]
+        span = (offset + i + len(text[i:j]) - len(text[i:j].lstrip()), offset + k)
+        if prelude.startswith("@"):
+            name = prelude.split(None, 1)[0].lower()
+            if name in ("@media", "@supports", "@layer", "@container"):
+                children = parse_css(body, offset + j + 1)
+            else:
+                children = body.strip()
+            rules.append(("at", prelude, children, span))
+        elif prelude:
+            rules.append(("rule", prelude, body.strip(), span))
+        i = k
+    return rules
+
+
+def _minify(declarations):
+    return re.sub(r"\s*([;:,])\s*", r"\1", re.sub(r"\s+", " ", declarations)).strip().rstrip(";")
+
+
+# ----------------------
+# 首屏元素与选择器匹配
+# ----------------------
+def fold_elements(html, limit=FOLD_ELEMENTS):
+    """页面首屏的元素：[(标签名, 类名集合, id)]，html 和 body 总是包含在内"""
+    body = re.search(r"<body\b[^>]*>", html, re.IGNORECASE)
+    elements = [("html", frozenset(), ""), ("body", frozenset(), "")]
+    if body:
+        attrs = parse_attrs(body.group(0)[5:-1])
+        elements[1] = ("body", frozenset(attrs.get("class", "").split()), attrs.get("id", ""))
+    text = html[body.end():] if body else html
+    text = re.sub(r"(?is)<(script|style)\b.*?</\1>", "", text)
+    for match in _ELEMENT.finditer(text):
+        if len(elements) >= limit + 2:
+            break
+        attrs = parse_attrs(match.group(2))
+        elements.append((match.group(1).lower(), frozenset(attrs.get("class", "").split()), attrs.get("id", "")))
+    return elements
+
+
+def _compound_matches(compound, elements):
+    compound = _PSEUDO_ARGS.sub("", re.sub(r"\[[^\]]*\]", "", compound))
+    tag = re.match(r"[a-zA-Z][\w-]*", compound)
+    tag = tag.group(0).lower() if tag else None
+    classes = set(re.findall(r"\.([\w-]+)", compound)) - STATE_CLASSES
+    ids = re.findall(r"#([\w-]+)", compound)
+    for element_tag, element_classes, element_id in elements:
+        if tag and tag != element_tag:
+            continue
+        if not classes <= element_classes:
+            continue
+        if ids and ids[0] != element_id:
+            continue
+        return True
+    return False
+
+
+def selector_matches(selector, elements):
+    """选择器中的每个复合选择器都能在首屏元素中找到时认为匹配（宁多勿少）"""
+    if INTERACTIVE_PSEUDO.search(selector):
+        return False
+    return all(_compound_matches(compound, elements) for compound in _COMPOUND.findall(selector))
+
+
+def critical_rules(rules, elements):
+    """从规则列表中选出首屏需要的规则，返回压缩后的 CSS 文本"""
+    out = []
+    for kind, prelude, body, _ in rules:
+        if kind == "rule":
+            selectors = [s.strip() for s in prelude.split(",") if selector_matches(s.strip(), elements)]
+            if selectors and body:
+                out.append(f"{','.join(selectors)}{{{_minify(body)}}}")
+        elif isinstance(body, list) and "print" not in prelude.lower():
+            inner = critical_rules(body, elements)
+            if inner:
+                out.append(f"{' '.join(prelude.split())}{{{inner}}}")
+    return "".join(out)
+
+
+def rebase_urls(css, css_path, page_path):
+    """把样式表中的相对地址改为相对于页面的地址（内联后基准路径变为页面所在目录）"""
+    css_dir = os.path.dirname(css_path)
+    page_dir = os.path.dirname(page_path)
+    if css_dir == page_dir:
+        return css
+
+    def replace(match):
+        url = match.group(2).strip()
+        if url.startswith(("data:", "#", "/")) or urlsplit(url).scheme:
+            return match.group(0)
+        target = os.path.normpath(os.path.join(css_dir, url))
+        return f"url({os.path.relpath(target, page_dir).replace(os.sep, '/')})"
+
+    return _CSS_URL.sub(replace, css)
+
+
+# ----------------------
+# 页面改写
+# ----------------------
+def restore_page(html):
+    """去掉之前注入的内容，恢复成优化前的样子（样式表的原有属性和脚本原有的 defer 保留）"""
+    html = re.sub(r"(?is)\s*<style data-critical>.*?</style>", "", html)
+    html = re.sub(r"(?is)\s*<noscript data-optimized>.*?</noscript>", "", html)
+    html = re.sub(r"(?i)(<script\b[^>]*?)\s+defer data-optimized\b", r"\1", html)
+
+    def restore_link(match):
+        attrs = parse_attrs(match.group(1))
+        if attrs.get("data-optimized") != "async":
+            return ""
+        for name in ASYNC_ATTRS:
+            attrs.pop(name, None)
+        return f'\n  <link rel="stylesheet"{format_attrs(attrs)} />'
+
+    return re.sub(r"(?i)\s*<link\b([^>]*\bdata-optimized\b[^>]*)>", restore_link, html)
+
+
+def _is_blocking_stylesheet(attrs):
+    return (
+        "stylesheet" in attrs.get("rel", "").lower().split()
+        and attrs.get("href")
+        and attrs.get("media", "all").lower() in ("", "all", "screen")
+    )
+
+
+def _async_stylesheet(attrs):
+    """改为异步加载的样式表，attrs 为去掉 rel 后的原有属性（href、integrity、crossorigin 等），原样保留"""
+    return (
+        f'<link rel="preload"{format_attrs(attrs)} as="style" data-optimized="async" '
+        "onload=\"this.onload=null;this.rel='stylesheet'\" />"
+    )
+
+
+class PageOptimizer:
+    """优化 root 下的页面；样式表解析结果和关键 CSS 按首屏元素缓存"""
+
+    def __init__(self, root):
+        self.root = root
+        self._stylesheets = {}  # 路径 -> (修改时间, 规则列表)
+        self._critical = {}  # (样式表路径, 首屏元素) -> 关键 CSS
+
+    def _rules(self, path):
+        mtime = os.path.getmtime(path)
+        cached = self._stylesheets.get(path)
+        if cached is None or cached[0] != mtime:
+            from site_validator import read_html
+            cached = (mtime, parse_css(read_html(path)))
+            self._stylesheets[path] = cached
+        return cached[1]
+
+    def critical_css(self, css_path, elements):
+        key = (css_path, tuple(elements))
+        if key not in self._critical:
+            self._critical[key] = critical_rules(self._rules(css_path), elements)
+        return self._critical[key]
+
+    def optimize(self, page_path, html):
+        """返回优化后的页面内容"""
+        html = restore_page(html)
+        head_end = html.lower().find("</head>")
+        if head_end < 0:
+            return html
+        elements = fold_elements(html)
+
+        head, rest = html[:head_end], html[head_end:]
+        critical = []
+        origins = []
+        first_stylesheet = None
+
+        def rewrite_head(match):
+            nonlocal first_stylesheet
+            if match.group(1).lower() != "link":
+                return match.group(0)
+            attrs = parse_attrs(match.group(2))
+            if attrs.get("rel", "").lower() == "preconnect":
+                origins.append(attrs.get("href", "").rstrip("/"))
+                return match.group(0)
+            if not _is_blocking_stylesheet(attrs):
+                return match.group(0)
+
+            href = attrs["href"]
+            parts = urlsplit(href)
+            if parts.scheme in ("http", "https") or href.startswith("//"):
+                origin = f"{parts.scheme or 'https'}://{parts.netloc}"
+                for item in (origin, EXTRA_ORIGINS.get(origin)):
+                    if item and item not in origins:
+                        origins.append(item)
+                        hints.append(f'<link rel="preconnect" href="{item}" crossorigin data-optimized />')
+            else:
+                target, _ = resolve_reference(self.root, page_path, href)
+                if not target or not os.path.isfile(target):
+                    return match.group(0)
+                critical.append(rebase_urls(self.critical_css(target, elements), target, page_path))
+
+            if first_stylesheet is None:
+                first_stylesheet = match.start()
+            attrs.pop("rel")
+            noscript.append(f'<link rel="stylesheet"{format_attrs(attrs)} />')
+            return _async_stylesheet(attrs)
+
+        hints, noscript = [], []
+        head = _TAG.sub(rewrite_head, head)
+
+        # 首屏中的第一张本地图片
+        fold_html = html[head_end:]
+        image = re.search(r"<img\b([^>]*)>", fold_html, re.IGNORECASE)
+        if image:
+            src = parse_attrs(image.group(1)).get("src", "")
+            if src and not urlsplit(src).scheme and not src.startswith(("//", "data:")):
+                hints.append(f'<link rel="preload" href="{src}" as="image" data-optimized />')
+
+        if first_stylesheet is not None:
+            inject = []
+            if critical and any(critical):
+                inject.append(f"<style data-critical>{''.join(critical)}</style>")
+            inject += hints
+            block = "\n  ".join(inject)
+            head = head[:first_stylesheet] + block + "\n  " + head[first_stylesheet:]
+            head = head.rstrip() + "\n  <noscript data-optimized>" + "".join(noscript) + "</noscript>\n"
+        elif hints:
+            head = head.rstrip() + "\n  " + "\n  ".join(hints) + "\n"
+
+        return head + _defer_scripts(rest)
+
+
+def _defer_scripts(html):
+    """给后面没有内联脚本的本地外部脚本加上 defer（保证执行顺序不变），带 data-optimized 标记以便还原"""
+    scripts = list(re.finditer(r"<script\b([^>]*)>", html, re.IGNORECASE))
+    out, last = [], 0
+    for index, match in enumerate(scripts):
+        attrs = parse_attrs(match.group(1))
+        src = attrs.get("src", "")
+        if (not src or urlsplit(src).scheme or src.startswith("//")
+                or "defer" in attrs or "async" in attrs or attrs.get("type") == "module"):
+            continue
+        if any("src" not in parse_attrs(later.group(1)) for later in scripts[index + 1:]):
+            continue
+        out.append(html[last:match.end() - 1].rstrip(" /") + " defer data-optimized>")
+        last = match.end()
+    out.append(html[last:])
+    return "".join(out)
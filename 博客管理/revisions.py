@@ -0,0 +1,179 @@
+"""文章修订历史
+
+每篇文章的每次保存都追加到 .revisions/<文章名>.pack 中。大多数修订只保存与上一版相比的行级差异
+（保留的行号区间和新增的行），经 zlib 压缩后通常只有几百字节；每隔 SNAPSHOT_INTERVAL 个修订
+或差异比全文还大时保存一份完整快照，因此读取任意修订最多只需重放 SNAPSHOT_INTERVAL - 1 个差异。
+
+记录格式：固定长度的头部（数据长度、时间、类型、CRC32、说明长度）+ 说明 + 压缩数据。
+列出修订只读取头部并跳过数据，不需要解压。
+"""
+import difflib
+import json
+import os
+import struct
+import time
+import zlib
+
+REVISIONS_DIRNAME = ".revisions"
+
+# 每隔多少个修订保存一份完整快照
+SNAPSHOT_INTERVAL = 20
+
+_HEADER = struct.Struct("<IdBIH")  # 数据长度、时间戳、类型、全文 CRC32、说明长度
+_FULL, _DELTA = 0, 1
+
+
+class RevisionError(Exception):
+    pass
+
+
+class Revision:
+    """一个修订的元数据"""
+
+    def __init__(self, number, timestamp, kind, crc, message, offset, size):
+        self.number = number
+        self.timestamp = timestamp
+        self.kind = kind
+        self.crc = crc
+        self.message = message
+        self.offset = offset  # 压缩数据在文件中的位置
+        self.size = size  # 压缩数据的字节数
+
+    @property
+    def is_snapshot(self):
+        return self.kind == _FULL
+
+    def label(self):
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.timestamp))
+        kind = "快照" if self.is_snapshot else "差异"
+        return f"#{self.number}  {when}  {self.message}（{kind} {self.size} 字节）"
+
+
+def make_delta(old_lines, new_lines):
+    """行级差异：整数对 [起, 止) 表示复制旧版本的行，字符串列表表示新增的行"""
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif tag in ("replace", "insert"):
+            ops.append(new_lines[j1:j2])
+    return ops
+
+
+def apply_delta(old_lines, ops):
+    lines = []
+    for op in ops:
+        if len(op) == 2 and isinstance(op[0], int):
+            lines.extend(old_lines[op[0]:op[1]])
+        else:
+            lines.extend(op)
+    return lines
+
+
+class RevisionStore:
+    """文章修订存储（root 为 .revisions 目录）"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def pack_path(self, name):
+        return os.path.join(self.root, name + ".pack")
+
+    def names(self):
+        """有修订历史的文章名（包括已删除的文章）"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(filename[:-5] for filename in os.listdir(self.root) if filename.endswith(".pack"))
+
+    def list(self, name):
+        """按顺序列出修订（只读取头部）"""
+        revisions = []
+        path = self.pack_path(name)
+        if not os.path.exists(path):
+            return revisions
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    break
+                size, timestamp, kind, crc, message_len = _HEADER.unpack(header)
+                message = f.read(message_len).decode("utf-8", errors="replace")
+                offset = f.tell()
+                if offset + size > os.fstat(f.fileno()).st_size:
+                    break  # 写入中断留下的残缺记录
+                revisions.append(Revision(len(revisions) + 1, timestamp, kind, crc, message, offset, size))
+                f.seek(size, os.SEEK_CUR)
+        return revisions
+
+    def _read_payload(self, f, revision):
+        f.seek(revision.offset)
+        try:
+            return json.loads(zlib.decompress(f.read(revision.size)).decode("utf-8"))
+        except (zlib.error, ValueError):
+            raise RevisionError(f"修订数据损坏：{os.path.basename(f.name)[:-5]} #{revision.number}")
+
+    def get(self, name, number=None, revisions=None):
+        """取得第 number 个修订的全文（默认最新的修订）"""
+        revisions = revisions or self.list(name)
+        if not revisions:
+            raise RevisionError(f"没有修订历史：{name}")
+        number = number or len(revisions)
+        if not 1 <= number <= len(revisions):
+            raise RevisionError(f"修订不存在：{name} #{number}")
+
+        # 从最近的快照开始重放差异
+        start = number - 1
+        while not revisions[start].is_snapshot:
+            start -= 1
+        with open(self.pack_path(name), "rb") as f:
+            lines = self._read_payload(f, revisions[start])
+            for revision in revisions[start + 1:number]:
+                lines = apply_delta(lines, self._read_payload(f, revision))
+
+        text = "".join(lines)
+        if zlib.crc32(text.encode("utf-8")) != revisions[number - 1].crc:
+            raise RevisionError(f"修订数据损坏：{name} #{number}")
+        return text
+
+    def record(self, name, text, message=""):
+        """追加一个修订，与最新修订相同时不记录；返回新修订的编号或 None"""
+        revisions = self.list(name)
+        previous = self.get(name, revisions=revisions) if revisions else None
+        if previous == text:
+            return None
+
+        new_lines = text.splitlines(keepends=True)
+        full = zlib.compress(json.dumps(new_lines, ensure_ascii=False).encode("utf-8"), 9)
+        kind, payload = _FULL, full
+        since_snapshot = 0
+        for revision in reversed(revisions):
+            if revision.is_snapshot:
+                break
+            since_snapshot += 1
+        if previous is not None and since_snapshot + 1 < SNAPSHOT_INTERVAL:
+            ops = make_delta(previous.splitlines(keepends=True), new_lines)
+            delta = zlib.compress(json.dumps(ops, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 9)
+            if len(delta) < len(full):
+                kind, payload = _DELTA, delta
+
+        message = message.encode("utf-8")[:1000]
+        os.makedirs(self.root, exist_ok=True)
+        path = self.pack_path(name)
+        with open(path, "ab") as f:
+            # 去掉写入中断留下的残缺记录
+            end = revisions[-1].offset + revisions[-1].size if revisions else 0
+            if f.tell() != end:
+                f.truncate(end)
+                f.seek(end)
+            f.write(_HEADER.pack(len(payload), time.time(), kind, zlib.crc32(text.encode("utf-8")), len(message)))
+            f.write(message)
+            f.write(payload)
+        return len(revisions) + 1
+
+    def diff(self, name, a, b):
+        """两个修订之间的统一格式差异（行列表）"""
+        revisions = self.list(name)
+        old = self.get(name, a, revisions).splitlines(keepends=True)
+        new = self.get(name, b, revisions).splitlines(keepends=True)
+        return [line.rstrip("\n") for line in difflib.unified_diff(old, new, f"#{a}", f"#{b}")]
@@ -0,0 +1,89 @@
+"""只发布构建好的站点文件
+
+把博客目录中真正需要对外提供的文件（页面、样式、脚本、图片、订阅源和站点地图）
+同步到发布分支的 git worktree 中，管理工具本身、批处理脚本、草稿和 src/ 等源文件不会进入发布分支。
+同步时只复制内容有变化的文件，并删除站点中已经不存在的文件。
+"""
+import filecmp
+import fnmatch
+import os
+import shutil
+
+# 整个目录都属于站点的子目录
+SITE_DIRS = ("js", "img", "posts", "tags", "archive", "galleries", "css", "fonts")
+
+# 根目录中属于站点的文件
+SITE_FILES = (
+    "*.html", "*.css", "*.ico", "*.webmanifest",
+    "feed.xml", "atom.xml", "feed.json", "sitemap*.xml",
+    "CNAME", "robots.txt",
+)
+
+# 同步时保留的发布分支文件：.nojekyll 让 GitHub Pages 直接提供静态文件
+KEEP_FILES = {".git", ".nojekyll"}
+
+# 发布 worktree 在 .git 目录中的位置
+WORKTREE_DIRNAME = "publish-worktree"
+
+
+def collect_site_files(blog_dir):
+    """站点文件：相对路径（使用 /） -> 绝对路径"""
+    files = {}
+    for name in os.listdir(blog_dir):
+        path = os.path.join(blog_dir, name)
+        if os.path.isfile(path) and any(fnmatch.fnmatch(name, pattern) for pattern in SITE_FILES):
+            files[name] = path
+
+    for directory in SITE_DIRS:
+        top = os.path.join(blog_dir, directory)
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".") and d != "__pycache__"]
+            for filename in filenames:
+                if filename.startswith(".") or filename.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, filename)
+                files[os.path.relpath(path, blog_dir).replace(os.sep, "/")] = path
+    return files
+
+
+def sync_tree(files, dest, transform=None):
+    """把 files 同步到 dest：复制新增或变化的文件，删除多余的文件，返回 (复制数, 删除数)
+
+    比较时先看大小和修改时间，不同再比较内容；复制时保留修改时间，下一次同步可以直接跳过。
+    transform(相对路径, 源路径) 返回字符串时写出该内容而不是复制源文件（例如优化后的页面），返回 None 时照常复制。
+    """
+    copied = removed = 0
+    for relative, source in files.items():
+        target = os.path.join(dest, *relative.split("/"))
+        content = transform(relative, source) if transform else None
+        if content is not None:
+            data = content.encode("utf-8")
+            if os.path.isfile(target):
+                with open(target, "rb") as f:
+                    if f.read() == data:
+                        continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(data)
+            copied += 1
+            continue
+        if os.path.isfile(target) and filecmp.cmp(source, target, shallow=True):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(source, target)
+        copied += 1
+
+    wanted = {os.path.join(dest, *relative.split("/")) for relative in files}
+    for dirpath, dirnames, filenames in os.walk(dest, topdown=False):
+        if dirpath == dest:
+            filenames = [f for f in filenames if f not in KEEP_FILES]
+        elif os.path.relpath(dirpath, dest).split(os.sep)[0] in KEEP_FILES:
+            continue
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if path not in wanted:
+                os.remove(path)
+                removed += 1
+        if dirpath != dest and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+    return copied, removed
@@ -0,0 +1,192 @@
+"""站点校验：检查生成的页面中失效的内部链接和缺失的资源
+
+每个 HTML 文件只解析一次，得到它引用的链接、图片、脚本和样式表，
+汇总成引用关系图后，再并行检查所有内部目标是否存在（包括 #锚点）。
+只检查会发布的页面（与 site_publish.collect_site_files 相同），管理工具目录、草稿等不参与校验。
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import unquote, urlsplit
+
+from site_publish import collect_site_files
+
+# 站点文件中不参与校验的目录
+DEFAULT_EXCLUDE_DIRS = {".git", "node_modules", "drafts", "__pycache__", ".revisions"}
+
+# 需要检查的 标签 -> 属性
+REFERENCE_ATTRS = {
+    "a": ("href",),
+    "link": ("href",),
+    "img": ("src", "srcset"),
+    "script": ("src",),
+    "source": ("src", "srcset"),
+    "iframe": ("src",),
+    "video": ("src", "poster"),
+    "audio": ("src",),
+}
+
+# 页面数超过该值时使用多进程解析
+PROCESS_POOL_MIN_PAGES = 200
+
+
+class _ReferenceParser(HTMLParser):
+    """收集页面中的引用和元素 id"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.references = []  # (行号, 标签, 属性, 地址)
+        self.ids = set()
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        for key in ("id", "name"):
+            if attrs.get(key) and (key == "id" or tag == "a"):
+                self.ids.add(attrs[key])
+
+        for attr in REFERENCE_ATTRS.get(tag, ()):
+            value = (attrs.get(attr) or "").strip()
+            if not value:
+                continue
+            if attr == "srcset":
+                # srcset 形如 "a.jpg 1x, b.jpg 2x"
+                urls = [part.split()[0] for part in value.split(",") if part.strip()]
+            else:
+                urls = [value]
+            line = self.getpos()[0]
+            for url in urls:
+                self.references.append((line, tag, attr, url))
+
+    handle_startendtag = handle_starttag
+
+
+def read_html(path):
+    """读取页面，依次尝试常见编码"""
+    with open(path, "rb") as f:
+        data = f.read()
+    for encoding in ("utf-8-sig", "gbk"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("utf-8", errors="replace")
+
+
+def parse_page(path):
+    """解析单个页面，返回 (路径, 引用列表, id 集合)；可在子进程中执行"""
+    parser = _ReferenceParser()
+    try:
+        parser.feed(read_html(path))
+        parser.close()
+    except Exception:
+        pass  # 残缺的页面尽量保留已经解析出的引用
+    return path, parser.references, parser.ids
+
+
+def collect_html_files(root, exclude_dirs=DEFAULT_EXCLUDE_DIRS):
+    """列出站点中会发布的所有 HTML 文件"""
+    return [
+        path for relative, path in sorted(collect_site_files(root).items())
+        if relative.lower().endswith((".html", ".htm")) and not exclude_dirs.intersection(relative.split("/")[:-1])
+    ]
+
+
+def resolve_reference(root, page, url):
+    """把页面中的地址解析为站点内的文件路径和锚点，外部地址返回 (None, None)"""
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or url.startswith(("#", "javascript:", "mailto:", "tel:", "data:")):
+        if url.startswith("#") and len(url) > 1:
+            return page, unquote(url[1:])
+        return None, None
+
+    path = unquote(parts.path)
+    if not path:
+        return None, None
+    if path.startswith("/"):
+        target = os.path.join(root, path.lstrip("/"))
+    else:
+        target = os.path.join(os.path.dirname(page), path)
+    return os.path.normpath(target), unquote(parts.fragment) or None
+
+
+class ValidationReport:
+    """站点校验结果"""
+
+    def __init__(self, root):
+        self.root = root
+        self.pages = 0
+        self.references = 0
+        self.targets = 0
+        self.broken = []  # (页面, 行号, 标签, 地址, 原因)
+        self.graph = {}  # 目标路径 -> 引用它的页面集合
+        self.elapsed = 0.0
+
+    @property
+    def ok(self):
+        return not self.broken
+
+    def summary(self):
+        """一行摘要"""
+        return (f"校验了 {self.pages} 个页面、{self.references} 处引用（{self.targets} 个内部目标），"
+                f"发现 {len(self.broken)} 处问题，用时 {self.elapsed:.2f} 秒")
+
+    def format_problems(self, limit=50):
+        """按行列出问题"""
+        lines = []
+        for page, line, tag, url, reason in self.broken[:limit]:
+            lines.append(f"{os.path.relpath(page, self.root)}:{line} <{tag}> {url} —— {reason}")
+        if len(self.broken) > limit:
+            lines.append(f"……另有 {len(self.broken) - limit} 处问题未列出")
+        return lines
+
+
+def validate_site(root, exclude_dirs=DEFAULT_EXCLUDE_DIRS, max_workers=None):
+    """校验 root 下的整个站点，返回 ValidationReport"""
+    started = time.perf_counter()
+    report = ValidationReport(root)
+    pages = collect_html_files(root, exclude_dirs)
+    report.pages = len(pages)
+
+    # 1. 解析所有页面（页面多时使用多进程）
+    if len(pages) >= PROCESS_POOL_MIN_PAGES:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            parsed = list(pool.map(parse_page, pages, chunksize=32))
+    else:
+        parsed = [parse_page(page) for page in pages]
+    page_ids = {os.path.normpath(path): ids for path, _, ids in parsed}
+
+    # 2. 建立引用关系图
+    uses = []  # (页面, 行号, 标签, 地址, 目标路径, 锚点)
+    for page, references, _ in parsed:
+        for line, tag, attr, url in references:
+            report.references += 1
+            target, fragment = resolve_reference(root, page, url)
+            if target is None:
+                continue
+            report.graph.setdefault(target, set()).add(page)
+            uses.append((page, line, tag, url, target, fragment))
+    report.targets = len(report.graph)
+
+    # 3. 并行检查所有内部目标是否存在（目录则检查 index.html）
+    def check(target):
+        if os.path.isfile(target):
+            return target
+        index = os.path.join(target, "index.html")
+        if os.path.isdir(target) and os.path.isfile(index):
+            return os.path.normpath(index)
+        return None
+
+    with ThreadPoolExecutor(max_workers=max_workers or 16) as pool:
+        existing = dict(zip(report.graph, pool.map(check, report.graph)))
+
+    for page, line, tag, url, target, fragment in uses:
+        resolved = existing.get(target)
+        if resolved is None:
+            report.broken.append((page, line, tag, url, "目标不存在"))
+        elif fragment and resolved in page_ids and fragment not in page_ids[resolved] and fragment != "top":
+            report.broken.append((page, line, tag, url, f"锚点 #{fragment} 不存在"))
+
+    report.broken.sort(key=lambda item: (item[0], item[1]))
+    report.elapsed = time.perf_counter() - started
+    return report
@@ -0,0 +1,437 @@
+"""HTML / CSS / JS 语法高亮
+
+分为两部分：
+- IncrementalTokenizer：与界面无关的按行增量分词器，缓存每行的起始状态和记号，
+  编辑后只从改动的行开始重新分词，直到状态与缓存一致为止；
+- SyntaxHighlighter：挂到 Tk Text 组件上，拦截 insert/delete/replace 得到改动的行范围，
+  并且只给可见区域内的行打标签。
+"""
+import re
+
+# 各类记号的颜色
+TAG_COLORS = {
+    "comment": "#94a3b8",
+    "string": "#16a34a",
+    "keyword": "#7c3aed",
+    "number": "#ea580c",
+    "tag": "#2563eb",
+    "attribute": "#b45309",
+    "selector": "#0f766e",
+    "property": "#be185d",
+}
+
+JS_KEYWORDS = {
+    "break", "case", "catch", "class", "const", "continue", "debugger", "default",
+    "delete", "do", "else", "export", "extends", "false", "finally", "for",
+    "function", "if", "import", "in", "instanceof", "let", "new", "null", "return",
+    "super", "switch", "this", "throw", "true", "try", "typeof", "undefined", "var",
+    "void", "while", "with", "yield", "async", "await", "of",
+}
+
+# 分词器状态：(语言, 当前模式, 附加标记, CSS 花括号深度)
+#   语言：文件本身的语言 html / css / js
+#   当前模式：正在解析的语言（HTML 中嵌入的 <style>/<script> 会切换到 css/js）
+#   附加标记：None、"comment"（跨行注释）、"template"（JS 模板字符串）、"tag:名称"（跨行标签）
+INITIAL_STATES = {
+    "html": ("html", "html", None, 0),
+    "css": ("css", "css", None, 0),
+    "js": ("js", "js", None, 0),
+}
+
+_CSS_TOKEN = re.compile(
+    r"""(?P<comment>/\*)
+      | (?P<string>"(?:[^"\\]|\\.)*"?|'(?:[^'\\]|\\.)*'?)
+      | (?P<open>\{)
+      | (?P<close>\})
+      | (?P<keyword>@[\w-]+|!important)
+      | (?P<number>\#[0-9a-fA-F]{3,8}\b|-?\d*\.?\d+(?:px|em|rem|%|s|ms|vh|vw|deg|fr)?)
+      | (?P<ident>[\w.#:>*\[\]="'~+-][\w.#:()>*\[\]="'~+-]*)
+      | (?P<end></style)""",
+    re.VERBOSE | re.IGNORECASE,
+)
+
+_JS_TOKEN = re.compile(
+    r"""(?P<line_comment>//.*)
+      | (?P<comment>/\*)
+      | (?P<template>`)
+      | (?P<string>"(?:[^"\\]|\\.)*"?|'(?:[^'\\]|\\.)*'?)
+      | (?P<number>\b(?:0x[0-9a-fA-F]+|\d*\.?\d+(?:e[+-]?\d+)?)\b)
+      | (?P<ident>[A-Za-z_$][\w$]*)
+      | (?P<end></script)""",
+    re.VERBOSE | re.IGNORECASE,
+)
+
+_HTML_TOKEN = re.compile(
+    r"""(?P<comment><!--)
+      | (?P<tag></?[A-Za-z][\w:-]*|<!DOCTYPE)""",
+    re.VERBOSE | re.IGNORECASE,
+)
+
+_HTML_IN_TAG = re.compile(
+    r"""(?P<string>"[^"]*"?|'[^']*'?)
+      | (?P<attribute>[A-Za-z_:][\w:.-]*)
+      | (?P<close>/?>)""",
+    re.VERBOSE,
+)
+
+
+def _scan_css(line, pos, state, tokens):
+    """解析一段 CSS，返回 (结束位置, 新状态)"""
+    lang, mode, flag, depth = state
+    length = len(line)
+    while pos < length:
+        if flag == "comment":
+            end = line.find("*/", pos)
+            if end < 0:
+                tokens.append(("comment", pos, length))
+                return length, (lang, mode, flag, depth)
+            tokens.append(("comment", pos, end + 2))
+            pos, flag = end + 2, None
+            continue
+
+        match = _CSS_TOKEN.search(line, pos)
+        if not match:
+            break
+        kind = match.lastgroup
+        start, end = match.span()
+        if kind == "comment":
+            pos, flag = start, "comment"
+            continue
+        if kind == "end":
+            if lang == "html":
+                # </style> 结束嵌入的 CSS，回到 HTML
+                return start, (lang, "html", None, 0)
+            pos = end
+            continue
+        if kind == "open":
+            depth += 1
+        elif kind == "close":
+            depth = max(depth - 1, 0)
+        elif kind == "ident":
+            text = match.group()
+            rest = line[end:end + 40].lstrip()
+            if depth > 0 and not rest.startswith(("{", ",")):
+                # 块内的 "名称:" 是属性名（冒号可能紧跟在名称后面）
+                colon = text.find(":")
+                if colon > 0:
+                    tokens.append(("property", start, start + colon))
+                elif rest.startswith(":"):
+                    tokens.append(("property", start, end))
+            else:
+                tokens.append(("selector", start, end))
+        elif kind == "number" and depth == 0 and match.group().startswith("#"):
+            # 块外的 #abc 是 id 选择器而不是颜色
+            tokens.append(("selector", start, end))
+        else:
+            tokens.append((kind, start, end))
+        pos = end
+    return length, (lang, mode, flag, depth)
+
+
+def _scan_js(line, pos, state, tokens):
+    """解析一段 JS，返回 (结束位置, 新状态)"""
+    lang, mode, flag, depth = state
+    length = len(line)
+    while pos < length:
+        if flag == "comment":
+            end = line.find("*/", pos)
+            if end < 0:
+                tokens.append(("comment", pos, length))
+                return length, (lang, mode, flag, depth)
+            tokens.append(("comment", pos, end + 2))
+            pos, flag = end + 2, None
+            continue
+        if flag == "template":
+            end = pos
+            while True:
+                end = line.find("`", end)
+                if end < 0 or line[end - 1:end] != "\\":
+                    break
+                end += 1
+            if end < 0:
+                tokens.append(("string", pos, length))
+                return length, (lang, mode, flag, depth)
+            tokens.append(("string", pos, end + 1))
+            pos, flag = end + 1, None
+            continue
+
+        match = _JS_TOKEN.search(line, pos)
+        if not match:
+            break
+        kind = match.lastgroup
+        start, end = match.span()
+        if kind == "comment":
+            pos, flag = start, "comment"
+            continue
+        if kind == "template":
+            tokens.append(("string", start, end))
+            pos, flag = end, "template"
+            continue
+        if kind == "end":
+            if lang == "html":
+                # </script> 结束嵌入的 JS，回到 HTML
+                return start, (lang, "html", None, 0)
+            pos = end
+            continue
+        if kind == "line_comment":
+            tokens.append(("comment", start, end))
+        elif kind == "ident":
+            if match.group() in JS_KEYWORDS:
+                tokens.append(("keyword", start, end))
+        else:
+            tokens.append((kind, start, end))
+        pos = end
+    return length, (lang, mode, flag, depth)
+
+
+def _scan_html(line, pos, state, tokens):
+    """解析一段 HTML，返回 (结束位置, 新状态)"""
+    lang, mode, flag, depth = state
+    length = len(line)
+    while pos < length:
+        if flag == "comment":
+            end = line.find("-->", pos)
+            if end < 0:
+                tokens.append(("comment", pos, length))
+                return length, (lang, mode, flag, depth)
+            tokens.append(("comment", pos, end + 3))
+            pos, flag = end + 3, None
+            continue
+        if flag and flag.startswith("tag:"):
+            # 标签内部：属性名、属性值，直到 > 为止
+            match = _HTML_IN_TAG.search(line, pos)
+            if not match:
+                return length, (lang, mode, flag, depth)
+            kind = match.lastgroup
+            start, end = match.span()
+            if kind == "close":
+                tokens.append(("tag", start, end))
+                name = flag[4:]
+                flag = None
+                pos = end
+                # <style> / <script> 之后切换到对应语言
+                if name == "style" and match.group() == ">":
+                    return pos, (lang, "css", None, 0)
+                if name == "script" and match.group() == ">":
+                    return pos, (lang, "js", None, 0)
+                continue
+            tokens.append((kind, start, end))
+            pos = end
+            continue
+
+        match = _HTML_TOKEN.search(line, pos)
+        if not match:
+            break
+        kind = match.lastgroup
+        start, end = match.span()
+        if kind == "comment":
+            pos, flag = start, "comment"
+            continue
+        tokens.append(("tag", start, end))
+        text = match.group()
+        name = "" if text.startswith("</") else text[1:].lower()
+        pos, flag = end, "tag:" + name
+    return length, (lang, mode, flag, depth)
+
+
+_SCANNERS = {"html": _scan_html, "css": _scan_css, "js": _scan_js}
+
+
+def tokenize_line(line, state):
+    """对一行文本分词，返回 (记号列表, 行末状态)，记号为 (类型, 起始列, 结束列)"""
+    tokens = []
+    pos = 0
+    length = len(line)
+    while True:
+        pos, state = _SCANNERS[state[1]](line, pos, state, tokens)
+        if pos >= length:
+            return tokens, state
+
+
+class IncrementalTokenizer:
+    """按行缓存状态和记号的增量分词器（与界面无关）"""
+
+    def __init__(self, language):
+        self.language = language
+        self.reset(1)
+
+    def reset(self, line_count):
+        """清空缓存"""
+        # states[i] 是第 i+1 行开头的状态，最后一项是文末状态
+        self.states = [INITIAL_STATES[self.language]] + [None] * line_count
+        self.tokens = [None] * line_count
+        self.dirty_from = 1
+
+    @property
+    def line_count(self):
+        return len(self.tokens)
+
+    def lines_changed(self, line, delta):
+        """第 line 行被修改，并且总行数变化了 delta 行"""
+        index = line - 1
+        if delta > 0:
+            self.states[index + 1:index + 1] = [None] * delta
+            self.tokens[index + 1:index + 1] = [None] * delta
+        elif delta < 0:
+            del self.states[index + 1:index + 1 - delta]
+            del self.tokens[index + 1:index + 1 - delta]
+
+        for i in range(index, min(index + max(delta, 0) + 1, len(self.tokens))):
+            self.tokens[i] = None
+        self.dirty_from = min(self.dirty_from, line)
+
+    def update(self, first, last, get_line):
+        """确保 first..last 行的记号是最新的，返回本次重新分词的行号列表
+
+        从最早的脏行开始分词，跳过状态未变的干净行；越过 last 后即停止，
+        之后仍不一致的行只记录为新的脏行位置，等滚动到那里时再处理。
+        """
+        line_count = len(self.tokens)
+        changed = []
+        line = self.dirty_from
+        while line <= line_count:
+            index = line - 1
+            if self.tokens[index] is not None:
+                # 干净的行，直接跳到下一个脏行
+                line = self._first_dirty(line)
+                continue
+            if line > last:
+                break
+
+            tokens, end_state = tokenize_line(get_line(line), self.states[index])
+            self.tokens[index] = tokens
+            changed.append(line)
+            if end_state != self.states[index + 1]:
+                # 行末状态变了，下一行也需要重新分词
+                self.states[index + 1] = end_state
+                if index + 1 < line_count:
+                    self.tokens[index + 1] = None
+            line += 1
+
+        self.dirty_from = self._first_dirty(line)
+        return changed
+
+    def _first_dirty(self, start):
+        """从 start 行开始查找第一个需要重新分词的行"""
+        try:
+            return self.tokens.index(None, start - 1) + 1
+        except ValueError:
+            return len(self.tokens) + 1
+
+
+class SyntaxHighlighter:
+    """给 Tk Text 组件添加增量语法高亮"""
+
+    def __init__(self, text, language):
+        self.text = text
+        self.tokenizer = IncrementalTokenizer(language)
+        self.tagged = set()  # 已经打过标签的行
+        self._pending = None
+
+        for tag, color in TAG_COLORS.items():
+            text.tag_configure(tag, foreground=color)
+
+        # 拦截组件命令，获取每次修改涉及的行
+        self._orig = text._w + "_orig"
+        text.tk.call("rename", text._w, self._orig)
+        text.tk.createcommand(text._w, self._dispatch)
+
+        # Tk 8.6 中非 BMP 字符（如 emoji）按两个字符计数
+        self._wide_chars = int(text.tk.call("string", "length", "\U0001F319")) == 2
+
+        # 滚动时给新出现的行打标签
+        scroll_command = text.cget("yscrollcommand")
+
+        def on_scroll(*args):
+            if scroll_command:
+                text.tk.call(scroll_command, *args)
+            self.schedule()
+
+        text.configure(yscrollcommand=on_scroll)
+        text.bind("<Configure>", lambda e: self.schedule(), add="+")
+        self.tokenizer.reset(self._line_count())
+
+    def _call(self, *args):
+        return self.text.tk.call(self._orig, *args)
+
+    def _line_count(self):
+        return int(str(self._call("index", "end-1c")).split(".")[0])
+
+    def _dispatch(self, command, *args):
+        """组件命令代理：修改类命令之后更新缓存"""
+        if command not in ("insert", "delete", "replace"):
+            return self._call(command, *args)
+
+        line = int(str(self._call("index", args[0])).split(".")[0])
+        before = self._line_count()
+        result = self._call(command, *args)
+        delta = self._line_count() - before
+
+        self.tokenizer.lines_changed(line, delta)
+        self._shift_tagged(line, delta)
+        self.schedule()
+        return result
+
+    def _shift_tagged(self, line, delta):
+        """修改之后调整已打标签的行号"""
+        if delta == 0:
+            self.tagged.discard(line)
+            return
+        shifted = set()
+        for tagged_line in self.tagged:
+            if tagged_line < line:
+                shifted.add(tagged_line)
+            elif tagged_line > line - min(delta, 0):
+                shifted.add(tagged_line + delta)
+        self.tagged = shifted
+
+    def schedule(self):
+        """在空闲时刷新高亮（多次调用会合并）"""
+        if self._pending is None:
+            self._pending = self.text.after_idle(self.flush)
+
+    def visible_lines(self):
+        """返回当前可见的首行和末行"""
+        first = int(str(self._call("index", "@0,0")).split(".")[0])
+        last = int(str(self._call("index", f"@0,{self.text.winfo_height()}")).split(".")[0])
+        return first, last
+
+    def flush(self):
+        """立即重新分词脏行，并给可见区域中未打标签的行打标签"""
+        self._pending = None
+        first, last = self.visible_lines()
+
+        def get_line(line):
+            return str(self._call("get", f"{line}.0", f"{line}.end"))
+
+        for line in self.tokenizer.update(first, last, get_line):
+            self.tagged.discard(line)
+
+        lines = [line for line in range(first, last + 1)
+                 if line not in self.tagged and line <= self.tokenizer.line_count]
+        if not lines:
+            return
+
+        # 先清除这些行的旧标签，再按类型批量添加
+        ranges = {tag: [] for tag in TAG_COLORS}
+        clear = []
+        for line in lines:
+            clear.extend((f"{line}.0", f"{line}.end"))
+            tokens = self.tokenizer.tokens[line - 1] or []
+            line_text = get_line(line) if self._wide_chars and tokens else ""
+            convert = bool(line_text) and max(map(ord, line_text)) > 0xFFFF
+            for tag, start, end in tokens:
+                if convert:
+                    start, end = self._tk_column(line_text, start), self._tk_column(line_text, end)
+                ranges[tag].extend((f"{line}.{start}", f"{line}.{end}"))
+            self.tagged.add(line)
+
+        for tag in TAG_COLORS:
+            self._call("tag", "remove", tag, *clear)
+            if ranges[tag]:
+                self._call("tag", "add", tag, *ranges[tag])
+
+    @staticmethod
+    def _tk_column(line_text, column):
+        """把 Python 字符串下标换算为 Tk 的列号"""
+        return column + sum(1 for ch in line_text[:column] if ord(ch) > 0xFFFF)
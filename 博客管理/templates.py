@@ -0,0 +1,234 @@
+"""页面模板
+
+文章页、文章卡片、文章列表页、标签/归档页以及相册页共用一个布局（base.html）和页眉、页脚两个片段，
+修改页脚只需改一个模板文件，再“重建全部页面”即可。模板语法：
+
+    {{ 变量 }}                     插入变量（没有提供的变量为空）
+    {% include "footer.html" %}    插入片段
+    {% layout "base.html" %}       把当前模板的内容放到布局的 {{ body }} 处
+    {% set 变量 = "值" %}          变量的默认值（渲染时传入的同名变量优先）
+
+博客目录下 templates/ 中的同名文件会覆盖内置模板（可用 export_templates 导出内置模板后修改）。
+模板在首次使用时编译为“文本 / 变量名”交替的列表并缓存，依赖的文件修改后自动重新编译。
+"""
+import os
+import re
+
+TEMPLATES_DIRNAME = "templates"
+
+# 默认的站点标题
+SITE_TITLE = "TangShiMei"
+
+# 内置模板
+BUILTIN_TEMPLATES = {
+    "base.html": """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+  <meta charset="UTF-8" />
+  <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+  <title>{{ page_title }} - {{ site_title }}</title>
+  <link rel="stylesheet" href="{{ root }}style.css" />
+</head>
+<body>
+{% include "header.html" %}
+
+{{ body }}
+
+{% include "footer.html" %}
+
+  {{ scripts }}
+</body>
+</html>
+""",
+    "header.html": """  <header>
+    <h1 class="site-title">{{ heading }}</h1>
+    <button id="theme-toggle" class="theme-btn" title="切换夜间模式">🌙</button>
+  </header>""",
+    "footer.html": """  <footer{{ footer_attrs }}>
+    <a href="{{ back_url }}" class="btn">{{ back_text }}</a>
+    <br><br>
+    <small>© 2025 {{ site_title }}</small>
+  </footer>""",
+    "post.html": """{% layout "base.html" %}
+{% set root = "../" %}
+{% set back_url = "../posts.html" %}
+{% set back_text = "← 返回文章列表" %}
+{% set footer_attrs = " style=\\"margin-top: 60px;\\"" %}
+  <main class="post-content">
+    <img src="{{ banner }}" alt="{{ alt }}" class="post-banner" />
+    <p class="post-date">发布于 {{ date }}</p>
+    <div class="post-tags">{{ tags }}</div>
+
+{{ content }}
+  </main>""",
+    "post_card.html": """
+    <!-- 新增文章 -->
+    <article class="card">
+      <img src="img/{{ img_name }}" alt="{{ title }}" class="post-img" />
+      <h2>{{ title }}</h2>
+      <p class="post-date">{{ date }}</p>
+      <div class="post-tags">{{ tags }}</div>
+      <p>{{ summary }}</p>
+      <a href="posts/{{ filename }}" class="btn">阅读全文</a>
+    </article>
+""",
+    "posts_page.html": """{% layout "base.html" %}
+{% set page_title = "文章列表" %}
+{% set heading = "文章列表" %}
+{% set back_url = "index.html" %}
+{% set back_text = "← 返回首页" %}
+  <main class="posts-container">{{ cards }}
+  </main>""",
+    "archive_page.html": """{% layout "base.html" %}
+{% set back_text = "← 返回文章列表" %}
+  <main class="posts-container">
+{{ items }}
+  </main>""",
+    "archive_card.html": """    <article class="card">
+      <img src="{{ root }}img/{{ img_name }}" alt="{{ title }}" class="post-img" />
+      <h2>{{ title }}</h2>
+      <p class="post-date">{{ date }}</p>
+      <div class="post-tags">{{ tags }}</div>
+      <p>{{ summary }}</p>
+      <a href="{{ root }}posts/{{ filename }}" class="btn">阅读全文</a>
+    </article>""",
+    "gallery_page.html": """{% layout "base.html" %}
+{% set root = "../" %}
+{% set back_url = "../posts.html" %}
+{% set back_text = "← 返回文章列表" %}
+  <style>
+    .gallery { display: grid; grid-template-columns: repeat(auto-fill, minmax(200px, 1fr)); gap: 12px; }
+    .gallery-item img { width: 100%; aspect-ratio: 1; object-fit: cover; border-radius: 8px; display: block; }
+  </style>
+  <main class="posts-container">
+    <p class="post-date">共 {{ count }} 张图片</p>
+    <div class="gallery">
+{{ items }}
+    </div>
+  </main>""",
+    "gallery_item.html": """      <a href="{{ root }}img/{{ image }}" class="gallery-item" target="_blank">
+        <img src="{{ root }}img/{{ thumb }}" alt="{{ alt }}" loading="lazy" />
+      </a>""",
+}
+
+_LAYOUT = re.compile(r'\{%\s*layout\s+"([^"]+)"\s*%\}\n?')
+_INCLUDE = re.compile(r'\{%\s*include\s+"([^"]+)"\s*%\}')
+_SET = re.compile(r'\{%\s*set\s+(\w+)\s*=\s*"((?:[^"\\]|\\.)*)"\s*%\}\n?')
+_VARIABLE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+class TemplateError(Exception):
+    pass
+
+
+class CompiledTemplate:
+    """编译后的模板：parts 中偶数位置是文本，奇数位置是变量名"""
+
+    def __init__(self, parts, defaults, files):
+        self.parts = parts
+        self.defaults = defaults
+        self.files = files  # 依赖的模板文件 -> 修改时间（内置模板为 None）
+
+    def render(self, **context):
+        values = dict(self.defaults, **context)
+        parts = self.parts
+        out = []
+        for i in range(0, len(parts) - 1, 2):
+            out.append(parts[i])
+            out.append(str(values.get(parts[i + 1], "")))
+        out.append(parts[-1])
+        return "".join(out)
+
+
+class TemplateSet:
+    """按名称查找、编译并缓存模板"""
+
+    def __init__(self, template_dir=None, variables=None):
+        self.template_dir = template_dir
+        self.variables = variables or {}  # 所有模板共用的变量（例如站点标题）
+        self._cache = {}
+
+    def _path(self, name):
+        return os.path.join(self.template_dir, name) if self.template_dir else None
+
+    def _source(self, name, files):
+        path = self._path(name)
+        if path and os.path.isfile(path):
+            files[path] = os.path.getmtime(path)
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        if name not in BUILTIN_TEMPLATES:
+            raise TemplateError(f"找不到模板：{name}")
+        files[name] = None
+        return BUILTIN_TEMPLATES[name]
+
+    def _expand(self, name, files, defaults, stack):
+        """展开布局和片段，返回纯文本（只剩变量）"""
+        if name in stack:
+            raise TemplateError(f"模板循环引用：{' -> '.join(stack + [name])}")
+        stack = stack + [name]
+        text = self._source(name, files)
+
+        # 默认值：外层模板（页面）的 set 优先于布局和片段中的 set
+        for key, value in _SET.findall(text):
+            defaults.setdefault(key, value.encode("raw_unicode_escape").decode("unicode_escape"))
+        text = _SET.sub("", text)
+
+        layout = None
+        match = _LAYOUT.search(text)
+        if match:
+            layout = match.group(1)
+            text = text[:match.start()] + text[match.end():]
+
+        text = _INCLUDE.sub(lambda m: self._expand(m.group(1), files, defaults, stack), text)
+
+        if layout:
+            outer = self._expand(layout, files, defaults, stack)
+            text = _VARIABLE.sub(lambda m: text if m.group(1) == "body" else m.group(0), outer)
+        return text
+
+    def _fresh(self, compiled):
+        for path, mtime in compiled.files.items():
+            if mtime is None:
+                # 内置模板：用户之后新建了同名文件时需要重新编译
+                override = self._path(path)
+                if override and os.path.isfile(override):
+                    return False
+            elif not os.path.isfile(path) or os.path.getmtime(path) != mtime:
+                return False
+        return True
+
+    def get(self, name):
+        """取得编译后的模板（依赖的文件修改后重新编译）"""
+        compiled = self._cache.get(name)
+        if compiled is not None and self._fresh(compiled):
+            return compiled
+
+        files, defaults = {}, {}
+        text = self._expand(name, files, defaults, [])
+        compiled = CompiledTemplate(_VARIABLE.split(text), defaults, files)
+        self._cache[name] = compiled
+        return compiled
+
+    def render(self, name, **context):
+        return self.get(name).render(**dict(self.variables, **context))
+
+    def sources(self):
+        """全部模板的源文本（博客目录中的模板优先，另加其中的自定义模板）"""
+        names = set(BUILTIN_TEMPLATES)
+        if self.template_dir and os.path.isdir(self.template_dir):
+            names.update(name for name in os.listdir(self.template_dir) if name.endswith(".html"))
+        return [self._source(name, {}) for name in sorted(names)]
+
+
+def export_templates(template_dir):
+    """把内置模板导出到 template_dir 供修改（已存在的文件不覆盖），返回导出的文件名列表"""
+    os.makedirs(template_dir, exist_ok=True)
+    exported = []
+    for name, text in BUILTIN_TEMPLATES.items():
+        path = os.path.join(template_dir, name)
+        if not os.path.exists(path):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            exported.append(name)
+    return exported
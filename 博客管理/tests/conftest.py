@@ -0,0 +1,31 @@
+"""测试的公共夹具
+
+测试直接导入管理工具的模块（与 benchmarks 相同，把上一级目录加入 sys.path），
+需要真实博客内容时把仓库根目录下的站点文件复制到临时目录中使用。
+"""
+import os
+import shutil
+import sys
+
+import pytest
+
+TOOL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SITE_DIR = os.path.dirname(TOOL_DIR)
+sys.path.insert(0, TOOL_DIR)
+
+# 复制到临时博客目录中的站点文件（不包括管理工具自身）
+SITE_ENTRIES = ("posts", "img", "js", "style.css", "index.html", "about.html", "guestbook.html")
+
+
+@pytest.fixture
+def site(tmp_path):
+    """仓库中现有站点的副本，返回博客目录路径"""
+    blog_dir = tmp_path / "blog"
+    blog_dir.mkdir()
+    for name in SITE_ENTRIES:
+        source = os.path.join(SITE_DIR, name)
+        if os.path.isdir(source):
+            shutil.copytree(source, blog_dir / name)
+        elif os.path.exists(source):
+            shutil.copy2(source, blog_dir / name)
+    return str(blog_dir)
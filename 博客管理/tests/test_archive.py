@@ -0,0 +1,25 @@
+import os
+
+from blog_engine import BlogEngine, tag_filename
+
+
+def test_tag_filenames_do_not_collide():
+    tags = ["python", "Python", "PYTHON", "web 开发", "web-开发", "web/开发", "a:b", "a-b", "生活", ""]
+    names = [tag_filename(tag).lower() for tag in tags]
+    assert len(set(names)) == len(tags)
+    # 本身就是合法小写文件名的标签保持原样
+    assert tag_filename("python") == "python.html" and tag_filename("生活") == "生活.html"
+    assert tag_filename("Python") == tag_filename("Python")
+
+
+def test_tags_differing_in_case_get_their_own_pages(site):
+    engine = BlogEngine(site)
+    engine.publish_post("小写标签", "2025-08-09", "python", "摘要", "正文")
+    engine.publish_post("大写标签", "2025-08-10", "Python", "摘要", "正文")
+
+    pages = {}
+    for tag in ("python", "Python"):
+        with open(os.path.join(site, "tags", tag_filename(tag)), encoding="utf-8") as f:
+            pages[tag] = f.read()
+    assert "小写标签" in pages["python"] and "大写标签" not in pages["python"]
+    assert "大写标签" in pages["Python"] and "小写标签" not in pages["Python"]
@@ -0,0 +1,73 @@
+import hashlib
+import os
+
+import pytest
+
+from backups import PACK_MAX_OBJECT, BackupError, BackupStore, scan_tree
+
+
+def tree_hashes(root):
+    result = {}
+    for relative in scan_tree(root):
+        with open(os.path.join(root, *relative.split("/")), "rb") as f:
+            result[relative] = hashlib.sha256(f.read()).hexdigest()
+    return result
+
+
+@pytest.fixture
+def blog(site):
+    # 一个大于 PACK_MAX_OBJECT 的文件，单独保存为压缩对象
+    with open(os.path.join(site, "big.txt"), "w", encoding="utf-8") as f:
+        f.write("大文件\n" * (PACK_MAX_OBJECT // 5))
+    return site
+
+
+def test_backup_and_restore(blog, tmp_path):
+    store = BackupStore(str(tmp_path / "backups"))
+    snapshot = store.backup(blog)
+    assert snapshot.files == len(scan_tree(blog))
+    assert os.path.isdir(store.objects_dir)
+
+    target = tmp_path / "restored"
+    assert store.restore(snapshot.name, str(target)) == snapshot.files
+    assert tree_hashes(str(target)) == tree_hashes(blog)
+    assert os.path.getmtime(target / "style.css") == os.path.getmtime(os.path.join(blog, "style.css"))
+
+
+def test_incremental_backup_and_old_snapshot(blog, tmp_path):
+    store = BackupStore(str(tmp_path / "backups"))
+    first = store.backup(blog)
+    assert store.backup(blog).added == 0
+
+    css = os.path.join(blog, "style.css")
+    with open(css, "rb") as f:
+        original = f.read()
+    with open(css, "ab") as f:
+        f.write(b"\n/* changed */\n")
+    third = store.backup(blog)
+    assert third.added == 1
+
+    target = tmp_path / "old"
+    store.restore(first.name, str(target), paths=["style.css"])
+    assert (target / "style.css").read_bytes() == original
+
+    # 删除旧快照后，仍被引用的对象保留，新快照可以完整恢复
+    store.delete(first.name)
+    store.restore(third.name, str(tmp_path / "new"))
+    assert tree_hashes(str(tmp_path / "new")) == tree_hashes(blog)
+
+
+def test_restore_detects_corruption(blog, tmp_path):
+    store = BackupStore(str(tmp_path / "backups"))
+    snapshot = store.backup(blog)
+    pack = os.path.join(store.packs_dir, os.listdir(store.packs_dir)[0])
+    data = bytearray(open(pack, "rb").read())
+    for i in range(0, len(data), 97):
+        data[i] ^= 0xFF
+    with open(pack, "wb") as f:
+        f.write(data)
+
+    target = tmp_path / "restored"
+    with pytest.raises(BackupError):
+        store.restore(snapshot.name, str(target))
+    assert not [name for _, _, names in os.walk(target) for name in names if name.endswith(".restore.tmp")]
@@ -0,0 +1,80 @@
+import os
+
+from blog_engine import BlogEngine, format_front_matter, parse_front_matter, post_page_markup, read_text_file
+
+
+def test_update_post_keeps_hand_written_page(site):
+    engine = BlogEngine(site)
+    post_path = os.path.join(engine.posts_dir, "post1.html")
+    before = post_page_markup(read_text_file(post_path))
+
+    title, content = engine.read_post(post_path)
+    assert title == before["page_title"]
+    engine.update_post(post_path, title, content)
+
+    after = post_page_markup(read_text_file(post_path))
+    assert after == before
+    assert engine.read_post_source(post_path)["img"] == "post1.jpg"
+
+
+def test_update_post_new_title_keeps_banner(site):
+    engine = BlogEngine(site)
+    post_path = os.path.join(engine.posts_dir, "post1.html")
+    before = post_page_markup(read_text_file(post_path))
+
+    _, content = engine.read_post(post_path)
+    engine.update_post(post_path, "新标题", content + "\n新的一段")
+
+    after = post_page_markup(read_text_file(post_path))
+    assert after["page_title"] == "新标题"
+    assert after["banner"] == before["banner"]
+    assert after["alt"] == before["alt"]
+    assert after["heading"] == before["heading"]
+    assert "新的一段" in read_text_file(post_path)
+
+
+def test_front_matter_round_trip():
+    meta = {"title": "标题", "date": "2025-01-01", "tags": "a,b", "img": "x.jpg", "summary": "摘要",
+            "heading": "页眉", "alt": "", "banner": "img/x.jpg"}
+    text = format_front_matter(meta, "# 小标题\n正文\n---\n不是分隔符")
+    assert "图片说明：" not in text
+    parsed = parse_front_matter(text)
+    assert parsed["content"] == "# 小标题\n正文\n---\n不是分隔符"
+    assert {key: parsed[key] for key in meta} == meta
+
+
+def test_rebuild_site_keeps_page_markup(site):
+    engine = BlogEngine(site)
+    names = engine.list_posts()
+    before = {name: post_page_markup(read_text_file(os.path.join(engine.posts_dir, name))) for name in names}
+
+    engine.rebuild_site()
+    for name in names:
+        html = read_text_file(os.path.join(engine.posts_dir, name))
+        assert post_page_markup(html) == before[name], name
+        assert '<div class="post-tags">' in html
+
+    # 重建是幂等的，卡片指向真实存在的图片
+    assert engine.rebuild_site() == 0
+    cards = read_text_file(engine.posts_page)
+    assert "default.jpg" not in cards
+    for name in names:
+        assert f'href="posts/{name}"' in cards
+
+
+def test_corrupted_revision_history_does_not_abort_save(site):
+    engine = BlogEngine(site)
+    warnings = []
+    engine.warn = warnings.append
+    path = engine.publish_post("修订损坏", "2025-08-09", "技术", "摘要", "正文")
+    store = engine.revision_store()
+    revision = store.list(os.path.basename(path))[0]
+    with open(store.pack_path(os.path.basename(path)), "r+b") as f:
+        f.seek(revision.offset)
+        f.write(b"\xff" * revision.size)
+
+    engine.update_post(path, "修订损坏后改名", "新正文")
+    with open(engine.posts_page, encoding="utf-8") as f:
+        assert "修订损坏后改名" in f.read()
+    assert engine.load_catalog().get(os.path.basename(path))["title"] == "修订损坏后改名"
+    assert len(warnings) == 1 and "修订历史未能记录" in warnings[0]
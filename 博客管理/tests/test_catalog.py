@@ -0,0 +1,33 @@
+import glob
+import os
+
+from blog_engine import read_text_file
+from catalog import PostCatalog, scan_post
+from conftest import SITE_DIR
+
+
+def test_scan_post_existing_posts():
+    paths = sorted(glob.glob(os.path.join(SITE_DIR, "posts", "*.html")))
+    assert paths
+    for path in paths:
+        meta = scan_post(path, read_text_file)
+        assert meta["title"]
+        assert meta["date"]
+        # 现有文章的横幅写作 img/xxx.jpg（不带 ../），必须识别出真实存在的图片
+        assert meta["img"], path
+        assert os.path.exists(os.path.join(SITE_DIR, "img", meta["img"])), meta["img"]
+
+
+def test_scan_post_banner_forms(tmp_path):
+    for src in ("../img/a.jpg", "img/a.jpg"):
+        path = tmp_path / "p.html"
+        path.write_text(f'<main class="post-content">\n<img src="{src}" class="post-banner" />\n<p>正文</p></main>',
+                        encoding="utf-8")
+        assert scan_post(str(path), read_text_file)["img"] == "a.jpg"
+
+
+def test_rebuild_catalog_from_site(site):
+    catalog = PostCatalog.load(site, os.path.join(site, "posts"), read_text_file)
+    assert catalog.rebuilt
+    assert len(catalog.entries) == len(os.listdir(os.path.join(site, "posts")))
+    assert all(entry["img"] != "default.jpg" and entry["img"] for entry in catalog.entries.values())
@@ -0,0 +1,63 @@
+import os
+
+from css_usage import CssUsage, analyze_site, prune_css, prune_inline_styles
+from site_publish import collect_site_files
+
+CSS = """body { margin: 0; }
+.used, .unused { color: red; }
+
+.unused-only { color: blue; }
+#menu > li.active { color: green; }
+@media (max-width: 600px) {
+  .gone { display: none; }
+}
+@media print {
+  .card:hover { display: none; }
+}
+"""
+
+
+def test_usage_from_html_and_scripts():
+    usage = CssUsage(safelist=["from-cdn"])
+    usage.add_html('<ul id="menu"><li class="used card">x</li></ul><script>el.classList.add("active");</script>')
+    usage.add_script('document.getElementById("box"); el.innerHTML = `<span class="tpl ${x}">`;'
+                     'document.querySelector("nav .open"); document.createElement("dialog");')
+
+    assert {"used", "card", "active", "tpl", "open", "from-cdn"} <= usage.classes
+    assert {"menu", "box", "from-cdn"} <= usage.ids
+    assert {"ul", "li", "nav", "dialog"} <= usage.tags
+    assert usage.matches("#menu > li.active:hover")
+    assert usage.matches("a[href^='http']") is False
+    assert not usage.matches(".used .missing")
+
+
+def test_prune_css():
+    usage = CssUsage()
+    usage.add_html('<ul id="menu"><li class="used active card">x</li></ul>')
+    pruned, dead = prune_css(CSS, usage)
+
+    assert dead == [(2, ".unused"), (4, ".unused-only"), (7, ".gone")]
+    assert ".used { color: red; }" in pruned
+    assert ".unused" not in pruned and "max-width" not in pruned
+    assert "#menu > li.active" in pruned and "@media print" in pruned
+
+
+def test_inline_styles_and_report(tmp_path):
+    html = ('<html><head><style data-critical>.keep-critical { }</style>\n'
+            '<style>\n.used { }\n.dead { }\n</style></head><body class="used"></body></html>')
+    usage = CssUsage()
+    usage.add_html(html)
+    pruned, dead = prune_inline_styles(html, usage)
+    assert dead == [(4, ".dead")]
+    assert ".keep-critical" in pruned and ".dead" not in pruned
+
+    (tmp_path / "index.html").write_text(html, encoding="utf-8")
+    (tmp_path / "style.css").write_text(CSS, encoding="utf-8")
+    os.makedirs(tmp_path / "js")
+    (tmp_path / "js" / "main.js").write_text('el.classList.toggle("unused-only");', encoding="utf-8")
+    report = analyze_site(str(tmp_path), collect_site_files(str(tmp_path)))
+    files = {relative: dead for relative, _, _, dead in report.files}
+    assert files["index.html"] == [(4, ".dead")]
+    assert (4, ".unused-only") not in files["style.css"] and (2, ".unused") in files["style.css"]
+    assert report.dead_count == sum(len(dead) for dead in files.values())
+    assert "第 4 行：.dead" in "\n".join(report.format_dead())
@@ -0,0 +1,80 @@
+import os
+import threading
+
+import pytest
+
+from deploy_queue import QUEUE_FILENAME, RETRY_BASE, DeployQueue, commit_message
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    """创建防抖窗口很长的队列（测试中直接调用 flush），测试结束时停止计时"""
+    queues = []
+
+    def make(deploy, **kwargs):
+        queue = DeployQueue(str(tmp_path / QUEUE_FILENAME), deploy, delay=3600, **kwargs)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.stop()
+
+
+def test_commit_message():
+    assert commit_message([{"reason": "发布文章《甲》"}]) == "自动部署：发布文章《甲》"
+    message = commit_message([{"reason": "甲"}, {"reason": "乙"}, {"reason": "甲"}])
+    assert message == "自动部署：2 项更新\n\n- 甲\n- 乙"
+
+
+def test_batch_is_deployed_once_and_persisted(tmp_path, make_queue):
+    deployed = []
+    queue = make_queue(deployed.append)
+    queue.enqueue("发布文章《甲》")
+    queue.enqueue("编辑文章《乙》")
+    assert os.path.exists(tmp_path / QUEUE_FILENAME)
+
+    # 重启后从磁盘恢复未完成的队列
+    queue.stop()
+    queue = make_queue(deployed.append)
+    assert queue.pending == 2
+    queue.flush()
+    assert deployed == ["自动部署：2 项更新\n\n- 发布文章《甲》\n- 编辑文章《乙》"]
+    assert queue.pending == 0 and not os.path.exists(tmp_path / QUEUE_FILENAME)
+
+
+def test_failure_is_retried_with_backoff(make_queue, monkeypatch):
+    delays = []
+    monkeypatch.setattr(DeployQueue, "_schedule", lambda self, seconds: delays.append(seconds))
+    results = [Exception("网络错误"), Exception("网络错误"), None]
+
+    def deploy(message):
+        result = results.pop(0)
+        if result:
+            raise result
+
+    logs = []
+    queue = make_queue(deploy, log=lambda message, status=None: logs.append(status))
+    queue.enqueue("发布文章《甲》")
+    queue.flush()
+    queue.flush()
+    assert delays[1:] == [RETRY_BASE, RETRY_BASE * 2] and queue.attempts == 2
+
+    # 退避期间加入的变更不会提前触发部署
+    queue.enqueue("编辑文章《甲》")
+    assert len(delays) == 3
+    queue.flush()
+    assert queue.pending == 0 and queue.attempts == 0
+    assert logs.count("danger") == 2 and logs[-1] == "success"
+
+
+def test_flush_waits_for_manual_deploy(make_queue):
+    lock = threading.Lock()
+    deployed = []
+    queue = make_queue(deployed.append, lock=lock)
+    queue.enqueue("发布文章《甲》")
+    with lock:
+        queue.flush()
+    assert deployed == [] and queue.pending == 1
+    queue.flush()
+    assert len(deployed) == 1
@@ -0,0 +1,137 @@
+import heapq
+import json
+import os
+import random
+from urllib.parse import quote
+
+import pytest
+
+import catalog as catalog_module
+from blog_engine import BlogEngine, read_text_file
+from catalog import CATALOG_FILENAME, CHUNKS_DIRNAME, LATEST_SIZE, PostCatalog
+
+
+def brute_latest(catalog, limit):
+    entries = heapq.nlargest(limit, catalog.entries.values(), key=lambda e: (e.get("date", ""), e["seq"]))
+    return [entry["filename"] for entry in entries]
+
+
+def random_date(rng):
+    return f"20{rng.randint(15, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+
+def test_latest_is_maintained_incrementally(tmp_path, monkeypatch):
+    rng = random.Random(5)
+    catalog = PostCatalog(str(tmp_path / CATALOG_FILENAME))
+    for i in range(300):
+        catalog.put(f"p{i}.html", {"title": str(i), "date": random_date(rng)})
+    catalog.latest(20)
+
+    rescans = []
+    original = heapq.nlargest
+
+    class CountingHeapq:
+        @staticmethod
+        def nlargest(*args, **kwargs):
+            rescans.append(1)
+            return original(*args, **kwargs)
+
+    monkeypatch.setattr(catalog_module, "heapq", CountingHeapq)
+    for step in range(2000):
+        names = list(catalog.entries)
+        action = rng.random()
+        if action < 0.4:
+            catalog.put(f"new{step}.html", {"title": "新", "date": random_date(rng)})
+        elif action < 0.8:
+            catalog.put(rng.choice(names), {"date": random_date(rng)})
+        elif len(names) > 1:
+            catalog.remove(rng.choice(names))
+        assert [e["filename"] for e in catalog.latest(20)] == brute_latest(catalog, 20)
+    # 只有删除较多时才需要重新扫描
+    assert len(rescans) < 2000 // (LATEST_SIZE - 20)
+
+
+def test_save_writes_only_changed_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog_module, "CHUNK_SIZE", 10)
+    posts_dir = str(tmp_path / "posts")
+    catalog = PostCatalog.load(str(tmp_path), posts_dir, read_text_file)
+    for i in range(35):
+        catalog.put(f"p{i}.html", {"title": str(i), "date": "2025-01-01"})
+    catalog.save()
+    chunks_dir = tmp_path / CHUNKS_DIRNAME
+    assert sorted(os.listdir(chunks_dir)) == [f"chunk-{n}.json" for n in range(4)]
+    assert catalog.chunk_numbers() == [0, 1, 2, 3]
+    assert [e["filename"] for e in catalog.chunk_entries(3)] == ["p30.html", "p31.html", "p32.html", "p33.html",
+                                                                 "p34.html"]
+
+    before = {name: os.stat(chunks_dir / name).st_mtime_ns for name in os.listdir(chunks_dir)}
+    os.utime(chunks_dir / "chunk-0.json", ns=(1, 1))
+    os.utime(chunks_dir / "chunk-2.json", ns=(1, 1))
+    catalog.put("p15.html", {"title": "改"})
+    catalog.remove("p33.html")
+    catalog.save()
+    assert os.stat(chunks_dir / "chunk-0.json").st_mtime_ns == 1
+    assert os.stat(chunks_dir / "chunk-2.json").st_mtime_ns == 1
+    assert os.stat(chunks_dir / "chunk-1.json").st_mtime_ns >= before["chunk-1.json"]
+
+    loaded = PostCatalog.load(str(tmp_path), posts_dir, read_text_file)
+    assert loaded.entries == catalog.entries and loaded.next_seq == 35 and not loaded.rebuilt
+    assert loaded.latest(20) == catalog.latest(20)
+    assert loaded.is_current()
+
+
+def test_old_single_file_catalog_is_migrated(tmp_path):
+    entries = {"a.html": {"seq": 0, "filename": "a.html", "title": "甲", "date": "2025-01-02",
+                          "published": "2025-01-02T00:00:00+00:00", "updated": "2025-01-02T00:00:00+00:00"}}
+    with open(tmp_path / CATALOG_FILENAME, "w", encoding="utf-8") as f:
+        json.dump({"next_seq": 1, "entries": entries}, f)
+
+    catalog = PostCatalog.load(str(tmp_path), str(tmp_path / "posts"), read_text_file)
+    assert catalog.entries == entries and not catalog.rebuilt
+    catalog.save()
+    with open(tmp_path / CATALOG_FILENAME, encoding="utf-8") as f:
+        assert "entries" not in json.load(f)
+    assert PostCatalog.load(str(tmp_path), str(tmp_path / "posts"), read_text_file).entries == entries
+
+
+def test_feeds_need_absolute_site_url(site):
+    engine = BlogEngine(site)
+    engine.publish_post("没有站点地址", "2025-08-09", "技术", "摘要", "正文")
+    assert not os.path.exists(os.path.join(site, "feed.xml"))
+    assert not os.path.exists(os.path.join(site, "sitemap.xml"))
+
+    engine.save_settings({"site_url": "https://example.github.io/blog"})
+    engine.rebuild_generated()
+    path = engine.publish_post("有站点地址", "2030-01-01", "技术", "摘要", "正文")
+    with open(os.path.join(site, "feed.json"), encoding="utf-8") as f:
+        feed = json.load(f)
+    assert feed["items"][0]["url"] == "https://example.github.io/blog/posts/" + quote(os.path.basename(path))
+    with open(os.path.join(site, "sitemap.xml"), encoding="utf-8") as f:
+        assert "<loc>https://example.github.io/blog/sitemap-posts-0.xml</loc>" in f.read()
+
+
+def test_engine_reuses_catalog_until_changed_on_disk(site):
+    engine = BlogEngine(site)
+    engine.publish_post("第一篇", "2025-08-09", "技术", "摘要", "正文")
+    catalog = engine.load_catalog()
+    assert engine.load_catalog() is catalog
+
+    # 其他程序（例如 git pull）改写目录文件后重新读取
+    path = os.path.join(site, CATALOG_FILENAME)
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    reloaded = engine.load_catalog()
+    assert reloaded is not catalog and reloaded.entries == catalog.entries
+
+
+@pytest.mark.parametrize("limit", [1, 20, 80])
+def test_latest_after_load_matches_scan(tmp_path, limit):
+    rng = random.Random(limit)
+    catalog = PostCatalog(str(tmp_path / CATALOG_FILENAME))
+    for i in range(120):
+        catalog.put(f"p{i}.html", {"date": random_date(rng)})
+    catalog.save()
+    loaded = PostCatalog.load(str(tmp_path), str(tmp_path / "posts"), read_text_file)
+    assert [e["filename"] for e in loaded.latest(limit)] == brute_latest(loaded, limit)
@@ -0,0 +1,48 @@
+import queue
+import time
+
+import pytest
+
+from fs_watch import InotifyWatcher, PollingWatcher, create_watcher
+
+
+def start(root, backend, on_changes, on_error=None):
+    if backend == "polling":
+        watcher = PollingWatcher(root, on_changes, debounce=0.05, on_error=on_error, interval=0.05).start()
+    else:
+        watcher = create_watcher(root, on_changes, debounce=0.05, on_error=on_error)
+        if not isinstance(watcher, InotifyWatcher):
+            watcher.stop()
+            pytest.skip("inotify 不可用")
+    time.sleep(0.2)  # 等待轮询线程完成第一次扫描
+    return watcher
+
+
+@pytest.mark.parametrize("backend", ["inotify", "polling"])
+def test_changes_are_batched(tmp_path, backend):
+    (tmp_path / "posts").mkdir()
+    batches = queue.Queue()
+    watcher = start(str(tmp_path), backend, batches.put)
+    try:
+        (tmp_path / "posts" / "a.html").write_text("a", encoding="utf-8")
+        (tmp_path / "style.css").write_text("b", encoding="utf-8")
+        (tmp_path / ".hidden").write_text("c", encoding="utf-8")
+        changes = set()
+        while changes != {"posts/a.html", "style.css"}:
+            changes |= batches.get(timeout=5)
+            assert ".hidden" not in changes
+    finally:
+        watcher.stop()
+
+
+def test_callback_errors_go_to_on_error(tmp_path):
+    def fail(changes):
+        raise ValueError("出错了")
+
+    errors = queue.Queue()
+    watcher = start(str(tmp_path), "polling", fail, errors.put)
+    try:
+        (tmp_path / "style.css").write_text("b", encoding="utf-8")
+        assert isinstance(errors.get(timeout=5), ValueError)
+    finally:
+        watcher.stop()
@@ -0,0 +1,64 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from git_jobs import GitCancelled, GitJobRunner, GitTimeout
+
+SLEEP = [sys.executable, "-c", "import time; time.sleep(30)"]
+
+
+@pytest.fixture
+def runner():
+    runner = GitJobRunner()
+    yield runner
+    runner.shutdown()
+
+
+def test_jobs_run_in_order_and_stream_output(runner):
+    order = []
+    lines = []
+
+    def job(name):
+        order.append(name)
+        return runner.run([sys.executable, "-c", f"print('{name}')\nprint('完成')"], log=lines.append)
+
+    jobs = [runner.submit(name, job, name) for name in ("甲", "乙", "丙")]
+    assert [j.result(10) for j in jobs] == [(0, "甲\n完成"), (0, "乙\n完成"), (0, "丙\n完成")]
+    assert order == ["甲", "乙", "丙"]
+    assert lines == ["甲", "完成", "乙", "完成", "丙", "完成"]
+    assert not runner.busy
+
+
+def test_timeout_kills_command(runner):
+    started = time.monotonic()
+    job = runner.submit("超时", runner.run, SLEEP, timeout=0.5)
+    with pytest.raises(GitTimeout):
+        job.result(10)
+    assert time.monotonic() - started < 10
+
+
+def test_cancel_running_and_queued_jobs(runner):
+    errors = []
+    done = threading.Event()
+    runner.default_error = lambda name, error: (errors.append((name, error)), done.set())
+
+    running = runner.submit("运行中", runner.run, SLEEP)
+    queued = runner.submit("排队中", runner.run, SLEEP)
+    deadline = time.monotonic() + 10
+    while (runner.current is not running or running._command is None) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    runner.cancel_all()
+    with pytest.raises(GitCancelled):
+        running.result(10)
+    with pytest.raises(GitCancelled):
+        queued.result(10)
+    # 主动取消的任务不经过 default_error
+    assert errors == []
+
+    failed = runner.submit("失败", runner.run, [sys.executable, "-c", "raise SystemExit(3)"])
+    assert failed.result(10)[0] == 3
+    runner.submit("出错", lambda: 1 / 0)
+    assert done.wait(10)
+    assert errors[0][0] == "出错" and isinstance(errors[0][1], ZeroDivisionError)
@@ -0,0 +1,114 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from git_status import STATUS_ARGS, parse_porcelain_v2
+
+
+def test_parse_records():
+    output = "\0".join([
+        "# branch.oid 1234567890abcdef1234567890abcdef12345678",
+        "# branch.head main",
+        "# branch.upstream origin/main",
+        "# branch.ab +2 -1",
+        "1 M. N... 100644 100644 100644 aaaa bbbb index.html",
+        "1 .M N... 100644 100644 100644 aaaa aaaa posts/带 空格.html",
+        "2 R. N... 100644 100644 100644 aaaa aaaa R100 posts/新.html",
+        "posts/旧.html",
+        "2 .R N... 100644 100644 100644 aaaa aaaa R100 img/b.jpg",
+        "img/a.jpg",
+        "u UU N... 100644 100644 100644 100644 aaaa bbbb cccc style.css",
+        "? drafts/草稿.md",
+        "",
+    ])
+    status = parse_porcelain_v2(output)
+
+    assert status.oid.startswith("1234567")
+    assert (status.branch, status.upstream, status.ahead, status.behind) == ("main", "origin/main", 2, 1)
+    assert status.staged == [("M", "index.html", None), ("R", "posts/新.html", "posts/旧.html")]
+    assert status.modified == [("M", "posts/带 空格.html", None), ("R", "img/b.jpg", "img/a.jpg")]
+    assert status.unmerged == [("UU", "style.css")]
+    assert status.untracked == ["drafts/草稿.md"]
+    assert not status.clean
+
+
+def test_parse_initial_and_detached():
+    status = parse_porcelain_v2("# branch.oid (initial)\0# branch.head (detached)\0")
+    assert status.oid is None and status.branch is None and status.upstream is None
+    assert status.clean
+    assert "分离的 HEAD" in status.summary() and "工作区干净" in status.summary()
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="需要 git")
+def test_parse_real_repository(tmp_path):
+    def git(*args):
+        return subprocess.run(
+            ["git", "-c", "user.name=测试", "-c", "user.email=test@example.com", *args],
+            cwd=tmp_path, check=True, capture_output=True, text=True, encoding="utf-8"
+        ).stdout
+
+    git("init", "-q", "-b", "main")
+    for name in ("index.html", "旧名.html", "style.css"):
+        (tmp_path / name).write_text(name, encoding="utf-8")
+    git("add", ".")
+    git("commit", "-q", "-m", "初始")
+
+    (tmp_path / "index.html").write_text("修改", encoding="utf-8")
+    git("mv", "旧名.html", "新 名.html")
+    os.remove(tmp_path / "style.css")
+    (tmp_path / "新文章.html").write_text("新", encoding="utf-8")
+
+    status = parse_porcelain_v2(git(*STATUS_ARGS))
+    assert status.branch == "main" and status.upstream is None
+    assert status.staged == [("R", "新 名.html", "旧名.html")]
+    assert sorted(status.modified) == [("D", "style.css", None), ("M", "index.html", None)]
+    assert status.untracked == ["新文章.html"]
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="需要 git")
+def test_status_cache(tmp_path, monkeypatch):
+    from blog_engine import BlogEngine
+
+    subprocess.run(["git", "init", "-q", "-b", "main"], cwd=tmp_path, check=True)
+    engine = BlogEngine(str(tmp_path))
+    runs = []
+    git = engine.git
+
+    def counting_git(args, *rest, **kwargs):
+        if args == STATUS_ARGS:
+            runs.append(1)
+        return git(args, *rest, **kwargs)
+
+    monkeypatch.setattr(engine, "git", counting_git)
+
+    # 没有文件监视器覆盖的仓库每次都执行 git status
+    engine.repo_status()
+    engine.repo_status()
+    assert len(runs) == 2
+
+    engine.status_watch_root = str(tmp_path)
+    engine.repo_status()
+    assert engine.repo_status().clean and len(runs) == 3
+
+    (tmp_path / "新文章.html").write_text("新", encoding="utf-8")
+    engine.invalidate_status()
+    assert engine.repo_status().untracked == ["新文章.html"] and len(runs) == 4
+
+    # git 操作改变索引时不需要通知
+    subprocess.run(["git", "add", "."], cwd=tmp_path, check=True)
+    assert engine.repo_status().staged and len(runs) == 5
+
+    # 执行 git status 期间收到的变化通知使本次结果不被缓存
+    def racing_git(args, *rest, **kwargs):
+        result = counting_git(args, *rest, **kwargs)
+        if args == STATUS_ARGS:
+            engine.invalidate_status()
+        return result
+
+    monkeypatch.setattr(engine, "git", racing_git)
+    engine.invalidate_status()
+    engine.repo_status()
+    engine.repo_status()
+    assert len(runs) == 7
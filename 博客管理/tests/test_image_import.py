@@ -0,0 +1,53 @@
+import os
+import random
+
+import pytest
+
+from image_import import MAX_IMAGE_SIZE, copy_image, import_images, load_index
+
+
+def write_bytes(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def test_import_deduplicates(tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    img_dir = str(tmp_path / "img")
+    a = write_bytes(source / "a b.gif", b"GIF89a-a")
+    write_bytes(source / "copy.gif", b"GIF89a-a")
+    other = source / "other"
+    other.mkdir()
+    write_bytes(other / "a b.gif", b"GIF89a-b")
+
+    result = import_images(img_dir, [str(source)], optimize=False)
+    assert result.copied == 2 and result.duplicates == 1 and not result.failed
+    assert result.images[0] == "a-b.gif" and result.images[1].startswith("a-b-")
+
+    # 再次导入同一张图片时识别为重复
+    again = import_images(img_dir, [a], optimize=False)
+    assert again.copied == 0 and again.images == ["a-b.gif"]
+    assert set(load_index(img_dir)) == set(result.images)
+
+
+@pytest.mark.parametrize("ext", [".png", ".webp", ".bmp", ".jpg"])
+def test_resize_large_image(tmp_path, ext):
+    Image = pytest.importorskip("PIL.Image")
+    rng = random.Random(1)
+    width, height = MAX_IMAGE_SIZE + 600, 300
+    image = Image.new("RGB", (width, height))
+    image.putdata([(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(width * height)])
+    source = str(tmp_path / f"photo{ext}")
+    image.save(source)
+
+    dest = str(tmp_path / f"out{ext}")
+    thumb = str(tmp_path / f"thumb{ext}")
+    assert copy_image(source, dest, thumb)
+    assert not os.path.exists(dest + ".tmp")
+    with Image.open(dest) as result, Image.open(source) as original:
+        assert result.format == original.format
+        assert max(result.size) <= max(original.size)
+    with Image.open(thumb) as result:
+        assert max(result.size) <= 400
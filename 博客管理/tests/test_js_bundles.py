@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from blog_engine import BlogEngine
+from js_bundles import BUNDLES_FILENAME, BundleError, build_bundles, inject_bundle, minify_js, resolve_order, restore_scripts
+
+
+def write_js(js_dir, name, code):
+    os.makedirs(js_dir, exist_ok=True)
+    with open(os.path.join(js_dir, name), "w", encoding="utf-8") as f:
+        f.write(code)
+
+
+def test_minify_keeps_literals():
+    code = (
+        "// 说明\n"
+        "/*! 版权 */\n"
+        'const a = "a    b";   /* 行内 */  let b = \'c  d\';\n'
+        "\n\n"
+        "const t = `第一行\n    缩进\n\n  空行后`;\n"
+        "    if (x   /   2 > 1) {   y = /a  b/g.test(s) }   \n"
+    )
+    assert minify_js(code) == (
+        "/*! 版权 */\n"
+        'const a = "a    b"; let b = \'c  d\';\n'
+        "const t = `第一行\n    缩进\n\n  空行后`;\n"
+        "if (x / 2 > 1) { y = /a  b/g.test(s) }\n"
+    )
+    assert minify_js("  \n\n") == "\n"
+
+
+def test_resolve_order(tmp_path):
+    js_dir = str(tmp_path)
+    write_js(js_dir, "main.js", "// @requires util.js, theme.js\nmain();\n")
+    write_js(js_dir, "theme.js", "// @requires util.js\ntheme();\n")
+    write_js(js_dir, "util.js", "util();\n")
+    assert resolve_order(js_dir, ["main.js"]) == ["util.js", "theme.js", "main.js"]
+
+    write_js(js_dir, "util.js", "// @requires main.js\n")
+    with pytest.raises(BundleError, match="循环依赖"):
+        resolve_order(js_dir, ["main.js"])
+    with pytest.raises(BundleError, match="找不到脚本"):
+        resolve_order(js_dir, ["missing.js"])
+
+
+def test_build_and_inject(tmp_path):
+    blog_dir = str(tmp_path)
+    js_dir = os.path.join(blog_dir, "js")
+    write_js(js_dir, "main.js", "main();\n")
+
+    built, changed = build_bundles(blog_dir, js_dir)
+    assert set(built) == {"post", "posts", "archive", "other"} and changed == set(built)
+    assert len({item["file"] for item in built.values()}) == 1
+    assert build_bundles(blog_dir, js_dir)[1] == set()
+
+    html = '<body>\n  <script src="../js/main.js"></script>\n</body>'
+    injected = inject_bundle(html, built["post"], "../")
+    assert f'src="../js/{built["post"]["file"]}" defer data-bundle="main.js"' in injected
+    assert restore_scripts(injected, "../") == html
+
+    # 后面还有内联脚本时不加 defer
+    html = '<script src="js/main.js"></script>\n<script>init();</script>'
+    assert " defer" not in inject_bundle(html, built["other"], "")
+
+
+def test_deploy_hands_bundling_to_bundler(site):
+    class Runner:
+        def run(self, command, cwd, log):
+            return 0, ""
+
+    engine = BlogEngine(site)
+    engine.runner = Runner()
+    with open(os.path.join(site, BUNDLES_FILENAME), "w", encoding="utf-8") as f:
+        f.write("{}")
+    calls = []
+    engine.deploy("更新", "git@example.com:blog.git", bundler=calls.append, log=print)
+    assert calls == [print]
+    assert not os.path.exists(os.path.join(site, "js", "dist"))
@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from large_file import MappedFile
+
+
+def write(path, text, encoding="utf-8"):
+    with open(path, "w", encoding=encoding, newline="") as f:
+        f.write(text)
+
+
+def check(mapped, path, expected):
+    """文件内容、映射和增量维护的行偏移与重新扫描的结果一致"""
+    with open(path, "rb") as f:
+        assert f.read() == expected.encode(mapped.encoding)
+    assert mapped.size == len(expected.encode(mapped.encoding))
+    assert list(mapped.offsets) == list(mapped._build_offsets())
+    assert mapped.read_lines(0, mapped.line_count) == expected
+
+
+def test_replace_lines_matches_full_reindex(tmp_path):
+    path = str(tmp_path / "big.css")
+    rng = random.Random(1)
+    lines = [f"行 {i} " + "x" * rng.randrange(0, 40) + "\n" for i in range(500)]
+    write(path, "".join(lines))
+    mapped = MappedFile(path)
+    try:
+        for _ in range(200):
+            start = rng.randrange(0, mapped.line_count)
+            end = min(start + rng.randrange(0, 30), mapped.line_count)
+            new = "".join(f"新{rng.random():.3f}\n" for _ in range(rng.randrange(0, 40)))
+            current = mapped.read_lines(0, mapped.line_count)
+            current_lines = current.splitlines(keepends=True)
+            if current.endswith("\n") or not current:
+                current_lines.append("")
+            expected = "".join(current_lines[:start]) + new + "".join(current_lines[end:])
+            mapped.replace_lines(start, end, new)
+            check(mapped, path, expected)
+    finally:
+        mapped.close()
+
+
+def test_replace_lines_empty_file(tmp_path):
+    path = str(tmp_path / "page.html")
+    write(path, "a\nb\n")
+    mapped = MappedFile(path)
+    try:
+        mapped.replace_lines(0, mapped.line_count, "")
+        check(mapped, path, "")
+        assert mapped.find("a") is None
+
+        # 清空之后再次编辑
+        mapped.replace_lines(0, mapped.line_count, "第一行\n第二行")
+        check(mapped, path, "第一行\n第二行")
+        assert mapped.find("第二行") == (1, 0)
+    finally:
+        mapped.close()
+
+
+def test_gbk_file(tmp_path):
+    path = str(tmp_path / "gbk.html")
+    write(path, "中文\n内容\n", "gbk")
+    mapped = MappedFile(path)
+    try:
+        assert mapped.encoding == "gbk"
+        mapped.replace_lines(1, 2, "修改\n")
+        check(mapped, path, "中文\n修改\n")
+    finally:
+        mapped.close()
+
+
+def test_read_only_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "ro.css")
+    write(path, "a\nb\n")
+
+    # 模拟没有写权限（root 用户不受文件权限限制，不能用 chmod）
+    real_open = open
+
+    def open_read_only(file, mode="r", *args, **kwargs):
+        if file == path and "+" in mode:
+            raise PermissionError(13, "Permission denied", file)
+        return real_open(file, mode, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", open_read_only)
+    mapped = MappedFile(path)
+    try:
+        assert mapped.read_only
+        assert mapped.read_lines(0, 2) == "a\nb\n"
+        with pytest.raises(PermissionError):
+            mapped.replace_lines(0, 1, "c\n")
+    finally:
+        mapped.close()
@@ -0,0 +1,83 @@
+import os
+
+from blog_engine import BlogEngine, read_text_file
+from legacy_import import parse_cards, parse_post
+
+CONTENT_DIV = """<!DOCTYPE html>
+<html><head><title>旧版工具的文章</title></head>
+<body>
+  <h1>旧版工具的文章</h1>
+  <p>发布于 2024年3月5日</p>
+  <div class="content">
+    <p>第一段正文。</p>
+  </div>
+</body></html>
+"""
+
+HANDWRITTEN = """<html><head><title>手写页面</title></head>
+<body>
+  <header><nav>导航</nav></header>
+  <article>
+    <h1>手写页面</h1>
+    <p>2023.11.02</p>
+    <p>这是<b>手写</b>的正文。</p>
+    <img src="../img/手写.png">
+  </article>
+  <footer>页脚</footer>
+</body></html>
+"""
+
+
+def write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_parse_formats(tmp_path):
+    write(tmp_path / "a.html", CONTENT_DIV)
+    write(tmp_path / "b.html", HANDWRITTEN)
+    write(tmp_path / "c.html", "<html><body><p>没有日期</p></body></html>")
+
+    post = parse_post(str(tmp_path / "a.html"))
+    assert (post["format"], post["title"], post["date"]) == ("content-div", "旧版工具的文章", "2024-03-05")
+    assert post["summary"] == "第一段正文。" and post["simple"]
+
+    post = parse_post(str(tmp_path / "b.html"))
+    assert (post["format"], post["title"], post["date"], post["img"]) == ("handwritten", "手写页面", "2023-11-02", "手写.png")
+    assert "导航" not in post["body"] and "页脚" not in post["body"] and not post["simple"]
+
+    post = parse_post(str(tmp_path / "c.html"))
+    assert post["problems"] == ["页面中没有日期，使用文件修改时间"]
+
+
+def test_import_reconciles_cards(site):
+    engine = BlogEngine(site)
+    path = engine.publish_post("已有卡片", "2025-08-10", "技术", "卡片上的摘要", "正文")
+    filename = os.path.basename(path)
+    write(os.path.join(site, "posts", "旧版.html"), CONTENT_DIV)
+
+    # 指向不存在文章的卡片和重复的卡片
+    html = read_text_file(engine.posts_page)
+    card = parse_cards(html)[filename]
+    duplicate = html[card["span"][0]:card["span"][1]]
+    orphan = duplicate.replace(filename, "不存在.html")
+    write(engine.posts_page, html.replace("</main>", duplicate + orphan + "\n</main>"))
+
+    result = engine.scan_legacy_posts()
+    assert result.orphan_cards == ["不存在.html"]
+    assert "旧版.html" in result.missing_cards and filename not in result.missing_cards
+    assert "1 张卡片指向不存在的文章" in result.summary()
+
+    result = engine.import_legacy_posts()
+    assert result.applied["cards_removed"] == 1 and result.applied["cards_added"] == len(result.missing_cards)
+    cards = parse_cards(read_text_file(engine.posts_page))
+    assert set(cards) == set(engine.list_posts())
+    assert all(not card["duplicates"] for card in cards.values())
+    assert cards[filename]["summary"] == "卡片上的摘要"
+    catalog = engine.load_catalog()
+    assert catalog.get("旧版.html")["date"] == "2024-03-05"
+    # 能无损转换的旧文章补写了源文件，可以直接编辑
+    assert os.path.exists(engine.source_path(os.path.join(site, "posts", "旧版.html")))
+
+    # 再次导入不再有改动
+    assert engine.scan_legacy_posts().missing_cards == [] and engine.scan_legacy_posts().orphan_cards == []
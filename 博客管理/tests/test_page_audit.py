@@ -0,0 +1,34 @@
+import os
+
+from page_audit import audit_site
+
+
+def test_audit_only_published_pages(site):
+    tool_dir = os.path.join(site, "博客管理", "posts")
+    os.makedirs(tool_dir)
+    with open(os.path.join(tool_dir, "你好.html"), "w", encoding="utf-8") as f:
+        f.write("<p>" + "很重的页面" * 200000 + "</p>")
+    with open(os.path.join(site, "about.html"), "a", encoding="utf-8") as f:
+        f.write('<img src="博客管理/logo.png">')
+    with open(os.path.join(site, "博客管理", "logo.png"), "wb") as f:
+        f.write(b"\0" * 1024)
+
+    report = audit_site(site)
+    pages = {os.path.relpath(audit.page, site).replace(os.sep, "/"): audit for audit in report.pages}
+    assert "index.html" in pages
+    assert not any(page.startswith("博客管理/") for page in pages)
+    assert "博客管理" not in report.summary()
+    # 不会发布的文件不计入页面大小
+    assert "博客管理/logo.png" in pages["about.html"].missing
+
+
+def test_missing_resources_are_reported(site):
+    before = len(audit_site(site).missing)
+    with open(os.path.join(site, "about.html"), "a", encoding="utf-8") as f:
+        f.write('<img src="img/不存在.png"><script src="js/不存在.js"></script>')
+
+    report = audit_site(site)
+    assert f"{before + 2} 个本地资源找不到" in report.summary()
+    problems = report.format_problems()
+    assert "about.html：找不到资源 img/不存在.png" in problems
+    assert "about.html：找不到资源 js/不存在.js" in problems
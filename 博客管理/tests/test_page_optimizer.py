@@ -0,0 +1,86 @@
+import os
+
+from blog_engine import BlogEngine
+from page_optimizer import PageOptimizer, parse_attrs, restore_page
+from site_publish import collect_site_files, sync_tree
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="UTF-8" />
+  <link rel="stylesheet" href="style.css" integrity="sha384-abc" crossorigin="anonymous" />
+  <link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Inter" crossorigin>
+</head>
+<body>
+  <h1 class="title">你好</h1>
+  <script src="js/main.js"></script>
+</body>
+</html>
+"""
+
+
+def write_site(root):
+    with open(os.path.join(root, "index.html"), "w", encoding="utf-8") as f:
+        f.write(PAGE)
+    with open(os.path.join(root, "style.css"), "w", encoding="utf-8") as f:
+        f.write(".title { color: red; }\n.footer { color: blue; }\n")
+    os.makedirs(os.path.join(root, "js"))
+    with open(os.path.join(root, "js", "main.js"), "w", encoding="utf-8") as f:
+        f.write("console.log(1);\n")
+    return os.path.join(root, "index.html")
+
+
+def stylesheet_links(html):
+    import re
+    return [parse_attrs(match.group(1)) for match in re.finditer(r"<link\b([^>]*)>", html)
+            if "stylesheet" in parse_attrs(match.group(1)).get("rel", "")]
+
+
+def test_restore_keeps_original_attributes(tmp_path):
+    page = write_site(str(tmp_path))
+    optimized = PageOptimizer(str(tmp_path)).optimize(page, PAGE)
+
+    assert "<style data-critical>.title{color:red}</style>" in optimized
+    preload = [attrs for attrs in map(parse_attrs, optimized.split("<link")[1:]) if attrs.get("as") == "style"]
+    assert preload[0]["integrity"] == "sha384-abc" and preload[0]["crossorigin"] == "anonymous"
+    assert 'src="js/main.js" defer data-optimized' in optimized
+
+    restored = restore_page(optimized)
+    assert "defer" not in restored and "data-optimized" not in restored
+    assert stylesheet_links(restored) == stylesheet_links(PAGE)
+
+    # 重复优化结果不变
+    assert PageOptimizer(str(tmp_path)).optimize(page, optimized) == optimized
+
+
+def test_source_deploy_does_not_rewrite_pages(tmp_path):
+    write_site(str(tmp_path))
+    before = {path: open(path, "rb").read() for path in collect_site_files(str(tmp_path)).values()}
+
+    class Runner:
+        def run(self, command, cwd, log):
+            return 0, ""
+
+    engine = BlogEngine(str(tmp_path))
+    engine.runner = Runner()
+    lines = []
+    engine.deploy("更新", "git@example.com:blog.git", optimize=True, log=lines.append)
+
+    assert {path: open(path, "rb").read() for path in before} == before
+    assert any("已跳过" in line for line in lines)
+
+
+def test_publish_optimizes_only_the_copy(tmp_path):
+    blog, worktree = tmp_path / "blog", tmp_path / "publish"
+    blog.mkdir()
+    worktree.mkdir()
+    write_site(str(blog))
+
+    engine = BlogEngine(str(blog))
+    files = collect_site_files(str(blog))
+    sync_tree(files, str(worktree), engine.publish_transform(str(blog), files, optimize=True))
+
+    with open(blog / "index.html", encoding="utf-8") as f:
+        assert f.read() == PAGE
+    with open(worktree / "index.html", encoding="utf-8") as f:
+        assert "data-critical" in f.read()
@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from revisions import SNAPSHOT_INTERVAL, RevisionError, RevisionStore
+
+
+def random_versions(count, seed=7):
+    rng = random.Random(seed)
+    lines = [f"<p>第 {i} 段</p>\n" for i in range(200)]
+    versions = []
+    for _ in range(count):
+        for _ in range(rng.randint(1, 5)):
+            i = rng.randrange(len(lines))
+            action = rng.choice(("edit", "insert", "delete"))
+            if action == "edit":
+                lines[i] = f"<p>修改 {rng.random()}</p>\n"
+            elif action == "insert":
+                lines.insert(i, f"<p>新增 {rng.random()}</p>\n")
+            elif len(lines) > 1:
+                del lines[i]
+        versions.append("".join(lines))
+    return versions
+
+
+def test_round_trip(tmp_path):
+    store = RevisionStore(str(tmp_path / ".revisions"))
+    versions = random_versions(SNAPSHOT_INTERVAL * 2 + 5)
+    for index, text in enumerate(versions, 1):
+        assert store.record("文章", text, f"第 {index} 次保存") == index
+    # 与最新修订相同时不记录
+    assert store.record("文章", versions[-1]) is None
+
+    revisions = store.list("文章")
+    assert len(revisions) == len(versions)
+    assert [r.number for r in revisions if r.is_snapshot] == [1, SNAPSHOT_INTERVAL + 1, SNAPSHOT_INTERVAL * 2 + 1]
+    assert revisions[4].message == "第 5 次保存"
+    for number, text in enumerate(versions, 1):
+        assert store.get("文章", number, revisions) == text
+    assert store.get("文章") == versions[-1]
+    assert store.names() == ["文章"]
+
+    diff = store.diff("文章", 1, 2)
+    assert diff[:2] == ["--- #1", "+++ #2"]
+    assert any(line.startswith("+") for line in diff[2:])
+
+
+def test_interrupted_write_is_discarded(tmp_path):
+    store = RevisionStore(str(tmp_path))
+    store.record("文章", "第一版\n")
+    store.record("文章", "第一版\n第二版\n")
+    with open(store.pack_path("文章"), "ab") as f:
+        f.write(b"\x40\x00\x00\x00partial")
+
+    assert len(store.list("文章")) == 2
+    assert store.record("文章", "第三版\n") == 3
+    assert [store.get("文章", n) for n in (1, 2, 3)] == ["第一版\n", "第一版\n第二版\n", "第三版\n"]
+
+
+def test_corrupted_revision(tmp_path):
+    store = RevisionStore(str(tmp_path))
+    store.record("文章", "原文\n" * 50)
+    revision = store.list("文章")[0]
+    with open(store.pack_path("文章"), "r+b") as f:
+        f.seek(revision.offset + revision.size - 1)
+        last = f.read(1)
+        f.seek(-1, 1)
+        f.write(bytes([last[0] ^ 0xFF]))
+
+    with pytest.raises(RevisionError, match="损坏"):
+        store.get("文章")
+    with pytest.raises(RevisionError):
+        store.get("文章", 2)
+    with pytest.raises(RevisionError):
+        store.get("没有的文章")
@@ -0,0 +1,64 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from blog_engine import BlogEngine
+from site_publish import collect_site_files
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="需要 git")
+
+
+def git(cwd, *args):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True, encoding="utf-8").stdout
+
+
+@pytest.fixture
+def repo(site, tmp_path, monkeypatch):
+    """提交过一次的博客仓库和作为 origin 的本地裸仓库，返回 (博客目录, 裸仓库路径)"""
+    for name, value in (("NAME", "测试"), ("EMAIL", "test@example.com")):
+        monkeypatch.setenv(f"GIT_AUTHOR_{name}", value)
+        monkeypatch.setenv(f"GIT_COMMITTER_{name}", value)
+    remote = str(tmp_path / "remote.git")
+    git(tmp_path, "init", "-q", "--bare", remote)
+
+    # 不属于站点的源文件和管理工具
+    for relative in ("drafts/草稿.md", "sources/你好.md", "博客管理/blog_manager.py", "启动.bat", "README.md"):
+        path = os.path.join(site, *relative.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(relative)
+    git(site, "init", "-q", "-b", "main")
+    git(site, "add", "-A")
+    git(site, "commit", "-q", "-m", "源文件")
+    return site, remote
+
+
+def published_files(remote, branch="gh-pages"):
+    return set(git(remote, "ls-tree", "-r", "-z", "--name-only", branch).split("\0")) - {""}
+
+
+def test_publish_only_site_files(repo):
+    blog_dir, remote = repo
+    engine = BlogEngine(blog_dir)
+    engine.publish_site("发布", remote)
+
+    files = published_files(remote)
+    assert files == set(collect_site_files(blog_dir)) | {".nojekyll"}
+    assert "index.html" in files and any(name.startswith("posts/") for name in files)
+    assert not any(name.startswith(("drafts/", "sources/", "博客管理/")) for name in files)
+    assert "启动.bat" not in files and "README.md" not in files
+    # 源分支不受影响
+    assert git(blog_dir, "rev-parse", "--abbrev-ref", "HEAD").strip() == "main"
+
+    # 没有变化时不产生新提交
+    head = git(remote, "rev-parse", "gh-pages")
+    engine.publish_site("再次发布", remote)
+    assert git(remote, "rev-parse", "gh-pages") == head
+
+    # 删除的站点文件也从发布分支中删除
+    os.remove(os.path.join(blog_dir, "guestbook.html"))
+    engine.publish_site("删除留言板", remote)
+    assert git(remote, "rev-parse", "gh-pages") != head
+    assert files - published_files(remote) == {"guestbook.html"}
@@ -0,0 +1,21 @@
+import os
+
+from site_validator import collect_html_files, validate_site
+
+
+def test_only_published_pages_are_checked(site):
+    # 管理工具目录和草稿中的页面不属于站点
+    for directory in ("博客管理/posts", "drafts"):
+        os.makedirs(os.path.join(site, directory))
+        with open(os.path.join(site, directory, "你好.html"), "w", encoding="utf-8") as f:
+            f.write('<a href="missing.html">坏链接</a>')
+
+    pages = collect_html_files(site)
+    relative = {os.path.relpath(page, site).replace(os.sep, "/") for page in pages}
+    assert "index.html" in relative
+    assert {"posts/" + name for name in os.listdir(os.path.join(site, "posts"))} <= relative
+    assert not any(path.startswith(("博客管理/", "drafts/")) for path in relative)
+
+    report = validate_site(site)
+    assert report.pages == len(pages)
+    assert not any(url == "missing.html" for _, _, _, url, _ in report.broken)
@@ -0,0 +1,105 @@
+import random
+
+from syntax_highlight import INITIAL_STATES, IncrementalTokenizer, tokenize_line
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+  <style>
+    body { color: #333; margin: 0 auto; }
+    /* 跨行
+       注释 */
+    .post-card:hover { transform: scale(1.02); }
+  </style>
+</head>
+<body class="main">
+  <!-- 页面
+       注释 -->
+  <h1 title='标题'>你好</h1>
+  <script>
+    const text = `模板
+      字符串`;
+    if (count > 0) { return "完成"; }
+  </script>
+</body>
+</html>
+"""
+
+
+def full_tokens(lines, language="html"):
+    state = INITIAL_STATES[language]
+    result = []
+    for line in lines:
+        tokens, state = tokenize_line(line, state)
+        result.append(tokens)
+    return result
+
+
+def kinds(line, state):
+    tokens, end = tokenize_line(line, state)
+    return [(kind, line[start:stop]) for kind, start, stop in tokens], end
+
+
+def test_tokenize_languages():
+    tokens, state = kinds('<a href="x.html">链接</a>', INITIAL_STATES["html"])
+    assert ("tag", "<a") in tokens and ("attribute", "href") in tokens and ("string", '"x.html"') in tokens
+    assert state == INITIAL_STATES["html"]
+
+    tokens, _ = kinds("const n = 42; // 说明", INITIAL_STATES["js"])
+    assert ("keyword", "const") in tokens and ("number", "42") in tokens and ("comment", "// 说明") in tokens
+
+    # 跨行注释的状态延续到下一行
+    _, state = kinds("a { color: red; } /* 开始", INITIAL_STATES["css"])
+    tokens, state = kinds("结束 */ b { }", state)
+    assert tokens[0] == ("comment", "结束 */")
+    assert state == INITIAL_STATES["css"]
+
+
+def test_embedded_style_and_script():
+    lines = PAGE.splitlines()
+    state = INITIAL_STATES["html"]
+    modes = []
+    for line in lines:
+        _, state = tokenize_line(line, state)
+        modes.append(state[1])
+    assert modes[lines.index("  <style>")] == "css"
+    assert modes[lines.index("  </style>")] == "html"
+    assert modes[lines.index("  <script>")] == "js"
+    assert state == INITIAL_STATES["html"]
+
+
+def test_incremental_matches_full_tokenize():
+    rng = random.Random(3)
+    lines = PAGE.splitlines()
+    tokenizer = IncrementalTokenizer("html")
+    tokenizer.reset(len(lines))
+    tokenizer.update(1, len(lines), lambda n: lines[n - 1])
+    assert tokenizer.tokens == full_tokens(lines)
+
+    snippets = ["/*", "*/", "<!--", "-->", "`", "<script>", "</script>", "<style>", "</style>", '"', "x", ""]
+    for _ in range(300):
+        line = rng.randint(1, len(lines))
+        action = rng.choice(("edit", "insert", "delete"))
+        if action == "edit":
+            text = lines[line - 1]
+            column = rng.randint(0, len(text))
+            lines[line - 1] = text[:column] + rng.choice(snippets) + text[column:]
+            tokenizer.lines_changed(line, 0)
+        elif action == "insert":
+            lines.insert(line, rng.choice(snippets))
+            tokenizer.lines_changed(line, 1)
+        elif len(lines) > 1 and line < len(lines):
+            lines[line - 1] += lines.pop(line)
+            tokenizer.lines_changed(line, -1)
+        else:
+            continue
+
+        # 只更新可见区域时，区域内的记号也必须和完整分词一致
+        first = rng.randint(1, len(lines))
+        last = min(len(lines), first + 10)
+        tokenizer.update(first, last, lambda n: lines[n - 1])
+        expected = full_tokens(lines)
+        assert tokenizer.tokens[first - 1:last] == expected[first - 1:last]
+
+    tokenizer.update(1, len(lines), lambda n: lines[n - 1])
+    assert tokenizer.tokens == full_tokens(lines)